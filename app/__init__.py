@@ -2,7 +2,8 @@ from quart import Quart, request
 from quart_cors import cors
 from app.routes import register_blueprints
 from app.utils.keep_alive import keep_db_alive  # ✅ this still works
-from app.database import SessionLocal
+from app.utils.activity_sink import activity_sink
+from app.database import SessionLocal, async_engine
 from sqlalchemy import text
 import asyncio
 import sentry_sdk
@@ -87,6 +88,13 @@ def create_app():
     async def startup():
         await warmup_db()
         app.add_background_task(keep_db_alive)
+        activity_sink.start()
         logger.info("PathSix CRM backend started successfully")
 
+    # Write buffered activity, then release pooled async DB connections so the process can exit cleanly
+    @app.after_serving
+    async def shutdown():
+        await activity_sink.stop()
+        await async_engine.dispose()
+
     return app
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.config import SQLALCHEMY_DATABASE_URI, SLOW_QUERY_THRESHOLD_MS
 import os
 import logging
@@ -37,4 +39,70 @@ def receive_after_cursor_execute(conn, cursor, statement, parameters, context, e
     _log_slow_query(conn, cursor, statement, parameters, context, executemany)
 
 SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False))
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+# ============================================================================
+# ASYNC ENGINE
+# ============================================================================
+# Route handlers are async, so queries made through SessionLocal block the
+# event loop for their full duration. AsyncSessionLocal runs the same models
+# over asyncpg (PostgreSQL) or aiosqlite (local SQLite) instead.
+#
+# Usage in a handler:
+#     session = AsyncSessionLocal()
+#     try:
+#         rows = (await session.execute(select(Lead).where(...))).scalars().all()
+#     finally:
+#         await session.close()
+#
+# Handlers built on sync Query helpers (the list endpoints, with paginate()
+# and TotalCounter) run them through session.run_sync(fn, ...): fn gets a
+# regular Session whose queries still go over the async driver, so the
+# event loop keeps serving other requests while they wait on the database.
+
+def get_async_database_url(url: str = SQLALCHEMY_DATABASE_URI):
+    """
+    Translate the sync DATABASE_URL into its async-driver equivalent.
+
+    Returns (url, connect_args). asyncpg does not understand libpq's
+    `sslmode` query parameter, so it is converted into the `ssl` connect arg.
+    """
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    parsed = make_url(url)
+    connect_args = {}
+
+    if parsed.get_backend_name() == "postgresql":
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode == "disable":
+            connect_args["ssl"] = False
+        elif sslmode in ("require", "verify-ca", "verify-full"):
+            connect_args["ssl"] = True
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+
+    return parsed, connect_args
+
+
+_async_url, _async_connect_args = get_async_database_url()
+
+async_engine = create_async_engine(
+    _async_url,
+    echo=False,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 10)),
+    connect_args=_async_connect_args,
+)
+
+event.listen(async_engine.sync_engine, "before_cursor_execute", receive_before_cursor_execute)
+event.listen(async_engine.sync_engine, "after_cursor_execute", receive_after_cursor_execute)
+
+# expire_on_commit=False: attributes stay readable after commit without
+# triggering an implicit (and, under asyncio, illegal) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
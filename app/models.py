@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Float, ForeignKey, Table, Boolean, BigInteger, false
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -110,11 +110,22 @@ class Client(Base):
     deleted_at = Column(DateTime, nullable=True)
     source_lead_id = Column(Integer, ForeignKey('leads.id'), nullable=True)
     converted_on = Column(DateTime, nullable=True)
+    # Maintained by app/utils/interaction_stats.py
+    interaction_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_interaction_at = Column(DateTime, nullable=True)
 
     # Relationships
     assigned_user = relationship("User", foreign_keys=[assigned_to])
     created_by_user = relationship("User", foreign_keys=[created_by])
 
+    # Keyset pagination (app/utils/pagination.py): newest/oldest and alphabetical;
+    # activity sort/filters
+    __table_args__ = (
+        Index("ix_clients_tenant_created", "tenant_id", "created_at", "id"),
+        Index("ix_clients_tenant_name", "tenant_id", "name", "id"),
+        Index("ix_clients_tenant_last_interaction", "tenant_id", "last_interaction_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Client {self.name}>"
 
@@ -165,10 +176,20 @@ class Lead(Base):
     lead_status = Column(String(20), default="open")  # Valid: "open", "converted", "closed", "lost"
     converted_on = Column(DateTime, nullable=True)
     lead_source = Column(String(50), nullable=True, index=True)  # Website, Referral, Cold Call, Email Campaign, etc.
+    # Maintained by app/utils/interaction_stats.py
+    interaction_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_interaction_at = Column(DateTime, nullable=True)
 
     assigned_user = relationship("User", foreign_keys=[assigned_to])
     created_by_user = relationship("User", foreign_keys=[created_by])
 
+    # Keyset pagination (app/utils/pagination.py): newest/oldest and alphabetical;
+    # activity sort/filters
+    __table_args__ = (
+        Index("ix_leads_tenant_created", "tenant_id", "created_at", "id"),
+        Index("ix_leads_tenant_name", "tenant_id", "name", "id"),
+        Index("ix_leads_tenant_last_interaction", "tenant_id", "last_interaction_at", "id"),
+    )
 
     def __repr__(self):
         return f"<Lead {self.name}>"
@@ -239,6 +260,8 @@ class Project(Base):
     deleted_at = Column(DateTime, nullable=True)
     deleted_by = Column(Integer, ForeignKey('users.id'), nullable=True)
     assigned_to = Column(Integer, ForeignKey('users.id'), nullable=True)
+    # Maintained by app/utils/ownership.py
+    effective_owner_id = Column(Integer, nullable=True)
 
     # ✅ Relationships to access names in API
     client = relationship("Client", backref="projects")
@@ -246,6 +269,14 @@ class Project(Base):
     assigned_user = relationship("User", foreign_keys=[assigned_to])
     created_by_user = relationship("User", foreign_keys=[created_by])
 
+    # Keyset pagination (app/utils/pagination.py): newest/oldest and alphabetical;
+    # owner-scoped lists
+    __table_args__ = (
+        Index("ix_projects_tenant_created", "tenant_id", "created_at", "id"),
+        Index("ix_projects_tenant_name", "tenant_id", "project_name", "id"),
+        Index("ix_projects_tenant_owner_created", "tenant_id", "effective_owner_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Project {self.project_name}>"
     
@@ -267,12 +298,23 @@ class Interaction(Base):
     follow_up = Column(DateTime, nullable=True)
     followup_status = Column(Enum(FollowUpStatus), default=FollowUpStatus.pending, nullable=False)
     summary = Column(String(255))
+    # Maintained by app/utils/ownership.py
+    effective_owner_id = Column(Integer, nullable=True)
 
     # Relationships
     lead = relationship("Lead", backref="interactions")
     client = relationship("Client", backref="interactions")
     project = relationship("Project", backref="interactions")  # 🆕 NEW RELATIONSHIP
 
+    # Keyset pagination (app/utils/pagination.py): newest/oldest; per-parent
+    # stats refresh (app/utils/interaction_stats.py); owner-scoped lists
+    __table_args__ = (
+        Index("ix_interactions_tenant_contact_date", "tenant_id", "contact_date", "id"),
+        Index("ix_interactions_client_contact_date", "client_id", "contact_date"),
+        Index("ix_interactions_lead_contact_date", "lead_id", "contact_date"),
+        Index("ix_interactions_tenant_owner_contact_date", "tenant_id", "effective_owner_id", "contact_date", "id"),
+    )
+
     def __repr__(self):
         return f"<Interaction {self.id} on {self.contact_date}>"
     
@@ -284,6 +326,8 @@ class ActivityType(enum.Enum):
     deleted = "deleted"
 
 class ActivityLog(Base):
+    # On PostgreSQL this table is partitioned by month on `timestamp` (primary
+    # key (id, timestamp)); see app/utils/activity_retention.py
     __tablename__ = 'activity_logs'
 
     id = Column(Integer, primary_key=True)
@@ -299,6 +343,42 @@ class ActivityLog(Base):
         return f"<ActivityLog {self.action.value} {self.entity_type} {self.entity_id}>"
 
 
+class RecentlyTouched(Base):
+    """
+    Latest activity time per (user, entity); answers /api/activity/recent.
+
+    Upserted alongside ActivityLog writes by app/utils/activity_sink.py.
+    """
+    __tablename__ = 'recently_touched'
+
+    user_id = Column(Integer, primary_key=True)
+    entity_type = Column(String(50), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, nullable=False)
+    last_touched_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_recently_touched_user_time", "tenant_id", "user_id", "last_touched_at"),
+    )
+
+
+class ActivityDailyRollup(Base):
+    """
+    Per-day ActivityLog counts for history past the retention window.
+
+    Written by app/utils/activity_retention.py just before the raw rows
+    (or their monthly partition) are dropped.
+    """
+    __tablename__ = 'activity_daily_rollups'
+
+    tenant_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    entity_type = Column(String(50), primary_key=True)
+    action = Column(String(20), primary_key=True)  # ActivityType value
+    event_count = Column(Integer, nullable=False, default=0)
+
+
 class ChatMessage(Base):
     __tablename__ = 'chat_messages'
 
@@ -407,17 +487,26 @@ class Backup(Base):
 
     # Backup metadata
     filename = Column(String(255), nullable=False, index=True)
-    backup_type = Column(String(20), default="manual", nullable=False)  # manual|scheduled|pre_restore
+    backup_type = Column(String(20), default="manual", nullable=False)  # manual|scheduled|pre_restore|tenant
     status = Column(String(20), default="pending", nullable=False, index=True)  # pending|in_progress|completed|failed
 
     # Storage location
     storage_key = Column(String(1024), nullable=True)  # B2 object key
-    size_bytes = Column(Integer, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
     checksum = Column(String(64), nullable=True)  # SHA-256 checksum
 
+    # Dump format: custom (single pg_dump stream) | directory (parallel tar + manifest)
+    # | tenant (one tenant's rows, app/utils/tenant_export.py)
+    dump_format = Column(String(20), default="custom", server_default="custom", nullable=False)
+    parallel_jobs = Column(Integer, nullable=True)  # pg_dump -j used for directory dumps
+    tenant_id = Column(Integer, nullable=True, index=True)  # set for tenant snapshots only
+    # Stored as deduplicated chunks (app/utils/backup_dedup.py); storage_key is
+    # then the manifest and checksum the SHA-256 of the unencrypted dump
+    deduplicated = Column(Boolean, default=False, server_default=false(), nullable=False)
+
     # Database snapshot metadata
     database_name = Column(String(100), nullable=True)
-    database_size_bytes = Column(Integer, nullable=True)
+    database_size_bytes = Column(BigInteger, nullable=True)
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -445,6 +534,10 @@ class Backup(Base):
             "size": self.size_bytes,
             "database_size": self.database_size_bytes,
             "checksum": self.checksum,
+            "format": self.dump_format,
+            "parallel_jobs": self.parallel_jobs,
+            "tenant_id": self.tenant_id,
+            "deduplicated": self.deduplicated,
             "created_at": self.created_at.isoformat() + "Z" if self.created_at else None,
             "completed_at": self.completed_at.isoformat() + "Z" if self.completed_at else None,
             "created_by": self.creator.email if self.creator else "system",
@@ -518,3 +611,177 @@ class BackupRestore(Base):
 
     def __repr__(self):
         return f"<BackupRestore backup_id={self.backup_id} status={self.status}>"
+
+
+class ReportDailyFact(Base):
+    """
+    Pre-aggregated report numbers, one row per tenant/day/dimension combo.
+
+    `day` is the creation day of the underlying rows. Rebuilt by
+    app/workers/report_jobs.py; see app/utils/report_snapshots.py for reads.
+    """
+    __tablename__ = "report_daily_facts"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    entity = Column(String(20), nullable=False)  # lead|project
+
+    # Dimensions (whichever apply to the entity)
+    status = Column(String(50), nullable=True)
+    source = Column(String(50), nullable=True)
+    value_type = Column(String(20), nullable=True)
+    assigned_to = Column(Integer, nullable=True)
+    is_deleted = Column(Boolean, default=False, nullable=False)
+
+    # Measures
+    item_count = Column(Integer, default=0, nullable=False)
+    total_value = Column(Float, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_report_daily_facts_tenant_entity_day", "tenant_id", "entity", "day"),
+    )
+
+    def __repr__(self):
+        return f"<ReportDailyFact {self.entity} tenant={self.tenant_id} day={self.day}>"
+
+
+class ReportSnapshotState(Base):
+    """Per-tenant refresh watermark for report_daily_facts."""
+    __tablename__ = "report_snapshot_state"
+
+    tenant_id = Column(Integer, primary_key=True)
+    refreshed_at = Column(DateTime, nullable=False)  # rows changed before this are in the facts
+    covered_through = Column(Date, nullable=False)  # facts are complete for days before this
+
+    def __repr__(self):
+        return f"<ReportSnapshotState tenant={self.tenant_id} refreshed_at={self.refreshed_at}>"
+
+
+class ReportDirtyDay(Base):
+    """
+    A fact day whose rows were hard-deleted since the last refresh.
+
+    Purged rows leave nothing behind for the watermark scan to find, so the
+    delete hooks in app/utils/report_snapshots.py record their creation days
+    here and the next refresh rebuilds them.
+    """
+    __tablename__ = "report_dirty_days"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, nullable=False, index=True)
+    day = Column(Date, nullable=False)
+    marked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ReportDirtyDay tenant={self.tenant_id} day={self.day}>"
+
+
+class SearchDocument(Base):
+    """
+    Denormalized global-search row per client/lead/project/account/user.
+
+    Kept current by app/utils/search_index.py. field_1..field_9 hold the
+    entity's searchable fields in the order of SEARCH_FIELDS so matches can
+    be reported per field; search_text is their lower-cased concatenation and
+    is what the full-text / trigram indexes cover.
+    """
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, nullable=False)
+    entity_type = Column(String(20), nullable=False)  # client|lead|project|account|user
+    entity_id = Column(Integer, nullable=False)
+
+    title = Column(String(255), nullable=True)
+    link = Column(String(255), nullable=True)
+
+    # Visibility for non-admin users
+    created_by = Column(Integer, nullable=True)
+    assigned_to = Column(Integer, nullable=True)
+    is_deleted = Column(Boolean, default=False, nullable=False)
+
+    field_1 = Column(Text, nullable=True)
+    field_2 = Column(Text, nullable=True)
+    field_3 = Column(Text, nullable=True)
+    field_4 = Column(Text, nullable=True)
+    field_5 = Column(Text, nullable=True)
+    field_6 = Column(Text, nullable=True)
+    field_7 = Column(Text, nullable=True)
+    field_8 = Column(Text, nullable=True)
+    field_9 = Column(Text, nullable=True)
+    search_text = Column(Text, nullable=False, default="")
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_search_documents_entity"),
+        Index("ix_search_documents_tenant_type", "tenant_id", "entity_type"),
+    )
+
+    def __repr__(self):
+        return f"<SearchDocument {self.entity_type} {self.entity_id}>"
+
+
+class ImportJob(Base):
+    """
+    A queued spreadsheet import (app/workers/import_jobs.py).
+
+    The upload is staged in document storage under file_key until the job
+    finishes so any worker machine can pick it up. rows_processed is
+    committed together with each chunk of inserted rows, so an interrupted
+    job resumes where it stopped.
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, nullable=False, index=True)
+    entity = Column(String(20), default="leads", nullable=False)
+
+    # Upload and options
+    filename = Column(String(255), nullable=False)
+    file_key = Column(String(512), nullable=True)  # staged upload; deleted when the job finishes
+    column_mappings = Column(JSON, nullable=False, default=list)
+    assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    status = Column(String(20), default="pending", nullable=False, index=True)  # pending|in_progress|completed|failed
+
+    # Progress
+    total_rows = Column(Integer, nullable=True)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    successful_rows = Column(Integer, default=0, nullable=False)
+    failed_rows = Column(Integer, default=0, nullable=False)
+    failures = Column(JSON, nullable=False, default=list)  # first IMPORT_MAX_STORED_FAILURES only
+    warnings = Column(JSON, nullable=False, default=list)
+    sample_names = Column(JSON, nullable=False, default=list)  # for the summary email
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=True)  # heartbeat while running
+    completed_at = Column(DateTime, nullable=True)
+
+    job_id = Column(String(100), nullable=True)  # RQ job ID
+    error_message = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    def to_dict(self, include_failures: bool = False):
+        data = {
+            "id": self.id,
+            "entity": self.entity,
+            "filename": self.filename,
+            "status": self.status,
+            "total_rows": self.total_rows,
+            "rows_processed": self.rows_processed,
+            "successful_imports": self.successful_rows,
+            "failed_imports": self.failed_rows,
+            "warnings": self.warnings or [],
+            "created_at": self.created_at.isoformat() + "Z" if self.created_at else None,
+            "started_at": self.started_at.isoformat() + "Z" if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() + "Z" if self.completed_at else None,
+            "error": self.error_message,
+        }
+        if include_failures:
+            data["failures"] = self.failures or []
+        return data
+
+    def __repr__(self):
+        return f"<ImportJob {self.id} status={self.status}>"
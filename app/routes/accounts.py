@@ -1,8 +1,9 @@
 from quart import Blueprint, request, jsonify
 from datetime import datetime
-from app.models import Account, ActivityLog, ActivityType
+from app.models import Account, ActivityType
 from app.database import SessionLocal
 from app.utils.auth_utils import requires_auth
+from app.utils.activity_sink import log_activity
 from app.constants import ACCOUNT_STATUS_OPTIONS
 from sqlalchemy.orm import joinedload
 
@@ -161,7 +162,7 @@ async def get_account(account_id):
         if not account:
             return jsonify({"error": "Account not found"}), 404
 
-        log = ActivityLog(
+        log_activity(
             tenant_id=user.tenant_id,
             user_id=user.id,
             action=ActivityType.viewed,
@@ -169,8 +170,6 @@ async def get_account(account_id):
             entity_id=account.id,
             description=f"Viewed account '{account.account_number}'"
         )
-        session.add(log)
-        session.commit()
 
         response = jsonify({
             "id": account.id,
@@ -1,8 +1,10 @@
+import asyncio
 from quart import Blueprint, jsonify, request
-from sqlalchemy import func, desc, case
+from sqlalchemy import desc
 from app.database import SessionLocal
-from app.models import ActivityLog, Client, Lead, Project, Account
+from app.models import RecentlyTouched, Client, Lead, Project, Account
 from app.utils.auth_utils import requires_auth
+from app.utils.activity_sink import activity_sink
 
 
 activity_bp = Blueprint("activity", __name__, url_prefix="/api/activity")
@@ -12,31 +14,24 @@ activity_bp = Blueprint("activity", __name__, url_prefix="/api/activity")
 @requires_auth()
 async def recent_activity():
     user = request.user
+    # Read-your-own-writes: views this user just made may still be buffered
+    if activity_sink.has_pending(user.id):
+        await asyncio.to_thread(activity_sink.flush)
     session = SessionLocal()
     try:
         limit = int(request.args.get("limit", 10))
         limit = min(limit, 50)
 
-        # Get most recent log per entity_type + entity_id for this user
-        subquery = (
-            session.query(
-                ActivityLog.entity_type,
-                ActivityLog.entity_id,
-                func.max(ActivityLog.timestamp).label("last_touched")
-            )
-            .filter(
-                ActivityLog.user_id == user.id,
-                ActivityLog.tenant_id == user.tenant_id
-            )
-            .group_by(ActivityLog.entity_type, ActivityLog.entity_id)
-            .subquery()
-        )
-
+        # Most recently touched entities for this user (one row per entity,
+        # kept current by the activity writer; no scan over activity_logs)
         results = session.query(
-            subquery.c.entity_type,
-            subquery.c.entity_id,
-            subquery.c.last_touched
-        ).order_by(desc(subquery.c.last_touched)).limit(limit).all()
+            RecentlyTouched.entity_type,
+            RecentlyTouched.entity_id,
+            RecentlyTouched.last_touched_at.label("last_touched")
+        ).filter(
+            RecentlyTouched.tenant_id == user.tenant_id,
+            RecentlyTouched.user_id == user.id
+        ).order_by(desc(RecentlyTouched.last_touched_at)).limit(limit).all()
 
         # Collect entity IDs by type for bulk loading
         client_ids = []
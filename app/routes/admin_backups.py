@@ -3,29 +3,50 @@ Admin-only backup management API.
 
 Endpoints:
 - GET /api/admin/backups - List all backups
-- POST /api/admin/backups - Trigger manual backup
-- GET /api/admin/backups/:id/status - Get backup status
-- POST /api/admin/backups/:id/restore - Restore from backup
+- POST /api/admin/backups - Queue a manual backup
+- GET /api/admin/backups/:id/status - Get backup status and job progress
+- POST /api/admin/backups/:id/restore - Queue a restore from backup
+- GET /api/admin/backups/restores/:id/status - Get restore status and job progress
 - DELETE /api/admin/backups/:id - Delete a backup
 """
 from quart import Blueprint, request, jsonify
+from sqlalchemy import or_
 from datetime import datetime
 from app.models import Backup, BackupRestore
 from app.database import SessionLocal
 from app.utils.auth_utils import requires_auth
-from app.workers.backup_jobs import run_backup_job
-from app.workers.restore_jobs import run_restore_job
+from app.workers.backup_jobs import enqueue_backup_job, get_job_state
+from app.workers.restore_jobs import enqueue_restore_job
+from app.workers.tenant_backup_jobs import enqueue_tenant_backup_job, enqueue_tenant_restore_job
+from app.utils.backup_pipeline import BACKUP_FORMATS, BACKUP_DEFAULT_FORMAT
 from app.utils.logging_utils import logger
 
 admin_backups_bp = Blueprint("admin_backups", __name__, url_prefix="/api/admin/backups")
 
 
+def _job_state(job_id):
+    """RQ state for a job, or None if it is gone or Redis is unreachable."""
+    if not job_id:
+        return None
+    try:
+        return get_job_state(job_id)
+    except Exception as e:
+        logger.warning(f"[Admin] Could not read job {job_id}: {str(e)}")
+        return None
+
+
+def _other_tenants_snapshot(backup, user) -> bool:
+    """Tenant snapshots are only visible to admins of that tenant."""
+    return backup.tenant_id is not None and backup.tenant_id != user.tenant_id
+
+
 @admin_backups_bp.route("", methods=["GET"])
 @admin_backups_bp.route("", methods=["GET"])
 @admin_backups_bp.route("/", methods=["GET"])
 @requires_auth(roles=["admin"])
 async def list_backups():
     """List all backups with pagination."""
+    user = request.user
     session = SessionLocal()
     try:
         # Query parameters
@@ -33,7 +54,9 @@ async def list_backups():
         offset = request.args.get("offset", 0, type=int)
         status = request.args.get("status")  # Optional filter
 
-        query = session.query(Backup).order_by(Backup.created_at.desc())
+        query = session.query(Backup).filter(
+            or_(Backup.tenant_id.is_(None), Backup.tenant_id == user.tenant_id)
+        ).order_by(Backup.created_at.desc())
 
         if status:
             query = query.filter(Backup.status == status)
@@ -58,21 +81,39 @@ async def list_backups():
 @requires_auth(roles=["admin"])
 async def create_backup():
     """
-    Trigger a manual backup job.
+    Queue a manual backup job on the backup worker.
+
+    Optional JSON body: {"format": "custom" | "directory" | "tenant", "parallel_jobs": N}.
+    Directory format dumps and restores in parallel (pg_dump/pg_restore -j).
+    Tenant format snapshots only the caller's tenant, and restores without
+    touching other tenants.
 
-    Note: Runs synchronously (may take 30-60 seconds).
-    Timeout configured to 10 minutes in fly.toml.
+    Returns 202 with the job id. Poll GET /api/admin/backups/<id>/status
+    for bytes dumped, encrypted and uploaded.
     """
     user = request.user
+    data = await request.get_json(silent=True) or {}
+    dump_format = data.get("format", BACKUP_DEFAULT_FORMAT)
+    formats = BACKUP_FORMATS + ("tenant",)
+    if dump_format not in formats:
+        return jsonify({"error": f"format must be one of: {', '.join(formats)}"}), 400
+    parallel_jobs = data.get("parallel_jobs")
+    if parallel_jobs is not None and (not isinstance(parallel_jobs, int) or parallel_jobs < 1):
+        return jsonify({"error": "parallel_jobs must be a positive integer"}), 400
+
     session = SessionLocal()
 
     try:
         # Create backup record with a temporary filename (will be updated by worker)
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        tenant_snapshot = dump_format == "tenant"
         backup = Backup(
             filename=f"manual_backup_{timestamp}.sql.gpg",
-            backup_type="manual",
+            backup_type="tenant" if tenant_snapshot else "manual",
             status="pending",
+            dump_format=dump_format,
+            parallel_jobs=parallel_jobs if dump_format == "directory" else None,
+            tenant_id=user.tenant_id if tenant_snapshot else None,
             created_by=user.id,
             created_at=datetime.utcnow()
         )
@@ -80,25 +121,27 @@ async def create_backup():
         session.commit()
         session.refresh(backup)
 
-        # Run backup job synchronously (no RQ worker needed)
-        logger.info(f"[Admin] Running manual backup {backup.id} by user {user.email}")
         try:
-            run_backup_job(backup.id, backup_type="manual")
-
-            # Fetch updated backup record
-            session.refresh(backup)
-
-            return jsonify({
-                "message": "Backup completed successfully",
-                "backup": backup.to_dict()
-            }), 201
-        except Exception as backup_err:
-            logger.error(f"[Admin] Manual backup failed: {str(backup_err)}")
+            enqueue = enqueue_tenant_backup_job if tenant_snapshot else enqueue_backup_job
+            backup.job_id = enqueue(backup)
+            session.commit()
+        except Exception as enqueue_err:
+            logger.error(f"[Admin] Could not queue manual backup {backup.id}: {str(enqueue_err)}")
+            backup.status = "failed"
+            backup.error_message = f"Could not enqueue backup: {str(enqueue_err)[:400]}"
+            session.commit()
             return jsonify({
                 "error": "Backup failed",
-                "details": str(backup_err)
+                "details": str(enqueue_err)
             }), 500
 
+        logger.info(f"[Admin] Queued manual backup {backup.id} by user {user.email}")
+        return jsonify({
+            "message": "Backup queued",
+            "backup": backup.to_dict(),
+            "job_id": backup.job_id
+        }), 202
+
     finally:
         session.close()
 
@@ -106,16 +149,25 @@ async def create_backup():
 @admin_backups_bp.route("/<int:backup_id>/status", methods=["GET"])
 @requires_auth(roles=["admin"])
 async def get_backup_status(backup_id: int):
-    """Get detailed status of a specific backup."""
+    """
+    Get detailed status of a specific backup.
+
+    While its worker job is still in Redis, "job" holds the RQ status and
+    progress: {"stage", "bytes_dumped", "bytes_encrypted", "bytes_uploaded"}.
+    """
+    user = request.user
     session = SessionLocal()
 
     try:
         backup = session.query(Backup).filter_by(id=backup_id).first()
 
-        if not backup:
+        if not backup or _other_tenants_snapshot(backup, user):
             return jsonify({"error": "Backup not found"}), 404
 
-        return jsonify(backup.to_dict())
+        data = backup.to_dict()
+        data["job_id"] = backup.job_id
+        data["job"] = _job_state(backup.job_id)
+        return jsonify(data)
 
     finally:
         session.close()
@@ -127,15 +179,16 @@ async def restore_backup(backup_id: int):
     """
     Restore database from a backup.
 
-    This will:
+    The backup worker will:
     1. Create a pre-restore safety backup (automatic)
     2. Download and verify the backup
     3. Restore the database
 
-    DANGER: This is a destructive operation!
+    DANGER: This is a destructive operation! Restoring a tenant snapshot
+    replaces only the caller's tenant; anything else restores the whole
+    database.
 
-    Note: Runs synchronously (may take 1-3 minutes).
-    Timeout configured to 10 minutes in fly.toml.
+    Returns 202 with the job id. Poll GET /api/admin/backups/restores/<id>/status.
     """
     user = request.user
     session = SessionLocal()
@@ -144,7 +197,7 @@ async def restore_backup(backup_id: int):
         # Verify backup exists and is completed
         backup = session.query(Backup).filter_by(id=backup_id).first()
 
-        if not backup:
+        if not backup or _other_tenants_snapshot(backup, user):
             return jsonify({"error": "Backup not found"}), 404
 
         if backup.status != "completed":
@@ -152,33 +205,21 @@ async def restore_backup(backup_id: int):
                 "error": f"Cannot restore from backup with status: {backup.status}"
             }), 400
 
-        # Step 1: Create pre-restore safety backup
-        logger.info(f"[Admin] Creating pre-restore safety backup before restoring {backup_id}")
-
+        # Pre-restore safety backup, taken by the worker before restoring
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        tenant_snapshot = backup.dump_format == "tenant"
         safety_backup = Backup(
             filename=f"pre_restore_{timestamp}.sql.gpg",
             backup_type="pre_restore",
             status="pending",
+            dump_format="tenant" if tenant_snapshot else BACKUP_DEFAULT_FORMAT,
+            tenant_id=backup.tenant_id,
             created_by=user.id,
             created_at=datetime.utcnow()
         )
         session.add(safety_backup)
-        session.commit()
-        session.refresh(safety_backup)
+        session.flush()
 
-        # Run safety backup synchronously (no RQ worker needed)
-        logger.info(f"[Admin] Running pre-restore safety backup {safety_backup.id}")
-        try:
-            run_backup_job(safety_backup.id, backup_type="pre_restore")
-        except Exception as backup_err:
-            logger.error(f"[Admin] Pre-restore backup failed: {str(backup_err)}")
-            return jsonify({
-                "error": "Failed to create pre-restore safety backup",
-                "details": str(backup_err)
-            }), 500
-
-        # Step 2: Create restore record
         restore = BackupRestore(
             backup_id=backup_id,
             restored_by=user.id,
@@ -188,24 +229,63 @@ async def restore_backup(backup_id: int):
         )
         session.add(restore)
         session.commit()
-        session.refresh(restore)
 
-        # Step 3: Run restore job synchronously (no RQ worker needed)
-        logger.info(f"[Admin] Running restore {restore.id} (restoring from backup {backup_id})")
         try:
-            run_restore_job(restore.id)
-            return jsonify({
-                "message": "Restore completed successfully",
-                "restore_id": restore.id,
-                "pre_restore_backup_id": safety_backup.id
-            }), 200
-        except Exception as restore_err:
-            logger.error(f"[Admin] Restore failed: {str(restore_err)}")
+            enqueue = enqueue_tenant_restore_job if tenant_snapshot else enqueue_restore_job
+            job_id = enqueue(restore)
+            # The safety backup runs inside the restore job
+            safety_backup.job_id = job_id
+            session.commit()
+        except Exception as enqueue_err:
+            logger.error(f"[Admin] Could not queue restore {restore.id}: {str(enqueue_err)}")
+            error_message = f"Could not enqueue restore: {str(enqueue_err)[:400]}"
+            for record in (safety_backup, restore):
+                record.status = "failed"
+                record.error_message = error_message
+            restore.completed_at = datetime.utcnow()
+            session.commit()
             return jsonify({
                 "error": "Restore failed",
-                "details": str(restore_err)
+                "details": str(enqueue_err)
             }), 500
 
+        logger.info(f"[Admin] Queued restore {restore.id} from backup {backup_id} by user {user.email}")
+        return jsonify({
+            "message": "Restore queued",
+            "restore_id": restore.id,
+            "pre_restore_backup_id": safety_backup.id,
+            "job_id": job_id
+        }), 202
+
+    finally:
+        session.close()
+
+
+@admin_backups_bp.route("/restores/<int:restore_id>/status", methods=["GET"])
+@requires_auth(roles=["admin"])
+async def get_restore_status(restore_id: int):
+    """
+    Get the status of a queued restore.
+
+    Once pg_restore runs the record is usually wiped with the rest of the
+    database, so "job" (the worker's RQ status and stage) is the reliable
+    signal; the B2 restore log at GET /restores is the permanent record.
+    """
+    session = SessionLocal()
+
+    try:
+        restore = session.query(BackupRestore).filter_by(id=restore_id).first()
+        job = _job_state(f"restore-{restore_id}")
+
+        if not restore and not job:
+            return jsonify({"error": "Restore not found"}), 404
+
+        return jsonify({
+            "restore": restore.to_dict() if restore else None,
+            "job_id": f"restore-{restore_id}",
+            "job": job
+        })
+
     finally:
         session.close()
 
@@ -220,13 +300,13 @@ async def delete_backup(backup_id: int):
     try:
         backup = session.query(Backup).filter_by(id=backup_id).first()
 
-        if not backup:
+        if not backup or _other_tenants_snapshot(backup, user):
             return jsonify({"error": "Backup not found"}), 404
 
-        # Don't allow deletion of backups that are being used
+        # Don't allow deletion of backups that are being used (or queued to be)
         active_restore = session.query(BackupRestore).filter(
             BackupRestore.backup_id == backup_id,
-            BackupRestore.status == "in_progress"
+            BackupRestore.status.in_(("pending", "in_progress"))
         ).first()
 
         if active_restore:
@@ -1,16 +1,19 @@
 from quart import Blueprint, request, jsonify, current_app
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import joinedload
-from app.models import User, Tenant
+from app.models import User
 from app.database import SessionLocal
 from app.utils.auth_utils import (
-    verify_password,
+    verify_password_async,
     create_token,
-    hash_password,
+    hash_password_async,
+    needs_rehash,
     generate_reset_token,
-    verify_reset_token
+    verify_reset_token,
+    invalidate_principal
 )
 from app.utils.auth_utils import requires_auth
+from app.utils.tenant_config import get_tenant_entry, conditional_json, make_etag
 from app.utils.email_utils import send_email
 from app.utils.rate_limiter import rate_limit
 
@@ -30,12 +33,11 @@ async def login():
 
     session = SessionLocal()
     try:
-        # Load user with tenant relationship for config
         user = session.query(User)\
-            .options(joinedload(User.tenant), joinedload(User.roles))\
+            .options(joinedload(User.roles))\
             .filter_by(email=email)\
             .first()
-        if not user or not verify_password(password, user.password_hash):
+        if not user or not await verify_password_async(password, user.password_hash):
             return jsonify({"error": "Invalid credentials"}), 401
 
         token = create_token(user)
@@ -52,13 +54,19 @@ async def login():
         }
 
         # Include tenant config if available
-        if user.tenant:
-            response_data["tenant"] = {
-                "id": user.tenant.id,
-                "name": user.tenant.name,
-                "slug": user.tenant.slug,
-                "config": user.tenant.config
-            }
+        tenant = get_tenant_entry(user.tenant_id)
+        if tenant:
+            response_data["tenant"] = tenant["tenant"]
+
+        # Upgrade hashes made with an old BCRYPT_ROUNDS while we have the password
+        if needs_rehash(user.password_hash):
+            try:
+                user.password_hash = await hash_password_async(password)
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                import logging
+                logging.warning(f"Login rehash failed for user {user.id}: {e}")
 
         response = jsonify(response_data)
         response.headers["Cache-Control"] = "no-store"
@@ -130,8 +138,9 @@ async def reset_password():
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await hash_password_async(new_password)
         session.commit()
+        invalidate_principal(user.id)
 
         return jsonify({"message": "Password updated successfully"})
     except SQLAlchemyError:
@@ -151,14 +160,16 @@ async def change_password():
     if not current_password or not new_password:
         return jsonify({"error": "Missing required fields"}), 400
 
-    if not verify_password(current_password, user.password_hash):
-        return jsonify({"error": "Incorrect current password"}), 403
-
     session = SessionLocal()
     try:
+        # Check against the DB row; request.user may be a cached principal
         user = session.get(User, user.id)
-        user.password_hash = hash_password(new_password)
+        if not await verify_password_async(current_password, user.password_hash):
+            return jsonify({"error": "Incorrect current password"}), 403
+
+        user.password_hash = await hash_password_async(new_password)
         session.commit()
+        invalidate_principal(user.id)
         return jsonify({"message": "Password changed successfully"})
     except SQLAlchemyError:
         session.rollback()
@@ -170,33 +181,24 @@ async def change_password():
 @auth_bp.route("/me", methods=["GET"])
 @requires_auth()
 async def get_me():
+    # request.user is already loaded (or cached) by requires_auth
     user = request.user
-    session = SessionLocal()
-    try:
-        # Reload user with tenant to get config
-        user = session.query(User)\
-            .options(joinedload(User.tenant), joinedload(User.roles))\
-            .filter_by(id=user.id)\
-            .first()
+    response_data = {
+        "id": user.id,
+        "email": user.email,
+        "roles": [r.name for r in user.roles],
+        "tenant_id": user.tenant_id,
+    }
 
-        response_data = {
-            "id": user.id,
-            "email": user.email,
-            "roles": [r.name for r in user.roles],
-            "tenant_id": user.tenant_id,
-        }
+    tenant = get_tenant_entry(user.tenant_id)
+    if tenant:
+        response_data["tenant"] = tenant["tenant"]
 
-        if user.tenant:
-            response_data["tenant"] = {
-                "id": user.tenant.id,
-                "name": user.tenant.name,
-                "slug": user.tenant.slug,
-                "config": user.tenant.config
-            }
-
-        return jsonify(response_data)
-    finally:
-        session.close()
+    etag = make_etag(
+        {key: value for key, value in response_data.items() if key != "tenant"},
+        tenant["etag"] if tenant else None,
+    )
+    return conditional_json(response_data, etag)
 
 
 @auth_bp.route("/tenant/config", methods=["GET"])
@@ -210,21 +212,12 @@ async def get_tenant_config():
     the authenticated user's organization.
     """
     user = request.user
-    session = SessionLocal()
-    try:
-        tenant = session.query(Tenant).filter_by(id=user.tenant_id).first()
+    tenant = get_tenant_entry(user.tenant_id)
 
-        if not tenant:
-            return jsonify({"error": "Tenant not found"}), 404
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
 
-        if not tenant.is_active:
-            return jsonify({"error": "Tenant is inactive"}), 403
+    if not tenant["is_active"]:
+        return jsonify({"error": "Tenant is inactive"}), 403
 
-        return jsonify({
-            "id": tenant.id,
-            "name": tenant.name,
-            "slug": tenant.slug,
-            "config": tenant.config
-        })
-    finally:
-        session.close()
+    return conditional_json(tenant["tenant"], tenant["etag"])
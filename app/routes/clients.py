@@ -1,14 +1,17 @@
 from quart import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 from pydantic import ValidationError
-from app.models import Client, ActivityLog, ActivityType, User, Interaction, Lead
-from app.database import SessionLocal
+from app.models import Client, ActivityType, User, Lead
+from app.database import SessionLocal, AsyncSessionLocal
 from app.utils.auth_utils import requires_auth
+from app.utils.pagination import paginate, keyset_for, PaginationError
+from app.utils.list_totals import TotalCounter
 from app.utils.email_utils import send_assignment_notification
 from app.utils.phone_utils import clean_phone_number
+from app.utils.activity_sink import log_activity
 from app.constants import PHONE_LABELS
 from app.schemas.clients import ClientCreateSchema, ClientUpdateSchema, ClientAssignSchema
-from sqlalchemy import or_, and_, func, desc
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import joinedload
 
 clients_bp = Blueprint("clients", __name__, url_prefix="/api/clients")
@@ -17,135 +20,117 @@ clients_bp = Blueprint("clients", __name__, url_prefix="/api/clients")
 @clients_bp.route("/", methods=["GET"])
 @requires_auth()
 async def list_clients():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-        activity_filter = request.args.get("activity_filter", "all")  # NEW: Activity filter
-        
-        # Validate sort order
-        if sort_order not in ["newest", "oldest", "alphabetical", "activity"]:
-            sort_order = "newest"
-
-        # Base query with interaction data
-        query = session.query(Client).options(
-            joinedload(Client.assigned_user),
-            joinedload(Client.created_by_user)
-        ).filter(
-            Client.tenant_id == user.tenant_id,
-            Client.deleted_at == None,
-            or_(
-                Client.assigned_to == user.id,
-                and_(
-                    Client.assigned_to == None,
-                    Client.created_by == user.id
-                )
-            )
-        )
-
-        # Apply activity filtering
-        if activity_filter == "active":
-            # Clients with interactions in last 30 days
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            query = query.join(Interaction, Client.id == Interaction.client_id).filter(
-                Interaction.contact_date >= thirty_days_ago
-            ).distinct()
-        elif activity_filter == "inactive":
-            # Clients with no interactions in last 90 days OR no interactions at all
-            ninety_days_ago = datetime.utcnow() - timedelta(days=90)
-            
-            # Subquery for clients with recent interactions
-            recent_interaction_clients = session.query(Interaction.client_id).filter(
-                Interaction.client_id != None,
-                Interaction.contact_date >= ninety_days_ago
-            ).distinct().subquery()
-            
-            # Exclude clients with recent interactions
-            query = query.outerjoin(
-                recent_interaction_clients, 
-                Client.id == recent_interaction_clients.c.client_id
-            ).filter(recent_interaction_clients.c.client_id == None)
-        elif activity_filter == "new":
-            # Clients created in last 7 days
-            seven_days_ago = datetime.utcnow() - timedelta(days=7)
-            query = query.filter(Client.created_at >= seven_days_ago)
-
-        # Apply sorting
-        if sort_order == "newest":
-            query = query.order_by(Client.created_at.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Client.created_at.asc())
-        elif sort_order == "alphabetical":
-            query = query.order_by(Client.name.asc())
-        elif sort_order == "activity":
-            # Sort by most recent interaction date
-            query = query.outerjoin(Interaction, Client.id == Interaction.client_id)\
-                         .group_by(Client.id)\
-                         .order_by(desc(func.max(Interaction.contact_date)))
-
-        total = query.count()
-        clients = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        # Get interaction statistics for each client
-        client_ids = [c.id for c in clients]
-        interaction_stats = {}
-        
-        if client_ids:
-            # Get interaction counts and last interaction dates
-            interaction_data = session.query(
-                Interaction.client_id,
-                func.count(Interaction.id).label('interaction_count'),
-                func.max(Interaction.contact_date).label('last_interaction_date')
-            ).filter(
-                Interaction.client_id.in_(client_ids)
-            ).group_by(Interaction.client_id).all()
-            
-            for data in interaction_data:
-                interaction_stats[data.client_id] = {
-                    'interaction_count': data.interaction_count,
-                    'last_interaction_date': data.last_interaction_date.isoformat() + "Z" if data.last_interaction_date else None
-                }
-
-        response = jsonify({
-            "clients": [{
-                "id": c.id,
-                "name": c.name,
-                "contact_person": c.contact_person,
-                "contact_title": c.contact_title,
-                "email": c.email,
-                "phone": c.phone,
-                "phone_label": c.phone_label,
-                "secondary_phone": c.secondary_phone,
-                "secondary_phone_label": c.secondary_phone_label,
-                "address": c.address,
-                "city": c.city,
-                "state": c.state,
-                "zip": c.zip,
-                "notes": c.notes,
-                "type": c.type,
-                "created_at": c.created_at.isoformat() + "Z",
-                "assigned_to": c.assigned_to,
-                "assigned_to_name": (
-                    c.assigned_user.email if c.assigned_user
-                    else c.created_by_user.email if c.created_by_user
-                    else None
-                ),
-                # NEW: Interaction statistics
-                "interaction_count": interaction_stats.get(c.id, {}).get('interaction_count', 0),
-                "last_interaction_date": interaction_stats.get(c.id, {}).get('last_interaction_date'),
-            } for c in clients],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order,
-            "activity_filter": activity_filter  # NEW: Include filter in response
-        })
+        data = await session.run_sync(_client_list_page, request.user, request.args)
+        response = jsonify(data)
         response.headers["Cache-Control"] = "no-store"
         return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     finally:
-        session.close()
+        await session.close()
+
+
+def _client_list_page(session, user, args) -> dict:
+    """One page of the user's clients (runs on the async session's connection)."""
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+    activity_filter = args.get("activity_filter", "all")  # NEW: Activity filter
+    
+    # Validate sort order
+    if sort_order not in ["newest", "oldest", "alphabetical", "activity"]:
+        sort_order = "newest"
+
+    # Base query with interaction data
+    query = session.query(Client).options(
+        joinedload(Client.assigned_user),
+        joinedload(Client.created_by_user)
+    ).filter(
+        Client.tenant_id == user.tenant_id,
+        Client.deleted_at == None,
+        or_(
+            Client.assigned_to == user.id,
+            and_(
+                Client.assigned_to == None,
+                Client.created_by == user.id
+            )
+        )
+    )
+
+    # Apply activity filtering
+    if activity_filter == "active":
+        # Clients with interactions in last 30 days
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        query = query.filter(Client.last_interaction_at >= thirty_days_ago)
+    elif activity_filter == "inactive":
+        # Clients with no interactions in last 90 days OR no interactions at all
+        ninety_days_ago = datetime.utcnow() - timedelta(days=90)
+        query = query.filter(or_(
+            Client.last_interaction_at == None,
+            Client.last_interaction_at < ninety_days_ago
+        ))
+    elif activity_filter == "new":
+        # Clients created in last 7 days
+        seven_days_ago = datetime.utcnow() - timedelta(days=7)
+        query = query.filter(Client.created_at >= seven_days_ago)
+
+    # Apply sorting
+    if sort_order == "newest":
+        query = query.order_by(Client.created_at.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Client.created_at.asc())
+    elif sort_order == "alphabetical":
+        query = query.order_by(Client.name.asc())
+    elif sort_order == "activity":
+        # Sort by most recent interaction date
+        query = query.order_by(Client.last_interaction_at.desc(), Client.id.desc())
+
+    totals = TotalCounter()
+    clients, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Client.created_at, Client.name, Client.id),
+        counter=totals
+    )
+
+
+    return {
+        "clients": [{
+            "id": c.id,
+            "name": c.name,
+            "contact_person": c.contact_person,
+            "contact_title": c.contact_title,
+            "email": c.email,
+            "phone": c.phone,
+            "phone_label": c.phone_label,
+            "secondary_phone": c.secondary_phone,
+            "secondary_phone_label": c.secondary_phone_label,
+            "address": c.address,
+            "city": c.city,
+            "state": c.state,
+            "zip": c.zip,
+            "notes": c.notes,
+            "type": c.type,
+            "created_at": c.created_at.isoformat() + "Z",
+            "assigned_to": c.assigned_to,
+            "assigned_to_name": (
+                c.assigned_user.email if c.assigned_user
+                else c.created_by_user.email if c.created_by_user
+                else None
+            ),
+            # NEW: Interaction statistics
+            "interaction_count": c.interaction_count,
+            "last_interaction_date": c.last_interaction_at.isoformat() + "Z" if c.last_interaction_at else None,
+        } for c in clients],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order,
+        "activity_filter": activity_filter  # NEW: Include filter in response
+    }
 
 
 @clients_bp.route("", methods=["POST"])
@@ -220,7 +205,7 @@ async def get_client(client_id):
         if not client:
             return jsonify({"error": "Client not found"}), 404
 
-        log = ActivityLog(
+        log_activity(
             tenant_id=user.tenant_id,
             user_id=user.id,
             action=ActivityType.viewed,
@@ -228,8 +213,6 @@ async def get_client(client_id):
             entity_id=client.id,
             description=f"Viewed client '{client.name}'"
         )
-        session.add(log)
-        session.commit()
 
         # If converted from a lead, fetch the original lead info
         lead_origin = None
@@ -428,130 +411,118 @@ async def assign_client(client_id):
 @clients_bp.route("/all", methods=["GET"])
 @requires_auth(roles=["admin"])
 async def list_all_clients():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        # Get pagination parameters
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-        user_email = request.args.get("user_email")  # Filter by specific user
-        activity_filter = request.args.get("activity_filter", "all")  # NEW: Activity filter
-        
-        # Validate sort order
-        if sort_order not in ["newest", "oldest", "alphabetical", "activity"]:
-            sort_order = "newest"
+        data = await session.run_sync(_all_clients_page, request.user, request.args)
+        response = jsonify(data)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        await session.close()
 
-        query = session.query(Client).options(
-            joinedload(Client.assigned_user),
-            joinedload(Client.created_by_user)
-        ).filter(
-            Client.tenant_id == user.tenant_id,
-            Client.deleted_at == None
-        )
 
-        # Filter by user if specified
-        if user_email:
-            query = query.filter(
-                or_(
-                    Client.assigned_user.has(User.email == user_email),
-                    Client.created_by_user.has(User.email == user_email)
-                )
+def _all_clients_page(session, user, args) -> dict:
+    """One page of every client in the tenant, optionally filtered by owner."""
+    # Get pagination parameters
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+    user_email = args.get("user_email")  # Filter by specific user
+    activity_filter = args.get("activity_filter", "all")  # NEW: Activity filter
+    
+    # Validate sort order
+    if sort_order not in ["newest", "oldest", "alphabetical", "activity"]:
+        sort_order = "newest"
+
+    query = session.query(Client).options(
+        joinedload(Client.assigned_user),
+        joinedload(Client.created_by_user)
+    ).filter(
+        Client.tenant_id == user.tenant_id,
+        Client.deleted_at == None
+    )
+
+    # Filter by user if specified
+    if user_email:
+        query = query.filter(
+            or_(
+                Client.assigned_user.has(User.email == user_email),
+                Client.created_by_user.has(User.email == user_email)
             )
+        )
 
-        # Apply activity filtering (same logic as main list)
-        if activity_filter == "active":
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            query = query.join(Interaction, Client.id == Interaction.client_id).filter(
-                Interaction.contact_date >= thirty_days_ago
-            ).distinct()
-        elif activity_filter == "inactive":
-            ninety_days_ago = datetime.utcnow() - timedelta(days=90)
-            recent_interaction_clients = session.query(Interaction.client_id).filter(
-                Interaction.client_id != None,
-                Interaction.contact_date >= ninety_days_ago
-            ).distinct().subquery()
-            query = query.outerjoin(
-                recent_interaction_clients, 
-                Client.id == recent_interaction_clients.c.client_id
-            ).filter(recent_interaction_clients.c.client_id == None)
-        elif activity_filter == "new":
-            seven_days_ago = datetime.utcnow() - timedelta(days=7)
-            query = query.filter(Client.created_at >= seven_days_ago)
-
-        # Apply sorting
-        if sort_order == "newest":
-            query = query.order_by(Client.created_at.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Client.created_at.asc())
-        elif sort_order == "alphabetical":
-            query = query.order_by(Client.name.asc())
-        elif sort_order == "activity":
-            query = query.outerjoin(Interaction, Client.id == Interaction.client_id)\
-                         .group_by(Client.id)\
-                         .order_by(desc(func.max(Interaction.contact_date)))
-
-        total = query.count()
-        clients = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        # Get interaction statistics
-        client_ids = [c.id for c in clients]
-        interaction_stats = {}
-        
-        if client_ids:
-            interaction_data = session.query(
-                Interaction.client_id,
-                func.count(Interaction.id).label('interaction_count'),
-                func.max(Interaction.contact_date).label('last_interaction_date')
-            ).filter(
-                Interaction.client_id.in_(client_ids)
-            ).group_by(Interaction.client_id).all()
-            
-            for data in interaction_data:
-                interaction_stats[data.client_id] = {
-                    'interaction_count': data.interaction_count,
-                    'last_interaction_date': data.last_interaction_date.isoformat() + "Z" if data.last_interaction_date else None
-                }
-
-        response_data = {
-            "clients": [
-                {
-                    "id": c.id,
-                    "name": c.name,
-                    "email": c.email,
-                    "phone": c.phone,
-                    "phone_label": c.phone_label,
-                    "secondary_phone": c.secondary_phone,
-                    "secondary_phone_label": c.secondary_phone_label,
-                    "contact_person": c.contact_person,
-                    "contact_title": c.contact_title,
-                    "type": c.type,
-                    "created_by": c.created_by,
-                    "created_by_name": c.created_by_user.email if c.created_by_user else None,
-                    "assigned_to_name": (
-                        c.assigned_user.email if c.assigned_user
-                        else c.created_by_user.email if c.created_by_user
-                        else None
-                    ),
-                    "created_at": c.created_at.isoformat() + "Z" if c.created_at else None,
-                    # NEW: Interaction statistics
-                    "interaction_count": interaction_stats.get(c.id, {}).get('interaction_count', 0),
-                    "last_interaction_date": interaction_stats.get(c.id, {}).get('last_interaction_date'),
-                } for c in clients
-            ],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order,
-            "user_email": user_email,
-            "activity_filter": activity_filter  # NEW: Include filter in response
-        }
-
-        response = jsonify(response_data)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    finally:
-        session.close()
+    # Apply activity filtering (same logic as main list)
+    if activity_filter == "active":
+        # Clients with interactions in last 30 days
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        query = query.filter(Client.last_interaction_at >= thirty_days_ago)
+    elif activity_filter == "inactive":
+        # Clients with no interactions in last 90 days OR no interactions at all
+        ninety_days_ago = datetime.utcnow() - timedelta(days=90)
+        query = query.filter(or_(
+            Client.last_interaction_at == None,
+            Client.last_interaction_at < ninety_days_ago
+        ))
+    elif activity_filter == "new":
+        seven_days_ago = datetime.utcnow() - timedelta(days=7)
+        query = query.filter(Client.created_at >= seven_days_ago)
+
+    # Apply sorting
+    if sort_order == "newest":
+        query = query.order_by(Client.created_at.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Client.created_at.asc())
+    elif sort_order == "alphabetical":
+        query = query.order_by(Client.name.asc())
+    elif sort_order == "activity":
+        query = query.order_by(Client.last_interaction_at.desc(), Client.id.desc())
+
+    totals = TotalCounter(allow_estimate=True)
+    clients, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Client.created_at, Client.name, Client.id),
+        counter=totals
+    )
+
+
+    response_data = {
+        "clients": [
+            {
+                "id": c.id,
+                "name": c.name,
+                "email": c.email,
+                "phone": c.phone,
+                "phone_label": c.phone_label,
+                "secondary_phone": c.secondary_phone,
+                "secondary_phone_label": c.secondary_phone_label,
+                "contact_person": c.contact_person,
+                "contact_title": c.contact_title,
+                "type": c.type,
+                "created_by": c.created_by,
+                "created_by_name": c.created_by_user.email if c.created_by_user else None,
+                "assigned_to_name": (
+                    c.assigned_user.email if c.assigned_user
+                    else c.created_by_user.email if c.created_by_user
+                    else None
+                ),
+                "created_at": c.created_at.isoformat() + "Z" if c.created_at else None,
+                # NEW: Interaction statistics
+                "interaction_count": c.interaction_count,
+                "last_interaction_date": c.last_interaction_at.isoformat() + "Z" if c.last_interaction_at else None,
+            } for c in clients
+        ],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order,
+        "user_email": user_email,
+        "activity_filter": activity_filter  # NEW: Include filter in response
+    }
+    return response_data
 
 
 @clients_bp.route("/assigned", methods=["GET"])
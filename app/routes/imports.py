@@ -1,49 +1,21 @@
-from quart import Blueprint, request, jsonify, g, Response
+from quart import Blueprint, request, jsonify, g, Response, current_app
 import pandas as pd
 import io
+import os
 import json
+import uuid
 from datetime import datetime
-from app.models import Lead, User
+from app.models import User, ImportJob
 from app.database import SessionLocal
 from app.utils.auth_utils import requires_auth
-from app.utils.phone_utils import clean_phone_number
 from app.utils.email_utils import send_email
-from app.constants import PHONE_LABELS
+from app.utils.import_utils import VALID_LEAD_FIELDS, import_leads, iter_upload, preview_upload
+from app.utils.storage_backend import get_storage, iter_file_chunks
+from app.workers.import_jobs import enqueue_import_job
+from app.utils.logging_utils import logger
 
 imports_bp = Blueprint("imports", __name__, url_prefix="/api/import")
 
-VALID_LEAD_FIELDS = {
-    'name': {'required': True, 'type': 'string', 'max_length': 100},
-    'contact_person': {'required': False, 'type': 'string', 'max_length': 100},
-    'contact_title': {'required': False, 'type': 'string', 'max_length': 100},
-    'email': {'required': False, 'type': 'email', 'max_length': 120},
-    'phone': {'required': False, 'type': 'phone', 'max_length': 20},
-    'phone_label': {'required': False, 'type': 'choice', 'choices': PHONE_LABELS},
-    'secondary_phone': {'required': False, 'type': 'phone', 'max_length': 20},
-    'secondary_phone_label': {'required': False, 'type': 'choice', 'choices': PHONE_LABELS},
-    'address': {'required': False, 'type': 'string', 'max_length': 255},
-    'city': {'required': False, 'type': 'string', 'max_length': 100},
-    'state': {'required': False, 'type': 'string', 'max_length': 100},
-    'zip': {'required': False, 'type': 'string', 'max_length': 20},
-    'notes': {'required': False, 'type': 'text'},
-    'type': {'required': False, 'type': 'string'},  # Permissive - accepts any value
-    'lead_status': {'required': False, 'type': 'string'}  # Permissive - accepts any value
-}
-
-def read_file(file_storage):
-    filename = file_storage.filename.lower()
-    if filename.endswith(".csv"):
-        for encoding in ["utf-8", "latin1", "cp1252"]:
-            try:
-                return pd.read_csv(file_storage.stream, encoding=encoding)
-            except UnicodeDecodeError:
-                continue
-        raise ValueError("Could not decode CSV file")
-    elif filename.endswith(".xlsx"):
-        return pd.read_excel(file_storage.stream)
-    else:
-        raise ValueError("Unsupported file format")
-
 @imports_bp.route("/leads/preview", methods=["POST"])
 @requires_auth()
 async def preview_leads():
@@ -53,13 +25,12 @@ async def preview_leads():
 
     file = files['file']
     try:
-        df = read_file(file)
-        df.columns = df.columns.astype(str).str.strip()
+        headers, rows, total = preview_upload(file.stream, file.filename, rows=10)
 
         return jsonify({
-            "headers": df.columns.tolist(),
-            "rows": df.head(10).fillna('').values.tolist(),
-            "totalRows": len(df)
+            "headers": headers,
+            "rows": rows,
+            "totalRows": total
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -70,7 +41,6 @@ async def submit_leads():
     user = request.user
     form = await request.form
     files = await request.files
-    successful_leads = []
 
     if 'file' not in files:
         return jsonify({"error": "No file uploaded"}), 400
@@ -89,86 +59,39 @@ async def submit_leads():
         if not assigned_user:
             return jsonify({"error": "Assigned user not found or inactive"}), 400
 
-        df = read_file(file)
-        df.columns = df.columns.astype(str).str.strip()
-
         mapped_fields = [m['leadField'] for m in column_mappings if m['leadField']]
         if 'name' not in mapped_fields:
             return jsonify({"error": "'name' field (Company Name) is required"}), 400
 
-        successful = 0
-        failed = 0
-        failures = []
-        warnings = []
-
-        for idx, row in df.iterrows():
-            try:
-                lead_data = {}
-                for mapping in column_mappings:
-                    csv_col = mapping['csvColumn']
-                    lead_field = mapping['leadField']
-                    if not lead_field:  # Skip unmapped fields
-                        continue
-
-                    val = row.get(csv_col, '')
-                    if pd.isna(val) or str(val).strip() == '':
-                        continue
-
-                    cleaned = str(val).strip()
-                    # ... cleaning logic here ...
-                    lead_data[lead_field] = cleaned
-
-                    if lead_field in ['phone', 'secondary_phone']:
-                        cleaned = clean_phone_number(cleaned)
-                        if not cleaned:
-                            warnings.append(f"Invalid phone on row {idx + 2}")
-                            continue
-                    elif lead_field == 'email':
-                        cleaned = cleaned.lower()
-                    # type and lead_status are permissive - accept any value
-                    elif lead_field.endswith("_label") and cleaned.lower() not in [p.lower() for p in PHONE_LABELS]:
-                        warnings.append(f"Unknown phone label '{cleaned}' on row {idx + 2}")
-                        cleaned = "work"
-
-                    lead_data[lead_field] = cleaned
-
-                if not lead_data.get("name"):
-                    raise ValueError("Missing required 'name' field")
-
-                lead_data.setdefault("type", "None")
-                lead_data.setdefault("lead_status", "open")
-                if "phone" in lead_data and "phone_label" not in lead_data:
-                    lead_data["phone_label"] = "work"
-                if "secondary_phone" in lead_data and "secondary_phone_label" not in lead_data:
-                    lead_data["secondary_phone_label"] = "mobile"
-
-                lead = Lead(
-                    tenant_id=user.tenant_id,
-                    created_by=user.id,
-                    assigned_to=assigned_user.id,
-                    created_at=datetime.utcnow(),
-                    **lead_data
-                )
-                successful_leads.append(lead_data.copy())
-                session.add(lead)
-                session.flush()
-                successful += 1
-            except Exception as e:
-                failed += 1
-                failures.append({
-                    "row": idx + 2,
-                    "data": row.dropna().to_dict(),
-                    "error": str(e)
-                })
-                session.rollback()
-
+        # Large uploads go to the import worker instead of holding the request open
+        file.stream.seek(0, os.SEEK_END)
+        size = file.stream.tell()
+        file.stream.seek(0)
+        if size > current_app.config.get("IMPORT_INLINE_MAX_BYTES", 1024 * 1024):
+            job = await _queue_import(session, user, file, column_mappings, assigned_user)
+            return jsonify({"message": "Import queued", "job": job.to_dict()}), 202
+
+        successful = failed = 0
+        failures, warnings, names = [], set(), []
+        for chunk in iter_upload(file.stream, file.filename):
+            result = import_leads(
+                session, chunk, column_mappings,
+                tenant_id=user.tenant_id,
+                created_by=user.id,
+                assigned_to=assigned_user.id
+            )
+            successful += result["successful"]
+            failed += result["failed"]
+            failures.extend(result["failures"])
+            warnings.update(result["warnings"])
+            names.extend(result["names"][:10 - len(names)])
         if successful:
             session.commit()
 
         if successful:
-            lead_list = [f"- {ld['name']}" for ld in successful_leads if 'name' in ld]
-            summary = "\n".join(lead_list[:10])  # limit preview to 10
-            more = f"\n...and {len(lead_list) - 10} more." if len(lead_list) > 10 else ""
+            lead_list = [f"- {name}" for name in names]
+            summary = "\n".join(lead_list)  # limit preview to 10
+            more = f"\n...and {successful - 10} more." if successful > 10 else ""
 
             body = (
                 f"You've been assigned {successful} new leads from a recent import by {user.email}.\n\n"
@@ -188,7 +111,7 @@ async def submit_leads():
             "message": f"Import complete: {successful} succeeded, {failed} failed.",
             "successful_imports": successful,
             "failed_imports": failed,
-            "warnings": list(set(warnings)),
+            "warnings": sorted(warnings),
             "failures": failures
         })
     except Exception as e:
@@ -198,6 +121,113 @@ async def submit_leads():
         session.close()
 
 
+async def _queue_import(session, user, file, column_mappings, assigned_user):
+    # Stream the spooled upload to storage; the worker reads it back from there
+    storage = get_storage()
+    key = f"imports/tenant-{user.tenant_id}/{uuid.uuid4().hex}{os.path.splitext(file.filename)[1].lower()}"
+    await storage.put_stream(key, iter_file_chunks(file.stream), file.mimetype or "application/octet-stream")
+
+    job = ImportJob(
+        tenant_id=user.tenant_id,
+        entity="leads",
+        filename=file.filename,
+        file_key=key,
+        column_mappings=column_mappings,
+        assigned_to=assigned_user.id,
+        status="pending",
+        created_by=user.id,
+        created_at=datetime.utcnow(),
+        failures=[],
+        warnings=[],
+        sample_names=[]
+    )
+    session.add(job)
+    session.commit()
+
+    try:
+        job.job_id = enqueue_import_job(job)
+        session.commit()
+    except Exception as e:
+        job.status = "failed"
+        job.error_message = f"Could not enqueue import: {str(e)[:400]}"
+        job.file_key = None
+        session.commit()
+        await storage.delete(key)
+        raise
+
+    logger.info(f"[Import] Queued import job {job.id} ({file.filename}) by user {user.email}")
+    return job
+
+
+@imports_bp.route("/leads/jobs", methods=["POST"])
+@requires_auth()
+async def queue_lead_import():
+    """Queue a lead import regardless of size. Poll GET /api/import/jobs/<id> for progress."""
+    user = request.user
+    form = await request.form
+    files = await request.files
+
+    if 'file' not in files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = files['file']
+    column_mappings = json.loads(form.get("column_mappings", "[]"))
+    if 'name' not in [m['leadField'] for m in column_mappings if m['leadField']]:
+        return jsonify({"error": "'name' field (Company Name) is required"}), 400
+    if not file.filename.lower().endswith((".csv", ".xlsx")):
+        return jsonify({"error": "Unsupported file format"}), 400
+
+    session = SessionLocal()
+    try:
+        assigned_user = session.query(User).filter_by(
+            email=form.get("assigned_user_email"),
+            tenant_id=user.tenant_id,
+            is_active=True
+        ).first()
+        if not assigned_user:
+            return jsonify({"error": "Assigned user not found or inactive"}), 400
+
+        job = await _queue_import(session, user, file, column_mappings, assigned_user)
+        return jsonify({"message": "Import queued", "job": job.to_dict()}), 202
+    except Exception as e:
+        session.rollback()
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+    finally:
+        session.close()
+
+
+def _visible_jobs(session, user):
+    query = session.query(ImportJob).filter(ImportJob.tenant_id == user.tenant_id)
+    if not any(role.name == "admin" for role in user.roles):
+        query = query.filter(ImportJob.created_by == user.id)
+    return query
+
+
+@imports_bp.route("/jobs", methods=["GET"])
+@requires_auth()
+async def list_import_jobs():
+    session = SessionLocal()
+    try:
+        limit = min(request.args.get("limit", 20, type=int), 100)
+        jobs = _visible_jobs(session, request.user).order_by(ImportJob.created_at.desc()).limit(limit).all()
+        return jsonify({"jobs": [job.to_dict() for job in jobs]})
+    finally:
+        session.close()
+
+
+@imports_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@requires_auth()
+async def get_import_job(job_id):
+    session = SessionLocal()
+    try:
+        job = _visible_jobs(session, request.user).filter(ImportJob.id == job_id).first()
+        if not job:
+            return jsonify({"error": "Import job not found"}), 404
+        return jsonify(job.to_dict(include_failures=True))
+    finally:
+        session.close()
+
+
 @imports_bp.route("/leads/template", methods=["GET"])
 @requires_auth()
 async def get_lead_template():
@@ -6,8 +6,11 @@ from sqlalchemy import or_, and_, func
 from icalendar import Calendar, Event
 
 from app.models import Interaction, Client, Lead, Project, FollowUpStatus, User, ActivityLog, ActivityType
-from app.database import SessionLocal
+from app.database import SessionLocal, AsyncSessionLocal
 from app.utils.auth_utils import requires_auth
+from app.utils.pagination import paginate, keyset_for, PaginationError
+from app.utils.list_totals import TotalCounter
+from app.utils.interaction_stats import refresh_interaction_stats, stats_targets
 from app.schemas.interactions import InteractionCreateSchema, InteractionUpdateSchema
 
 interactions_bp = Blueprint("interactions", __name__, url_prefix="/api/interactions")
@@ -17,174 +20,187 @@ interactions_bp = Blueprint("interactions", __name__, url_prefix="/api/interacti
 @interactions_bp.route("/", methods=["GET"])
 @requires_auth()
 async def list_interactions():
-    user = request.user
-    session = SessionLocal()
-    try:
-        client_id = request.args.get("client_id")
-        lead_id = request.args.get("lead_id")
-        project_id = request.args.get("project_id")  # NEW: Add project support
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 10))
-        sort_order = request.args.get("sort", "newest")
-
-        # Validate only one entity type is specified
-        entity_count = sum(bool(x) for x in [client_id, lead_id, project_id])
-        if entity_count > 1:
-            return jsonify({"error": "Cannot filter by multiple entity types"}), 400
-
-        # Validate sort order
-        valid_sorts = ["newest", "oldest", "pending", "completed"]
-        if sort_order not in valid_sorts:
-            sort_order = "newest"
-
-        query = session.query(Interaction).options(
-            joinedload(Interaction.client),
-            joinedload(Interaction.lead),
-            joinedload(Interaction.project)  # NEW: Add project loading
-        ).filter(Interaction.tenant_id == user.tenant_id)
+    # Validate only one entity type is specified
+    if sum(bool(request.args.get(x)) for x in ["client_id", "lead_id", "project_id"]) > 1:
+        return jsonify({"error": "Cannot filter by multiple entity types"}), 400
 
-        # Apply entity-based access control
-        if not any(role.name == "admin" for role in user.roles):
-            query = query.filter(
-                or_(
-                    # Client interactions - user has access to client
-                    and_(
-                        Interaction.client_id != None,
-                        Interaction.client.has(
-                            or_(
-                                Client.created_by == user.id,
-                                Client.assigned_to == user.id
-                            )
+    session = AsyncSessionLocal()
+    try:
+        data = await session.run_sync(_interaction_list_page, request.user, request.args)
+        response = jsonify(data)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        await session.close()
+
+
+def _interaction_list_page(session, user, args) -> dict:
+    """One page of the interactions the user can see (runs on the async session's connection)."""
+    client_id = args.get("client_id")
+    lead_id = args.get("lead_id")
+    project_id = args.get("project_id")  # NEW: Add project support
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 10))
+    sort_order = args.get("sort", "newest")
+
+    # Validate sort order
+    valid_sorts = ["newest", "oldest", "pending", "completed"]
+    if sort_order not in valid_sorts:
+        sort_order = "newest"
+
+    query = session.query(Interaction).options(
+        joinedload(Interaction.client),
+        joinedload(Interaction.lead),
+        joinedload(Interaction.project)  # NEW: Add project loading
+    ).filter(Interaction.tenant_id == user.tenant_id)
+
+    # Apply entity-based access control
+    if not any(role.name == "admin" for role in user.roles):
+        query = query.filter(
+            or_(
+                # Interactions on records this user owns (indexed)
+                Interaction.effective_owner_id == user.id,
+                # Client interactions - user has access to client
+                and_(
+                    Interaction.client_id != None,
+                    Interaction.client.has(
+                        or_(
+                            Client.created_by == user.id,
+                            Client.assigned_to == user.id
                         )
-                    ),
-                    # Lead interactions - user has access to lead
-                    and_(
-                        Interaction.lead_id != None,
-                        Interaction.lead.has(
-                            or_(
-                                Lead.created_by == user.id,
-                                Lead.assigned_to == user.id
-                            )
+                    )
+                ),
+                # Lead interactions - user has access to lead
+                and_(
+                    Interaction.lead_id != None,
+                    Interaction.lead.has(
+                        or_(
+                            Lead.created_by == user.id,
+                            Lead.assigned_to == user.id
                         )
-                    ),
-                    # Project interactions - user created the project
-                    and_(
-                        Interaction.project_id != None,
-                        Interaction.project.has(Project.created_by == user.id)
                     )
+                ),
+                # Project interactions - user created the project
+                and_(
+                    Interaction.project_id != None,
+                    Interaction.project.has(Project.created_by == user.id)
                 )
             )
+        )
 
-        # Apply entity-specific filters
-        if client_id:
-            query = query.filter(
-                Interaction.client_id == int(client_id),
-                Interaction.lead_id == None,
-                Interaction.project_id == None
-            )
-        elif lead_id:
-            query = query.filter(
-                Interaction.lead_id == int(lead_id),
-                Interaction.client_id == None,
-                Interaction.project_id == None
-            )
-        elif project_id:  # NEW: Project filtering
-            query = query.filter(
-                Interaction.project_id == int(project_id),
-                Interaction.client_id == None,
-                Interaction.lead_id == None
-            )
+    # Apply entity-specific filters
+    if client_id:
+        query = query.filter(
+            Interaction.client_id == int(client_id),
+            Interaction.lead_id == None,
+            Interaction.project_id == None
+        )
+    elif lead_id:
+        query = query.filter(
+            Interaction.lead_id == int(lead_id),
+            Interaction.client_id == None,
+            Interaction.project_id == None
+        )
+    elif project_id:  # NEW: Project filtering
+        query = query.filter(
+            Interaction.project_id == int(project_id),
+            Interaction.client_id == None,
+            Interaction.lead_id == None
+        )
 
-        # Apply sorting
-        if sort_order == "newest":
-            query = query.order_by(Interaction.contact_date.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Interaction.contact_date.asc())
-        elif sort_order == "pending":
-            query = query.order_by(
-                (and_(
-                    Interaction.follow_up != None,
-                    Interaction.followup_status != FollowUpStatus.completed
-                )).desc(),
-                Interaction.follow_up.asc(),
-                Interaction.contact_date.desc()
-            )
-        elif sort_order == "completed":
-            query = query.order_by(
-                (Interaction.followup_status == FollowUpStatus.completed).desc(),
-                Interaction.contact_date.desc()
-            )
+    # Apply sorting
+    if sort_order == "newest":
+        query = query.order_by(Interaction.contact_date.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Interaction.contact_date.asc())
+    elif sort_order == "pending":
+        query = query.order_by(
+            (and_(
+                Interaction.follow_up != None,
+                Interaction.followup_status != FollowUpStatus.completed
+            )).desc(),
+            Interaction.follow_up.asc(),
+            Interaction.contact_date.desc()
+        )
+    elif sort_order == "completed":
+        query = query.order_by(
+            (Interaction.followup_status == FollowUpStatus.completed).desc(),
+            Interaction.contact_date.desc()
+        )
 
-        total = query.count()
-        interactions = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        response_data = {
-            "interactions": [
-                {
-                    "id": i.id,
-                    "contact_date": i.contact_date.isoformat(),
-                    "follow_up": i.follow_up.isoformat() if i.follow_up else None,
-                    "summary": i.summary,
-                    "outcome": i.outcome,
-                    "notes": i.notes,
-                    "client_id": i.client_id,
-                    "lead_id": i.lead_id,
-                    "project_id": i.project_id,  # NEW: Include project_id
-                    "client_name": i.client.name if i.client else None,
-                    "lead_name": i.lead.name if i.lead else None,
-                    "project_name": i.project.project_name if i.project else None,  # NEW: Project name
-                    "contact_person": (
-                        i.contact_person or  # Use interaction's contact if set
-                        (i.client.contact_person if i.client else None) or
-                        (i.lead.contact_person if i.lead else None) or
-                        (i.project.primary_contact_name if i.project else None)  # NEW: Project contact
-                    ),
-                    "email": (
-                        i.email or  # Use interaction's email if set
-                        (i.client.email if i.client else None) or
-                        (i.lead.email if i.lead else None) or
-                        (i.project.primary_contact_email if i.project else None)  # NEW: Project email
-                    ),
-                    "phone": (
-                        i.phone or  # Use interaction's phone if set
-                        (i.client.phone if i.client else None) or
-                        (i.lead.phone if i.lead else None) or
-                        (i.project.primary_contact_phone if i.project else None)  # NEW: Project phone
-                    ),
-                    "phone_label": (
-                        (i.client.phone_label if i.client else None) or
-                        (i.lead.phone_label if i.lead else None) or
-                        (i.project.primary_contact_phone_label if i.project else None) or
-                        "work"
-                    ),
-                    "secondary_phone": (
-                        (i.client.secondary_phone if i.client else None) or
-                        (i.lead.secondary_phone if i.lead else None)
-                        # NOTE: Projects only have primary contact for now
-                    ),
-                    "secondary_phone_label": (
-                        (i.client.secondary_phone_label if i.client else None) or
-                        (i.lead.secondary_phone_label if i.lead else None)
-                    ),
-                    "followup_status": i.followup_status.value if i.followup_status else None,
-                    "profile_link": (
-                        f"/clients/{i.client_id}" if i.client_id else
-                        f"/leads/{i.lead_id}" if i.lead_id else
-                        f"/projects/{i.project_id}" if i.project_id else None  # NEW: Project link
-                    )
-                } for i in interactions
-            ],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order
-        }
-
-        response = jsonify(response_data)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    finally:
-        session.close()
+    totals = TotalCounter()
+    interactions, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Interaction.contact_date, None, Interaction.id),
+        counter=totals
+    )
+
+    response_data = {
+        "interactions": [
+            {
+                "id": i.id,
+                "contact_date": i.contact_date.isoformat(),
+                "follow_up": i.follow_up.isoformat() if i.follow_up else None,
+                "summary": i.summary,
+                "outcome": i.outcome,
+                "notes": i.notes,
+                "client_id": i.client_id,
+                "lead_id": i.lead_id,
+                "project_id": i.project_id,  # NEW: Include project_id
+                "client_name": i.client.name if i.client else None,
+                "lead_name": i.lead.name if i.lead else None,
+                "project_name": i.project.project_name if i.project else None,  # NEW: Project name
+                "contact_person": (
+                    i.contact_person or  # Use interaction's contact if set
+                    (i.client.contact_person if i.client else None) or
+                    (i.lead.contact_person if i.lead else None) or
+                    (i.project.primary_contact_name if i.project else None)  # NEW: Project contact
+                ),
+                "email": (
+                    i.email or  # Use interaction's email if set
+                    (i.client.email if i.client else None) or
+                    (i.lead.email if i.lead else None) or
+                    (i.project.primary_contact_email if i.project else None)  # NEW: Project email
+                ),
+                "phone": (
+                    i.phone or  # Use interaction's phone if set
+                    (i.client.phone if i.client else None) or
+                    (i.lead.phone if i.lead else None) or
+                    (i.project.primary_contact_phone if i.project else None)  # NEW: Project phone
+                ),
+                "phone_label": (
+                    (i.client.phone_label if i.client else None) or
+                    (i.lead.phone_label if i.lead else None) or
+                    (i.project.primary_contact_phone_label if i.project else None) or
+                    "work"
+                ),
+                "secondary_phone": (
+                    (i.client.secondary_phone if i.client else None) or
+                    (i.lead.secondary_phone if i.lead else None)
+                    # NOTE: Projects only have primary contact for now
+                ),
+                "secondary_phone_label": (
+                    (i.client.secondary_phone_label if i.client else None) or
+                    (i.lead.secondary_phone_label if i.lead else None)
+                ),
+                "followup_status": i.followup_status.value if i.followup_status else None,
+                "profile_link": (
+                    f"/clients/{i.client_id}" if i.client_id else
+                    f"/leads/{i.lead_id}" if i.lead_id else
+                    f"/projects/{i.project_id}" if i.project_id else None  # NEW: Project link
+                )
+            } for i in interactions
+        ],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order
+    }
+    return response_data
 
 
 @interactions_bp.route("", methods=["POST"])
@@ -263,6 +279,7 @@ async def create_interaction():
             phone=data.phone
         )
         session.add(interaction)
+        refresh_interaction_stats(session, *stats_targets(interaction))
         session.commit()
         session.refresh(interaction)
 
@@ -315,6 +332,7 @@ async def update_interaction(interaction_id):
 
         # Update fields with validated data
         update_data = data.model_dump(exclude_unset=True)
+        before = stats_targets(interaction)
         
         for field, value in update_data.items():
             if field == "email":
@@ -322,6 +340,9 @@ async def update_interaction(interaction_id):
             else:
                 setattr(interaction, field, value)
 
+        if {"contact_date", "client_id", "lead_id"} & update_data.keys():
+            after = stats_targets(interaction)
+            refresh_interaction_stats(session, before[0] | after[0], before[1] | after[1])
         session.commit()
         session.refresh(interaction)
         return jsonify({"id": interaction.id})
@@ -360,7 +381,9 @@ async def delete_interaction(interaction_id):
             if not has_access:
                 return jsonify({"error": "Access denied"}), 403
 
+        targets = stats_targets(interaction)
         session.delete(interaction)
+        refresh_interaction_stats(session, *targets)
         session.commit()
         return jsonify({"message": "Interaction deleted"})
     finally:
@@ -385,10 +408,12 @@ async def transfer_interactions():
             Interaction.lead_id == from_lead_id
         ).all()
 
+        client_ids, _ = stats_targets(*interactions)
         for interaction in interactions:
             interaction.lead_id = None
             interaction.client_id = to_client_id
 
+        refresh_interaction_stats(session, client_ids | {to_client_id}, {from_lead_id})
         session.commit()
 
         return jsonify({
@@ -518,151 +543,165 @@ async def complete_interaction(interaction_id):
 @interactions_bp.route("/all", methods=["GET"])
 @requires_auth(roles=["admin"])
 async def list_all_interactions_admin():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-        user_email = request.args.get("user_email")
-        
-        if sort_order not in ["newest", "oldest", "alphabetical"]:
-            sort_order = "newest"
-
-        query = session.query(Interaction).options(
-            joinedload(Interaction.client).joinedload(Client.assigned_user),
-            joinedload(Interaction.client).joinedload(Client.created_by_user),
-            joinedload(Interaction.lead).joinedload(Lead.assigned_user),
-            joinedload(Interaction.lead).joinedload(Lead.created_by_user),
-            joinedload(Interaction.project).joinedload(Project.assigned_user),
-            joinedload(Interaction.project).joinedload(Project.created_by_user),
-        ).filter(
-            Interaction.tenant_id == user.tenant_id
-        )
+        data = await session.run_sync(_all_interactions_page, request.user, request.args)
+        response = jsonify(data)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        await session.close()
 
-        # Filter by user if specified — use exclusive ownership to match assigned_to_name display logic:
-        # assigned_to takes priority; created_by is only the fallback when no one is assigned.
-        # This prevents the same interaction from appearing under multiple users.
-        if user_email:
-            subquery_user_id = session.query(User.id).filter(User.email == user_email).scalar_subquery()
-            query = query.filter(
-                or_(
-                    # Client: directly assigned to this user
-                    and_(
-                        Interaction.client_id != None,
-                        Interaction.client.has(Client.assigned_user.has(User.email == user_email))
-                    ),
-                    # Client: unassigned, created by this user
-                    and_(
-                        Interaction.client_id != None,
-                        Interaction.client.has(and_(
-                            Client.assigned_to == None,
-                            Client.created_by_user.has(User.email == user_email)
-                        ))
-                    ),
-                    # Lead: directly assigned to this user
-                    and_(
-                        Interaction.lead_id != None,
-                        Interaction.lead.has(Lead.assigned_user.has(User.email == user_email))
-                    ),
-                    # Lead: unassigned, created by this user
-                    and_(
-                        Interaction.lead_id != None,
-                        Interaction.lead.has(and_(
-                            Lead.assigned_to == None,
-                            Lead.created_by_user.has(User.email == user_email)
-                        ))
-                    ),
-                    # Project: directly assigned to this user
-                    and_(
-                        Interaction.project_id != None,
-                        Interaction.project.has(Project.assigned_to == subquery_user_id)
-                    ),
-                    # Project: unassigned, created by this user
-                    and_(
-                        Interaction.project_id != None,
-                        Interaction.project.has(and_(
-                            Project.assigned_to == None,
-                            Project.created_by == subquery_user_id
-                        ))
-                    )
-                )
-            )
 
-        # Apply sorting
-        if sort_order == "newest":
-            query = query.order_by(Interaction.contact_date.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Interaction.contact_date.asc())
-        elif sort_order == "alphabetical":
-            # Sort by entity name alphabetically
-            query = query.order_by(
-                func.coalesce(Client.name, Lead.name, Project.project_name).asc()  # NEW: Include project name
-            ).outerjoin(Client, Interaction.client_id == Client.id)\
-             .outerjoin(Lead, Interaction.lead_id == Lead.id)\
-             .outerjoin(Project, Interaction.project_id == Project.id)  # NEW: Join projects
-
-        total = query.count()
-        interactions = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        response_data = {
-            "interactions": [{
-                "id": i.id,
-                "contact_date": i.contact_date.isoformat(),
-                "follow_up": i.follow_up.isoformat() if i.follow_up else None,
-                "summary": i.summary,
-                "outcome": i.outcome,
-                "notes": i.notes,
-                "client_id": i.client_id,
-                "lead_id": i.lead_id,
-                "project_id": i.project_id,  # NEW: Include project_id
-                "client_name": i.client.name if i.client else None,
-                "lead_name": i.lead.name if i.lead else None,
-                "project_name": i.project.project_name if i.project else None,  # NEW: Project name
-                "contact_person": (
-                    i.contact_person.strip() if i.contact_person and i.contact_person.strip()
-                    else i.client.contact_person if i.client
-                    else i.lead.contact_person if i.lead
-                    else i.project.primary_contact_name if i.project  # NEW: Project contact
-                    else None
+def _all_interactions_page(session, user, args) -> dict:
+    """One page of every interaction in the tenant, optionally filtered by owner."""
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+    user_email = args.get("user_email")
+    
+    if sort_order not in ["newest", "oldest", "alphabetical"]:
+        sort_order = "newest"
+
+    query = session.query(Interaction).options(
+        joinedload(Interaction.client).joinedload(Client.assigned_user),
+        joinedload(Interaction.client).joinedload(Client.created_by_user),
+        joinedload(Interaction.lead).joinedload(Lead.assigned_user),
+        joinedload(Interaction.lead).joinedload(Lead.created_by_user),
+        joinedload(Interaction.project).joinedload(Project.assigned_user),
+        joinedload(Interaction.project).joinedload(Project.created_by_user),
+    ).filter(
+        Interaction.tenant_id == user.tenant_id
+    )
+
+    # Filter by user if specified — use exclusive ownership to match assigned_to_name display logic:
+    # assigned_to takes priority; created_by is only the fallback when no one is assigned.
+    # This prevents the same interaction from appearing under multiple users.
+    if user_email:
+        subquery_user_id = session.query(User.id).filter(User.email == user_email).scalar_subquery()
+        query = query.filter(
+            or_(
+                # Owner of the linked record (indexed)
+                Interaction.effective_owner_id == subquery_user_id,
+                # Client: directly assigned to this user
+                and_(
+                    Interaction.client_id != None,
+                    Interaction.client.has(Client.assigned_user.has(User.email == user_email))
                 ),
-                "email": (
-                    i.email or
-                    (i.client.email if i.client else None) or
-                    (i.lead.email if i.lead else None) or
-                    (i.project.primary_contact_email if i.project else None)  # NEW: Project email
+                # Client: unassigned, created by this user
+                and_(
+                    Interaction.client_id != None,
+                    Interaction.client.has(and_(
+                        Client.assigned_to == None,
+                        Client.created_by_user.has(User.email == user_email)
+                    ))
                 ),
-                "phone": (
-                    i.phone or
-                    (i.client.phone if i.client else None) or
-                    (i.lead.phone if i.lead else None) or
-                    (i.project.primary_contact_phone if i.project else None)  # NEW: Project phone
+                # Lead: directly assigned to this user
+                and_(
+                    Interaction.lead_id != None,
+                    Interaction.lead.has(Lead.assigned_user.has(User.email == user_email))
                 ),
-                "followup_status": i.followup_status.value if i.followup_status else None,
-                "profile_link": (
-                    f"/clients/{i.client_id}" if i.client_id else
-                    f"/leads/{i.lead_id}" if i.lead_id else
-                    f"/projects/{i.project_id}" if i.project_id else None  # NEW: Project link
+                # Lead: unassigned, created by this user
+                and_(
+                    Interaction.lead_id != None,
+                    Interaction.lead.has(and_(
+                        Lead.assigned_to == None,
+                        Lead.created_by_user.has(User.email == user_email)
+                    ))
+                ),
+                # Project: directly assigned to this user
+                and_(
+                    Interaction.project_id != None,
+                    Interaction.project.has(Project.assigned_to == subquery_user_id)
                 ),
-                "assigned_to_name": (
-                    i.client.assigned_user.email if i.client and i.client.assigned_user
-                    else i.client.created_by_user.email if i.client and i.client.created_by_user
-                    else i.lead.assigned_user.email if i.lead and i.lead.assigned_user
-                    else i.lead.created_by_user.email if i.lead and i.lead.created_by_user
-                    else i.project.assigned_user.email if i.project and i.project.assigned_user
-                    else i.project.created_by_user.email if i.project and i.project.created_by_user
-                    else None
+                # Project: unassigned, created by this user
+                and_(
+                    Interaction.project_id != None,
+                    Interaction.project.has(and_(
+                        Project.assigned_to == None,
+                        Project.created_by == subquery_user_id
+                    ))
                 )
-            } for i in interactions],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order,
-            "user_email": user_email
-        }
-
-        response = jsonify(response_data)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    finally:
-        session.close()
\ No newline at end of file
+            )
+        )
+
+    # Apply sorting
+    if sort_order == "newest":
+        query = query.order_by(Interaction.contact_date.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Interaction.contact_date.asc())
+    elif sort_order == "alphabetical":
+        # Sort by entity name alphabetically
+        query = query.order_by(
+            func.coalesce(Client.name, Lead.name, Project.project_name).asc()  # NEW: Include project name
+        ).outerjoin(Client, Interaction.client_id == Client.id)\
+         .outerjoin(Lead, Interaction.lead_id == Lead.id)\
+         .outerjoin(Project, Interaction.project_id == Project.id)  # NEW: Join projects
+
+    totals = TotalCounter(allow_estimate=True)
+    interactions, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Interaction.contact_date, None, Interaction.id),
+        counter=totals
+    )
+
+    response_data = {
+        "interactions": [{
+            "id": i.id,
+            "contact_date": i.contact_date.isoformat(),
+            "follow_up": i.follow_up.isoformat() if i.follow_up else None,
+            "summary": i.summary,
+            "outcome": i.outcome,
+            "notes": i.notes,
+            "client_id": i.client_id,
+            "lead_id": i.lead_id,
+            "project_id": i.project_id,  # NEW: Include project_id
+            "client_name": i.client.name if i.client else None,
+            "lead_name": i.lead.name if i.lead else None,
+            "project_name": i.project.project_name if i.project else None,  # NEW: Project name
+            "contact_person": (
+                i.contact_person.strip() if i.contact_person and i.contact_person.strip()
+                else i.client.contact_person if i.client
+                else i.lead.contact_person if i.lead
+                else i.project.primary_contact_name if i.project  # NEW: Project contact
+                else None
+            ),
+            "email": (
+                i.email or
+                (i.client.email if i.client else None) or
+                (i.lead.email if i.lead else None) or
+                (i.project.primary_contact_email if i.project else None)  # NEW: Project email
+            ),
+            "phone": (
+                i.phone or
+                (i.client.phone if i.client else None) or
+                (i.lead.phone if i.lead else None) or
+                (i.project.primary_contact_phone if i.project else None)  # NEW: Project phone
+            ),
+            "followup_status": i.followup_status.value if i.followup_status else None,
+            "profile_link": (
+                f"/clients/{i.client_id}" if i.client_id else
+                f"/leads/{i.lead_id}" if i.lead_id else
+                f"/projects/{i.project_id}" if i.project_id else None  # NEW: Project link
+            ),
+            "assigned_to_name": (
+                i.client.assigned_user.email if i.client and i.client.assigned_user
+                else i.client.created_by_user.email if i.client and i.client.created_by_user
+                else i.lead.assigned_user.email if i.lead and i.lead.assigned_user
+                else i.lead.created_by_user.email if i.lead and i.lead.created_by_user
+                else i.project.assigned_user.email if i.project and i.project.assigned_user
+                else i.project.created_by_user.email if i.project and i.project.created_by_user
+                else None
+            )
+        } for i in interactions],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order,
+        "user_email": user_email
+    }
+    return response_data
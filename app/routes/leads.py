@@ -1,11 +1,14 @@
 from quart import Blueprint, request, jsonify
 from datetime import datetime
 from pydantic import ValidationError
-from app.models import Lead, ActivityLog, ActivityType, User
-from app.database import SessionLocal
+from app.models import Lead, ActivityType, User
+from app.database import SessionLocal, AsyncSessionLocal
 from app.utils.auth_utils import requires_auth
+from app.utils.pagination import paginate, keyset_for, PaginationError
+from app.utils.list_totals import TotalCounter
 from app.utils.email_utils import send_assignment_notification
 from app.utils.phone_utils import clean_phone_number
+from app.utils.activity_sink import log_activity
 from app.constants import PHONE_LABELS
 from app.schemas.leads import LeadCreateSchema, LeadUpdateSchema, LeadAssignSchema
 from sqlalchemy import or_, and_
@@ -18,80 +21,93 @@ leads_bp = Blueprint("leads", __name__, url_prefix="/api/leads")
 @leads_bp.route("/", methods=["GET"])
 @requires_auth()
 async def list_leads():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-        
-        # Validate sort order
-        if sort_order not in ["newest", "oldest", "alphabetical"]:
-            sort_order = "newest"
-
-        query = session.query(Lead).options(
-            joinedload(Lead.assigned_user),
-            joinedload(Lead.created_by_user)
-        ).filter(
-            Lead.tenant_id == user.tenant_id,
-            Lead.deleted_at == None,
-            or_(
-                Lead.assigned_to == user.id,
-                and_(
-                    Lead.assigned_to == None,
-                    Lead.created_by == user.id
-                )
-            )
-        )
-
-        # Apply sorting
-        if sort_order == "newest":
-            query = query.order_by(Lead.created_at.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Lead.created_at.asc())
-        elif sort_order == "alphabetical":
-            query = query.order_by(Lead.name.asc())
-
-        total = query.count()
-        leads = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        response = jsonify({
-            "leads": [{
-                "id": l.id,
-                "name": l.name,
-                "contact_person": l.contact_person,
-                "contact_title": l.contact_title,
-                "email": l.email,
-                "phone": l.phone,
-                "phone_label": l.phone_label,
-                "secondary_phone": l.secondary_phone,
-                "secondary_phone_label": l.secondary_phone_label,
-                "address": l.address,
-                "city": l.city,
-                "state": l.state,
-                "zip": l.zip,
-                "notes": l.notes,
-                "created_at": l.created_at.isoformat() + "Z",
-                "assigned_to": l.assigned_to,
-                "assigned_to_name": (
-                    l.assigned_user.email if l.assigned_user
-                    else l.created_by_user.email if l.created_by_user
-                    else None
-                ),
-                "lead_status": l.lead_status,
-                "lead_source": l.lead_source,
-                "converted_on": l.converted_on.isoformat() + "Z" if l.converted_on else None,
-                "type": l.type
-            } for l in leads],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order
-        })
+        data = await session.run_sync(_lead_list_page, request.user, request.args)
+        response = jsonify(data)
         response.headers["Cache-Control"] = "no-store"
         return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     finally:
-        session.close()
+        await session.close()
+
+
+def _lead_list_page(session, user, args) -> dict:
+    """One page of the user's leads (runs on the async session's connection)."""
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+    
+    # Validate sort order
+    if sort_order not in ["newest", "oldest", "alphabetical"]:
+        sort_order = "newest"
+
+    query = session.query(Lead).options(
+        joinedload(Lead.assigned_user),
+        joinedload(Lead.created_by_user)
+    ).filter(
+        Lead.tenant_id == user.tenant_id,
+        Lead.deleted_at == None,
+        or_(
+            Lead.assigned_to == user.id,
+            and_(
+                Lead.assigned_to == None,
+                Lead.created_by == user.id
+            )
+        )
+    )
+
+    # Apply sorting
+    if sort_order == "newest":
+        query = query.order_by(Lead.created_at.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Lead.created_at.asc())
+    elif sort_order == "alphabetical":
+        query = query.order_by(Lead.name.asc())
+
+    totals = TotalCounter()
+    leads, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Lead.created_at, Lead.name, Lead.id),
+        counter=totals
+    )
+
+    return {
+        "leads": [{
+            "id": l.id,
+            "name": l.name,
+            "contact_person": l.contact_person,
+            "contact_title": l.contact_title,
+            "email": l.email,
+            "phone": l.phone,
+            "phone_label": l.phone_label,
+            "secondary_phone": l.secondary_phone,
+            "secondary_phone_label": l.secondary_phone_label,
+            "address": l.address,
+            "city": l.city,
+            "state": l.state,
+            "zip": l.zip,
+            "notes": l.notes,
+            "created_at": l.created_at.isoformat() + "Z",
+            "assigned_to": l.assigned_to,
+            "assigned_to_name": (
+                l.assigned_user.email if l.assigned_user
+                else l.created_by_user.email if l.created_by_user
+                else None
+            ),
+            "lead_status": l.lead_status,
+            "lead_source": l.lead_source,
+            "converted_on": l.converted_on.isoformat() + "Z" if l.converted_on else None,
+            "type": l.type
+        } for l in leads],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order
+    }
 
 
 @leads_bp.route("", methods=["POST"])
@@ -172,7 +188,7 @@ async def get_lead(lead_id):
         if not lead:
             return jsonify({"error": "Lead not found"}), 404
 
-        log = ActivityLog(
+        log_activity(
             tenant_id=user.tenant_id,
             user_id=user.id,
             action=ActivityType.viewed,
@@ -180,8 +196,6 @@ async def get_lead(lead_id):
             entity_id=lead.id,
             description=f"Viewed lead '{lead.name}'"
         )
-        session.add(log)
-        session.commit()
 
         response = jsonify({
             "id": lead.id,
@@ -378,88 +392,100 @@ async def assign_lead(lead_id):
 @leads_bp.route("/all", methods=["GET"])
 @requires_auth(roles=["admin"])
 async def list_all_leads_admin():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        # Get pagination parameters
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-        user_email = request.args.get("user_email")  # Filter by specific user
-        
-        # Validate sort order
-        if sort_order not in ["newest", "oldest", "alphabetical"]:
-            sort_order = "newest"
+        data = await session.run_sync(_all_leads_page, request.user, request.args)
+        response = jsonify(data)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        await session.close()
 
-        query = session.query(Lead).options(
-            joinedload(Lead.assigned_user),
-            joinedload(Lead.created_by_user)
-        ).filter(
-            Lead.tenant_id == user.tenant_id,
-            Lead.deleted_at == None
-        )
 
-        # Filter by user if specified
-        if user_email:
-            query = query.filter(
-                or_(
-                    Lead.assigned_user.has(User.email == user_email),
-                    Lead.created_by_user.has(User.email == user_email)
-                )
+def _all_leads_page(session, user, args) -> dict:
+    """One page of every lead in the tenant, optionally filtered by owner."""
+    # Get pagination parameters
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+    user_email = args.get("user_email")  # Filter by specific user
+    
+    # Validate sort order
+    if sort_order not in ["newest", "oldest", "alphabetical"]:
+        sort_order = "newest"
+
+    query = session.query(Lead).options(
+        joinedload(Lead.assigned_user),
+        joinedload(Lead.created_by_user)
+    ).filter(
+        Lead.tenant_id == user.tenant_id,
+        Lead.deleted_at == None
+    )
+
+    # Filter by user if specified
+    if user_email:
+        query = query.filter(
+            or_(
+                Lead.assigned_user.has(User.email == user_email),
+                Lead.created_by_user.has(User.email == user_email)
             )
+        )
 
-        # Apply sorting
-        if sort_order == "newest":
-            query = query.order_by(Lead.created_at.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Lead.created_at.asc())
-        elif sort_order == "alphabetical":
-            query = query.order_by(Lead.name.asc())
-
-        total = query.count()
-        leads = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        response_data = {
-            "leads": [{
-                "id": l.id,
-                "name": l.name,
-                "contact_person": l.contact_person,
-                "contact_title": l.contact_title,
-                "email": l.email,
-                "phone": l.phone,
-                "phone_label": l.phone_label,
-                "secondary_phone": l.secondary_phone,
-                "secondary_phone_label": l.secondary_phone_label,
-                "address": l.address,
-                "city": l.city,
-                "state": l.state,
-                "zip": l.zip,
-                "notes": l.notes,
-                "assigned_to": l.assigned_to,
-                "created_at": l.created_at.isoformat() + "Z",
-                "lead_status": l.lead_status,
-                "lead_source": l.lead_source,
-                "converted_on": l.converted_on.isoformat() + "Z" if l.converted_on else None,
-                "type": l.type,
-                "assigned_to_name": (
-                    l.assigned_user.email if l.assigned_user
-                    else l.created_by_user.email if l.created_by_user
-                    else None
-                ),
-                "created_by_name": l.created_by_user.email if l.created_by_user else None,
-            } for l in leads],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order,
-            "user_email": user_email
-        }
-
-        response = jsonify(response_data)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    finally:
-        session.close()
+    # Apply sorting
+    if sort_order == "newest":
+        query = query.order_by(Lead.created_at.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Lead.created_at.asc())
+    elif sort_order == "alphabetical":
+        query = query.order_by(Lead.name.asc())
+
+    totals = TotalCounter(allow_estimate=True)
+    leads, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Lead.created_at, Lead.name, Lead.id),
+        counter=totals
+    )
+
+    response_data = {
+        "leads": [{
+            "id": l.id,
+            "name": l.name,
+            "contact_person": l.contact_person,
+            "contact_title": l.contact_title,
+            "email": l.email,
+            "phone": l.phone,
+            "phone_label": l.phone_label,
+            "secondary_phone": l.secondary_phone,
+            "secondary_phone_label": l.secondary_phone_label,
+            "address": l.address,
+            "city": l.city,
+            "state": l.state,
+            "zip": l.zip,
+            "notes": l.notes,
+            "assigned_to": l.assigned_to,
+            "created_at": l.created_at.isoformat() + "Z",
+            "lead_status": l.lead_status,
+            "lead_source": l.lead_source,
+            "converted_on": l.converted_on.isoformat() + "Z" if l.converted_on else None,
+            "type": l.type,
+            "assigned_to_name": (
+                l.assigned_user.email if l.assigned_user
+                else l.created_by_user.email if l.created_by_user
+                else None
+            ),
+            "created_by_name": l.created_by_user.email if l.created_by_user else None,
+        } for l in leads],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order,
+        "user_email": user_email
+    }
+    return response_data
 
 
 @leads_bp.route("/assigned", methods=["GET"])
@@ -1,11 +1,15 @@
 from quart import Blueprint, request, jsonify
 from datetime import datetime
 from pydantic import ValidationError
-from app.models import Project, ActivityLog, ActivityType, Client, Lead, User
-from app.database import SessionLocal
+from app.models import Project, ActivityType, Client, Lead, User
+from app.database import SessionLocal, AsyncSessionLocal
 from app.utils.auth_utils import requires_auth
+from app.utils.pagination import paginate, keyset_for, PaginationError
+from app.utils.list_totals import TotalCounter
+from app.utils import ownership  # noqa: F401  registers the effective-owner sync hook
 from app.utils.phone_utils import clean_phone_number  
 from app.utils.email_utils import send_assignment_notification
+from app.utils.activity_sink import log_activity
 from app.constants import PHONE_LABELS
 from app.schemas.projects import ProjectCreateSchema, ProjectUpdateSchema, ProjectAssignSchema
 from sqlalchemy.orm import joinedload
@@ -30,111 +34,88 @@ def parse_date_with_default_time(value):
 @projects_bp.route("/", methods=["GET"])
 @requires_auth()
 async def list_projects():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-
-        if sort_order not in ["newest", "oldest", "alphabetical"]:
-            sort_order = "newest"
-
-        query = session.query(Project).options(
-            joinedload(Project.client),
-            joinedload(Project.lead),
-            joinedload(Project.assigned_user)
-        ).filter(
-            Project.tenant_id == user.tenant_id,
-            Project.deleted_at == None
-        ).filter(
-            or_(
-                # Project is directly assigned to this user
-                Project.assigned_to == user.id,
-                # Project has no direct assignment — inherit from client/lead/created_by
-                and_(
-                    Project.assigned_to == None,
-                    or_(
-                        # Client-linked: visible if client assigned to user, or unassigned and created by user
-                        and_(
-                            Project.client_id != None,
-                            or_(
-                                Project.client.has(Client.assigned_to == user.id),
-                                and_(
-                                    Project.client.has(Client.assigned_to == None),
-                                    Project.client.has(Client.created_by == user.id)
-                                )
-                            )
-                        ),
-                        # Lead-linked: visible if lead assigned to user, or unassigned and created by user
-                        and_(
-                            Project.lead_id != None,
-                            or_(
-                                Project.lead.has(Lead.assigned_to == user.id),
-                                and_(
-                                    Project.lead.has(Lead.assigned_to == None),
-                                    Project.lead.has(Lead.created_by == user.id)
-                                )
-                            )
-                        ),
-                        # Standalone project: visible only if created by this user
-                        and_(
-                            Project.client_id == None,
-                            Project.lead_id == None,
-                            Project.created_by == user.id
-                        )
-                    )
-                )
-            )
-        )
-
-        # Sorting
-        if sort_order == "newest":
-            query = query.order_by(Project.created_at.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Project.created_at.asc())
-        elif sort_order == "alphabetical":
-            query = query.order_by(Project.project_name.asc())
-
-        total = query.count()
-        projects = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        response = jsonify({
-            "projects": [
-                {
-                    "id": p.id,
-                    "project_name": p.project_name,
-                    "type": p.type,
-                    "project_status": p.project_status,
-                    "project_description": p.project_description,
-                    "notes": p.notes,
-                    "project_start": p.project_start.isoformat() if p.project_start else None,
-                    "project_end": p.project_end.isoformat() if p.project_end else None,
-                    "project_worth": p.project_worth,
-                    "value_type": p.value_type or 'one_time',
-                    "client_id": p.client_id,
-                    "lead_id": p.lead_id,
-                    "client_name": p.client.name if p.client else None,
-                    "lead_name": p.lead.name if p.lead else None,
-                    "created_at": p.created_at.isoformat() if p.created_at else None,
-                    "primary_contact_name": p.primary_contact_name,
-                    "primary_contact_title": p.primary_contact_title,
-                    "primary_contact_email": p.primary_contact_email,
-                    "primary_contact_phone": p.primary_contact_phone,
-                    "primary_contact_phone_label": p.primary_contact_phone_label,
-                    "assigned_to": p.assigned_to,
-                    "assigned_to_name": p.assigned_user.email if p.assigned_user else None,
-                } for p in projects
-            ],
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order
-        })
+        data = await session.run_sync(_project_list_page, request.user, request.args)
+        response = jsonify(data)
         response.headers["Cache-Control"] = "no-store"
         return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     finally:
-        session.close()
+        await session.close()
+
+
+def _project_list_page(session, user, args) -> dict:
+    """One page of the user's projects (runs on the async session's connection)."""
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+
+    if sort_order not in ["newest", "oldest", "alphabetical"]:
+        sort_order = "newest"
+
+    query = session.query(Project).options(
+        joinedload(Project.client),
+        joinedload(Project.lead),
+        joinedload(Project.assigned_user)
+    ).filter(
+        Project.tenant_id == user.tenant_id,
+        Project.deleted_at == None
+    ).filter(
+        # Assigned user, else the linked client's/lead's owner, else the creator
+        Project.effective_owner_id == user.id
+    )
+
+    # Sorting
+    if sort_order == "newest":
+        query = query.order_by(Project.created_at.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Project.created_at.asc())
+    elif sort_order == "alphabetical":
+        query = query.order_by(Project.project_name.asc())
+
+    totals = TotalCounter()
+    projects, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Project.created_at, Project.project_name, Project.id),
+        counter=totals
+    )
+
+    return {
+        "projects": [
+            {
+                "id": p.id,
+                "project_name": p.project_name,
+                "type": p.type,
+                "project_status": p.project_status,
+                "project_description": p.project_description,
+                "notes": p.notes,
+                "project_start": p.project_start.isoformat() if p.project_start else None,
+                "project_end": p.project_end.isoformat() if p.project_end else None,
+                "project_worth": p.project_worth,
+                "value_type": p.value_type or 'one_time',
+                "client_id": p.client_id,
+                "lead_id": p.lead_id,
+                "client_name": p.client.name if p.client else None,
+                "lead_name": p.lead.name if p.lead else None,
+                "created_at": p.created_at.isoformat() if p.created_at else None,
+                "primary_contact_name": p.primary_contact_name,
+                "primary_contact_title": p.primary_contact_title,
+                "primary_contact_email": p.primary_contact_email,
+                "primary_contact_phone": p.primary_contact_phone,
+                "primary_contact_phone_label": p.primary_contact_phone_label,
+                "assigned_to": p.assigned_to,
+                "assigned_to_name": p.assigned_user.email if p.assigned_user else None,
+            } for p in projects
+        ],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order
+    }
 
 
 
@@ -159,7 +140,7 @@ async def get_project(project_id):
             return jsonify({"error": "Project not found"}), 404
 
         # 🆕 Add activity log for "Recently Touched"
-        log = ActivityLog(
+        log_activity(
             tenant_id=user.tenant_id,
             user_id=user.id,
             action=ActivityType.viewed,
@@ -167,8 +148,6 @@ async def get_project(project_id):
             entity_id=project.id,
             description=f"Viewed project '{project.project_name}'"
         )
-        session.add(log)
-        session.commit()
 
         return jsonify({
             "id": project.id,
@@ -404,122 +383,134 @@ async def get_project_interactions(project_id):
 @projects_bp.route("/all", methods=["GET"])
 @requires_auth(roles=["admin"])
 async def list_all_projects():
-    user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 20))
-        sort_order = request.args.get("sort", "newest")
-        user_email = request.args.get("user_email")
-        
-        if sort_order not in ["newest", "oldest", "alphabetical"]:
-            sort_order = "newest"
-
-        query = session.query(Project).options(
-            joinedload(Project.assigned_user),
-            joinedload(Project.client).joinedload(Client.assigned_user),
-            joinedload(Project.client).joinedload(Client.created_by_user),
-            joinedload(Project.lead).joinedload(Lead.assigned_user),
-            joinedload(Project.lead).joinedload(Lead.created_by_user),
-        ).filter(
-            Project.tenant_id == user.tenant_id
-        )
+        data = await session.run_sync(_all_projects_page, request.user, request.args)
+        response = jsonify(data)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        await session.close()
+
 
-        if user_email:
-            subquery_user_id = session.query(User.id).filter(User.email == user_email).scalar_subquery()
-            query = query.filter(
-                or_(
-                    # Client projects
-                    and_(
-                        Project.client_id != None,
-                        or_(
-                            Project.client.has(Client.assigned_user.has(User.email == user_email)),
-                            Project.client.has(Client.created_by_user.has(User.email == user_email))
-                        )
-                    ),
-                    # Lead projects
-                    and_(
-                        Project.lead_id != None,
-                        or_(
-                            Project.lead.has(Lead.assigned_user.has(User.email == user_email)),
-                            Project.lead.has(Lead.created_by_user.has(User.email == user_email))
-                        )
-                    ),
-                    # ✅ Unattached projects created by this user
-                    and_(
-                        Project.client_id == None,
-                        Project.lead_id == None,
-                        Project.created_by == subquery_user_id
+def _all_projects_page(session, user, args) -> dict:
+    """One page of every project in the tenant, optionally filtered by owner."""
+    page = int(args.get("page", 1))
+    per_page = int(args.get("per_page", 20))
+    sort_order = args.get("sort", "newest")
+    user_email = args.get("user_email")
+    
+    if sort_order not in ["newest", "oldest", "alphabetical"]:
+        sort_order = "newest"
+
+    query = session.query(Project).options(
+        joinedload(Project.assigned_user),
+        joinedload(Project.client).joinedload(Client.assigned_user),
+        joinedload(Project.client).joinedload(Client.created_by_user),
+        joinedload(Project.lead).joinedload(Lead.assigned_user),
+        joinedload(Project.lead).joinedload(Lead.created_by_user),
+    ).filter(
+        Project.tenant_id == user.tenant_id
+    )
+
+    if user_email:
+        subquery_user_id = session.query(User.id).filter(User.email == user_email).scalar_subquery()
+        query = query.filter(
+            or_(
+                # Client projects
+                and_(
+                    Project.client_id != None,
+                    or_(
+                        Project.client.has(Client.assigned_user.has(User.email == user_email)),
+                        Project.client.has(Client.created_by_user.has(User.email == user_email))
+                    )
+                ),
+                # Lead projects
+                and_(
+                    Project.lead_id != None,
+                    or_(
+                        Project.lead.has(Lead.assigned_user.has(User.email == user_email)),
+                        Project.lead.has(Lead.created_by_user.has(User.email == user_email))
                     )
+                ),
+                # ✅ Unattached projects created by this user
+                and_(
+                    Project.client_id == None,
+                    Project.lead_id == None,
+                    Project.created_by == subquery_user_id
                 )
             )
+        )
 
-        if sort_order == "newest":
-            query = query.order_by(Project.created_at.desc())
-        elif sort_order == "oldest":
-            query = query.order_by(Project.created_at.asc())
-        elif sort_order == "alphabetical":
-            query = query.order_by(Project.project_name.asc())
-
-        total = query.count()
-        projects = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        response_data = {
-            "projects": []
-        }
-
-        for p in projects:
-            # Project's own assigned_to takes priority over inherited client/lead assignment
-            if p.assigned_user:
-                assigned_to_email = p.assigned_user.email
-            elif p.client and p.client.assigned_user:
-                assigned_to_email = p.client.assigned_user.email
-            elif p.client and p.client.created_by_user:
-                assigned_to_email = p.client.created_by_user.email
-            elif p.lead and p.lead.assigned_user:
-                assigned_to_email = p.lead.assigned_user.email
-            elif p.lead and p.lead.created_by_user:
-                assigned_to_email = p.lead.created_by_user.email
-            else:
-                assigned_to_email = None
-
-            response_data["projects"].append({
-                "id": p.id,
-                "project_name": p.project_name,
-                "type": p.type,
-                "project_status": p.project_status,
-                "project_description": p.project_description,
-                "notes": p.notes,
-                "project_start": p.project_start.isoformat() if p.project_start else None,
-                "project_end": p.project_end.isoformat() if p.project_end else None,
-                "project_worth": p.project_worth,
-                "client_id": p.client_id,
-                "lead_id": p.lead_id,
-                "client_name": p.client.name if p.client else None,
-                "lead_name": p.lead.name if p.lead else None,
-                "assigned_to_email": assigned_to_email,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-                # NEW: Include contact fields in admin view
-                "primary_contact_name": p.primary_contact_name,
-                "primary_contact_title": p.primary_contact_title,
-                "primary_contact_email": p.primary_contact_email,
-                "primary_contact_phone": p.primary_contact_phone,
-                "primary_contact_phone_label": p.primary_contact_phone_label
-            })
-
-        response_data.update({
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "sort_order": sort_order,
-            "user_email": user_email
+    if sort_order == "newest":
+        query = query.order_by(Project.created_at.desc())
+    elif sort_order == "oldest":
+        query = query.order_by(Project.created_at.asc())
+    elif sort_order == "alphabetical":
+        query = query.order_by(Project.project_name.asc())
+
+    totals = TotalCounter(allow_estimate=True)
+    projects, total, next_cursor = paginate(
+        query, args, page, per_page, sort_order,
+        keyset_for(sort_order, Project.created_at, Project.project_name, Project.id),
+        counter=totals
+    )
+
+    response_data = {
+        "projects": []
+    }
+
+    for p in projects:
+        # Project's own assigned_to takes priority over inherited client/lead assignment
+        if p.assigned_user:
+            assigned_to_email = p.assigned_user.email
+        elif p.client and p.client.assigned_user:
+            assigned_to_email = p.client.assigned_user.email
+        elif p.client and p.client.created_by_user:
+            assigned_to_email = p.client.created_by_user.email
+        elif p.lead and p.lead.assigned_user:
+            assigned_to_email = p.lead.assigned_user.email
+        elif p.lead and p.lead.created_by_user:
+            assigned_to_email = p.lead.created_by_user.email
+        else:
+            assigned_to_email = None
+
+        response_data["projects"].append({
+            "id": p.id,
+            "project_name": p.project_name,
+            "type": p.type,
+            "project_status": p.project_status,
+            "project_description": p.project_description,
+            "notes": p.notes,
+            "project_start": p.project_start.isoformat() if p.project_start else None,
+            "project_end": p.project_end.isoformat() if p.project_end else None,
+            "project_worth": p.project_worth,
+            "client_id": p.client_id,
+            "lead_id": p.lead_id,
+            "client_name": p.client.name if p.client else None,
+            "lead_name": p.lead.name if p.lead else None,
+            "assigned_to_email": assigned_to_email,
+            "created_at": p.created_at.isoformat() if p.created_at else None,
+            # NEW: Include contact fields in admin view
+            "primary_contact_name": p.primary_contact_name,
+            "primary_contact_title": p.primary_contact_title,
+            "primary_contact_email": p.primary_contact_email,
+            "primary_contact_phone": p.primary_contact_phone,
+            "primary_contact_phone_label": p.primary_contact_phone_label
         })
 
-        response = jsonify(response_data)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    finally:
-        session.close()
+    response_data.update({
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total_estimated": totals.estimated,
+        "sort_order": sort_order,
+        "user_email": user_email
+    })
+    return response_data
 
 @projects_bp.route("/by-client/<int:client_id>", methods=["GET"])
 @requires_auth()
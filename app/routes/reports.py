@@ -1,14 +1,62 @@
 from quart import Blueprint, jsonify, request
-from sqlalchemy import func, and_, or_, case, distinct, cast, Date
+from sqlalchemy import func, and_, or_, case, distinct, cast, Date, select, union
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
-from app.database import SessionLocal
-from app.models import Lead, Project, Client, Interaction, User, ActivityLog, Subscription
+from app.database import AsyncSessionLocal
+from app.models import (
+    Lead, Project, Client, Interaction, User, ActivityLog, ActivityDailyRollup, Subscription, ReportDailyFact
+)
 from app.utils.auth_utils import requires_auth
+from app.utils.report_utils import AggregateQuery, days_between
+from app.utils.report_snapshots import get_snapshot_window, merged_groups
 from dateutil.parser import parse as parse_date
 
 reports_bp = Blueprint("reports", __name__, url_prefix="/api/reports")
 
 
+async def _summary_counts(session, lead_filters, project_filters, window=None):
+    """
+    Lead/project headline numbers: one query per entity, plus one per
+    entity over report_daily_facts when a snapshot window is available.
+    """
+    fact = ReportDailyFact
+
+    lead_statements = [AggregateQuery(*lead_filters, *([Lead.created_at >= window.live_since] if window else []))
+        .count("total", Lead.id)
+        .count("converted", Lead.id, Lead.lead_status == "won")
+        .statement()]
+    project_statements = [AggregateQuery(*project_filters, *([Project.created_at >= window.live_since] if window else []))
+        .count("total", Project.id)
+        .count("won", Project.id, Project.project_status == "completed")
+        .count("lost", Project.id, Project.project_status == "lost")
+        .sum("won_value", Project.project_worth, Project.project_status == "completed")
+        .statement()]
+
+    if window:
+        lead_statements.append(AggregateQuery(*window.fact_filters("lead"), fact.is_deleted == False)
+            .sum("total", fact.item_count)
+            .sum("converted", fact.item_count, fact.status == "won")
+            .statement())
+        project_statements.append(AggregateQuery(*window.fact_filters("project"))
+            .sum("total", fact.item_count)
+            .sum("won", fact.item_count, fact.status == "completed")
+            .sum("lost", fact.item_count, fact.status == "lost")
+            .sum("won_value", fact.total_value, fact.status == "completed")
+            .statement())
+
+    lead_total, lead_converted = (await merged_groups(session, lead_statements))[()]
+    project_total, project_won, project_lost, won_value = (await merged_groups(session, project_statements))[()]
+
+    return {
+        "lead_count": lead_total,
+        "converted_leads": lead_converted,
+        "project_count": project_total,
+        "won_projects": project_won,
+        "lost_projects": project_lost,
+        "total_won_value": won_value
+    }
+
+
 # ============================================================================
 # LEGACY ENDPOINTS (keeping for backwards compatibility)
 # ============================================================================
@@ -17,7 +65,7 @@ reports_bp = Blueprint("reports", __name__, url_prefix="/api/reports")
 @requires_auth()
 async def get_reports():
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -36,52 +84,20 @@ async def get_reports():
             filters.append(Lead.created_at <= dt_end)
             project_filters.append(Project.created_at <= dt_end)
 
-        # Total leads
-        total_leads = session.query(func.count(Lead.id)).filter(*filters).scalar()
-
-        # Converted leads
-        converted_leads = session.query(func.count(Lead.id)).filter(
-            *filters,
-            Lead.lead_status == "won"
-        ).scalar()
-
-        # Total projects
-        total_projects = session.query(func.count(Project.id)).filter(*project_filters).scalar()
-
-        # Won projects
-        won_projects = session.query(func.count(Project.id)).filter(
-            *project_filters,
-            Project.project_status == "completed"
-        ).scalar()
-
-        # Lost projects
-        lost_projects = session.query(func.count(Project.id)).filter(
-            *project_filters,
-            Project.project_status == "lost"
-        ).scalar()
-
-        # Total won value
-        total_won_value = session.query(func.coalesce(func.sum(Project.project_worth), 0)).filter(
-            *project_filters,
-            Project.project_status == "completed"
-        ).scalar()
-
-        return jsonify({
-            "lead_count": total_leads,
-            "converted_leads": converted_leads,
-            "project_count": total_projects,
-            "won_projects": won_projects,
-            "lost_projects": lost_projects,
-            "total_won_value": total_won_value
-        })
+        window = await get_snapshot_window(
+            session, tenant_id,
+            parse_date(start_date) if start_date else None,
+            parse_date(end_date) if end_date else None
+        )
+        return jsonify(await _summary_counts(session, filters, project_filters, window))
     finally:
-        session.close()
+        await session.close()
 
 @reports_bp.route("/summary", methods=["POST"])
 @requires_auth()
 async def summary_report():
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         data = await request.get_json()
@@ -101,32 +117,14 @@ async def summary_report():
             filters.append(Lead.created_at <= dt_end)
             project_filters.append(Project.created_at <= dt_end)
 
-        total_leads = session.query(func.count(Lead.id)).filter(*filters).scalar()
-        converted_leads = session.query(func.count(Lead.id)).filter(
-            *filters, Lead.lead_status == "won"
-        ).scalar()
-
-        total_projects = session.query(func.count(Project.id)).filter(*project_filters).scalar()
-        won_projects = session.query(func.count(Project.id)).filter(
-            *project_filters, Project.project_status == "completed"
-        ).scalar()
-        lost_projects = session.query(func.count(Project.id)).filter(
-            *project_filters, Project.project_status == "lost"
-        ).scalar()
-        total_won_value = session.query(func.coalesce(func.sum(Project.project_worth), 0)).filter(
-            *project_filters, Project.project_status == "completed"
-        ).scalar()
-
-        return jsonify({
-            "lead_count": total_leads,
-            "converted_leads": converted_leads,
-            "project_count": total_projects,
-            "won_projects": won_projects,
-            "lost_projects": lost_projects,
-            "total_won_value": total_won_value
-        })
+        window = await get_snapshot_window(
+            session, tenant_id,
+            parse_date(start_date) if start_date else None,
+            parse_date(end_date) if end_date else None
+        )
+        return jsonify(await _summary_counts(session, filters, project_filters, window))
     finally:
-        session.close()
+        await session.close()
 
 
 # ============================================================================
@@ -139,7 +137,7 @@ async def summary_report():
 async def sales_pipeline():
     """Tracks leads by stage and value."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -151,56 +149,79 @@ async def sales_pipeline():
             lead_filters.append(Lead.created_at >= parse_date(start_date))
         if end_date:
             lead_filters.append(Lead.created_at <= parse_date(end_date))
+        assignee = None
         if user_filter and "admin" in [r.name for r in user.roles]:
-            lead_filters.append(Lead.assigned_to == int(user_filter))
-        
-        lead_pipeline = session.query(
-            Lead.lead_status,
-            func.count(Lead.id).label('count')
-        ).filter(*lead_filters).group_by(Lead.lead_status).all()
+            assignee = int(user_filter)
+            lead_filters.append(Lead.assigned_to == assignee)
         
         project_filters = [Project.tenant_id == tenant_id, Project.deleted_at == None]
         if start_date:
             project_filters.append(Project.created_at >= parse_date(start_date))
         if end_date:
             project_filters.append(Project.created_at <= parse_date(end_date))
-        
-        project_pipeline = session.query(
-            Project.project_status,
-            func.count(Project.id).label('count'),
-            func.coalesce(func.sum(Project.project_worth), 0).label('total_value')
-        ).filter(*project_filters).group_by(Project.project_status).all()
 
-        # Value type breakdown per project status
-        project_vtype = session.query(
+        window = await get_snapshot_window(
+            session, tenant_id,
+            parse_date(start_date) if start_date else None,
+            parse_date(end_date) if end_date else None
+        )
+        if window:
+            lead_filters.append(Lead.created_at >= window.live_since)
+            project_filters.append(Project.created_at >= window.live_since)
+
+        lead_statements = [select(
+            Lead.lead_status,
+            func.count(Lead.id).label('count')
+        ).where(*lead_filters).group_by(Lead.lead_status)]
+
+        # Value type breakdown per project status; status totals are summed from it
+        project_statements = [select(
             Project.project_status,
             Project.value_type,
             func.count(Project.id).label('count'),
             func.coalesce(func.sum(Project.project_worth), 0).label('total_value')
-        ).filter(*project_filters).group_by(Project.project_status, Project.value_type).all()
-
+        ).where(*project_filters).group_by(Project.project_status, Project.value_type)]
+
+        if window:
+            fact = ReportDailyFact
+            lead_fact_filters = window.fact_filters("lead") + [fact.is_deleted == False]
+            if assignee is not None:
+                lead_fact_filters.append(fact.assigned_to == assignee)
+            lead_statements.append(select(
+                fact.status, func.sum(fact.item_count)
+            ).where(*lead_fact_filters).group_by(fact.status))
+            project_statements.append(select(
+                fact.status, fact.value_type, func.sum(fact.item_count), func.sum(fact.total_value)
+            ).where(*window.fact_filters("project"), fact.is_deleted == False).group_by(fact.status, fact.value_type))
+
+        lead_pipeline = await merged_groups(session, lead_statements, key_len=1)
+        project_vtype = await merged_groups(session, project_statements, key_len=2)
+
+        project_pipeline = {}
         vtype_by_status = {}
-        for row in project_vtype:
-            status = row.project_status
-            if status not in vtype_by_status:
-                vtype_by_status[status] = {}
-            vt = row.value_type or 'one_time'
+        for (status, value_type), (count, total_value) in project_vtype.items():
+            totals = project_pipeline.setdefault(status, [0, 0])
+            totals[0] += count
+            totals[1] += total_value
+            vt = value_type or 'one_time'
+            vtype_by_status.setdefault(status, {})
+            existing = vtype_by_status[status].get(vt)
             vtype_by_status[status][vt] = {
-                'count': row.count,
-                'total_value': float(row.total_value)
+                'count': count + (existing['count'] if existing else 0),
+                'total_value': float(total_value) + (existing['total_value'] if existing else 0)
             }
 
         return jsonify({
-            "leads": [{"status": row.lead_status, "count": row.count} for row in lead_pipeline],
+            "leads": [{"status": status, "count": count} for (status,), (count,) in lead_pipeline.items()],
             "projects": [{
-                "status": row.project_status,
-                "count": row.count,
-                "total_value": float(row.total_value),
-                "by_value_type": vtype_by_status.get(row.project_status, {})
-            } for row in project_pipeline]
+                "status": status,
+                "count": count,
+                "total_value": float(total_value),
+                "by_value_type": vtype_by_status.get(status, {})
+            } for status, (count, total_value) in project_pipeline.items()]
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 2. LEAD SOURCE REPORT
@@ -209,7 +230,7 @@ async def sales_pipeline():
 async def lead_source_report():
     """Shows which sources bring in the best leads and highest conversions."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -222,24 +243,42 @@ async def lead_source_report():
         if end_date:
             filters.append(Lead.created_at <= parse_date(end_date))
         
-        results = session.query(
-            Lead.lead_source,
-            func.count(Lead.id).label('total_leads'),
-            func.sum(case((Lead.lead_status == 'won', 1), else_=0)).label('converted'),
-            func.sum(case((Lead.lead_status == 'qualified', 1), else_=0)).label('qualified')
-        ).filter(*filters).group_by(Lead.lead_source).all()
-        
+        window = await get_snapshot_window(
+            session, tenant_id,
+            parse_date(start_date) if start_date else None,
+            parse_date(end_date) if end_date else None
+        )
+        if window:
+            filters.append(Lead.created_at >= window.live_since)
+
+        statements = [AggregateQuery(*filters)
+            .group_by(Lead.lead_source)
+            .count("total_leads", Lead.id)
+            .count("converted", Lead.id, Lead.lead_status == 'won')
+            .count("qualified", Lead.id, Lead.lead_status == 'qualified')
+            .statement()]
+        if window:
+            fact = ReportDailyFact
+            statements.append(AggregateQuery(*window.fact_filters("lead"), or_(fact.is_deleted == False, fact.status == 'won'))
+                .group_by(fact.source)
+                .sum("total_leads", fact.item_count)
+                .sum("converted", fact.item_count, fact.status == 'won')
+                .sum("qualified", fact.item_count, fact.status == 'qualified')
+                .statement())
+
+        results = await merged_groups(session, statements, key_len=1)
+
         return jsonify({
             "sources": [{
-                "source": row.lead_source or "Unknown",
-                "total_leads": row.total_leads,
-                "converted": row.converted,
-                "qualified": row.qualified,
-                "conversion_rate": round((row.converted / row.total_leads * 100), 2) if row.total_leads > 0 else 0
-            } for row in results]
+                "source": source or "Unknown",
+                "total_leads": total_leads,
+                "converted": converted,
+                "qualified": qualified,
+                "conversion_rate": round((converted / total_leads * 100), 2) if total_leads > 0 else 0
+            } for (source,), (total_leads, converted, qualified) in results.items()]
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 3. CONVERSION RATE REPORT
@@ -248,7 +287,7 @@ async def lead_source_report():
 async def conversion_rate_report():
     """Measures how well leads move through funnel and who's closing them."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -261,33 +300,41 @@ async def conversion_rate_report():
         if end_date:
             filters.append(Lead.created_at <= parse_date(end_date))
         
-        total_leads = session.query(func.count(Lead.id)).filter(*filters).scalar()
-        converted_leads = session.query(func.count(Lead.id)).filter(*filters, Lead.lead_status == 'won').scalar()
+        # Totals and average days to convert in one pass
+        won = Lead.lead_status == 'won'
+        overall = await AggregateQuery(*filters)\
+            .count("total", Lead.id)\
+            .count("converted", Lead.id, won)\
+            .avg("avg_days", days_between(session.bind.dialect.name, Lead.created_at, Lead.converted_on),
+                 won, Lead.converted_on != None)\
+            .one(session)
+        total_leads = overall.total
+        converted_leads = overall.converted
+        avg_days = overall.avg_days
         overall_rate = round((converted_leads / total_leads * 100), 2) if total_leads > 0 else 0
 
         by_user = []
         if "admin" in [r.name for r in user.roles]:
-            user_stats = session.query(
-                Lead.assigned_to, User.email,
-                func.count(Lead.id).label('total'),
-                func.sum(case((Lead.lead_status == 'won', 1), else_=0)).label('converted')
-            ).join(User, Lead.assigned_to == User.id).filter(*filters).group_by(Lead.assigned_to, User.email).all()
-            
+            # Outer join keeps the unassigned (NULL) group in the same query
+            user_stats = await AggregateQuery(*filters)\
+                .group_by(Lead.assigned_to, User.email)\
+                .outerjoin(User, Lead.assigned_to == User.id)\
+                .count("total", Lead.id)\
+                .count("converted", Lead.id, won)\
+                .all(session)
+
             by_user = [{
                 "user_id": row.assigned_to,
                 "user_email": row.email,
                 "total_leads": row.total,
                 "converted": row.converted,
                 "conversion_rate": round((row.converted / row.total * 100), 2) if row.total > 0 else 0
-            } for row in user_stats]
+            } for row in user_stats if row.assigned_to is not None]
 
             # Include unassigned leads so totals add up
-            unassigned_total = session.query(func.count(Lead.id)).filter(
-                *filters, Lead.assigned_to == None
-            ).scalar() or 0
-            unassigned_converted = session.query(func.count(Lead.id)).filter(
-                *filters, Lead.assigned_to == None, Lead.lead_status == 'won'
-            ).scalar() or 0
+            unassigned = next((row for row in user_stats if row.assigned_to is None), None)
+            unassigned_total = unassigned.total if unassigned else 0
+            unassigned_converted = unassigned.converted if unassigned else 0
             if unassigned_total > 0:
                 by_user.append({
                     "user_id": None,
@@ -296,24 +343,7 @@ async def conversion_rate_report():
                     "converted": unassigned_converted,
                     "conversion_rate": round((unassigned_converted / unassigned_total * 100), 2) if unassigned_total > 0 else 0
                 })
-        
-        # Calculate average days to convert (database-agnostic)
-        # PostgreSQL: EXTRACT(EPOCH FROM (date1 - date2)) / 86400
-        # SQLite: julianday(date1) - julianday(date2)
-        from app.config import SQLALCHEMY_DATABASE_URI
-        if 'postgresql' in SQLALCHEMY_DATABASE_URI or 'postgres' in SQLALCHEMY_DATABASE_URI:
-            # PostgreSQL approach: EXTRACT(EPOCH FROM (converted_on - created_at)) / 86400
-            avg_days = session.query(
-                func.avg(
-                    func.extract('epoch', Lead.converted_on - Lead.created_at) / 86400
-                )
-            ).filter(*filters, Lead.lead_status == 'won', Lead.converted_on != None).scalar()
-        else:
-            # SQLite approach: julianday
-            avg_days = session.query(
-                func.avg(func.julianday(Lead.converted_on) - func.julianday(Lead.created_at))
-            ).filter(*filters, Lead.lead_status == 'won', Lead.converted_on != None).scalar()
-        
+
         return jsonify({
             "overall": {
                 "total_leads": total_leads,
@@ -324,7 +354,7 @@ async def conversion_rate_report():
             "by_user": by_user
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 4. REVENUE BY CLIENT REPORT
@@ -333,7 +363,7 @@ async def conversion_rate_report():
 async def revenue_by_client():
     """Aggregates all project totals per client, with value_type breakdown."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -346,26 +376,26 @@ async def revenue_by_client():
         if end_date:
             filters.append(Project.created_at <= parse_date(end_date))
 
-        client_revenue = session.query(
+        client_revenue = (await session.execute(select(
             Client.id, Client.name,
             func.count(Project.id).label('project_count'),
             func.coalesce(func.sum(case((Project.project_status == 'completed', Project.project_worth), else_=0)), 0).label('won_value'),
             func.coalesce(func.sum(case((Project.project_status == 'active', Project.project_worth), else_=0)), 0).label('pending_value'),
             func.coalesce(func.sum(Project.project_worth), 0).label('total_value')
-        ).join(Project, Client.id == Project.client_id).filter(*filters).group_by(
+        ).join(Project, Client.id == Project.client_id).where(*filters).group_by(
             Client.id, Client.name
-        ).order_by(func.sum(Project.project_worth).desc()).limit(limit).all()
+        ).order_by(func.sum(Project.project_worth).desc()).limit(limit))).all()
 
         client_ids = [row.id for row in client_revenue]
 
         # Per-client value_type breakdown for won projects
-        vtype_rows = session.query(
+        vtype_rows = (await session.execute(select(
             Project.client_id,
             Project.value_type,
             func.coalesce(func.sum(case((Project.project_status == 'completed', Project.project_worth), else_=0)), 0).label('won_value'),
-        ).filter(*filters, Project.client_id.in_(client_ids)).group_by(
+        ).where(*filters, Project.client_id.in_(client_ids)).group_by(
             Project.client_id, Project.value_type
-        ).all()
+        ))).all()
 
         vtype_map = {}
         for row in vtype_rows:
@@ -393,7 +423,7 @@ async def revenue_by_client():
             } for row in client_revenue]
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 5. USER ACTIVITY REPORT
@@ -401,7 +431,7 @@ async def revenue_by_client():
 @requires_auth(roles=["admin"])
 async def user_activity_report():
     """Tracks each team member's engagement. Admin only."""
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         user = request.user
         tenant_id = user.tenant_id
@@ -414,46 +444,72 @@ async def user_activity_report():
         if end_date:
             date_filter.append(Interaction.contact_date <= parse_date(end_date))
         
-        users = session.query(User).filter(User.tenant_id == tenant_id, User.is_active == True).all()
-        
-        user_stats = []
-        for u in users:
-            interaction_count = session.query(func.count(Interaction.id)).filter(
-                Interaction.tenant_id == tenant_id,
-                or_(
-                    Interaction.client_id.in_(session.query(Client.id).filter(Client.assigned_to == u.id, Client.tenant_id == tenant_id)),
-                    Interaction.lead_id.in_(session.query(Lead.id).filter(Lead.assigned_to == u.id, Lead.tenant_id == tenant_id))
-                ),
-                *date_filter
-            ).scalar()
-            
-            leads_assigned = session.query(func.count(Lead.id)).filter(
-                Lead.tenant_id == tenant_id, Lead.assigned_to == u.id, Lead.deleted_at == None
-            ).scalar()
-            
-            clients_assigned = session.query(func.count(Client.id)).filter(
-                Client.tenant_id == tenant_id, Client.assigned_to == u.id, Client.deleted_at == None
-            ).scalar()
-            
-            activity_count = session.query(func.count(ActivityLog.id)).filter(
-                ActivityLog.tenant_id == tenant_id,
-                ActivityLog.user_id == u.id,
-                *([ActivityLog.timestamp >= parse_date(start_date)] if start_date else []),
-                *([ActivityLog.timestamp <= parse_date(end_date)] if end_date else [])
-            ).scalar()
-            
-            user_stats.append({
-                "user_id": u.id,
-                "email": u.email,
-                "interactions": interaction_count,
-                "leads_assigned": leads_assigned,
-                "clients_assigned": clients_assigned,
-                "activity_count": activity_count
-            })
-        
+        users = (await session.execute(select(User.id, User.email).where(
+            User.tenant_id == tenant_id, User.is_active == True
+        ))).all()
+
+        # Fixed number of grouped queries regardless of team size.
+        # An interaction belongs to a user if its client or its lead is
+        # assigned to them; UNION drops the duplicate when both are.
+        via_client = select(
+            Interaction.id.label("interaction_id"), Client.assigned_to.label("user_id")
+        ).join(Client, Interaction.client_id == Client.id).where(
+            Interaction.tenant_id == tenant_id, Client.tenant_id == tenant_id, Client.assigned_to != None, *date_filter
+        )
+        via_lead = select(
+            Interaction.id.label("interaction_id"), Lead.assigned_to.label("user_id")
+        ).join(Lead, Interaction.lead_id == Lead.id).where(
+            Interaction.tenant_id == tenant_id, Lead.tenant_id == tenant_id, Lead.assigned_to != None, *date_filter
+        )
+        owned = union(via_client, via_lead).subquery()
+        interaction_counts = dict((await session.execute(
+            select(owned.c.user_id, func.count()).group_by(owned.c.user_id)
+        )).all())
+
+        lead_counts = dict((await session.execute(select(
+            Lead.assigned_to, func.count(Lead.id)
+        ).where(
+            Lead.tenant_id == tenant_id, Lead.assigned_to != None, Lead.deleted_at == None
+        ).group_by(Lead.assigned_to))).all())
+
+        client_counts = dict((await session.execute(select(
+            Client.assigned_to, func.count(Client.id)
+        ).where(
+            Client.tenant_id == tenant_id, Client.assigned_to != None, Client.deleted_at == None
+        ).group_by(Client.assigned_to))).all())
+
+        activity_counts = dict((await session.execute(select(
+            ActivityLog.user_id, func.count(ActivityLog.id)
+        ).where(
+            ActivityLog.tenant_id == tenant_id,
+            *([ActivityLog.timestamp >= parse_date(start_date)] if start_date else []),
+            *([ActivityLog.timestamp <= parse_date(end_date)] if end_date else [])
+        ).group_by(ActivityLog.user_id))).all())
+
+        # History past the retention window only survives as daily roll-ups.
+        # end_date parses to midnight, so as with raw rows its own day is excluded.
+        rolled_up = (await session.execute(select(
+            ActivityDailyRollup.user_id, func.sum(ActivityDailyRollup.event_count)
+        ).where(
+            ActivityDailyRollup.tenant_id == tenant_id,
+            *([ActivityDailyRollup.day >= parse_date(start_date).date()] if start_date else []),
+            *([ActivityDailyRollup.day < parse_date(end_date).date()] if end_date else [])
+        ).group_by(ActivityDailyRollup.user_id))).all()
+        for user_id, events in rolled_up:
+            activity_counts[user_id] = activity_counts.get(user_id, 0) + events
+
+        user_stats = [{
+            "user_id": u.id,
+            "email": u.email,
+            "interactions": interaction_counts.get(u.id, 0),
+            "leads_assigned": lead_counts.get(u.id, 0),
+            "clients_assigned": client_counts.get(u.id, 0),
+            "activity_count": activity_counts.get(u.id, 0)
+        } for u in users]
+
         return jsonify({"users": user_stats})
     finally:
-        session.close()
+        await session.close()
 
 
 # 6. FOLLOW-UP / INACTIVITY REPORT
@@ -462,7 +518,7 @@ async def user_activity_report():
 async def follow_up_report():
     """Highlights contacts overdue for outreach or with no recent activity."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         now = datetime.utcnow()
@@ -475,46 +531,46 @@ async def follow_up_report():
             Interaction.followup_status.in_(['pending', 'rescheduled'])
         ]
         
-        overdue = session.query(
+        overdue = (await session.execute(select(
             Interaction.id, Interaction.client_id, Interaction.lead_id,
             Interaction.follow_up, Interaction.summary,
             Client.name.label('client_name'), Lead.name.label('lead_name')
         ).outerjoin(Client, Interaction.client_id == Client.id).outerjoin(
             Lead, Interaction.lead_id == Lead.id
-        ).filter(*overdue_filters).order_by(Interaction.follow_up.asc()).all()
+        ).where(*overdue_filters).order_by(Interaction.follow_up.asc()))).all()
         
         inactive_threshold = now - timedelta(days=days_threshold)
         
-        recent_client_interactions = session.query(distinct(Interaction.client_id)).filter(
+        recent_client_interactions = select(distinct(Interaction.client_id)).where(
             Interaction.tenant_id == tenant_id,
             Interaction.client_id != None,
             Interaction.contact_date >= inactive_threshold
         ).subquery()
         
-        inactive_clients = session.query(
+        inactive_clients = (await session.execute(select(
             Client.id, Client.name,
             func.max(Interaction.contact_date).label('last_interaction')
-        ).outerjoin(Interaction, Client.id == Interaction.client_id).filter(
+        ).outerjoin(Interaction, Client.id == Interaction.client_id).where(
             Client.tenant_id == tenant_id,
             Client.deleted_at == None,
             ~Client.id.in_(recent_client_interactions)
-        ).group_by(Client.id, Client.name).all()
+        ).group_by(Client.id, Client.name))).all()
         
-        recent_lead_interactions = session.query(distinct(Interaction.lead_id)).filter(
+        recent_lead_interactions = select(distinct(Interaction.lead_id)).where(
             Interaction.tenant_id == tenant_id,
             Interaction.lead_id != None,
             Interaction.contact_date >= inactive_threshold
         ).subquery()
         
-        inactive_leads = session.query(
+        inactive_leads = (await session.execute(select(
             Lead.id, Lead.name,
             func.max(Interaction.contact_date).label('last_interaction')
-        ).outerjoin(Interaction, Lead.id == Interaction.lead_id).filter(
+        ).outerjoin(Interaction, Lead.id == Interaction.lead_id).where(
             Lead.tenant_id == tenant_id,
             Lead.deleted_at == None,
             Lead.lead_status.in_(['open', 'qualified', 'proposal']),
             ~Lead.id.in_(recent_lead_interactions)
-        ).group_by(Lead.id, Lead.name).all()
+        ).group_by(Lead.id, Lead.name))).all()
         
         return jsonify({
             "overdue_follow_ups": [{
@@ -540,7 +596,7 @@ async def follow_up_report():
             } for row in inactive_leads]
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 7. CLIENT RETENTION REPORT
@@ -549,7 +605,7 @@ async def follow_up_report():
 async def client_retention_report():
     """Shows how many clients renewed, stayed active, or dropped off over time."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -561,25 +617,25 @@ async def client_retention_report():
         if end_date:
             filters.append(Client.created_at <= parse_date(end_date))
         
-        status_breakdown = session.query(
+        status_breakdown = (await session.execute(select(
             Client.status, func.count(Client.id).label('count')
-        ).filter(*filters, Client.deleted_at == None).group_by(Client.status).all()
+        ).where(*filters, Client.deleted_at == None).group_by(Client.status))).all()
         
-        churned_count = session.query(func.count(Client.id)).filter(
+        churned_count = await session.scalar(select(func.count(Client.id)).where(
             Client.tenant_id == tenant_id,
             Client.deleted_at != None,
             *([Client.deleted_at >= parse_date(start_date)] if start_date else []),
             *([Client.deleted_at <= parse_date(end_date)] if end_date else [])
-        ).scalar()
+        ))
         
-        total_active = session.query(func.count(Client.id)).filter(*filters, Client.deleted_at == None).scalar()
+        total_active = await session.scalar(select(func.count(Client.id)).where(*filters, Client.deleted_at == None))
         
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        active_with_interactions = session.query(func.count(distinct(Interaction.client_id))).filter(
+        active_with_interactions = await session.scalar(select(func.count(distinct(Interaction.client_id))).where(
             Interaction.tenant_id == tenant_id,
             Interaction.client_id != None,
             Interaction.contact_date >= thirty_days_ago
-        ).scalar()
+        ))
         
         return jsonify({
             "status_breakdown": [{"status": row.status, "count": row.count} for row in status_breakdown],
@@ -589,7 +645,7 @@ async def client_retention_report():
             "retention_rate": round((total_active / (total_active + churned_count) * 100), 2) if (total_active + churned_count) > 0 else 0
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 8. PROJECT PERFORMANCE REPORT
@@ -598,7 +654,7 @@ async def client_retention_report():
 async def project_performance_report():
     """Summarizes project outcomes, durations, or success rates."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -610,33 +666,27 @@ async def project_performance_report():
         if end_date:
             filters.append(Project.created_at <= parse_date(end_date))
         
-        status_counts = session.query(
+        status_counts = (await session.execute(select(
             Project.project_status,
             func.count(Project.id).label('count'),
             func.coalesce(func.sum(Project.project_worth), 0).label('total_value')
-        ).filter(*filters).group_by(Project.project_status).all()
+        ).where(*filters).group_by(Project.project_status))).all()
         
-        total_projects = session.query(func.count(Project.id)).filter(*filters).scalar()
-        won_projects = session.query(func.count(Project.id)).filter(*filters, Project.project_status == 'completed').scalar()
+        # Totals, average duration and average value in one pass
+        completed = Project.project_status == 'completed'
+        totals = await AggregateQuery(*filters)\
+            .count("total", Project.id)\
+            .count("won", Project.id, completed)\
+            .avg("avg_duration", days_between(session.bind.dialect.name, Project.project_start, Project.project_end),
+                 completed, Project.project_start != None, Project.project_end != None)\
+            .avg("avg_value", Project.project_worth, Project.project_worth != None)\
+            .one(session)
+        total_projects = totals.total
+        won_projects = totals.won
+        avg_duration = totals.avg_duration
+        avg_value = totals.avg_value
         win_rate = round((won_projects / total_projects * 100), 2) if total_projects > 0 else 0
-        
-        # Calculate average project duration (database-agnostic)
-        from app.config import SQLALCHEMY_DATABASE_URI
-        if 'postgresql' in SQLALCHEMY_DATABASE_URI or 'postgres' in SQLALCHEMY_DATABASE_URI:
-            # PostgreSQL approach: EXTRACT(EPOCH FROM (project_end - project_start)) / 86400
-            avg_duration = session.query(
-                func.avg(
-                    func.extract('epoch', Project.project_end - Project.project_start) / 86400
-                )
-            ).filter(*filters, Project.project_start != None, Project.project_end != None, Project.project_status == 'completed').scalar()
-        else:
-            # SQLite approach: julianday
-            avg_duration = session.query(
-                func.avg(func.julianday(Project.project_end) - func.julianday(Project.project_start))
-            ).filter(*filters, Project.project_start != None, Project.project_end != None, Project.project_status == 'completed').scalar()
-        
-        avg_value = session.query(func.avg(Project.project_worth)).filter(*filters, Project.project_worth != None).scalar()
-        
+
         return jsonify({
             "status_breakdown": [{
                 "status": row.project_status,
@@ -649,7 +699,7 @@ async def project_performance_report():
             "avg_project_value": round(float(avg_value), 2) if avg_value else None
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 9. UPCOMING TASKS REPORT
@@ -658,7 +708,7 @@ async def project_performance_report():
 async def upcoming_tasks_report():
     """Lists upcoming meetings, calls, or follow-ups for the team."""
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         days_ahead = int(request.args.get("days", 30))
@@ -677,23 +727,23 @@ async def upcoming_tasks_report():
         
         if user_filter and "admin" in [r.name for r in user.roles]:
             filters.extend([or_(
-                Interaction.client_id.in_(session.query(Client.id).filter(Client.assigned_to == int(user_filter))),
-                Interaction.lead_id.in_(session.query(Lead.id).filter(Lead.assigned_to == int(user_filter)))
+                Interaction.client_id.in_(select(Client.id).where(Client.assigned_to == int(user_filter))),
+                Interaction.lead_id.in_(select(Lead.id).where(Lead.assigned_to == int(user_filter)))
             )])
         elif "admin" not in [r.name for r in user.roles]:
             filters.extend([or_(
-                Interaction.client_id.in_(session.query(Client.id).filter(Client.assigned_to == user.id)),
-                Interaction.lead_id.in_(session.query(Lead.id).filter(Lead.assigned_to == user.id))
+                Interaction.client_id.in_(select(Client.id).where(Client.assigned_to == user.id)),
+                Interaction.lead_id.in_(select(Lead.id).where(Lead.assigned_to == user.id))
             )])
         
-        upcoming = session.query(
+        upcoming = (await session.execute(select(
             Interaction.id, Interaction.client_id, Interaction.lead_id,
             Interaction.follow_up, Interaction.summary, Interaction.followup_status,
             Client.name.label('client_name'), Lead.name.label('lead_name'),
             Client.assigned_to.label('client_assigned_to'), Lead.assigned_to.label('lead_assigned_to')
         ).outerjoin(Client, Interaction.client_id == Client.id).outerjoin(
             Lead, Interaction.lead_id == Lead.id
-        ).filter(*filters).order_by(Interaction.follow_up.asc()).all()
+        ).where(*filters).order_by(Interaction.follow_up.asc()))).all()
         
         assigned_user_ids = set()
         for row in upcoming:
@@ -704,7 +754,7 @@ async def upcoming_tasks_report():
         
         user_map = {}
         if assigned_user_ids:
-            users = session.query(User.id, User.email).filter(User.id.in_(assigned_user_ids)).all()
+            users = (await session.execute(select(User.id, User.email).where(User.id.in_(assigned_user_ids)))).all()
             user_map = {u.id: u.email for u in users}
         
         return jsonify({
@@ -721,7 +771,7 @@ async def upcoming_tasks_report():
             } for row in upcoming]
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 10. REVENUE FORECAST REPORT
@@ -734,19 +784,19 @@ async def revenue_forecast_report():
     Includes MRR/ARR from won projects.
     """
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
 
         WEIGHTS = {'active': 0.3, 'completed': 1.0, 'lost': 0.0}
 
-        projects = session.query(
+        projects = (await session.execute(select(
             Project.project_status, Project.project_worth, Project.value_type
-        ).filter(
+        ).where(
             Project.tenant_id == tenant_id,
             Project.deleted_at == None,
             Project.project_worth != None
-        ).all()
+        ))).all()
 
         forecast_by_status = {}
         total_forecast = 0
@@ -796,9 +846,9 @@ async def revenue_forecast_report():
                     total_mrr += worth / 12
                     total_arr += worth
 
-        lead_forecast = session.query(
+        lead_forecast = (await session.execute(select(
             Lead.lead_status, func.count(Lead.id).label('count')
-        ).filter(Lead.tenant_id == tenant_id, Lead.deleted_at == None).group_by(Lead.lead_status).all()
+        ).where(Lead.tenant_id == tenant_id, Lead.deleted_at == None).group_by(Lead.lead_status))).all()
 
         return jsonify({
             "projects": [{
@@ -823,7 +873,7 @@ async def revenue_forecast_report():
             "lead_pipeline": [{"status": row.lead_status, "count": row.count} for row in lead_forecast]
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 11. SUBSCRIPTION INCOME REPORT
@@ -837,7 +887,7 @@ async def subscription_income_report():
     Optional date filters apply to start_date.
     """
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -852,7 +902,7 @@ async def subscription_income_report():
         if end_date:
             filters.append(Subscription.start_date <= parse_date(end_date))
 
-        subs = session.query(Subscription).filter(*filters).all()
+        subs = (await session.execute(select(Subscription).options(selectinload(Subscription.client)).where(*filters))).scalars().all()
 
         monthly_revenue = sum(s.price for s in subs if s.billing_cycle == "monthly")
         yearly_revenue = sum(s.price for s in subs if s.billing_cycle == "yearly")
@@ -896,7 +946,7 @@ async def subscription_income_report():
             "by_client": clients_list,
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 12. UPCOMING SUBSCRIPTION RENEWALS REPORT
@@ -908,7 +958,7 @@ async def upcoming_renewals_report():
     Monthly subs are excluded since they don't need advance reminders.
     """
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         days_ahead = int(request.args.get("days", 60))
@@ -925,14 +975,14 @@ async def upcoming_renewals_report():
         else:
             cycles = ["yearly"]
 
-        subs = session.query(Subscription).filter(
+        subs = (await session.execute(select(Subscription).options(selectinload(Subscription.client)).where(
             Subscription.tenant_id == tenant_id,
             Subscription.status == "active",
             Subscription.billing_cycle.in_(cycles),
             Subscription.renewal_date != None,
             Subscription.renewal_date >= now,
             Subscription.renewal_date <= future_cutoff,
-        ).order_by(Subscription.renewal_date.asc()).all()
+        ).order_by(Subscription.renewal_date.asc()))).scalars().all()
 
         return jsonify({
             "days_ahead": days_ahead,
@@ -952,7 +1002,7 @@ async def upcoming_renewals_report():
             "total": len(subs),
         })
     finally:
-        session.close()
+        await session.close()
 
 
 # 13. CONVERTED LEADS REPORT
@@ -965,7 +1015,7 @@ async def converted_leads_report():
     Optionally filtered by converted_on date range.
     """
     user = request.user
-    session = SessionLocal()
+    session = AsyncSessionLocal()
     try:
         tenant_id = user.tenant_id
         start_date = request.args.get("start_date")
@@ -981,28 +1031,28 @@ async def converted_leads_report():
         if end_date:
             filters.append(Lead.converted_on <= parse_date(end_date))
 
-        leads = session.query(
+        leads = (await session.execute(select(
             Lead.id, Lead.name, Lead.lead_source, Lead.created_at,
             Lead.converted_on, Lead.assigned_to
-        ).filter(*filters).order_by(Lead.converted_on.desc().nullslast()).all()
+        ).where(*filters).order_by(Lead.converted_on.desc().nullslast()))).all()
 
         # Look up linked clients via source_lead_id
         lead_ids = [l.id for l in leads]
         client_map = {}
         if lead_ids:
-            clients = session.query(
+            clients = (await session.execute(select(
                 Client.source_lead_id, Client.id, Client.name
-            ).filter(
+            ).where(
                 Client.tenant_id == tenant_id,
                 Client.source_lead_id.in_(lead_ids)
-            ).all()
+            ))).all()
             client_map = {c.source_lead_id: {"id": c.id, "name": c.name} for c in clients}
 
         # Look up assigned user emails
         user_ids = {l.assigned_to for l in leads if l.assigned_to}
         user_map = {}
         if user_ids:
-            users = session.query(User.id, User.email).filter(User.id.in_(user_ids)).all()
+            users = (await session.execute(select(User.id, User.email).where(User.id.in_(user_ids)))).all()
             user_map = {u.id: u.email for u in users}
 
         results = []
@@ -1028,4 +1078,4 @@ async def converted_leads_report():
             "total": len(results),
         })
     finally:
-        session.close()
+        await session.close()
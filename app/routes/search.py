@@ -1,11 +1,48 @@
+import re
 from quart import Blueprint, request, jsonify
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, case, select, table, column, literal, literal_column
 from app.database import SessionLocal
-from app.models import Client, Lead, Project, Account, User
+from app.models import SearchDocument
 from app.utils.auth_utils import requires_auth
+from app.utils.search_index import SEARCH_FIELDS, SLOT_COLUMNS
 
 search_bp = Blueprint("search", __name__, url_prefix="/api/search")
 
+RESULTS_PER_TYPE = 10
+
+search_fts = table("search_documents_fts", column("rowid"), column("rank"))
+
+
+def _like(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _match_and_score(dialect_name: str, query: str, terms: list):
+    """
+    Return (joins, match, score) for the dialect's search index.
+    Higher score = better match.
+    """
+    doc = SearchDocument
+    substring = doc.search_text.like(_like(query), escape="\\")
+
+    if dialect_name == "postgresql":
+        # search_vector is a generated column created by the migration, not mapped on the model
+        vector = literal_column("search_documents.search_vector")
+        if terms:
+            ts_query = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+            return [], or_(vector.op("@@")(ts_query), substring), func.ts_rank(vector, ts_query)
+        return [], substring, literal(0.0)
+
+    if dialect_name == "sqlite" and len(query) >= 3:
+        # FTS5 trigram tokenizer: a quoted phrase matches any substring
+        phrase = '"' + query.replace('"', '""') + '"'
+        match = literal_column("search_documents_fts").op("MATCH")(phrase)
+        return [(search_fts, search_fts.c.rowid == doc.id)], match, -search_fts.c.rank
+
+    return [], substring, literal(0.0)
+
+
 @search_bp.route("", methods=["GET"])
 @search_bp.route("/", methods=["GET"])
 @requires_auth()
@@ -17,109 +54,54 @@ async def global_search():
 
     session = SessionLocal()
     try:
-        results = []
+        doc = SearchDocument
         is_admin = any(role.name == "admin" for role in user.roles)
+        words = re.findall(r"\w+", query)
+        terms = words or [query]
 
-        def matched_fields(instance, fields):
-            matches = []
-            for field in fields:
-                value = getattr(instance, field, "")
-                if value and query in value.lower():
-                    matches.append(field)
-            return matches
-
-        # Clients
-        client_fields = ["name", "contact_person", "email", "phone", "address", "city", "state", "zip", "notes"]
-        client_q = session.query(Client).filter(
-            Client.tenant_id == user.tenant_id,
-            Client.deleted_at == None,
-            or_(*[func.lower(getattr(Client, f)).ilike(f"%{query}%") for f in client_fields])
-        )
-        if not is_admin:
-            client_q = client_q.filter(Client.created_by == user.id)
-
-        for c in client_q.limit(10):
-            results.append({
-                "type": "client",
-                "id": c.id,
-                "name": c.name,
-                "link": f"/clients/{c.id}",
-                "matches": matched_fields(c, client_fields)
-            })
-
-        # Leads
-        lead_fields = ["name", "contact_person", "email", "phone", "address", "city", "state", "zip", "notes"]
-        lead_q = session.query(Lead).filter(
-            Lead.tenant_id == user.tenant_id,
-            Lead.deleted_at == None,
-            or_(*[func.lower(getattr(Lead, f)).ilike(f"%{query}%") for f in lead_fields])
-        )
+        filters = [doc.tenant_id == user.tenant_id, doc.is_deleted == False]
         if not is_admin:
-            lead_q = lead_q.filter(or_(Lead.created_by == user.id, Lead.assigned_to == user.id))
-
-        for l in lead_q.limit(10):
-            results.append({
-                "type": "lead",
-                "id": l.id,
-                "name": l.name,
-                "link": f"/leads/{l.id}",
-                "matches": matched_fields(l, lead_fields)
-            })
-
-        # Projects
-        project_fields = ["project_name", "project_description", "project_status"]
-        project_q = session.query(Project).filter(
-            Project.tenant_id == user.tenant_id,
-            or_(*[func.lower(getattr(Project, f)).ilike(f"%{query}%") for f in project_fields])
+            # Same visibility as the list endpoints; users are admin-only
+            filters.append(or_(
+                and_(doc.entity_type.in_(["client", "project", "account"]), doc.created_by == user.id),
+                and_(doc.entity_type == "lead", or_(doc.created_by == user.id, doc.assigned_to == user.id)),
+            ))
+
+        joins, match, score = _match_and_score(session.get_bind().dialect.name, query, words)
+        # Exact title prefix beats a hit buried in notes
+        score = score + case((func.lower(doc.title).like(_like(query)[1:], escape="\\"), 1.0), else_=0.0)
+
+        slot_matches = [
+            or_(*[func.lower(slot).like(_like(term), escape="\\") for term in terms]).label(slot.key)
+            for slot in SLOT_COLUMNS
+        ]
+
+        ranked = select(
+            doc.entity_type, doc.entity_id, doc.title, doc.link, *slot_matches,
+            score.label("score"),
+            func.row_number().over(partition_by=doc.entity_type, order_by=score.desc()).label("type_rank"),
         )
-        if not is_admin:
-            project_q = project_q.filter(Project.created_by == user.id)
+        for target, onclause in joins:
+            ranked = ranked.join(target, onclause)
+        ranked = ranked.where(*filters, match).subquery()
 
-        for p in project_q.limit(10):
-            link = f"/clients/{p.client_id}" if p.client_id else f"/leads/{p.lead_id}"
-            results.append({
-                "type": "project",
-                "id": p.id,
-                "name": p.project_name,
-                "link": link,
-                "matches": matched_fields(p, project_fields)
-            })
+        rows = session.execute(
+            select(ranked)
+            .where(ranked.c.type_rank <= RESULTS_PER_TYPE)
+            .order_by(ranked.c.score.desc(), ranked.c.entity_type, ranked.c.entity_id)
+        ).mappings().all()
 
-        # Accounts
-        account_fields = ["account_name", "account_number", "notes"]
-        account_q = session.query(Account).filter(
-            Account.tenant_id == user.tenant_id,
-            or_(*[func.lower(getattr(Account, f)).ilike(f"%{query}%") for f in account_fields])
-        )
-        if not is_admin:
-            account_q = account_q.join(Client).filter(Client.created_by == user.id)
-
-        for a in account_q.limit(10):
+        results = []
+        for row in rows:
+            fields = SEARCH_FIELDS[row["entity_type"]]
             results.append({
-                "type": "account",
-                "id": a.id,
-                "name": a.account_name or a.account_number,
-                "link": f"/clients/{a.client_id}",
-                "matches": matched_fields(a, account_fields)
+                "type": row["entity_type"],
+                "id": row["entity_id"],
+                "name": row["title"],
+                "link": row["link"],
+                "matches": [field for field, slot in zip(fields, SLOT_COLUMNS) if row[slot.key]],
             })
 
-        # Users (admin only)
-        if is_admin:
-            user_fields = ["email"]
-            user_q = session.query(User).filter(
-                User.tenant_id == user.tenant_id,
-                or_(*[func.lower(getattr(User, f)).ilike(f"%{query}%") for f in user_fields])
-            )
-
-            for u in user_q.limit(10):
-                results.append({
-                    "type": "user",
-                    "id": u.id,
-                    "name": u.email,
-                    "link": None,
-                    "matches": matched_fields(u, user_fields)
-                })
-
         return jsonify(results)
 
     finally:
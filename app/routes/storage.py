@@ -7,7 +7,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.database import SessionLocal
 from app.models import File
 from app.utils.auth_utils import requires_auth
-from app.utils.storage_backend import get_storage
+from app.utils.storage_backend import get_storage, iter_file_chunks
+from app.utils.storage_clients import storage_pool_stats
 import inspect
 
 
@@ -34,6 +35,12 @@ async def list_files():
     finally:
         session.close()
 
+@storage_bp.route("/pool-stats", methods=["GET"])
+@requires_auth(roles=["admin"])
+async def pool_stats():
+    """Shared S3 client metrics for this process (document and backup storage)."""
+    return jsonify({"clients": storage_pool_stats()})
+
 @storage_bp.route("/upload", methods=["POST"])
 @requires_auth(roles=["file_uploads"])
 async def upload_files():
@@ -65,9 +72,9 @@ async def upload_files():
             key = _tenant_key(user.tenant_id, stored_name)
 
             try:
-                data = file.read()
+                # Stream from the spooled upload; never hold the whole file in memory
                 mimetype = file.mimetype or "application/octet-stream"
-                await storage.put_bytes(key, data, mimetype)
+                await storage.put_stream(key, iter_file_chunks(file.stream), mimetype)
 
                 # Persist: for local we store absolute path; for S3 we store the key
                 local_path = await storage.local_path_for(key)
@@ -116,25 +123,41 @@ async def download_file(file_id: int):
 
         # Backward‑compatible: if this record has a local absolute path and exists, serve it
         if os.path.isabs(rec.path) and os.path.exists(rec.path):
+            # send_file streams from disk; conditional=True adds Range support
             return await send_file(
                 rec.path,
                 as_attachment=True,
                 attachment_filename=rec.filename,  # keep your existing arg
                 mimetype=rec.mimetype,
+                conditional=True,
             )
 
         # Otherwise treat File.path as an object key in S3‑compatible storage
         storage = get_storage()
         try:
-            data, content_type = await storage.get_bytes(rec.path)
+            size, content_type = await storage.stat(rec.path)
         except Exception:
             return jsonify({"error": "File not found in storage"}), 404
 
         headers = {
-            "Content-Type": content_type or rec.mimetype or "application/octet-stream",
+            "Content-Type": rec.mimetype or content_type or "application/octet-stream",
             "Content-Disposition": f'attachment; filename="{rec.filename}"',
+            "Accept-Ranges": "bytes",
         }
-        return Response(data, headers=headers)
+
+        # Single byte ranges only (what browsers and download managers send)
+        status = 200
+        start, end = 0, size
+        if request.range and request.range.units == "bytes":
+            byte_range = request.range.range_for_length(size) if len(request.range.ranges) == 1 else None
+            if byte_range is None:
+                return Response("", status=416, headers={"Content-Range": f"bytes */{size}"})
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        headers["Content-Length"] = str(end - start)
+
+        return Response(storage.iter_range(rec.path, start, end), status=status, headers=headers)
     finally:
         session.close()
 
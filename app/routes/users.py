@@ -1,7 +1,7 @@
 from quart import Blueprint, request, jsonify
 from app.models import User, Role, ActivityLog, ActivityType
 from app.database import SessionLocal
-from app.utils.auth_utils import requires_auth, hash_password
+from app.utils.auth_utils import requires_auth, hash_password_async, invalidate_principal, password_hash_stats
 
 users_bp = Blueprint("users", __name__, url_prefix="/api/users")
 
@@ -34,6 +34,13 @@ async def list_users():
         session.close()
 
 
+@users_bp.route("/password-hash-stats", methods=["GET"])
+@requires_auth(roles=["admin"])
+async def hash_stats():
+    """bcrypt work factor, pool size and latency for this process."""
+    return jsonify(password_hash_stats())
+
+
 @users_bp.route("", methods=["POST"])
 @users_bp.route("/", methods=["POST"])
 @requires_auth(roles=["admin"])
@@ -60,7 +67,7 @@ async def create_user():
         new_user = User(
             tenant_id=user.tenant_id,
             email=email,
-            password_hash=hash_password(password),
+            password_hash=await hash_password_async(password),
             is_active=True
         )
 
@@ -100,6 +107,7 @@ async def toggle_user_active(user_id):
 
         target.is_active = not target.is_active
         session.commit()
+        invalidate_principal(target.id)
 
         return jsonify({
             "id": target.id,
@@ -132,6 +140,7 @@ async def update_user_roles(user_id):
 
         target.roles = roles
         session.commit()
+        invalidate_principal(target.id)
 
         return jsonify({
             "id": target.id,
@@ -167,6 +176,7 @@ async def update_user_email(user_id):
 
         target.email = new_email
         session.commit()
+        invalidate_principal(target.id)
 
         return jsonify({
             "id": target.id,
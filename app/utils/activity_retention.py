@@ -0,0 +1,162 @@
+"""
+activity_logs partitioning, retention and roll-up.
+
+On PostgreSQL, activity_logs is range-partitioned by month on `timestamp`
+(see the add_activity_partitions migration). Partitions are named
+activity_logs_YYYY_MM, and a DEFAULT partition catches anything outside
+them. maintain_activity_logs() does three things:
+
+1. Creates partitions for the current month and ACTIVITY_PARTITIONS_AHEAD
+   months after it.
+2. Rolls every partition older than ACTIVITY_RETENTION_MONTHS up into
+   activity_daily_rollups, then detaches and drops it. Dropping a
+   partition is a catalog operation; there is no row-by-row DELETE and no
+   table bloat.
+3. Prunes recently_touched rows older than the retention window.
+
+On other databases (SQLite in tests) the same roll-up runs over a
+timestamp range, and the rows are deleted in the same transaction.
+
+Run it daily with scripts/maintain_activity_logs.py.
+"""
+import os
+from datetime import datetime, date
+from sqlalchemy import delete, func, select, text
+from app.models import ActivityLog, ActivityDailyRollup, RecentlyTouched
+from app.utils.activity_sink import dialect_insert
+from app.utils.logging_utils import logger
+
+ACTIVITY_RETENTION_MONTHS = int(os.getenv("ACTIVITY_RETENTION_MONTHS", 13))
+ACTIVITY_PARTITIONS_AHEAD = int(os.getenv("ACTIVITY_PARTITIONS_AHEAD", 2))
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"activity_logs_{month.year:04d}_{month.month:02d}"
+
+
+def partition_ddl(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF activity_logs "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def is_partitioned(session) -> bool:
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    kind = session.execute(text(
+        "SELECT relkind FROM pg_class WHERE relname = 'activity_logs' AND relkind = 'p'"
+    )).scalar()
+    return kind is not None
+
+
+def ensure_partitions(session, today: date = None, ahead: int = None) -> list:
+    """Create the current and upcoming monthly partitions. Returns their names."""
+    current = month_start(today or date.today())
+    ahead = ACTIVITY_PARTITIONS_AHEAD if ahead is None else ahead
+    months = [add_months(current, i) for i in range(ahead + 1)]
+    for month in months:
+        session.execute(text(partition_ddl(month)))
+    return [partition_name(month) for month in months]
+
+
+def monthly_partitions(session) -> list:
+    """(month, name) for every activity_logs_YYYY_MM partition, oldest first."""
+    names = session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'activity_logs'"
+    )).scalars().all()
+    partitions = []
+    for name in names:
+        try:
+            year, month = name[len("activity_logs_"):].split("_")
+            partitions.append((date(int(year), int(month), 1), name))
+        except ValueError:
+            continue  # activity_logs_default
+    return sorted(partitions)
+
+
+def roll_up(session, start, end) -> int:
+    """Add per-day counts for rows with start <= timestamp < end. Returns the number of events."""
+    day = func.date(ActivityLog.timestamp)
+    groups = session.execute(
+        select(
+            ActivityLog.tenant_id, ActivityLog.user_id, day.label("day"),
+            ActivityLog.entity_type, ActivityLog.action, func.count().label("events"),
+        ).where(
+            *([ActivityLog.timestamp >= start] if start is not None else []),
+            ActivityLog.timestamp < end,
+        ).group_by(
+            ActivityLog.tenant_id, ActivityLog.user_id, day, ActivityLog.entity_type, ActivityLog.action
+        )
+    ).all()
+
+    if not groups:
+        return 0
+    rows = [{
+        "tenant_id": group.tenant_id,
+        "user_id": group.user_id,
+        "day": group.day if isinstance(group.day, date) else date.fromisoformat(str(group.day)),
+        "entity_type": group.entity_type,
+        "action": group.action.value,
+        "event_count": group.events,
+    } for group in groups]
+    statement = dialect_insert(session, ActivityDailyRollup)
+    # Re-running over a range that already has roll-ups adds to them
+    session.execute(statement.on_conflict_do_update(
+        index_elements=["tenant_id", "user_id", "day", "entity_type", "action"],
+        set_={"event_count": ActivityDailyRollup.event_count + statement.excluded.event_count},
+    ), rows)
+    return sum(row["event_count"] for row in rows)
+
+
+def _delete_before(session, cutoff) -> int:
+    return session.execute(delete(ActivityLog).where(ActivityLog.timestamp < cutoff)).rowcount
+
+
+def maintain_activity_logs(session, retention_months: int = None, today: date = None) -> dict:
+    """Create upcoming partitions, roll up and drop expired history. Returns a summary."""
+    retention_months = ACTIVITY_RETENTION_MONTHS if retention_months is None else retention_months
+    cutoff_month = add_months(month_start(today or date.today()), -retention_months)
+    cutoff = datetime.combine(cutoff_month, datetime.min.time())
+    summary = {"cutoff": cutoff_month.isoformat(), "created": [], "dropped": [], "rolled_up": 0}
+
+    if is_partitioned(session):
+        summary["created"] = ensure_partitions(session, today)
+        session.commit()
+        for month, name in monthly_partitions(session):
+            if add_months(month, 1) > cutoff_month:
+                break
+            # One transaction per partition: roll-up and drop land together
+            summary["rolled_up"] += roll_up(
+                session, datetime.combine(month, datetime.min.time()),
+                datetime.combine(add_months(month, 1), datetime.min.time()),
+            )
+            session.execute(text(f"ALTER TABLE activity_logs DETACH PARTITION {name}"))
+            session.execute(text(f"DROP TABLE {name}"))
+            session.commit()
+            summary["dropped"].append(name)
+            logger.info(f"[Activity] Rolled up and dropped partition {name}")
+        # Stragglers in the DEFAULT partition (e.g. backfilled old timestamps)
+        summary["rolled_up"] += roll_up(session, None, cutoff)
+        _delete_before(session, cutoff)
+    else:
+        summary["rolled_up"] = roll_up(session, None, cutoff)
+        summary["deleted"] = _delete_before(session, cutoff)
+
+    summary["recently_touched_pruned"] = session.execute(
+        delete(RecentlyTouched).where(RecentlyTouched.last_touched_at < cutoff)
+    ).rowcount
+    session.commit()
+    return summary
@@ -0,0 +1,205 @@
+"""
+Buffered ActivityLog writer.
+
+Detail views (get_lead, get_client, get_project, get_account) used to add an
+ActivityLog row and commit before serializing the response, so every read
+paid for a write transaction. They now call log_activity(), which only
+appends to an in-memory buffer. A background task started with the app
+bulk-inserts the buffer when ACTIVITY_FLUSH_INTERVAL_SECONDS elapse or
+ACTIVITY_FLUSH_BATCH_SIZE events are waiting, and drains it on shutdown.
+
+Repeated views of the same entity by the same user within
+ACTIVITY_COALESCE_SECONDS are coalesced. A view still in the buffer gets its
+timestamp moved forward, and one already written is not written again.
+"Recently touched" only needs the latest view per entity, so this cuts
+rows without changing what it shows. Other actions are never coalesced.
+
+Each write also upserts recently_touched, the per-(user, entity) latest
+activity time that /api/activity/recent reads instead of grouping over
+activity_logs.
+
+When the writer is not running (scripts, the test client, workers) events
+are written immediately, as before.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import SessionLocal
+from app.models import ActivityLog, ActivityType, RecentlyTouched
+from app.utils.logging_utils import logger
+
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", 2))
+ACTIVITY_FLUSH_BATCH_SIZE = int(os.getenv("ACTIVITY_FLUSH_BATCH_SIZE", 500))
+ACTIVITY_COALESCE_SECONDS = int(os.getenv("ACTIVITY_COALESCE_SECONDS", 60))
+# Events kept across failed flushes before new ones are dropped
+ACTIVITY_BUFFER_MAX = int(os.getenv("ACTIVITY_BUFFER_MAX", 50000))
+
+
+def dialect_insert(session, model):
+    """INSERT for the session's dialect, with on_conflict_do_update available."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def touch_recent(session, rows):
+    """Move recently_touched forward for these activity rows."""
+    latest = {}
+    for row in rows:
+        key = (row["user_id"], row["entity_type"], row["entity_id"])
+        if key not in latest or row["timestamp"] > latest[key]["last_touched_at"]:
+            latest[key] = {
+                "user_id": row["user_id"],
+                "entity_type": row["entity_type"],
+                "entity_id": row["entity_id"],
+                "tenant_id": row["tenant_id"],
+                "last_touched_at": row["timestamp"],
+            }
+    if not latest:
+        return
+    statement = dialect_insert(session, RecentlyTouched)
+    newest = func.greatest if session.get_bind().dialect.name == "postgresql" else func.max
+    session.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "entity_type", "entity_id"],
+        set_={"last_touched_at": newest(RecentlyTouched.last_touched_at, statement.excluded.last_touched_at)},
+    ), list(latest.values()))
+
+
+class ActivitySink:
+    def __init__(self):
+        self._pending = OrderedDict()   # key -> row; views keyed by entity, others unique
+        self._written_views = {}        # view key -> monotonic time it was buffered
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._stopping = False
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, tenant_id: int, user_id: int, action: ActivityType,
+               entity_type: str, entity_id: int, description: str = None):
+        row = {
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "timestamp": datetime.now(),
+            "description": description,
+        }
+        if not self.running:
+            self._write([row])
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if action == ActivityType.viewed:
+                key = (tenant_id, user_id, entity_type, entity_id)
+                if key in self._pending:
+                    self._pending[key].update(timestamp=row["timestamp"], description=description)
+                    return
+                seen = self._written_views.get(key)
+                if seen is not None and now - seen < ACTIVITY_COALESCE_SECONDS:
+                    return
+                self._written_views[key] = now
+            else:
+                self._sequence += 1
+                key = ("event", self._sequence)
+
+            if len(self._pending) >= ACTIVITY_BUFFER_MAX:
+                self.dropped += 1
+                return
+            self._pending[key] = row
+            full = len(self._pending) >= ACTIVITY_FLUSH_BATCH_SIZE
+
+        if full:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def has_pending(self, user_id: int) -> bool:
+        with self._lock:
+            return any(row["user_id"] == user_id for row in self._pending.values())
+
+    def flush(self) -> int:
+        """Write everything buffered so far. Returns the number of rows written."""
+        with self._lock:
+            batch = self._pending
+            self._pending = OrderedDict()
+            cutoff = time.monotonic() - ACTIVITY_COALESCE_SECONDS
+            self._written_views = {k: t for k, t in self._written_views.items() if t >= cutoff}
+        if not batch:
+            return 0
+
+        try:
+            self._write(list(batch.values()))
+        except Exception as e:
+            logger.error(f"[Activity] Failed to write {len(batch)} events: {str(e)}")
+            with self._lock:
+                # Put the batch back in front of anything recorded meanwhile
+                batch.update(self._pending)
+                while len(batch) > ACTIVITY_BUFFER_MAX:
+                    batch.popitem(last=False)
+                    self.dropped += 1
+                self._pending = batch
+            return 0
+        return len(batch)
+
+    def _write(self, rows):
+        session = SessionLocal()
+        try:
+            session.execute(insert(ActivityLog), rows)
+            touch_recent(session, rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=ACTIVITY_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        """Start the background writer on the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and drain the buffer."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        written = await asyncio.to_thread(self.flush)
+        if written or self.dropped:
+            logger.info(f"[Activity] Drained {written} events on shutdown ({self.dropped} dropped)")
+
+
+activity_sink = ActivitySink()
+
+
+def log_activity(tenant_id: int, user_id: int, action: ActivityType,
+                 entity_type: str, entity_id: int, description: str = None):
+    """Queue an ActivityLog row without touching the caller's session."""
+    activity_sink.record(tenant_id, user_id, action, entity_type, entity_id, description)
@@ -1,19 +1,100 @@
+import asyncio
 import bcrypt
+import os
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from authlib.jose import jwt, JoseError
 from quart import request, jsonify, current_app
 from functools import wraps
-from app.models import User
+from app.models import User, Role
 from app.database import SessionLocal
 from itsdangerous import URLSafeTimedSerializer
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import joinedload
 
+# ============================================================================
+# PASSWORD HASHING
+# ============================================================================
+# bcrypt costs ~200 ms of CPU per call at the default work factor. Async
+# handlers use the *_async variants, which run on a small dedicated thread
+# pool (bcrypt releases the GIL while hashing), so a burst of logins queues
+# there instead of blocking the event loop. PASSWORD_HASH_WORKERS bounds
+# how many cores hashing may take from request handling.
+#
+# BCRYPT_ROUNDS is the work factor for new hashes. Hashes made with a
+# different cost are upgraded on the next successful login (needs_rehash).
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_stats = {}
+_hash_stats_lock = threading.Lock()
+
+
+def _timed(operation: str, func, *args):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _hash_stats_lock:
+            stats = _hash_stats.setdefault(operation, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+
+def _hashpw(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def _checkpw(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return _timed("hash", _hashpw, password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    return _timed("verify", _checkpw, password, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bcrypt pool; use from request handlers."""
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """verify_password on the bcrypt pool; use from request handlers."""
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, verify_password, password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True if `hashed` was made with a work factor other than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+def password_hash_stats() -> dict:
+    """Per-operation bcrypt latency for this process."""
+    with _hash_stats_lock:
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "workers": PASSWORD_HASH_WORKERS,
+            "operations": {
+                operation: {
+                    "count": stats["count"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 1) if stats["count"] else 0,
+                    "max_ms": round(stats["max_ms"], 1),
+                } for operation, stats in _hash_stats.items()
+            },
+        }
+
 
 def create_token(user: User) -> str:
     header = {"alg": "HS256"}
@@ -21,6 +102,8 @@ def create_token(user: User) -> str:
         "sub": user.id,
         "email": user.email,
         "roles": [r.name for r in user.roles],
+        "tenant_id": user.tenant_id,
+        "iat": int(time.time()),
         "exp": int(time.time()) + 30 * 86400  # 30 days
     }
     return jwt.encode(header, payload, current_app.config["SECRET_KEY"]).decode("utf-8")
@@ -28,6 +111,85 @@ def create_token(user: User) -> str:
 def decode_token(token: str):
     return jwt.decode(token, current_app.config["SECRET_KEY"])
 
+# ============================================================================
+# PRINCIPAL CACHE
+# ============================================================================
+# requires_auth used to load User + roles on every request. Resolved users
+# are now kept in a small in-process TTL/LRU cache keyed by (user_id, token).
+# Routes that change what the cache holds (active flag, roles, email,
+# password) call invalidate_principal(). Other worker processes are not
+# notified, so AUTH_CACHE_TTL_SECONDS bounds how stale they can be.
+
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 1024))
+
+# Optional fast path: trust the signed JWT claims (roles, tenant_id) without
+# touching the DB while the token is younger than the freshness window.
+# Off by default; 0 disables it.
+AUTH_JWT_FRESHNESS_SECONDS = int(os.getenv("AUTH_JWT_FRESHNESS_SECONDS", 0))
+
+_principal_cache = OrderedDict()
+_principal_lock = threading.Lock()
+
+
+def _get_cached_principal(user_id, token):
+    key = (user_id, token)
+    with _principal_lock:
+        entry = _principal_cache.get(key)
+        if not entry:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del _principal_cache[key]
+            return None
+        _principal_cache.move_to_end(key)
+        return user
+
+
+def _cache_principal(user_id, token, user):
+    if AUTH_CACHE_TTL_SECONDS <= 0:
+        return
+    with _principal_lock:
+        _principal_cache[(user_id, token)] = (time.monotonic() + AUTH_CACHE_TTL_SECONDS, user)
+        _principal_cache.move_to_end((user_id, token))
+        while len(_principal_cache) > AUTH_CACHE_MAX_ENTRIES:
+            _principal_cache.popitem(last=False)
+
+
+def invalidate_principal(user_id: int = None):
+    """Drop cached principals for a user (or everyone if user_id is None)."""
+    with _principal_lock:
+        if user_id is None:
+            _principal_cache.clear()
+            return
+        for key in [k for k in _principal_cache if k[0] == user_id]:
+            del _principal_cache[key]
+
+
+def _principal_from_claims(payload):
+    """
+    Build a detached User from fresh JWT claims, or None if the fast path
+    is disabled or the token lacks the claims it needs.
+    """
+    if AUTH_JWT_FRESHNESS_SECONDS <= 0:
+        return None
+    issued_at = payload.get("iat")
+    tenant_id = payload.get("tenant_id")
+    if issued_at is None or tenant_id is None:
+        return None
+    if time.time() - issued_at > AUTH_JWT_FRESHNESS_SECONDS:
+        return None
+
+    user = User(
+        id=payload["sub"],
+        tenant_id=tenant_id,
+        email=payload.get("email"),
+        is_active=True,
+    )
+    user.roles = [Role(name=name) for name in payload.get("roles", [])]
+    return user
+
+
 def requires_auth(roles: list = None):
     def wrapper(fn):
         @wraps(fn)
@@ -44,17 +206,22 @@ def requires_auth(roles: list = None):
             except JoseError:
                 return jsonify({"error": "Invalid token"}), 401
 
-            session = SessionLocal()
-            try:
-                user = session.query(User)\
-                    .options(joinedload(User.roles))\
-                    .filter(User.id == payload["sub"], User.is_active == True)\
-                    .first()
-            except SQLAlchemyError:
-                session.rollback()
-                return jsonify({"error": "Database error"}), 500
-            finally:
-                session.close()
+            user = _get_cached_principal(payload["sub"], token) or _principal_from_claims(payload)
+            if user is None:
+                session = SessionLocal()
+                try:
+                    user = session.query(User)\
+                        .options(joinedload(User.roles))\
+                        .filter(User.id == payload["sub"], User.is_active == True)\
+                        .first()
+                except SQLAlchemyError:
+                    session.rollback()
+                    return jsonify({"error": "Database error"}), 500
+                finally:
+                    session.close()
+
+                if user:
+                    _cache_principal(payload["sub"], token, user)
 
             if not user:
                 return jsonify({"error": "User not found"}), 401
@@ -0,0 +1,435 @@
+"""
+Deduplicating backup store: content-defined chunks, each stored once.
+
+Nightly dumps of the same database are almost identical, but gpg output
+is random. Each full encrypted upload therefore shared nothing with the
+previous one, and retention kept BACKUP_RETENTION_DAYS near-identical
+copies. Backups marked `deduplicated` (BACKUP_DEDUP=true) send the
+plaintext dump through a ChunkStore instead of gpg:
+
+1. The stream is cut into content-defined chunks. A cut falls where a
+   rolling hash of the last CHUNK_WINDOW bytes matches a mask. An insert or
+   delete only moves the cuts near it, so the chunks after it repeat the
+   previous night's. Chunks are BACKUP_CHUNK_AVG_SIZE / 4 to
+   BACKUP_CHUNK_AVG_SIZE * 4 bytes.
+2. A chunk's id is the HMAC-SHA256 of its plaintext, keyed from
+   BACKUP_GPG_PASSPHRASE, so object names reveal nothing about content.
+3. The chunk index is the set of objects under CHUNK_PREFIX. A chunk not
+   yet in it is zlib-compressed, sealed with AES-256-GCM (the chunk id is
+   the associated data) and uploaded. Chunks already present are skipped.
+4. The manifest lists the backup's chunk ids in order, with the dump's
+   size and SHA-256. It is sealed the same way and stored at the backup's
+   storage_key under MANIFEST_PREFIX.
+
+Restores read the manifest and stream the chunks back in order, checking
+each chunk's id and the dump's SHA-256. collect_garbage() deletes chunks
+that no manifest under MANIFEST_PREFIX references (cleanup_old_backups
+deletes expired manifests first). Manifests in storage, not rows in the
+backups table, decide what is kept, because a full restore rolls that
+table back. Chunks younger than BACKUP_CHUNK_GC_GRACE_HOURS are kept.
+
+A running backup may reuse chunks that only an expired manifest lists, so
+the two sides hand off through objects in the bucket. put() writes a
+lease under LEASE_PREFIX before it reads the chunk index and waits while
+GC_MARKER is present. collect_garbage() writes GC_MARKER before it reads
+the leases and deletes nothing while a lease is live. Storage is strongly
+consistent, so at least one side sees the other: either the backup waits
+for the collection to finish or the collection skips. Leases older than
+the grace period and markers older than GC_MARKER_STALE_SECONDS are
+treated as left behind by a crashed job.
+
+Deduplicated dumps are taken uncompressed (pg_dump -Z0), so unchanged rows
+give the same bytes every night. Chunks are compressed one by one instead.
+Upload and storage then grow with day-over-day churn, not database size.
+"""
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import numpy as np
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from app.utils.backup_pipeline import RELAY_CHUNK_SIZE, BackupProgress, _CountingWriter, _start_thread
+from app.utils.backup_storage import BACKUP_UPLOAD_CONCURRENCY
+from app.utils.logging_utils import logger
+
+BACKUP_DEDUP = os.getenv("BACKUP_DEDUP", "false").lower() == "true"
+# Average chunk size; must be a power of two
+BACKUP_CHUNK_AVG_SIZE = int(os.getenv("BACKUP_CHUNK_AVG_SIZE", 1024 * 1024))
+BACKUP_CHUNK_GC_GRACE_HOURS = int(os.getenv("BACKUP_CHUNK_GC_GRACE_HOURS", 24))
+
+CHUNK_PREFIX = "backups/chunks/"
+MANIFEST_PREFIX = "backups/manifests/"
+LEASE_PREFIX = "backups/chunk-leases/"
+GC_MARKER = "backups/chunk-gc"
+MANIFEST_VERSION = 1
+
+# How often a backup checks whether a collection has finished
+GC_MARKER_POLL_SECONDS = 10
+# A collection marker older than this was left by a crashed cleanup
+GC_MARKER_STALE_SECONDS = 3600
+
+# Bytes covered by the rolling hash
+CHUNK_WINDOW = 64
+# Fixed per-byte values for the rolling hash. Changing them moves every cut
+# point, so existing chunks would stop matching.
+_BYTE_HASHES = np.array(
+    [int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], "little") for value in range(256)],
+    dtype=np.uint64,
+)
+_NONCE_SIZE = 12
+
+
+class Chunker:
+    """Splits a byte stream at content-defined cut points."""
+
+    def __init__(self, avg_size: int = None):
+        avg_size = avg_size or BACKUP_CHUNK_AVG_SIZE
+        if avg_size & (avg_size - 1) or avg_size < 4 * CHUNK_WINDOW:
+            raise ValueError(f"Chunk size must be a power of two of at least {4 * CHUNK_WINDOW}")
+        self.mask = np.uint64(avg_size - 1)
+        self.min_size = avg_size // 4
+        self.max_size = avg_size * 4
+
+    def cut_point(self, data) -> int:
+        """Length of the first chunk of `data` (all of it if no cut is found)."""
+        view = np.frombuffer(data, dtype=np.uint8, count=min(len(data), self.max_size))
+        if len(view) <= self.min_size:
+            return len(view)
+        # Sum of the byte hashes over each CHUNK_WINDOW-byte window (uint64 wraps)
+        sums = np.cumsum(_BYTE_HASHES[view])
+        window_sums = sums[CHUNK_WINDOW:] - sums[:-CHUNK_WINDOW]
+        # window_sums[i] covers the bytes before position i + CHUNK_WINDOW + 1
+        cuts = np.flatnonzero((window_sums & self.mask) == 0) + CHUNK_WINDOW + 1
+        cuts = cuts[cuts >= self.min_size]
+        return int(cuts[0]) if len(cuts) else len(view)
+
+    def split(self, stream):
+        """Yield the chunks of a readable binary stream."""
+        buffer = b""
+        eof = False
+        while not eof:
+            data = stream.read(self.max_size)
+            eof = not data
+            buffer += data
+            while len(buffer) >= self.max_size or (eof and buffer):
+                cut = self.cut_point(buffer)
+                yield buffer[:cut]
+                buffer = buffer[cut:]
+
+
+def _older_than(obj: dict, age: timedelta, now: datetime = None) -> bool:
+    return obj["last_modified"] < (now or datetime.now(timezone.utc)) - age
+
+
+@lru_cache(maxsize=4)
+def _derive_keys(passphrase: str) -> tuple:
+    material = hashlib.scrypt(
+        passphrase.encode("utf-8"), salt=b"pathsix-backup-chunks", n=2 ** 14, r=8, p=1, dklen=64
+    )
+    return material[:32], material[32:]
+
+
+class ChunkStore:
+    """Chunks and manifests in the backup bucket, sealed with keys derived from the passphrase."""
+
+    def __init__(self, storage, passphrase: str, chunker: Chunker = None, concurrency: int = None):
+        if not passphrase:
+            raise ValueError("BACKUP_GPG_PASSPHRASE not configured")
+        encryption_key, self._mac_key = _derive_keys(passphrase)
+        self._aead = AESGCM(encryption_key)
+        self.storage = storage
+        self.chunker = chunker or Chunker()
+        self.concurrency = concurrency or BACKUP_UPLOAD_CONCURRENCY
+
+    def chunk_id(self, data: bytes) -> str:
+        return hmac.new(self._mac_key, data, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def chunk_key(chunk_id: str) -> str:
+        return f"{CHUNK_PREFIX}{chunk_id[:2]}/{chunk_id}"
+
+    def _seal(self, data: bytes, associated: str) -> bytes:
+        nonce = os.urandom(_NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, zlib.compress(data, 6), associated.encode("utf-8"))
+
+    def _open(self, blob: bytes, associated: str) -> bytes:
+        return zlib.decompress(
+            self._aead.decrypt(blob[:_NONCE_SIZE], blob[_NONCE_SIZE:], associated.encode("utf-8"))
+        )
+
+    def known_chunks(self) -> set:
+        """The chunk index: ids of every chunk already stored."""
+        return {obj["key"].rsplit("/", 1)[-1] for obj in self.storage.list_objects(CHUNK_PREFIX)}
+
+    def put(self, produce, manifest_key: str, timeout: int = 3600, progress: BackupProgress = None,
+            on_timeout=None) -> dict:
+        """
+        Chunk and store whatever `produce(pipe)` writes, then write the
+        manifest to `manifest_key`. `produce` returns the number of bytes it
+        wrote. Returns {"size", "checksum", "dump_size", "chunks",
+        "new_chunks"}: size is the bytes uploaded (new chunks plus the
+        manifest) and checksum is the SHA-256 of the dump. Raises if the
+        backup takes longer than `timeout` seconds, after calling
+        `on_timeout()` to stop whatever feeds the producer.
+        """
+        deadline = time.monotonic() + timeout
+        lease_key = f"{LEASE_PREFIX}{uuid.uuid4().hex}"
+        self.storage.put_object(lease_key, manifest_key.encode("utf-8"))
+        try:
+            self._wait_for_collection(deadline)
+            manifest, uploaded, new_chunks, produced = self._put_stream(
+                produce, deadline, timeout, progress, on_timeout
+            )
+            blob = self._seal(json.dumps(manifest).encode("utf-8"), manifest_key)
+            self.storage.put_object(manifest_key, blob)
+        finally:
+            self.storage.delete_file(lease_key)
+        logger.info(
+            f"[Backup] Stored {manifest['size']} dump bytes as {len(manifest['chunks'])} chunks "
+            f"({new_chunks} new, {uploaded} bytes uploaded) under {manifest_key}"
+        )
+        return {
+            "size": uploaded + len(blob),
+            "checksum": manifest["sha256"],
+            "dump_size": manifest["size"] if produced is None else produced,
+            "chunks": len(manifest["chunks"]),
+            "new_chunks": new_chunks,
+        }
+
+    def _wait_for_collection(self, deadline: float):
+        """Block while collect_garbage() runs; chunks in the index may be about to go."""
+        while any(
+            obj["key"] == GC_MARKER and not _older_than(obj, timedelta(seconds=GC_MARKER_STALE_SECONDS))
+            for obj in self.storage.list_objects(GC_MARKER)
+        ):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exception("Timed out waiting for chunk garbage collection to finish")
+            logger.info("[Backup] Waiting for chunk garbage collection to finish")
+            time.sleep(min(GC_MARKER_POLL_SECONDS, remaining))
+
+    def _put_stream(self, produce, deadline: float, timeout: int, progress, on_timeout=None):
+        """Run the producer into a pipe and store its chunks, with a watchdog."""
+        read_fd, write_fd = os.pipe()
+        reader = os.fdopen(read_fd, "rb")
+        writer = os.fdopen(write_fd, "wb")
+        writer_lock = threading.Lock()
+        timed_out = threading.Event()
+        outcome = {}
+
+        def run_producer():
+            try:
+                outcome["produced"] = produce(_CountingWriter(writer, progress) if progress else writer)
+            except BrokenPipeError:
+                pass  # the reader gave up; its error is reported instead
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                with writer_lock:
+                    try:
+                        writer.close()
+                    except BrokenPipeError:
+                        pass
+                    outcome["closed"] = True
+
+        def stop_on_timeout():
+            # A stalled dump never closes the pipe and our read would block
+            # forever. Swap the write end for a pipe nobody reads: the read
+            # sees EOF, and the producer's next write raises BrokenPipeError,
+            # which kills the dump. A producer blocked on a silent dump never
+            # writes again, so on_timeout() stops the dump itself.
+            timed_out.set()
+            with writer_lock:
+                if not outcome.get("closed"):
+                    dead_read, dead_write = os.pipe()
+                    os.close(dead_read)
+                    os.dup2(dead_write, write_fd)
+                    os.close(dead_write)
+            if on_timeout is not None:
+                on_timeout()
+
+        watchdog = threading.Timer(max(deadline - time.monotonic(), 0), stop_on_timeout)
+        watchdog.start()
+        producer = _start_thread(run_producer)
+        if progress:
+            progress.set_stage("uploading")
+        try:
+            manifest, uploaded, new_chunks = self._put_chunks(reader, timed_out, progress)
+        finally:
+            watchdog.cancel()
+            reader.close()
+            # A producer still writing stops on the closed pipe; a stalled one is left behind
+            producer.join(None if "closed" in outcome else 5)
+        if timed_out.is_set():
+            raise Exception(f"Backup pipeline timed out after {timeout}s")
+        if "error" in outcome:
+            raise outcome["error"]
+        return manifest, uploaded, new_chunks, outcome.get("produced")
+
+    def _put_chunks(self, stream, timed_out: threading.Event, progress):
+        known = self.known_chunks()
+        sha256 = hashlib.sha256()
+        manifest = {"version": MANIFEST_VERSION, "size": 0, "sha256": None, "chunks": []}
+        uploaded = 0
+        new_chunks = 0
+        in_flight = set()
+
+        def upload(chunk_id, blob):
+            self.storage.put_object(self.chunk_key(chunk_id), blob)
+            if progress:
+                progress.add("uploaded", len(blob))
+            return len(blob)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="backup-chunks") as pool:
+            for chunk in self.chunker.split(stream):
+                if timed_out.is_set():
+                    break
+                sha256.update(chunk)
+                manifest["size"] += len(chunk)
+                chunk_id = self.chunk_id(chunk)
+                manifest["chunks"].append([chunk_id, len(chunk)])
+                if chunk_id in known:
+                    continue
+                known.add(chunk_id)
+                blob = self._seal(chunk, chunk_id)
+                if progress:
+                    progress.add("encrypted", len(blob))
+                if len(in_flight) >= self.concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    uploaded += sum(future.result() for future in done)
+                in_flight.add(pool.submit(upload, chunk_id, blob))
+                new_chunks += 1
+            uploaded += sum(future.result() for future in wait(in_flight).done)
+
+        manifest["sha256"] = sha256.hexdigest()
+        return manifest, uploaded, new_chunks
+
+    def read_manifest(self, manifest_key: str) -> dict:
+        blob = self.storage.open_stream(manifest_key).read()
+        manifest = json.loads(self._open(blob, manifest_key))
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported backup manifest version: {manifest.get('version')}")
+        return manifest
+
+    def _fetch(self, chunk_id: str, size: int) -> bytes:
+        data = self._open(self.storage.open_stream(self.chunk_key(chunk_id)).read(), chunk_id)
+        if len(data) != size or not hmac.compare_digest(self.chunk_id(data), chunk_id):
+            raise Exception(f"Backup chunk {chunk_id} is corrupt")
+        return data
+
+    def stream(self, manifest_key: str, consume):
+        """
+        Pass a readable stream over the stored dump to `consume`, then check
+        the whole dump against the manifest. Returns (consume's result,
+        SHA-256 of the dump), like stream_decrypted().
+        """
+        manifest = self.read_manifest(manifest_key)
+        reader = ChunkReader(self, manifest)
+        try:
+            result = consume(reader)
+            # Drain anything consume left unread (e.g. tar's end-of-archive padding)
+            for _ in iter(lambda: reader.read(RELAY_CHUNK_SIZE), b""):
+                pass
+        finally:
+            reader.close()
+        return result, manifest["sha256"]
+
+    def collect_garbage(self, grace_hours: int = None, now: datetime = None) -> dict:
+        """
+        Delete chunks that no stored manifest references and that are older
+        than the grace period. Skipped while a backup holds a lease. Returns
+        {"manifests", "kept", "deleted", "deleted_bytes", "skipped"}.
+        """
+        grace = timedelta(hours=BACKUP_CHUNK_GC_GRACE_HOURS if grace_hours is None else grace_hours)
+        now = now or datetime.now(timezone.utc)
+        result = {"manifests": 0, "kept": 0, "deleted": 0, "deleted_bytes": 0, "skipped": False}
+
+        # Marker first, then leases: a backup that starts after this reads
+        # the marker and waits for us to finish
+        self.storage.put_object(GC_MARKER, b"")
+        try:
+            live = 0
+            for lease in self.storage.list_objects(LEASE_PREFIX):
+                if _older_than(lease, grace, now):
+                    logger.warning(f"[Cleanup] Removing stale backup lease {lease['key']}")
+                    self.storage.delete_file(lease["key"])
+                else:
+                    live += 1
+            if live:
+                logger.info(f"[Cleanup] Skipping chunk collection while {live} backups hold leases")
+                result["skipped"] = True
+                return result
+
+            manifests = self.storage.list_objects(MANIFEST_PREFIX)
+            referenced = set()
+            for obj in manifests:
+                referenced.update(chunk_id for chunk_id, _ in self.read_manifest(obj["key"])["chunks"])
+            result["manifests"] = len(manifests)
+
+            for obj in self.storage.list_objects(CHUNK_PREFIX):
+                chunk_id = obj["key"].rsplit("/", 1)[-1]
+                if chunk_id in referenced or not _older_than(obj, grace, now):
+                    result["kept"] += 1
+                    continue
+                if self.storage.delete_file(obj["key"]):
+                    result["deleted"] += 1
+                    result["deleted_bytes"] += obj["size"]
+        finally:
+            self.storage.delete_file(GC_MARKER)
+
+        logger.info(
+            f"[Cleanup] Chunk store: {result['manifests']} manifests, {result['kept']} chunks kept, "
+            f"{result['deleted']} deleted ({result['deleted_bytes']} bytes)"
+        )
+        return result
+
+
+class ChunkReader:
+    """Streams a manifest's chunks in order, fetching a few ahead. Raises at the end on a checksum mismatch."""
+
+    def __init__(self, store: ChunkStore, manifest: dict):
+        self.store = store
+        self.manifest = manifest
+        self._pool = ThreadPoolExecutor(max_workers=store.concurrency, thread_name_prefix="backup-chunks")
+        self._pending = []
+        self._next = 0
+        self._buffer = b""
+        self._sha256 = hashlib.sha256()
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def _fill(self):
+        chunks = self.manifest["chunks"]
+        while self._next < len(chunks) and len(self._pending) < self.store.concurrency * 2:
+            chunk_id, size = chunks[self._next]
+            self._pending.append(self._pool.submit(self.store._fetch, chunk_id, size))
+            self._next += 1
+
+    def read(self, size=-1):
+        with self._lock:
+            if size is None or size < 0:
+                size = RELAY_CHUNK_SIZE
+            while not self._buffer and not self._finished:
+                self._fill()
+                if not self._pending:
+                    self._finish()
+                    break
+                self._buffer = self._pending.pop(0).result()
+                self._sha256.update(self._buffer)
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+            return data
+
+    def _finish(self):
+        self._finished = True
+        if self._sha256.hexdigest() != self.manifest["sha256"]:
+            raise Exception("Reassembled backup does not match its manifest checksum")
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
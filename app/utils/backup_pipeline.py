@@ -0,0 +1,405 @@
+"""
+Streaming backup pipeline: dump | gpg | sha256 + multipart upload.
+
+run_backup_job used to write the dump to /tmp, write an encrypted copy
+next to it, re-read that copy to hash it and then upload it. That meant
+three passes over the disk and twice the dump size in scratch space. This
+pipeline makes one pass over the dump:
+
+    producer thread (writes dump bytes, counts them) -> gpg stdin
+    gpg stdout -> BackupStorageBackend.upload_stream (hash + parts)
+
+Two dump formats are supported, chosen per backup (Backup.dump_format):
+
+- "custom": `pg_dump --format=custom` is piped straight from stdout, so
+  nothing touches local disk. Restores run single-threaded.
+- "directory": `pg_dump --format=directory -j N` dumps tables in
+  parallel into a scratch directory. The directory is then streamed as an
+  uncompressed tar, with a trailing manifest.json holding each file's size
+  and SHA-256. Restores stream the object back through gpg into a scratch
+  directory, verify it against the manifest and run `pg_restore -j N`.
+  This way, restoring a large database scales with the available cores.
+
+The passphrase reaches gpg through a separate pipe (--passphrase-fd), since
+its stdin/stdout carry the data. gpg does not compress again (both dump
+formats are already compressed). If the producer or gpg fails, or the
+pipeline runs past `timeout`, the multipart upload is aborted and nothing
+is stored. On a timeout the dump process is killed as well, so a stalled
+pg_dump cannot hold the worker.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+from app.utils.logging_utils import logger
+
+BACKUP_FORMATS = ("custom", "directory")
+BACKUP_DEFAULT_FORMAT = os.getenv("BACKUP_DEFAULT_FORMAT", "custom")
+# Worker processes for directory-format pg_dump / pg_restore
+BACKUP_PARALLEL_JOBS = int(os.getenv("BACKUP_PARALLEL_JOBS", os.cpu_count() or 2))
+# Where directory-format dumps and restores are staged
+BACKUP_SCRATCH_DIR = os.getenv("BACKUP_SCRATCH_DIR", tempfile.gettempdir())
+
+# Minimum gap between progress reports of a running backup
+BACKUP_PROGRESS_INTERVAL_SECONDS = float(os.getenv("BACKUP_PROGRESS_INTERVAL_SECONDS", 2))
+
+RELAY_CHUNK_SIZE = 1024 * 1024
+# How long a timed-out pipeline waits for its producer thread to finish
+PRODUCER_JOIN_SECONDS = 5
+MANIFEST_NAME = "manifest.json"
+
+
+class BackupProgress:
+    """
+    Stage and byte counters for a running backup or restore. Counters are
+    bytes dumped (fed to gpg), encrypted (read from gpg) and uploaded
+    (acknowledged parts). `publish(snapshot)` is called on every stage
+    change and at most every BACKUP_PROGRESS_INTERVAL_SECONDS otherwise.
+    """
+    FIELDS = ("dumped", "encrypted", "uploaded")
+
+    def __init__(self, publish=None):
+        self.publish = publish
+        self.stage = "starting"
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        self._lock = threading.Lock()
+        self._published_at = 0.0
+
+    def snapshot(self) -> dict:
+        snapshot = {"stage": self.stage}
+        snapshot.update({f"bytes_{field}": count for field, count in self.counts.items()})
+        return snapshot
+
+    def set_stage(self, stage: str):
+        with self._lock:
+            self.stage = stage
+            self._publish(force=True)
+
+    def add(self, field: str, count: int):
+        with self._lock:
+            self.counts[field] += count
+            self._publish()
+
+    def _publish(self, force=False):
+        now = time.monotonic()
+        if self.publish is None or (not force and now - self._published_at < BACKUP_PROGRESS_INTERVAL_SECONDS):
+            return
+        self._published_at = now
+        try:
+            self.publish(self.snapshot())
+        except Exception as e:
+            logger.warning(f"[Backup] Could not publish progress: {str(e)}")
+
+
+class _CountingWriter:
+    def __init__(self, target, progress: BackupProgress):
+        self._target = target
+        self._progress = progress
+
+    def write(self, data):
+        written = self._target.write(data)
+        self._progress.add("dumped", len(data))
+        return written
+
+
+def gpg_command(passphrase_fd: int, decrypt: bool = False) -> list:
+    command = ["gpg", "--batch", "--passphrase-fd", str(passphrase_fd)]
+    if decrypt:
+        return command + ["--decrypt"]
+    return command + [
+        "--symmetric",                        # Symmetric encryption (no public key)
+        "--cipher-algo", "AES256",            # Use AES256
+        "--compress-algo", "none",            # Dumps are already compressed
+        "--output", "-",
+    ]
+
+
+def _start_gpg(passphrase: str, decrypt: bool = False):
+    passphrase_read, passphrase_write = os.pipe()
+    try:
+        gpg = subprocess.Popen(
+            gpg_command(passphrase_read, decrypt),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            pass_fds=(passphrase_read,),
+        )
+    finally:
+        os.close(passphrase_read)
+    with os.fdopen(passphrase_write, "w") as f:
+        f.write(passphrase)
+    return gpg
+
+
+def _start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+class _Pipeline:
+    """gpg plus the producer thread feeding it, with a watchdog."""
+
+    def __init__(self, produce, passphrase: str, timeout: int, decrypt: bool = False, progress=None,
+                 on_timeout=None):
+        self.gpg = _start_gpg(passphrase, decrypt)
+        self.progress = progress
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.timed_out = threading.Event()
+        self.produced = None
+        self.error = None
+        self._gpg_errors = []
+        self._threads = [
+            _start_thread(self._produce, produce),
+            _start_thread(self._drain_stderr),
+        ]
+        self._watchdog = threading.Timer(timeout, self._on_timeout)
+        self._watchdog.start()
+
+    def _produce(self, produce):
+        try:
+            target = _CountingWriter(self.gpg.stdin, self.progress) if self.progress else self.gpg.stdin
+            self.produced = produce(target)
+        except BrokenPipeError:
+            pass  # gpg exited early; its exit status reports why
+        except Exception as e:
+            self.error = e
+            self.kill()
+        finally:
+            try:
+                self.gpg.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def _drain_stderr(self):
+        self._gpg_errors.append(self.gpg.stderr.read())
+        self.gpg.stderr.close()
+
+    def _on_timeout(self):
+        self.timed_out.set()
+        self.kill()
+        # gpg's death does not reach a producer blocked reading a stalled dump
+        if self.on_timeout is not None:
+            self.on_timeout()
+
+    def kill(self):
+        if self.gpg.poll() is None:
+            self.gpg.kill()
+
+    def check(self):
+        """Wait for both sides and raise if anything failed."""
+        self.gpg.wait()
+        for thread in self._threads:
+            # A stalled producer that on_timeout could not stop is left behind
+            thread.join(PRODUCER_JOIN_SECONDS if self.timed_out.is_set() else None)
+        self._watchdog.cancel()
+        if self.timed_out.is_set():
+            raise Exception(f"Backup pipeline timed out after {self.timeout}s")
+        if self.error is not None:
+            raise self.error
+        if self.gpg.returncode != 0:
+            action = "decryption" if "--decrypt" in self.gpg.args else "encryption"
+            raise Exception(f"GPG {action} failed: {b''.join(self._gpg_errors).decode(errors='replace')}")
+
+    def close(self):
+        self._watchdog.cancel()
+        self.kill()
+        self.gpg.stdout.close()
+
+
+def stream_encrypted(produce, passphrase: str, storage, object_key: str, timeout: int = 3600,
+                     progress: BackupProgress = None, chunk_store=None, on_timeout=None) -> dict:
+    """
+    Encrypt whatever `produce(pipe)` writes and upload it to `object_key`.
+    `produce` returns the number of plaintext bytes it wrote. Returns
+    {"size", "checksum", "dump_size"}, where size and checksum describe the
+    stored (encrypted) object. `on_timeout()` is called from the watchdog
+    to stop whatever feeds the producer.
+
+    With a `chunk_store` (app/utils/backup_dedup.py) the plaintext is
+    deduplicated into it instead, and `object_key` receives the manifest.
+    """
+    if chunk_store is not None:
+        return chunk_store.put(produce, object_key, timeout, progress, on_timeout=on_timeout)
+
+    pipeline = _Pipeline(produce, passphrase, timeout, progress=progress, on_timeout=on_timeout)
+    if progress:
+        progress.set_stage("uploading")
+    try:
+        result = storage.upload_stream(
+            pipeline.gpg.stdout, object_key, before_complete=pipeline.check, progress=progress
+        )
+    finally:
+        pipeline.close()
+
+    result["dump_size"] = pipeline.produced
+    logger.info(
+        f"[Backup] Streamed {result['dump_size']} dump bytes as {result['size']} encrypted bytes to {object_key}"
+    )
+    return result
+
+
+def stream_encrypted_dump(dump_cmd: list, passphrase: str, storage, object_key: str,
+                          timeout: int = 3600, progress: BackupProgress = None, chunk_store=None) -> dict:
+    """Run `dump_cmd` and stream its stdout through stream_encrypted()."""
+    dumps = []
+    timed_out = threading.Event()
+
+    def kill_dump():
+        timed_out.set()
+        for dump in dumps:
+            if dump.poll() is None:
+                dump.kill()
+
+    def produce(target):
+        dump = subprocess.Popen(dump_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        dumps.append(dump)
+        if timed_out.is_set():
+            dump.kill()
+        errors = []
+        drain = _start_thread(lambda: errors.append(dump.stderr.read()))
+        written = 0
+        try:
+            for chunk in iter(lambda: dump.stdout.read(RELAY_CHUNK_SIZE), b""):
+                written += len(chunk)
+                target.write(chunk)
+        except BaseException:
+            dump.kill()
+            raise
+        finally:
+            dump.stdout.close()
+            dump.wait()
+            drain.join()
+        if dump.returncode != 0:
+            raise Exception(f"{dump_cmd[0]} failed: {b''.join(errors).decode(errors='replace')}")
+        return written
+
+    return stream_encrypted(produce, passphrase, storage, object_key, timeout, progress, chunk_store,
+                            on_timeout=kill_dump)
+
+
+# ============================================================================
+# DIRECTORY FORMAT
+# ============================================================================
+
+class _HashingReader:
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.sha256.update(data)
+        return data
+
+
+def scratch_directory(prefix: str) -> str:
+    """A fresh directory under BACKUP_SCRATCH_DIR; remove it with shutil.rmtree."""
+    os.makedirs(BACKUP_SCRATCH_DIR, exist_ok=True)
+    return tempfile.mkdtemp(prefix=prefix, dir=BACKUP_SCRATCH_DIR)
+
+
+def write_directory_tar(directory: str, target) -> int:
+    """
+    Write the files of a directory-format dump to `target` as a tar stream,
+    followed by manifest.json. Returns the number of file bytes written.
+    """
+    manifest = {"format": "directory", "files": {}}
+    total = 0
+    with tarfile.open(fileobj=target, mode="w|") as tar:
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            info = tar.gettarinfo(path, arcname=name)
+            with open(path, "rb") as f:
+                reader = _HashingReader(f)
+                tar.addfile(info, reader)
+            manifest["files"][name] = {"size": info.size, "sha256": reader.sha256.hexdigest()}
+            total += info.size
+
+        data = json.dumps(manifest, sort_keys=True).encode("utf-8")
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    return total
+
+
+def extract_directory_tar(stream, directory: str) -> dict:
+    """
+    Extract a write_directory_tar() stream into `directory` and verify every
+    file against the manifest. Returns the manifest.
+    """
+    manifest = None
+    seen = {}
+    with tarfile.open(fileobj=stream, mode="r|") as tar:
+        for member in tar:
+            if member.name == MANIFEST_NAME:
+                manifest = json.load(tar.extractfile(member))
+                continue
+            if not member.isfile() or os.path.basename(member.name) != member.name or member.name.startswith("."):
+                raise Exception(f"Unexpected entry in backup archive: {member.name}")
+            reader = _HashingReader(tar.extractfile(member))
+            with open(os.path.join(directory, member.name), "wb") as f:
+                shutil.copyfileobj(reader, f, RELAY_CHUNK_SIZE)
+            seen[member.name] = {"size": member.size, "sha256": reader.sha256.hexdigest()}
+
+    if manifest is None:
+        raise Exception("Backup archive has no manifest")
+    if seen != manifest["files"]:
+        bad = sorted(
+            name for name in set(seen) | set(manifest["files"])
+            if seen.get(name) != manifest["files"].get(name)
+        )
+        raise Exception(f"Backup archive does not match its manifest: {', '.join(bad)}")
+    return manifest
+
+
+def stream_encrypted_directory_dump(dump_cmd: list, dump_dir: str, passphrase: str, storage,
+                                    object_key: str, timeout: int = 3600,
+                                    progress: BackupProgress = None, chunk_store=None) -> dict:
+    """
+    Run a directory-format `dump_cmd` that writes `dump_dir`, then stream
+    the directory as a tar through stream_encrypted(). The result also
+    carries the manifest.
+    """
+    if progress:
+        progress.set_stage("dumping")
+    result = subprocess.run(dump_cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise Exception(f"{dump_cmd[0]} failed: {result.stderr}")
+    return stream_encrypted(
+        lambda target: write_directory_tar(dump_dir, target), passphrase, storage, object_key, timeout, progress,
+        chunk_store
+    )
+
+
+def stream_decrypted(source, passphrase: str, consume, timeout: int = 3600):
+    """
+    Feed encrypted bytes read from `source` through gpg --decrypt and pass
+    the plaintext pipe to `consume`. Returns (consume's result, SHA-256 of
+    the encrypted bytes).
+    """
+    sha256 = hashlib.sha256()
+
+    def produce(target):
+        total = 0
+        for chunk in iter(lambda: source.read(RELAY_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            total += len(chunk)
+            target.write(chunk)
+        return total
+
+    pipeline = _Pipeline(produce, passphrase, timeout, decrypt=True)
+    try:
+        result = consume(pipeline.gpg.stdout)
+        # Drain anything consume left unread (e.g. tar's end-of-archive padding)
+        for _ in iter(lambda: pipeline.gpg.stdout.read(RELAY_CHUNK_SIZE), b""):
+            pass
+        pipeline.check()
+    finally:
+        pipeline.close()
+    return result, sha256.hexdigest()
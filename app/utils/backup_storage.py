@@ -1,6 +1,14 @@
-import boto3
-from botocore.config import Config as BotoConfig
-from typing import Optional
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import BinaryIO, Optional
+from app.utils.storage_clients import get_s3_client
+
+# Multipart part size for streamed backups (S3/B2 minimum is 5 MB; at most
+# 10,000 parts, so 16 MB parts cover dumps up to ~160 GB)
+BACKUP_PART_SIZE = int(os.getenv("BACKUP_PART_SIZE", 16 * 1024 * 1024))
+# Parts uploading at once; memory use is bounded by (this + 1) * part size
+BACKUP_UPLOAD_CONCURRENCY = int(os.getenv("BACKUP_UPLOAD_CONCURRENCY", 4))
 
 
 class BackupStorageBackend:
@@ -8,18 +16,7 @@ class BackupStorageBackend:
 
     def __init__(self, endpoint_url: str, access_key: str, secret_key: str,
                  bucket: str, region: Optional[str] = None):
-        cfg = BotoConfig(
-            s3={"addressing_style": "path"},
-            signature_version="s3v4",
-        )
-        self.client = boto3.client(
-            "s3",
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-            region_name=region,
-            config=cfg,
-        )
+        self.client = get_s3_client(endpoint_url, access_key, secret_key, region, name="backups")
         self.bucket = bucket
 
     def upload_file(self, local_path: str, object_key: str) -> bool:
@@ -36,6 +33,84 @@ class BackupStorageBackend:
             print(f"[BackupStorage] Upload failed: {e}")
             return False
 
+    def upload_stream(self, stream: BinaryIO, object_key: str, before_complete=None,
+                      part_size: int = None, concurrency: int = None, progress=None) -> dict:
+        """
+        Upload everything read from `stream` as one object, hashing it inline.
+
+        Parts go up as multipart uploads on a small thread pool while the
+        next part is read, with at most `concurrency` parts in flight.
+        `before_complete` runs once the stream is exhausted, before the
+        object becomes visible; raising there discards the upload.
+        `progress` (a BackupProgress) counts bytes read and bytes uploaded.
+        Returns {"size": bytes, "checksum": sha256 hex}. Raises on failure
+        after aborting the multipart upload.
+        """
+        part_size = part_size or BACKUP_PART_SIZE
+        concurrency = concurrency or BACKUP_UPLOAD_CONCURRENCY
+        sha256 = hashlib.sha256()
+        size = 0
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=object_key, ContentType='application/octet-stream'
+        )["UploadId"]
+        parts = {}
+        in_flight = set()
+
+        def upload_part(number, body):
+            response = self.client.upload_part(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                PartNumber=number, Body=body,
+            )
+            if progress:
+                progress.add("uploaded", len(body))
+            return number, response["ETag"]
+
+        def collect(done):
+            for future in done:
+                number, etag = future.result()
+                parts[number] = etag
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="backup-upload") as pool:
+                number = 0
+                while True:
+                    body = _read_exactly(stream, part_size)
+                    # An empty stream still needs one (empty) part
+                    if not body and number:
+                        break
+                    sha256.update(body)
+                    size += len(body)
+                    if progress:
+                        progress.add("encrypted", len(body))
+                    number += 1
+                    if len(in_flight) >= concurrency:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    in_flight.add(pool.submit(upload_part, number, body))
+                    if len(body) < part_size:
+                        break
+                collect(wait(in_flight).done)
+
+            if before_complete:
+                before_complete()
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                MultipartUpload={"Parts": [
+                    {"ETag": parts[n], "PartNumber": n} for n in sorted(parts)
+                ]},
+            )
+        except BaseException:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            except Exception as e:
+                print(f"[BackupStorage] Abort failed: {e}")
+            raise
+        return {"size": size, "checksum": sha256.hexdigest()}
+
+    def open_stream(self, object_key: str) -> BinaryIO:
+        """Readable stream over an object's bytes. Raises if it cannot be fetched."""
+        return self.client.get_object(Bucket=self.bucket, Key=object_key)["Body"]
+
     def download_file(self, object_key: str, local_path: str) -> bool:
         """Download a file from B2."""
         try:
@@ -54,23 +129,44 @@ class BackupStorageBackend:
             print(f"[BackupStorage] Delete failed: {e}")
             return False
 
+    def put_object(self, object_key: str, body: bytes):
+        """Store a small object in one request. Raises on failure."""
+        self.client.put_object(
+            Bucket=self.bucket, Key=object_key, Body=body, ContentType='application/octet-stream'
+        )
+
+    def list_objects(self, prefix: str = "") -> list:
+        """
+        Every object under `prefix` as {"key", "size", "last_modified"},
+        following pagination. Raises on failure.
+        """
+        objects = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                objects.append({"key": obj["Key"], "size": obj["Size"], "last_modified": obj["LastModified"]})
+        return objects
+
     def list_files(self, prefix: str = "") -> list:
         """List all files in B2 with optional prefix filter."""
         try:
-            response = self.client.list_objects_v2(
-                Bucket=self.bucket,
-                Prefix=prefix
-            )
-
-            if 'Contents' not in response:
-                return []
-
-            return [obj['Key'] for obj in response['Contents']]
+            return [obj["key"] for obj in self.list_objects(prefix)]
         except Exception as e:
             print(f"[BackupStorage] List files failed: {e}")
             return []
 
 
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """Read `size` bytes from a pipe (short only at end of stream)."""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = stream.read(size - len(buffer))
+        if not chunk:
+            break
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
 def get_backup_storage() -> BackupStorageBackend:
     """Factory function to create backup storage backend."""
     from app.config import (
@@ -1,10 +1,46 @@
 """
 Utility functions for data import operations
 """
+import os
 import re
-from typing import Optional, Dict, Any
+import io
+import csv
+import codecs
+from datetime import datetime
+from itertools import islice
+from typing import Optional, Dict, Any, Iterator
+import numpy as np
+import openpyxl
 import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from app.constants import PHONE_LABELS
+from app.models import Lead
 from app.utils.phone_utils import clean_phone_number
+from app.utils.search_index import index_instances
+
+# Rows per INSERT batch (and per savepoint) in import_leads, and per parsed chunk
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# Bytes of a CSV upload inspected to pick its encoding
+UPLOAD_SNIFF_BYTES = 64 * 1024
+
+VALID_LEAD_FIELDS = {
+    'name': {'required': True, 'type': 'string', 'max_length': 100},
+    'contact_person': {'required': False, 'type': 'string', 'max_length': 100},
+    'contact_title': {'required': False, 'type': 'string', 'max_length': 100},
+    'email': {'required': False, 'type': 'email', 'max_length': 120},
+    'phone': {'required': False, 'type': 'phone', 'max_length': 20},
+    'phone_label': {'required': False, 'type': 'choice', 'choices': PHONE_LABELS},
+    'secondary_phone': {'required': False, 'type': 'phone', 'max_length': 20},
+    'secondary_phone_label': {'required': False, 'type': 'choice', 'choices': PHONE_LABELS},
+    'address': {'required': False, 'type': 'string', 'max_length': 255},
+    'city': {'required': False, 'type': 'string', 'max_length': 100},
+    'state': {'required': False, 'type': 'string', 'max_length': 100},
+    'zip': {'required': False, 'type': 'string', 'max_length': 20},
+    'notes': {'required': False, 'type': 'text'},
+    'type': {'required': False, 'type': 'string'},  # Permissive - accepts any value
+    'lead_status': {'required': False, 'type': 'string'}  # Permissive - accepts any value
+}
 
 
 def validate_email(email: str) -> Optional[str]:
@@ -98,4 +134,283 @@ def map_lead_data(row: pd.Series) -> Dict[str, Any]:
         'notes': notes,
         'type': 'Food and Beverage',
         'lead_status': 'open'
-    }
\ No newline at end of file
+    }
+
+
+# ============================================================================
+# BATCHED LEAD IMPORT
+# ============================================================================
+
+def sniff_encoding(stream) -> str:
+    """
+    Pick the text encoding of a CSV upload from its first
+    UPLOAD_SNIFF_BYTES. UTF-8 (with or without BOM) if the prefix decodes,
+    else latin-1, which accepts any byte. Leaves the stream at 0.
+    """
+    stream.seek(0)
+    prefix = stream.read(UPLOAD_SNIFF_BYTES)
+    stream.seek(0)
+    try:
+        # Incremental decode tolerates a multi-byte character cut off at the end
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def _upload_kind(filename: str) -> str:
+    filename = filename.lower()
+    if filename.endswith(".csv"):
+        return "csv"
+    if filename.endswith(".xlsx"):
+        return "xlsx"
+    raise ValueError("Unsupported file format")
+
+
+def _strip_headers(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+def _xlsx_rows(stream):
+    """Yield (headers, row iterator) for the first sheet, in read-only mode."""
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    header = next(rows, None) or ()
+
+    # Match read_excel's names for blank and repeated headers
+    headers, seen = [], {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name).strip()
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        headers.append(name)
+
+    def values():
+        try:
+            for row in rows:
+                if any(cell is not None and cell != "" for cell in row):
+                    yield row[:len(headers)]
+        finally:
+            workbook.close()
+    return headers, values()
+
+
+def iter_upload(stream, filename: str, chunksize: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Parse a CSV/XLSX upload into DataFrames of at most `chunksize` rows.
+    The index keeps counting across chunks (row n of the sheet has index
+    n - 2), so memory stays bounded by the chunk, not the file.
+    """
+    chunksize = chunksize or IMPORT_CHUNK_SIZE
+    kind = _upload_kind(filename)
+
+    if kind == "csv":
+        encoding = sniff_encoding(stream)
+        with pd.read_csv(stream, encoding=encoding, encoding_errors="replace", chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield _strip_headers(chunk)
+        return
+
+    stream.seek(0)
+    headers, rows = _xlsx_rows(stream)
+    start = 0
+    while True:
+        batch = list(islice(rows, chunksize))
+        if not batch:
+            break
+        yield pd.DataFrame.from_records(
+            batch, columns=headers, index=pd.RangeIndex(start, start + len(batch))
+        )
+        start += len(batch)
+
+
+def count_upload_rows(stream, filename: str) -> int:
+    """Count data rows without building DataFrames. Leaves the stream at 0."""
+    kind = _upload_kind(filename)
+    if kind == "csv":
+        encoding = sniff_encoding(stream)
+        text = io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline="")
+        try:
+            # csv handles quoted newlines; blank lines are skipped like read_csv does
+            count = sum(1 for row in csv.reader(text) if row) - 1
+        finally:
+            text.detach()
+    else:
+        stream.seek(0)
+        _, rows = _xlsx_rows(stream)
+        count = sum(1 for _ in rows)
+    stream.seek(0)
+    return max(count, 0)
+
+
+def preview_upload(stream, filename: str, rows: int = 10):
+    """Return (headers, first `rows` rows, total row count) reading only what that needs."""
+    first = next(iter_upload(stream, filename, chunksize=rows), None)
+    if first is None:
+        headers, sample = [], []
+    else:
+        headers, sample = first.columns.tolist(), first.head(rows).fillna('').values.tolist()
+    return headers, sample, count_upload_rows(stream, filename)
+
+
+def clean_phone_series(values: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_phone_number: same rules, applied to a whole column.
+    Blank or invalid numbers become None.
+    """
+    digits = values.astype("string").str.replace(r"\D", "", regex=True)
+    length = digits.str.len().fillna(0).to_numpy()
+    digits = digits.fillna("").to_numpy(dtype=object)
+
+    cleaned = np.select(
+        [
+            length == 10,
+            (length == 11) & np.char.startswith(digits.astype(str), "1"),
+            length == 7,
+            (length >= 7) & (length <= 15),
+        ],
+        ["+1" + digits, "+" + digits, digits, "+" + digits],
+        default=None,
+    )
+    return pd.Series(cleaned, index=values.index, dtype=object)
+
+
+def _text_column(values: pd.Series) -> pd.Series:
+    """Stripped strings, with NaN/blank cells as None."""
+    text = values.astype(str).str.strip()
+    return text.where(values.notna() & (text != ""), None).astype(object)
+
+
+def _row_data(df: pd.DataFrame, idx) -> Dict[str, Any]:
+    """A sheet row's non-empty cells as JSON-safe values, for failure reports."""
+    data = {}
+    for key, value in df.loc[idx].dropna().items():
+        if hasattr(value, "item"):
+            value = value.item()
+        if not isinstance(value, (str, int, float, bool)):
+            value = str(value)
+        data[str(key)] = value
+    return data
+
+
+def prepare_leads(df: pd.DataFrame, column_mappings: list):
+    """
+    Map and clean an import sheet column-by-column.
+
+    Returns (records, failures, warnings): records is a DataFrame of Lead
+    column values for the valid rows (indexed like df), failures is a list
+    of {"row", "data", "error"} for rejected rows. Row numbers are
+    spreadsheet rows (index + 2, counting the header).
+    """
+    row_numbers = pd.Series(df.index + 2, index=df.index)
+    warnings = []
+    fields = {}
+
+    for mapping in column_mappings:
+        csv_col = mapping['csvColumn']
+        lead_field = mapping['leadField']
+        if not lead_field or csv_col not in df.columns:
+            continue
+
+        text = _text_column(df[csv_col])
+        if lead_field in ('phone', 'secondary_phone'):
+            cleaned = clean_phone_series(text)
+            invalid = text.notna() & cleaned.isna()
+            warnings.extend(f"Invalid phone on row {n}" for n in row_numbers[invalid])
+            text = cleaned
+        elif lead_field == 'email':
+            text = text.str.lower()
+        elif lead_field.endswith("_label"):
+            unknown = text.notna() & ~text.str.lower().isin([p.lower() for p in PHONE_LABELS])
+            warnings.extend(
+                f"Unknown phone label '{value}' on row {n}"
+                for value, n in zip(text[unknown], row_numbers[unknown])
+            )
+            text = text.mask(unknown, "work")
+
+        # Later mappings win, but a blank cell keeps the earlier value
+        fields[lead_field] = text if lead_field not in fields else text.combine_first(fields[lead_field])
+
+    records = pd.DataFrame(fields, index=df.index, dtype=object)
+    for column in VALID_LEAD_FIELDS:
+        if column not in records:
+            records[column] = None
+
+    errors = pd.Series(None, index=df.index, dtype=object)
+    errors = errors.mask(records['name'].isna(), "Missing required 'name' field")
+    for field, spec in VALID_LEAD_FIELDS.items():
+        max_length = spec.get('max_length')
+        if max_length:
+            too_long = errors.isna() & (records[field].str.len() > max_length)
+            errors = errors.mask(too_long, f"'{field}' exceeds {max_length} characters")
+
+    failed = errors.notna()
+    failures = [
+        {"row": int(n), "data": _row_data(df, idx), "error": error}
+        for idx, n, error in zip(df.index[failed], row_numbers[failed], errors[failed])
+    ]
+
+    records = records[~failed]
+    records['type'] = records['type'].fillna("None")
+    records['lead_status'] = records['lead_status'].fillna("open")
+    records['phone_label'] = records['phone_label'].fillna("work")
+    records['secondary_phone_label'] = records['secondary_phone_label'].mask(
+        records['secondary_phone'].notna() & records['secondary_phone_label'].isna(), "mobile"
+    )
+    return records, failures, warnings
+
+
+def import_leads(session, df: pd.DataFrame, column_mappings: list, *, tenant_id: int,
+                 created_by: int, assigned_to: int, chunk_size: int = None) -> Dict[str, Any]:
+    """
+    Validate and insert an import sheet in batches. Each batch is one
+    multi-row INSERT inside a savepoint; if the database rejects a batch,
+    its rows are retried one at a time so only the bad rows fail. Search
+    documents are written alongside. The caller commits.
+    """
+    records, failures, warnings = prepare_leads(df, column_mappings)
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+
+    records['tenant_id'] = tenant_id
+    records['created_by'] = created_by
+    records['assigned_to'] = assigned_to
+    records['created_at'] = datetime.utcnow()
+    rows = records.to_dict("records")
+    indexes = records.index.tolist()
+
+    def insert_rows(batch):
+        with session.begin_nested():
+            leads = session.scalars(insert(Lead).returning(Lead), batch).all()
+            index_instances(session.connection(), leads)
+        return leads
+
+    names = []
+    for start in range(0, len(rows), chunk_size):
+        batch = rows[start:start + chunk_size]
+        try:
+            insert_rows(batch)
+            names.extend(row['name'] for row in batch)
+        except SQLAlchemyError:
+            for idx, row in zip(indexes[start:start + chunk_size], batch):
+                try:
+                    insert_rows([row])
+                    names.append(row['name'])
+                except SQLAlchemyError as e:
+                    failures.append({
+                        "row": int(idx) + 2,
+                        "data": _row_data(df, idx),
+                        "error": str(e.orig if getattr(e, "orig", None) else e)
+                    })
+
+    failures.sort(key=lambda f: f["row"])
+    return {
+        "successful": len(names),
+        "failed": len(failures),
+        "failures": failures,
+        "warnings": list(set(warnings)),
+        "names": names,
+    }
@@ -0,0 +1,88 @@
+"""
+Denormalized interaction stats on clients and leads.
+
+Client.interaction_count / last_interaction_at (and the same pair on Lead)
+mirror COUNT(*) and MAX(contact_date) over the interactions attached to the
+row. The activity sort and the active/inactive filters on client lists read
+these columns instead of grouping over interactions.
+
+The interaction create, update, delete and transfer handlers call
+refresh_interaction_stats() for every client/lead they touched. The stats
+are recomputed from the interactions table, not incremented, so a retried
+or concurrent request cannot make them drift. Run
+scripts/backfill_interaction_stats.py once after migrating, and after a
+restore or raw-SQL change to interactions.
+"""
+from sqlalchemy import func, select
+from app.models import Client, Lead, Interaction
+from app.utils.list_totals import invalidate_totals, invalidate_totals_on_commit
+
+STATS_PARENTS = (
+    (Client, Interaction.client_id),
+    (Lead, Interaction.lead_id),
+)
+
+
+def _stats_values(model, foreign_key):
+    # updated_at is passed through so the onupdate default does not fire:
+    # logging an interaction is not an edit of the client/lead itself
+    return {
+        "interaction_count": select(func.count(Interaction.id))
+        .where(foreign_key == model.id).scalar_subquery(),
+        "last_interaction_at": select(func.max(Interaction.contact_date))
+        .where(foreign_key == model.id).scalar_subquery(),
+        "updated_at": model.updated_at,
+    }
+
+
+def refresh_interaction_stats(session, client_ids=(), lead_ids=()):
+    """Recompute stats for these clients/leads in the current transaction."""
+    session.flush()
+    for (model, foreign_key), ids in zip(STATS_PARENTS, (client_ids, lead_ids)):
+        ids = {i for i in ids if i}
+        if not ids:
+            continue
+        # Core statement: these columns are not searchable, so the ORM bulk
+        # hooks (search re-index) have nothing to do here
+        table = model.__table__
+        session.execute(
+            table.update()
+            .where(table.c.id.in_(ids))
+            .values(_stats_values(model, foreign_key))
+        )
+        invalidate_totals_on_commit(session, table.name)
+
+
+def stats_targets(*interactions):
+    """(client_ids, lead_ids) referenced by these interactions."""
+    return (
+        {i.client_id for i in interactions if i.client_id},
+        {i.lead_id for i in interactions if i.lead_id},
+    )
+
+
+def backfill_interaction_stats(session, tenant_id: int = None, batch_size: int = 1000):
+    """Recompute stats for every client and lead (optionally one tenant). Returns the row count."""
+    total = 0
+    for model, foreign_key in STATS_PARENTS:
+        table = model.__table__
+        query = select(table.c.id).order_by(table.c.id).limit(batch_size)
+        if tenant_id is not None:
+            query = query.where(table.c.tenant_id == tenant_id)
+
+        # Keyset batches, committed one at a time, keep locks short on large tenants
+        last_id = 0
+        while True:
+            ids = session.execute(query.where(table.c.id > last_id)).scalars().all()
+            if not ids:
+                break
+            session.execute(
+                table.update()
+                .where(table.c.id.in_(ids))
+                .values(_stats_values(model, foreign_key))
+            )
+            session.commit()
+            total += len(ids)
+            last_id = ids[-1]
+        invalidate_totals(table.name)
+    return total
@@ -0,0 +1,154 @@
+"""
+Totals for paginated list responses.
+
+List endpoints used to run query.count() over their full visibility filter
+on every request. For list_projects that filter has six EXISTS
+subqueries. The count was often the more expensive half of the request.
+
+TotalCounter (passed to paginate() as `counter`) serves totals from two
+places:
+
+- An in-process TTL/LRU cache. The key is the count query's SQL and bound
+  parameters, which already include the tenant, the user and any filters.
+  Each entry records a write version for every table the query reads.
+  Flushed and bulk inserts/updates/deletes bump those versions when their
+  transaction commits, so a write to leads (or to clients, which projects'
+  visibility depends on) invalidates the affected counts at once in this
+  process. Writes that roll back leave the cache alone. Other processes rely on
+  LIST_TOTAL_CACHE_TTL_SECONDS.
+- Planner estimates. With allow_estimate=True (admin /all views) on
+  PostgreSQL, tables with more than LIST_TOTAL_ESTIMATE_MIN_ROWS rows are
+  counted with EXPLAIN's row estimate instead of COUNT(*). counter.estimated
+  tells the caller which kind of total it got.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+LIST_TOTAL_CACHE_TTL_SECONDS = int(os.getenv("LIST_TOTAL_CACHE_TTL_SECONDS", 30))
+LIST_TOTAL_CACHE_MAX_ENTRIES = int(os.getenv("LIST_TOTAL_CACHE_MAX_ENTRIES", 5000))
+LIST_TOTAL_ESTIMATE_MIN_ROWS = int(os.getenv("LIST_TOTAL_ESTIMATE_MIN_ROWS", 100000))
+
+_totals_cache = OrderedDict()
+_table_versions = defaultdict(int)
+_totals_lock = threading.Lock()
+
+
+def _versions(tables):
+    return tuple(_table_versions[name] for name in tables)
+
+
+def invalidate_totals(*tables):
+    """Drop cached totals that read any of these tables (all tables if none given)."""
+    with _totals_lock:
+        if not tables:
+            _totals_cache.clear()
+        for name in tables:
+            _table_versions[name] += 1
+
+
+class TotalCounter:
+    """Callable that returns a (possibly cached or estimated) total for a list query."""
+
+    def __init__(self, allow_estimate: bool = False):
+        self.allow_estimate = allow_estimate
+        self.estimated = False
+
+    def __call__(self, query) -> int:
+        statement = query.order_by(None).statement
+        session = query.session
+        dialect = session.get_bind().dialect
+        compiled = statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+        tables = sorted({t.name for t in find_tables(statement, check_columns=True, include_joins=True)
+                         if hasattr(t, "name")})
+        key = (str(compiled), json.dumps(compiled.params, default=str, sort_keys=True), self.allow_estimate)
+
+        now = time.monotonic()
+        with _totals_lock:
+            entry = _totals_cache.get(key)
+            if entry and entry[0] > now and entry[1] == _versions(tables):
+                _totals_cache.move_to_end(key)
+                self.estimated = entry[3]
+                return entry[2]
+            versions = _versions(tables)
+
+        total, estimated = None, False
+        if self.allow_estimate and dialect.name == "postgresql":
+            total = _planner_estimate(session, compiled, tables)
+            estimated = total is not None
+        if total is None:
+            total = query.order_by(None).count()
+
+        if LIST_TOTAL_CACHE_TTL_SECONDS > 0:
+            with _totals_lock:
+                # Versions captured before counting: a concurrent write makes this entry stale at once
+                _totals_cache[key] = (now + LIST_TOTAL_CACHE_TTL_SECONDS, versions, total, estimated)
+                _totals_cache.move_to_end(key)
+                while len(_totals_cache) > LIST_TOTAL_CACHE_MAX_ENTRIES:
+                    _totals_cache.popitem(last=False)
+
+        self.estimated = estimated
+        return total
+
+
+def _planner_estimate(session, compiled, tables):
+    """EXPLAIN row estimate, or None if every table is small enough to count exactly."""
+    sizes = session.execute(
+        text("SELECT coalesce(max(reltuples), 0) FROM pg_class WHERE relname = ANY(:names)"),
+        {"names": list(tables)}
+    ).scalar()
+    if not sizes or sizes < LIST_TOTAL_ESTIMATE_MIN_ROWS:
+        return None
+    params = compiled.params
+    if compiled.positional:
+        # asyncpg takes $1, $2... arguments in order
+        params = tuple(params[name] for name in compiled.positiontup)
+    plan = session.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# ============================================================================
+# INVALIDATION HOOKS
+# ============================================================================
+
+def invalidate_totals_on_commit(session, *tables):
+    """Drop cached totals over these tables once the session's transaction commits."""
+    session.info.setdefault("list_totals_changed", set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_tables(session, flush_context):
+    tables = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if hasattr(obj, "__table__")
+    }
+    if tables:
+        invalidate_totals_on_commit(session, *tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            invalidate_totals_on_commit(orm_execute_state.session, mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    tables = session.info.pop("list_totals_changed", None)
+    if tables:
+        invalidate_totals(*tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("list_totals_changed", None)
@@ -0,0 +1,175 @@
+"""
+Precomputed effective owners for projects and interactions.
+
+Project.effective_owner_id resolves the ownership chain that list_projects
+used to evaluate per row with six correlated EXISTS subqueries:
+
+    project.assigned_to
+    -> linked client's (assigned_to, else created_by)
+    -> linked lead's (assigned_to, else created_by)
+    -> project.created_by (standalone projects only)
+
+Interaction.effective_owner_id is its parent's owner. The parent is the
+client, else the lead, else the project, and the project case uses the
+project's effective owner. Owner-scoped lists then filter on
+(tenant_id, effective_owner_id), which is a single index range scan.
+
+An after_flush hook keeps both columns in sync. It runs when a client or
+lead is reassigned, when a project is created, reassigned or relinked,
+and when an interaction is created or moved. It recomputes them with
+set-based UPDATEs in the same transaction. That covers the assign and
+update routes in clients, leads and projects, plus every other ORM write
+path (imports, conversions). The add_effective_owners migration fills the
+columns for existing rows; run scripts/backfill_effective_owners.py after a
+restore or a raw-SQL change to ownership columns.
+"""
+from sqlalchemy import event, case, func, or_, select, false
+from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+from app.models import Client, Lead, Project, Interaction
+from app.utils.list_totals import invalidate_totals, invalidate_totals_on_commit
+
+_clients = Client.__table__
+_leads = Lead.__table__
+_projects = Project.__table__
+_interactions = Interaction.__table__
+
+# Columns whose change can move ownership
+OWNER_FIELDS = {
+    Client: ("assigned_to", "created_by"),
+    Lead: ("assigned_to", "created_by"),
+    Project: ("assigned_to", "created_by", "client_id", "lead_id"),
+    Interaction: ("client_id", "lead_id", "project_id"),
+}
+
+
+def _parent_owner(table, foreign_key):
+    return (
+        select(func.coalesce(table.c.assigned_to, table.c.created_by))
+        .where(table.c.id == foreign_key)
+        .scalar_subquery()
+    )
+
+
+def project_owner_expression():
+    p = _projects.c
+    return func.coalesce(p.assigned_to, case(
+        (p.client_id != None, _parent_owner(_clients, p.client_id)),
+        (p.lead_id != None, _parent_owner(_leads, p.lead_id)),
+        else_=p.created_by,
+    ))
+
+
+def interaction_owner_expression():
+    i = _interactions.c
+    project_owner = (
+        select(_projects.c.effective_owner_id)
+        .where(_projects.c.id == i.project_id)
+        .scalar_subquery()
+    )
+    return case(
+        (i.client_id != None, _parent_owner(_clients, i.client_id)),
+        (i.lead_id != None, _parent_owner(_leads, i.lead_id)),
+        (i.project_id != None, project_owner),
+        else_=None,
+    )
+
+
+def _owner_values(table):
+    values = {"effective_owner_id": (
+        project_owner_expression() if table is _projects else interaction_owner_expression()
+    )}
+    # Passed through so the onupdate default does not fire: an ownership
+    # change upstream is not an edit of the project itself
+    if "updated_at" in table.c:
+        values["updated_at"] = table.c.updated_at
+    return values
+
+
+def _in(column, ids):
+    return column.in_(ids) if ids else false()
+
+
+def sync_effective_owners(connection, client_ids=(), lead_ids=(), project_ids=(), interaction_ids=()):
+    """Recompute owners downstream of these rows. Returns False if there was nothing to do."""
+    client_ids, lead_ids = set(client_ids), set(lead_ids)
+    project_ids, interaction_ids = set(project_ids), set(interaction_ids)
+    if not (client_ids or lead_ids or project_ids or interaction_ids):
+        return False
+
+    p, i = _projects.c, _interactions.c
+    affected_projects = or_(
+        _in(p.id, project_ids), _in(p.client_id, client_ids), _in(p.lead_id, lead_ids)
+    )
+    connection.execute(
+        _projects.update()
+        .where(affected_projects)
+        .values(_owner_values(_projects))
+    )
+    # Projects first: interactions on a project inherit its new owner
+    connection.execute(
+        _interactions.update()
+        .where(or_(
+            _in(i.id, interaction_ids),
+            _in(i.client_id, client_ids),
+            _in(i.lead_id, lead_ids),
+            i.project_id.in_(select(p.id).where(affected_projects)),
+        ))
+        .values(_owner_values(_interactions))
+    )
+    return True
+
+
+def backfill_effective_owners(session, tenant_id: int = None, batch_size: int = 1000):
+    """Recompute owners for every project, then every interaction. Returns the row count."""
+    total = 0
+    for table in (_projects, _interactions):
+        query = select(table.c.id).order_by(table.c.id).limit(batch_size)
+        if tenant_id is not None:
+            query = query.where(table.c.tenant_id == tenant_id)
+
+        # Keyset batches, committed one at a time, keep locks short on large tenants
+        last_id = 0
+        while True:
+            ids = session.execute(query.where(table.c.id > last_id)).scalars().all()
+            if not ids:
+                break
+            session.execute(table.update().where(table.c.id.in_(ids)).values(_owner_values(table)))
+            session.commit()
+            total += len(ids)
+            last_id = ids[-1]
+        invalidate_totals(table.name)
+    return total
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+def _owner_fields_changed(obj, fields):
+    state = sa_inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_after_flush(session, flush_context):
+    changed = {model: set() for model in OWNER_FIELDS}
+    for obj in list(session.new) + list(session.dirty):
+        model = type(obj)
+        if model not in OWNER_FIELDS:
+            continue
+        # A new client/lead has no projects or interactions yet
+        if obj in session.new and model in (Client, Lead):
+            continue
+        if obj in session.new or _owner_fields_changed(obj, OWNER_FIELDS[model]):
+            changed[model].add(obj.id)
+
+    synced = sync_effective_owners(
+        session.connection(),
+        client_ids=changed[Client],
+        lead_ids=changed[Lead],
+        project_ids=changed[Project],
+        interaction_ids=changed[Interaction],
+    )
+    if synced:
+        invalidate_totals_on_commit(session, _projects.name, _interactions.name)
@@ -0,0 +1,105 @@
+"""
+Pagination helpers for list endpoints.
+
+Two modes, picked by the request:
+- page/per_page (default): OFFSET paging with an exact total, as before.
+- cursor (opt-in, `?cursor=` for the first page, then the returned
+  `next_cursor`): keyset paging over (sort key, id). Each page is an
+  index range scan, so page 10,000 costs the same as page 1. The total is
+  only computed when `include_total=true` is passed.
+
+Cursors are opaque (URL-safe base64 JSON of the last row's sort values)
+and are tied to the sort order they were issued for.
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    """Bad cursor or a sort order that cannot be keyset-paginated."""
+
+
+def keyset_for(sort_order: str, date_col, name_col, id_col):
+    """
+    (column, direction) keys for the standard newest/oldest/alphabetical
+    sorts, or None if `sort_order` has no keyset equivalent.
+    """
+    if sort_order == "newest":
+        return [(date_col, "desc"), (id_col, "desc")]
+    if sort_order == "oldest":
+        return [(date_col, "asc"), (id_col, "asc")]
+    if sort_order == "alphabetical" and name_col is not None:
+        return [(name_col, "asc"), (id_col, "asc")]
+    return None
+
+
+def encode_cursor(sort_order: str, values: list) -> str:
+    payload = {
+        "s": sort_order,
+        "v": [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_order: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v
+            for v in payload["v"]
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if payload.get("s") != sort_order:
+        raise PaginationError("Cursor was issued for a different sort order")
+    return values
+
+
+def _after(keys, values):
+    """Rows strictly after `values` in (k1, k2, ...) order: k1 > v1 OR (k1 = v1 AND k2 > v2) ..."""
+    clauses = []
+    for i, (column, direction) in enumerate(keys):
+        past = column < values[i] if direction == "desc" else column > values[i]
+        clauses.append(and_(*[keys[j][0] == values[j] for j in range(i)], past))
+    return or_(*clauses)
+
+
+def paginate(query, args, page: int, per_page: int, sort_order: str, keys=None, counter=None):
+    """
+    Page `query` per the request args. Returns (items, total, next_cursor);
+    total is None in cursor mode unless include_total=true, next_cursor is
+    None in page mode and on the last page. `counter` (e.g. a
+    list_totals.TotalCounter) replaces query.count() for the total.
+    """
+    count = counter or (lambda q: q.order_by(None).count())
+
+    if "cursor" not in args:
+        total = count(query)
+        return query.offset((page - 1) * per_page).limit(per_page).all(), total, None
+
+    if keys is None:
+        raise PaginationError(f"Cursor pagination is not supported for sort '{sort_order}'")
+
+    total = count(query) if args.get("include_total") == "true" else None
+
+    keyset = query.order_by(None).order_by(
+        *[column.desc() if direction == "desc" else column.asc() for column, direction in keys]
+    )
+    cursor = args.get("cursor")
+    if cursor:
+        values = decode_cursor(cursor, sort_order)
+        if len(values) != len(keys):
+            raise PaginationError("Invalid cursor")
+        keyset = keyset.filter(_after(keys, values))
+
+    rows = keyset.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(sort_order, [getattr(last, column.key) for column, _ in keys])
+    return items, total, next_cursor
@@ -1,20 +1,45 @@
 """
-Simple in-memory rate limiter for authentication endpoints.
+Rate limiter for authentication and other abuse-prone endpoints.
 
-For production with multiple server instances, consider Redis-backed rate limiting.
-This implementation uses a sliding window counter approach.
+Each limit is a sliding window: at most `max_attempts` requests per
+`window_seconds` for a key. A key is made from the route and the scope,
+which can be the client IP, the authenticated user or the tenant. The
+window is kept as a ring buffer of the last `max_attempts` request times,
+so checking and recording a hit is O(1). A request is allowed while the
+buffer has free slots or while its oldest entry is outside the window.
+
+Two backends hold the buffers:
+
+- RedisBackend (RATE_LIMIT_BACKEND=redis, the default) keeps each buffer
+  in a capped Redis list, so limits hold across Hypercorn workers and Fly
+  machines. A Lua script does the check and the update atomically. The
+  backend has its own client with RATE_LIMIT_REDIS_TIMEOUT_SECONDS socket
+  timeouts. If Redis is unreachable, the limiter falls back to a
+  per-process MemoryBackend and retries Redis after
+  RATE_LIMIT_REDIS_RETRY_SECONDS.
+- MemoryBackend (RATE_LIMIT_BACKEND=memory) keeps the buffers in process,
+  for tests and single-process development.
+
+Responses carry X-RateLimit-Limit, X-RateLimit-Remaining and
+X-RateLimit-Reset (seconds until a slot frees up), plus Retry-After on 429.
 """
+import os
+import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, deque
 from functools import wraps
-from quart import request, jsonify
+from quart import request, jsonify, make_response
+from app.utils.logging_utils import logger
 
-# In-memory storage: {ip_address: [(timestamp, count), ...]}
-_rate_limit_store = defaultdict(list)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "redis")
+# Buffers kept by the in-memory backend before the least recently used go
+RATE_LIMIT_MEMORY_MAX_KEYS = int(os.getenv("RATE_LIMIT_MEMORY_MAX_KEYS", 100000))
+# Connect/read timeout for the limiter's Redis client
+RATE_LIMIT_REDIS_TIMEOUT_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", 0.25))
+# After a Redis error, limit per process for this long before trying again
+RATE_LIMIT_REDIS_RETRY_SECONDS = int(os.getenv("RATE_LIMIT_REDIS_RETRY_SECONDS", 30))
 
-# Cleanup old entries every N requests
-_cleanup_counter = 0
-_cleanup_threshold = 100
+KEY_PREFIX = "ratelimit:"
 
 
 def _get_client_ip():
@@ -27,39 +52,154 @@ def _get_client_ip():
     return request.remote_addr or 'unknown'
 
 
-def _cleanup_old_entries():
-    """Remove expired entries to prevent memory bloat."""
-    global _cleanup_counter
-    _cleanup_counter += 1
-    
-    if _cleanup_counter >= _cleanup_threshold:
-        current_time = time.time()
-        expired_ips = []
-        
-        for ip, attempts in _rate_limit_store.items():
-            # Remove attempts older than 1 hour
-            _rate_limit_store[ip] = [
-                (timestamp, count) for timestamp, count in attempts
-                if current_time - timestamp < 3600
-            ]
-            # Mark empty IPs for deletion
-            if not _rate_limit_store[ip]:
-                expired_ips.append(ip)
-        
-        for ip in expired_ips:
-            del _rate_limit_store[ip]
-        
-        _cleanup_counter = 0
-
-
-def rate_limit(max_attempts: int, window_seconds: int):
+def _scope_identity(scope: str) -> str:
+    user = getattr(request, "user", None)
+    if scope == "user" and user is not None:
+        return f"user:{user.id}"
+    if scope == "tenant" and user is not None:
+        return f"tenant:{user.tenant_id}"
+    # Unauthenticated requests (and scope="ip") are limited per client IP
+    return f"ip:{_get_client_ip()}"
+
+
+class MemoryBackend:
+    """Per-process ring buffers, for tests and single-process development."""
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = RATE_LIMIT_MEMORY_MAX_KEYS if max_keys is None else max_keys
+        self._buffers = OrderedDict()  # key -> deque of hit times, newest last
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float, now: float = None):
+        """Record a hit if allowed. Returns (allowed, remaining, reset_seconds)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            hits = self._buffers.get(key)
+            if hits is None or hits.maxlen != limit:
+                hits = self._buffers[key] = deque(hits or (), maxlen=limit)
+            self._buffers.move_to_end(key)
+
+            if len(hits) >= limit and now - hits[0] < window:
+                return False, 0, window - (now - hits[0])
+            hits.append(now)
+            while len(self._buffers) > self.max_keys:
+                self._buffers.popitem(last=False)
+            return True, limit - len(hits), window - (now - hits[0])
+
+    def reset(self, key: str = None):
+        with self._lock:
+            if key is None:
+                self._buffers.clear()
+            else:
+                self._buffers.pop(key, None)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {key: len(hits) for key, hits in self._buffers.items()}
+
+
+# KEYS[1] = buffer; ARGV = limit, window (ms), now (ms).
+# Newest hit is at the head, so LINDEX -1 is the oldest one kept.
+_HIT_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local count = redis.call('LLEN', KEYS[1])
+if count >= limit then
+    local oldest = tonumber(redis.call('LINDEX', KEYS[1], -1))
+    if now - oldest < window then
+        return {0, 0, window - (now - oldest)}
+    end
+end
+redis.call('LPUSH', KEYS[1], now)
+redis.call('LTRIM', KEYS[1], 0, limit - 1)
+redis.call('PEXPIRE', KEYS[1], window)
+local oldest = tonumber(redis.call('LINDEX', KEYS[1], -1))
+return {1, limit - math.min(count + 1, limit), window - (now - oldest)}
+"""
+
+
+class RedisBackend:
+    """Ring buffers in Redis lists, shared by every worker and machine."""
+
+    def __init__(self, connection=None):
+        if connection is None:
+            from app.workers import fail_fast_connection
+            connection = fail_fast_connection(RATE_LIMIT_REDIS_TIMEOUT_SECONDS)
+        self.connection = connection
+        self._script = connection.register_script(_HIT_SCRIPT)
+        self.fallback = MemoryBackend()
+        self._degraded = False
+        self._down_until = 0.0
+
+    def hit(self, key: str, limit: int, window: float, now: float = None):
+        from redis.exceptions import RedisError
+
+        if time.monotonic() < self._down_until:
+            return self.fallback.hit(key, limit, window, now)
+
+        now_ms = int((time.time() if now is None else now) * 1000)
+        try:
+            allowed, remaining, reset_ms = self._script(
+                keys=[key], args=[limit, int(window * 1000), now_ms]
+            )
+        except RedisError as e:
+            if not self._degraded:
+                logger.warning(f"[RateLimit] Redis unavailable, limiting per process: {str(e)}")
+                self._degraded = True
+            self._down_until = time.monotonic() + RATE_LIMIT_REDIS_RETRY_SECONDS
+            return self.fallback.hit(key, limit, window, now)
+        if self._degraded:
+            logger.info("[RateLimit] Redis available again")
+            self._degraded = False
+        return bool(allowed), int(remaining), int(reset_ms) / 1000
+
+    def reset(self, key: str = None):
+        if key is not None:
+            self.connection.delete(key)
+        else:
+            for name in self.connection.scan_iter(match=f"{KEY_PREFIX}*"):
+                self.connection.delete(name)
+        self.fallback.reset(key)
+
+    def status(self) -> dict:
+        return {
+            name.decode() if isinstance(name, bytes) else name: self.connection.llen(name)
+            for name in self.connection.scan_iter(match=f"{KEY_PREFIX}*")
+        }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide backend, created from RATE_LIMIT_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = RedisBackend() if RATE_LIMIT_BACKEND == "redis" else MemoryBackend()
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the backend (tests, or an app that wires its own connection)."""
+    global _backend
+    _backend = backend
+
+
+def rate_limit(max_attempts: int, window_seconds: int, scope: str = "ip"):
     """
-    Rate limiting decorator using sliding window.
-    
+    Rate limiting decorator using a sliding window.
+
     Args:
         max_attempts: Maximum number of requests allowed
         window_seconds: Time window in seconds
-        
+        scope: "ip", "user" or "tenant". User and tenant scopes need
+            request.user, so put this decorator below @requires_auth;
+            unauthenticated requests fall back to the client IP.
+
     Example:
         @rate_limit(max_attempts=5, window_seconds=60)  # 5 requests per minute
         async def login():
@@ -71,88 +211,47 @@ def rate_limit(max_attempts: int, window_seconds: int):
             # Skip rate limiting for OPTIONS (CORS preflight)
             if request.method == "OPTIONS":
                 return await fn(*args, **kwargs)
-            
-            client_ip = _get_client_ip()
-            current_time = time.time()
-            
-            # Get attempts for this IP
-            attempts = _rate_limit_store[client_ip]
-            
-            # Remove expired attempts (outside the window)
-            cutoff_time = current_time - window_seconds
-            valid_attempts = [
-                (timestamp, count) for timestamp, count in attempts
-                if timestamp > cutoff_time
-            ]
-            
-            # Count total attempts in the window
-            total_attempts = sum(count for _, count in valid_attempts)
-            
-            # Check if limit exceeded
-            if total_attempts >= max_attempts:
-                # Find oldest attempt to calculate retry time
-                if valid_attempts:
-                    oldest_timestamp = min(timestamp for timestamp, _ in valid_attempts)
-                    retry_after = int(window_seconds - (current_time - oldest_timestamp)) + 1
-                else:
-                    retry_after = window_seconds
-                
-                return jsonify({
+
+            key = f"{KEY_PREFIX}{fn.__name__}:{_scope_identity(scope)}"
+            allowed, remaining, reset = get_backend().hit(key, max_attempts, window_seconds)
+            reset = max(int(reset + 0.999), 1)
+
+            if not allowed:
+                response = jsonify({
                     "error": "Rate limit exceeded",
-                    "message": f"Too many attempts. Please try again in {retry_after} seconds.",
-                    "retry_after": retry_after
-                }), 429
-            
-            # Record this attempt
-            valid_attempts.append((current_time, 1))
-            _rate_limit_store[client_ip] = valid_attempts
-            
-            # Periodic cleanup
-            _cleanup_old_entries()
-            
-            # Proceed with the request
-            return await fn(*args, **kwargs)
-        
+                    "message": f"Too many attempts. Please try again in {reset} seconds.",
+                    "retry_after": reset
+                })
+                response.status_code = 429
+                response.headers["Retry-After"] = str(reset)
+            else:
+                response = await make_response(await fn(*args, **kwargs))
+
+            response.headers["X-RateLimit-Limit"] = str(max_attempts)
+            response.headers["X-RateLimit-Remaining"] = str(remaining)
+            response.headers["X-RateLimit-Reset"] = str(reset)
+            return response
+
         return wrapper
     return decorator
 
 
-def reset_rate_limit(ip_address: str = None):
+def reset_rate_limit(key: str = None):
     """
-    Reset rate limit for an IP address (useful for testing or admin override).
-    
+    Reset rate limits (useful for testing or admin override).
+
     Args:
-        ip_address: IP to reset, or None to reset all
+        key: Full limiter key (e.g. "ratelimit:login:ip:1.2.3.4"), or None to reset all
     """
-    if ip_address:
-        if ip_address in _rate_limit_store:
-            del _rate_limit_store[ip_address]
-    else:
-        _rate_limit_store.clear()
+    get_backend().reset(key)
 
 
-def get_rate_limit_status(ip_address: str = None):
+def get_rate_limit_status():
     """
     Get current rate limit status for debugging/monitoring.
-    
-    Args:
-        ip_address: IP to check, or None for all IPs
-        
+
     Returns:
-        Dict with rate limit statistics
+        Dict of limiter key -> hits currently held in its window buffer
     """
-    if ip_address:
-        attempts = _rate_limit_store.get(ip_address, [])
-        return {
-            "ip": ip_address,
-            "total_attempts": sum(count for _, count in attempts),
-            "attempts": attempts
-        }
-    else:
-        return {
-            "total_ips": len(_rate_limit_store),
-            "ips": {
-                ip: sum(count for _, count in attempts)
-                for ip, attempts in _rate_limit_store.items()
-            }
-        }
+    buffers = get_backend().status()
+    return {"total_keys": len(buffers), "keys": buffers}
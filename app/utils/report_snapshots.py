@@ -0,0 +1,142 @@
+"""
+Read side of the report snapshot tables.
+
+app/workers/report_jobs.py keeps report_daily_facts up to date per tenant.
+Reports answer from those facts for days before the tenant's
+`covered_through` date, and read raw rows only for the days after it. The
+raw-row part stays small however much history the tenant has.
+
+    window = await get_snapshot_window(session, tenant_id, dt_start, dt_end)
+    live = [Lead.created_at >= window.live_since] if window else []
+    statements = [select(Lead.lead_status, func.count(Lead.id)).where(*filters, *live).group_by(...)]
+    if window:
+        statements.append(select(ReportDailyFact.status, func.sum(ReportDailyFact.item_count))
+                          .where(*window.fact_filters("lead")).group_by(...))
+    counts = await merged_groups(session, statements, key_len=1)
+
+Facts are bucketed by day, so a window is only offered when the requested
+date range falls on midnight boundaries (what the dashboard sends).
+Otherwise, or if the tenant has never been refreshed or its snapshot is
+older than REPORT_SNAPSHOT_MAX_AGE_HOURS, callers read raw rows as before.
+
+The refresh finds changed days by scanning created/updated/deleted_at, which
+cannot see hard deletes. The session hooks at the bottom record the days of
+purged leads and projects in report_dirty_days so the next refresh rebuilds
+them too.
+"""
+import os
+from datetime import datetime, time, timedelta
+from sqlalchemy import event, func, insert, select, Date
+from sqlalchemy.orm import Session
+from app.models import Lead, Project, ReportDailyFact, ReportSnapshotState, ReportDirtyDay
+
+REPORT_SNAPSHOT_MAX_AGE_HOURS = int(os.getenv("REPORT_SNAPSHOT_MAX_AGE_HOURS", 26))
+
+
+class SnapshotWindow:
+    """Splits a report's date range into a snapshot part and a live part."""
+
+    def __init__(self, tenant_id, covered_through, dt_start=None, dt_end=None):
+        self.tenant_id = tenant_id
+        self.covered_through = covered_through
+        self.dt_start = dt_start
+        self.dt_end = dt_end
+
+    @property
+    def live_since(self) -> datetime:
+        """Raw rows created at or after this are not in the facts yet."""
+        return datetime.combine(self.covered_through, time.min)
+
+    def fact_filters(self, entity: str) -> list:
+        """Tenant/entity/day filters for ReportDailyFact rows in this window."""
+        fact = ReportDailyFact
+        filters = [
+            fact.tenant_id == self.tenant_id,
+            fact.entity == entity,
+            fact.day < self.covered_through,
+        ]
+        if self.dt_start:
+            filters.append(fact.day >= self.dt_start.date())
+        if self.dt_end:
+            # created_at <= midnight of the end day excludes that day
+            filters.append(fact.day < self.dt_end.date())
+        return filters
+
+
+def _on_day_boundary(dt) -> bool:
+    return dt is None or (dt.tzinfo is None and dt.time() == time.min)
+
+
+async def get_snapshot_window(session, tenant_id, dt_start=None, dt_end=None):
+    """Return a SnapshotWindow if facts can answer for this range, else None."""
+    if not (_on_day_boundary(dt_start) and _on_day_boundary(dt_end)):
+        return None
+
+    state = await session.get(ReportSnapshotState, tenant_id)
+    if not state:
+        return None
+    if state.refreshed_at < datetime.utcnow() - timedelta(hours=REPORT_SNAPSHOT_MAX_AGE_HOURS):
+        return None
+
+    return SnapshotWindow(tenant_id, state.covered_through, dt_start, dt_end)
+
+
+def merge_rows(rows, key_len: int = 0) -> dict:
+    """Sum the value columns of rows that share the same leading key columns."""
+    totals = {}
+    for row in rows:
+        key, values = tuple(row[:key_len]), list(row[key_len:])
+        if key in totals:
+            totals[key] = [(a or 0) + (b or 0) for a, b in zip(totals[key], values)]
+        else:
+            totals[key] = values
+    return totals
+
+
+async def merged_groups(session, statements, key_len: int = 0) -> dict:
+    """Run each statement and merge their rows with merge_rows()."""
+    rows = []
+    for stmt in statements:
+        rows.extend((await session.execute(stmt)).all())
+    return merge_rows(rows, key_len)
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+def _mark_dirty_days(connection, tenant_days):
+    now = datetime.utcnow()
+    rows = [{"tenant_id": tenant_id, "day": day, "marked_at": now} for tenant_id, day in tenant_days]
+    if rows:
+        connection.execute(insert(ReportDirtyDay), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_purged_after_flush(session, flush_context):
+    tenant_days = {
+        (obj.tenant_id, obj.created_at.date())
+        for obj in session.deleted
+        if type(obj) in (Lead, Project) and obj.created_at is not None
+    }
+    if tenant_days:
+        _mark_dirty_days(session.connection(), tenant_days)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_purged_bulk(orm_execute_state):
+    if not orm_execute_state.is_delete:
+        return None
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in (Lead, Project):
+        return None
+
+    statement = orm_execute_state.statement
+    day_query = select(model.tenant_id, func.date(model.created_at, type_=Date)).distinct()
+    if statement.whereclause is not None:
+        day_query = day_query.where(statement.whereclause)
+    session = orm_execute_state.session
+    tenant_days = {(tenant_id, day) for tenant_id, day in session.execute(day_query) if day is not None}
+    _mark_dirty_days(session.connection(), tenant_days)
+    return None
@@ -0,0 +1,81 @@
+"""
+Conditional-aggregation helpers for report endpoints.
+
+Most dashboard numbers are counts/sums over the same filtered set with one
+extra condition each ("all leads", "won leads", ...). Running one scalar
+query per number costs a round-trip each; AggregateQuery folds them into a
+single SELECT using FILTER (WHERE ...) clauses, which both PostgreSQL and
+SQLite (3.30+) support.
+
+    agg = AggregateQuery(*filters)
+    agg.count("total", Lead.id)
+    agg.count("won", Lead.id, Lead.lead_status == "won")
+    row = await agg.one(session)
+    row.total, row.won
+"""
+from sqlalchemy import func, select, and_
+
+
+def _filtered(aggregate, conditions):
+    if not conditions:
+        return aggregate
+    return aggregate.filter(and_(*conditions))
+
+
+def days_between(dialect_name: str, start, end):
+    """
+    Expression for the number of days between two datetime columns.
+
+    PostgreSQL: EXTRACT(EPOCH FROM (end - start)) / 86400
+    SQLite: julianday(end) - julianday(start)
+    """
+    if dialect_name == "postgresql":
+        return func.extract('epoch', end - start) / 86400
+    return func.julianday(end) - func.julianday(start)
+
+
+class AggregateQuery:
+    """Builds one SELECT of labelled, optionally filtered aggregates."""
+
+    def __init__(self, *filters):
+        self.filters = list(filters)
+        self.group_columns = []
+        self.columns = []
+        self.joins = []
+
+    def count(self, name, column, *conditions):
+        self.columns.append(_filtered(func.count(column), conditions).label(name))
+        return self
+
+    def sum(self, name, column, *conditions, default=0):
+        self.columns.append(func.coalesce(_filtered(func.sum(column), conditions), default).label(name))
+        return self
+
+    def avg(self, name, column, *conditions):
+        self.columns.append(_filtered(func.avg(column), conditions).label(name))
+        return self
+
+    def group_by(self, *columns):
+        self.group_columns.extend(columns)
+        return self
+
+    def outerjoin(self, target, onclause):
+        self.joins.append((target, onclause))
+        return self
+
+    def statement(self):
+        stmt = select(*self.group_columns, *self.columns)
+        for target, onclause in self.joins:
+            stmt = stmt.outerjoin(target, onclause)
+        stmt = stmt.where(*self.filters)
+        if self.group_columns:
+            stmt = stmt.group_by(*self.group_columns)
+        return stmt
+
+    async def one(self, session):
+        """Run an ungrouped query and return its single row."""
+        return (await session.execute(self.statement())).one()
+
+    async def all(self, session):
+        """Run a grouped query and return one row per group."""
+        return (await session.execute(self.statement())).all()
@@ -0,0 +1,246 @@
+"""
+Global search index.
+
+Every client, lead, project, account and user has one SearchDocument row
+(search_documents). The row holds its searchable fields and the
+visibility columns that global_search filters on. ORM session hooks keep
+the rows current:
+
+- after_flush re-indexes anything added, changed or deleted through the
+  session.
+- do_orm_execute catches bulk query.update()/.delete() calls (bulk
+  soft-delete and purge).
+
+Index backends:
+- PostgreSQL: a generated, weighted `search_vector` tsvector with a GIN
+  index for ranking and word/prefix matches, plus a pg_trgm GIN index on
+  search_text so substring (ILIKE '%q%') matches also use an index.
+- SQLite: an external-content FTS5 table using the trigram tokenizer, kept
+  in sync by triggers. Used for local testing.
+
+Run scripts/rebuild_search_index.py once after migrating, and after any
+restore or raw-SQL data change.
+"""
+from sqlalchemy import event, delete, insert, select, DDL
+from sqlalchemy.orm import Session, selectinload, object_session
+from app.models import Client, Lead, Project, Account, User, SearchDocument
+
+# Searchable fields per entity type, mapped to field_1..field_N in order
+SEARCH_FIELDS = {
+    "client": ["name", "contact_person", "email", "phone", "address", "city", "state", "zip", "notes"],
+    "lead": ["name", "contact_person", "email", "phone", "address", "city", "state", "zip", "notes"],
+    "project": ["project_name", "project_description", "project_status"],
+    "account": ["account_name", "account_number", "notes"],
+    "user": ["email"],
+}
+
+ENTITY_TYPES = {
+    Client: "client",
+    Lead: "lead",
+    Project: "project",
+    Account: "account",
+    User: "user",
+}
+
+SLOT_COLUMNS = [getattr(SearchDocument, f"field_{i}") for i in range(1, 10)]
+
+
+# ============================================================================
+# INDEX DDL
+# ============================================================================
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(search_text, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_vector ON search_documents USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_trgm ON search_documents USING gin (search_text gin_trgm_ops)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5(
+        search_text, content='search_documents', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, search_text)
+        VALUES ('delete', old.id, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, search_text)
+        VALUES ('delete', old.id, old.search_text);
+        INSERT INTO search_documents_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+]
+
+for _statement in POSTGRES_DDL:
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_DDL:
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+# ============================================================================
+# DOCUMENT BUILDING
+# ============================================================================
+
+def _link_for(entity_type, instance):
+    if entity_type == "client":
+        return f"/clients/{instance.id}"
+    if entity_type == "lead":
+        return f"/leads/{instance.id}"
+    if entity_type == "project":
+        return f"/clients/{instance.client_id}" if instance.client_id else f"/leads/{instance.lead_id}"
+    if entity_type == "account":
+        return f"/clients/{instance.client_id}"
+    return None
+
+
+def build_document(instance) -> dict:
+    """Return the search_documents row values for an indexed instance."""
+    entity_type = ENTITY_TYPES[type(instance)]
+    values = [getattr(instance, field, None) for field in SEARCH_FIELDS[entity_type]]
+
+    if entity_type == "project":
+        title = instance.project_name
+    elif entity_type == "account":
+        title = instance.account_name or instance.account_number
+    elif entity_type == "user":
+        title = instance.email
+    else:
+        title = instance.name
+
+    created_by = getattr(instance, "created_by", None)
+    if entity_type == "account":
+        # Non-admins see accounts of clients they created. Pending accounts
+        # don't lazy-load inside after_flush, so fall back to the client_id.
+        client = instance.client
+        if client is None and instance.client_id is not None:
+            client = object_session(instance).get(Client, instance.client_id)
+        created_by = client.created_by if client else None
+
+    document = {
+        "tenant_id": instance.tenant_id,
+        "entity_type": entity_type,
+        "entity_id": instance.id,
+        "title": title,
+        "link": _link_for(entity_type, instance),
+        "created_by": created_by,
+        "assigned_to": instance.assigned_to if entity_type == "lead" else None,
+        # Search has always hidden soft-deleted clients and leads only
+        "is_deleted": entity_type in ("client", "lead") and instance.deleted_at is not None,
+        "search_text": " ".join(str(v) for v in values if v).lower(),
+    }
+    for i, slot in enumerate(SLOT_COLUMNS):
+        document[slot.key] = str(values[i]) if i < len(values) and values[i] is not None else None
+    return document
+
+
+def index_instances(connection, instances):
+    """Replace the search documents for the given ORM instances."""
+    by_type = {}
+    for instance in instances:
+        by_type.setdefault(ENTITY_TYPES[type(instance)], []).append(instance)
+
+    for entity_type, items in by_type.items():
+        remove_documents(connection, entity_type, [item.id for item in items])
+        connection.execute(insert(SearchDocument), [build_document(item) for item in items])
+
+
+def remove_documents(connection, entity_type, entity_ids):
+    if entity_ids:
+        connection.execute(delete(SearchDocument).where(
+            SearchDocument.entity_type == entity_type,
+            SearchDocument.entity_id.in_(list(entity_ids))
+        ))
+
+
+def rebuild_search_index(session, tenant_id: int = None, batch_size: int = 1000):
+    """Re-index every searchable row (optionally for one tenant). Returns the row count."""
+    total = 0
+    for model, entity_type in ENTITY_TYPES.items():
+        stmt = delete(SearchDocument).where(SearchDocument.entity_type == entity_type)
+        if tenant_id is not None:
+            stmt = stmt.where(SearchDocument.tenant_id == tenant_id)
+        session.execute(stmt)
+
+        query = select(model).order_by(model.id).limit(batch_size)
+        if model is Account:
+            query = query.options(selectinload(Account.client))
+        if tenant_id is not None:
+            query = query.where(model.tenant_id == tenant_id)
+
+        # Keyset batches keep memory flat on large tenants
+        last_id = 0
+        while True:
+            batch = session.execute(query.where(model.id > last_id)).scalars().all()
+            if not batch:
+                break
+            session.execute(insert(SearchDocument), [build_document(item) for item in batch])
+            total += len(batch)
+            last_id = batch[-1].id
+            session.expunge_all()
+    session.commit()
+    return total
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+@event.listens_for(Session, "after_flush")
+def _index_after_flush(session, flush_context):
+    changed = [obj for obj in list(session.new) + list(session.dirty) if type(obj) in ENTITY_TYPES]
+    removed = [obj for obj in session.deleted if type(obj) in ENTITY_TYPES]
+    if not changed and not removed:
+        return
+
+    connection = session.connection()
+    for obj in removed:
+        remove_documents(connection, ENTITY_TYPES[type(obj)], [obj.id])
+    if changed:
+        index_instances(connection, changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _index_bulk_statements(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in ENTITY_TYPES:
+        return None
+
+    session = orm_execute_state.session
+    statement = orm_execute_state.statement
+    id_query = select(model.id)
+    if statement.whereclause is not None:
+        id_query = id_query.where(statement.whereclause)
+    ids = session.execute(id_query).scalars().all()
+
+    result = orm_execute_state.invoke_statement()
+
+    if ids:
+        connection = session.connection()
+        if orm_execute_state.is_delete:
+            remove_documents(connection, ENTITY_TYPES[model], ids)
+        else:
+            rows = session.execute(
+                select(model).where(model.id.in_(ids)).execution_options(populate_existing=True)
+            ).scalars().all()
+            index_instances(connection, rows)
+    return result
@@ -3,15 +3,25 @@ from __future__ import annotations
 import os
 import io
 import asyncio
-from typing import Optional, Tuple
+from typing import Optional, Tuple, AsyncIterator
 from quart import current_app
 
-try:
-    import boto3
-    from botocore.config import Config as BotoConfig
-except ImportError:
-    boto3 = None
-    BotoConfig = None
+from app.utils.storage_clients import get_s3_client
+
+
+# Bytes per read/write when streaming objects
+STREAM_CHUNK_SIZE = 1024 * 1024
+# S3 multipart part size (S3 minimum is 5 MB for all but the last part)
+S3_PART_SIZE = 8 * 1024 * 1024
+
+
+async def iter_file_chunks(fileobj, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a (blocking) file object in chunks off the event loop."""
+    while True:
+        chunk = await asyncio.to_thread(fileobj.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
 
 
 class StorageBackend:
@@ -20,6 +30,11 @@ class StorageBackend:
     async def delete(self, key: str) -> None: ...
     async def local_path_for(self, key: str) -> Optional[str]: ...
 
+    # Streaming: memory per transfer is one chunk, not the whole object
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int: ...
+    async def stat(self, key: str) -> Tuple[int, str]: ...
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]: ...
+
 
 class LocalStorageBackend(StorageBackend):
     def __init__(self, root: str):
@@ -56,23 +71,52 @@ class LocalStorageBackend(StorageBackend):
     async def local_path_for(self, key: str) -> Optional[str]:
         return self._abs(key)
 
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int:
+        abs_path = self._abs(key)
+        tmp_path = abs_path + ".part"
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        size = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.remove, tmp_path)
+            raise
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.replace, tmp_path, abs_path)
+        return size
+
+    async def stat(self, key: str) -> Tuple[int, str]:
+        size = await asyncio.to_thread(os.path.getsize, self._abs(key))
+        return size, "application/octet-stream"
+
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end) of the object (end=None means to the end)."""
+        f = await asyncio.to_thread(open, self._abs(key), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                size = STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining)
+                chunk = await asyncio.to_thread(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
 
 class S3StorageBackend(StorageBackend):
     def __init__(self, endpoint_url: str, access_key: str, secret_key: str,
                  bucket: str, region: Optional[str] = None, force_path_style: bool = True):
-        if boto3 is None:
-            raise RuntimeError("boto3 is not installed. pip install boto3")
-        cfg = BotoConfig(
-            s3={"addressing_style": "path" if force_path_style else "auto"},
-            signature_version="s3v4",
-        )
-        self.client = boto3.client(
-            "s3",
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-            region_name=region,
-            config=cfg,
+        # Shared per-process client; constructing the backend itself is cheap
+        self.client = get_s3_client(
+            endpoint_url, access_key, secret_key, region,
+            addressing_style="path" if force_path_style else "auto",
         )
         self.bucket = bucket
 
@@ -97,17 +141,97 @@ class S3StorageBackend(StorageBackend):
     async def local_path_for(self, key: str) -> Optional[str]:
         return None  # not applicable for S3
 
-
-def get_storage() -> StorageBackend:
-    vendor = current_app.config.get("STORAGE_VENDOR", "local").lower()
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> int:
+        """
+        Upload in S3_PART_SIZE multipart parts; objects smaller than one part
+        go up with a single PutObject.
+        """
+        content_type = content_type or "application/octet-stream"
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+
+        async def flush_part():
+            nonlocal upload_id
+            if upload_id is None:
+                created = await asyncio.to_thread(
+                    self.client.create_multipart_upload,
+                    Bucket=self.bucket, Key=key, ContentType=content_type,
+                )
+                upload_id = created["UploadId"]
+            part_number = len(parts) + 1
+            response = await asyncio.to_thread(
+                self.client.upload_part,
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                PartNumber=part_number, Body=bytes(buffer),
+            )
+            parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+            buffer.clear()
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                size += len(chunk)
+                if len(buffer) >= S3_PART_SIZE:
+                    await flush_part()
+
+            if upload_id is None:
+                await asyncio.to_thread(
+                    self.client.put_object,
+                    Bucket=self.bucket, Key=key, Body=bytes(buffer), ContentType=content_type,
+                )
+                return size
+
+            if buffer:
+                await flush_part()
+            await asyncio.to_thread(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            return size
+        except BaseException:
+            if upload_id is not None:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload,
+                    Bucket=self.bucket, Key=key, UploadId=upload_id,
+                )
+            raise
+
+    async def stat(self, key: str) -> Tuple[int, str]:
+        head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        return head["ContentLength"], head.get("ContentType", "application/octet-stream")
+
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Ranged GetObject, read from the response body one chunk at a time."""
+        if end is not None and end <= start:
+            return
+        byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+        obj = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket, Key=key, Range=byte_range)
+        body = obj["Body"]
+        try:
+            async for chunk in iter_file_chunks(body):
+                yield chunk
+        finally:
+            await asyncio.to_thread(body.close)
+
+
+def storage_from_config(config) -> StorageBackend:
+    """Build the configured backend from a config mapping (app.config or the config module's vars)."""
+    vendor = config.get("STORAGE_VENDOR", "local").lower()
     if vendor == "s3":
         return S3StorageBackend(
-            endpoint_url=current_app.config["S3_ENDPOINT_URL"],
-            access_key=current_app.config["S3_ACCESS_KEY_ID"],
-            secret_key=current_app.config["S3_SECRET_ACCESS_KEY"],
-            bucket=current_app.config["S3_BUCKET"],
-            region=current_app.config.get("S3_REGION"),
-            force_path_style=current_app.config.get("S3_FORCE_PATH_STYLE", True),
+            endpoint_url=config["S3_ENDPOINT_URL"],
+            access_key=config["S3_ACCESS_KEY_ID"],
+            secret_key=config["S3_SECRET_ACCESS_KEY"],
+            bucket=config["S3_BUCKET"],
+            region=config.get("S3_REGION"),
+            force_path_style=config.get("S3_FORCE_PATH_STYLE", True),
         )
     # default: local
-    return LocalStorageBackend(current_app.config.get("STORAGE_ROOT", "./storage"))
+    return LocalStorageBackend(config.get("STORAGE_ROOT", "./storage"))
+
+
+def get_storage() -> StorageBackend:
+    return storage_from_config(current_app.config)
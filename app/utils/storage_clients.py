@@ -0,0 +1,126 @@
+# app/utils/storage_clients.py
+"""
+Process-wide S3 client registry.
+
+Building a boto3 client costs tens of milliseconds: it loads the service
+model, resolves credentials and endpoints, and starts a fresh connection
+pool. Document storage and backup storage used to build one per call. They
+now share one client per (endpoint, credentials, region, addressing style).
+boto3 clients are thread-safe, so the same client serves every
+asyncio.to_thread call. Clients are built from their own boto3 Session,
+because the default session is not thread-safe.
+"""
+from __future__ import annotations
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Optional
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+except ImportError:
+    boto3 = None
+    BotoConfig = None
+
+# Connections kept per client (boto3 default is 10; to_thread can run more at once)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_CONNECT_TIMEOUT = int(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+S3_READ_TIMEOUT = int(os.getenv("S3_READ_TIMEOUT", "60"))
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "3"))
+
+_clients = {}
+_lock = threading.Lock()
+
+
+class _RegisteredClient:
+    def __init__(self, name: str, endpoint_url: str, client, build_ms: float):
+        self.name = name
+        self.endpoint_url = endpoint_url
+        self.client = client
+        self.build_ms = build_ms
+        self.created_at = datetime.utcnow()
+        self.uses = 0
+
+
+def _build_client(endpoint_url, access_key, secret_key, region, addressing_style):
+    if boto3 is None:
+        raise RuntimeError("boto3 is not installed. pip install boto3")
+    cfg = BotoConfig(
+        s3={"addressing_style": addressing_style},
+        signature_version="s3v4",
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=S3_CONNECT_TIMEOUT,
+        read_timeout=S3_READ_TIMEOUT,
+        retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "standard"},
+    )
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region,
+        config=cfg,
+    )
+
+
+def get_s3_client(endpoint_url: str, access_key: str, secret_key: str,
+                  region: Optional[str] = None, addressing_style: str = "path",
+                  name: str = "storage"):
+    """Return the shared client for this configuration, building it on first use."""
+    key = (endpoint_url, access_key, secret_key, region, addressing_style)
+    entry = _clients.get(key)
+    if entry is None:
+        with _lock:
+            entry = _clients.get(key)
+            if entry is None:
+                started = time.perf_counter()
+                client = _build_client(endpoint_url, access_key, secret_key, region, addressing_style)
+                entry = _RegisteredClient(name, endpoint_url, client, (time.perf_counter() - started) * 1000)
+                _clients[key] = entry
+    entry.uses += 1
+    return entry.client
+
+
+def _pool_stats(client) -> list:
+    # botocore keeps urllib3 pools on a private attribute; report what is there
+    try:
+        manager = client._endpoint.http_session._manager
+        pools = [manager.pools[k] for k in list(manager.pools.keys())]
+    except (AttributeError, KeyError):
+        return []
+    return [{
+        "host": pool.host,
+        "connections_opened": pool.num_connections,
+        "requests": pool.num_requests,
+        "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+    } for pool in pools]
+
+
+def storage_pool_stats() -> list:
+    """Per-client metrics: build cost, lookups served and urllib3 pool usage."""
+    with _lock:
+        entries = list(_clients.values())
+    return [{
+        "name": entry.name,
+        "endpoint_url": entry.endpoint_url,
+        "created_at": entry.created_at.isoformat() + "Z",
+        "build_ms": round(entry.build_ms, 1),
+        "uses": entry.uses,
+        "max_pool_connections": entry.client.meta.config.max_pool_connections,
+        "pools": _pool_stats(entry.client),
+    } for entry in entries]
+
+
+def reset_s3_clients():
+    """Close and forget every client (tests, credential rotation)."""
+    with _lock:
+        entries = list(_clients.values())
+        _clients.clear()
+    for entry in entries:
+        try:
+            entry.client.close()
+        except Exception:
+            pass
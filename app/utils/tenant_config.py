@@ -0,0 +1,202 @@
+"""
+Cached tenant configs for login, /me and /tenant/config.
+
+The frontend calls /me and /tenant/config on every page load. Both used to
+reload the Tenant row and send the full config blob each time. Now:
+
+- get_tenant_entry() serves the tenant's id, name, slug, config and
+  active flag from a small in-process TTL/LRU cache. On a miss it tries
+  Redis before the database, so one process loads a tenant and the rest
+  reuse it. Redis is optional. Its client has
+  TENANT_CONFIG_REDIS_TIMEOUT_SECONDS socket timeouts, and while Redis is
+  unreachable the cache goes straight to the database and retries Redis
+  after TENANT_CONFIG_REDIS_RETRY_SECONDS.
+- Each entry carries a strong ETag, a hash of its serialized content.
+  conditional_json() answers a matching If-None-Match with an empty 304,
+  so a repeat load costs no DB queries and almost no bytes.
+
+An after_commit hook drops the local and Redis entries for any tenant
+changed through the ORM, including by the tenant scripts. Other web
+processes keep their local copy for up to TENANT_CONFIG_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from quart import request, jsonify, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Tenant
+from app.utils.logging_utils import logger
+
+TENANT_CONFIG_CACHE_TTL_SECONDS = int(os.getenv("TENANT_CONFIG_CACHE_TTL_SECONDS", 30))
+TENANT_CONFIG_CACHE_MAX_ENTRIES = int(os.getenv("TENANT_CONFIG_CACHE_MAX_ENTRIES", 1000))
+# 0 disables the Redis tier
+TENANT_CONFIG_REDIS_TTL_SECONDS = int(os.getenv("TENANT_CONFIG_REDIS_TTL_SECONDS", 3600))
+TENANT_CONFIG_REDIS_RETRY_SECONDS = int(os.getenv("TENANT_CONFIG_REDIS_RETRY_SECONDS", 30))
+# Connect/read timeout for the Redis tier's client
+TENANT_CONFIG_REDIS_TIMEOUT_SECONDS = float(os.getenv("TENANT_CONFIG_REDIS_TIMEOUT_SECONDS", 0.25))
+
+REDIS_KEY = "tenant_config:{}"
+
+_entries = OrderedDict()
+_entries_lock = threading.Lock()
+_redis_down_until = 0.0
+_redis_client = None
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _entry_for(tenant: Tenant) -> dict:
+    data = {"id": tenant.id, "name": tenant.name, "slug": tenant.slug, "config": tenant.config}
+    return {"tenant": data, "is_active": bool(tenant.is_active), "etag": make_etag(data)}
+
+
+# ============================================================================
+# REDIS TIER
+# ============================================================================
+
+def _redis():
+    global _redis_client
+    if TENANT_CONFIG_REDIS_TTL_SECONDS <= 0 or time.monotonic() < _redis_down_until:
+        return None
+    if _redis_client is None:
+        from app.workers import fail_fast_connection
+        _redis_client = fail_fast_connection(TENANT_CONFIG_REDIS_TIMEOUT_SECONDS)
+    return _redis_client
+
+
+def _redis_failed(e):
+    global _redis_down_until
+    if time.monotonic() >= _redis_down_until:
+        logger.warning(f"[TenantConfig] Redis unavailable, using the database: {str(e)}")
+    _redis_down_until = time.monotonic() + TENANT_CONFIG_REDIS_RETRY_SECONDS
+
+
+def _redis_get(tenant_id):
+    from redis.exceptions import RedisError
+
+    connection = _redis()
+    if connection is None:
+        return None
+    try:
+        raw = connection.get(REDIS_KEY.format(tenant_id))
+    except RedisError as e:
+        _redis_failed(e)
+        return None
+    return json.loads(raw) if raw else None
+
+
+def _redis_set(tenant_id, entry):
+    from redis.exceptions import RedisError
+
+    connection = _redis()
+    if connection is None:
+        return
+    try:
+        connection.set(REDIS_KEY.format(tenant_id), json.dumps(entry), ex=TENANT_CONFIG_REDIS_TTL_SECONDS)
+    except RedisError as e:
+        _redis_failed(e)
+
+
+def _redis_delete(tenant_ids):
+    from redis.exceptions import RedisError
+
+    connection = _redis()
+    if connection is None:
+        return
+    try:
+        connection.delete(*[REDIS_KEY.format(tenant_id) for tenant_id in tenant_ids])
+    except RedisError as e:
+        _redis_failed(e)
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def get_tenant_entry(tenant_id: int) -> dict | None:
+    """{"tenant": {...}, "is_active": bool, "etag": str}, or None if the tenant does not exist."""
+    now = time.monotonic()
+    with _entries_lock:
+        cached = _entries.get(tenant_id)
+        if cached and cached[0] >= now:
+            _entries.move_to_end(tenant_id)
+            return cached[1]
+
+    entry = _redis_get(tenant_id)
+    if entry is None:
+        session = SessionLocal()
+        try:
+            tenant = session.get(Tenant, tenant_id)
+            if tenant is None:
+                return None
+            entry = _entry_for(tenant)
+        finally:
+            session.close()
+        _redis_set(tenant_id, entry)
+
+    if TENANT_CONFIG_CACHE_TTL_SECONDS > 0:
+        with _entries_lock:
+            _entries[tenant_id] = (now + TENANT_CONFIG_CACHE_TTL_SECONDS, entry)
+            _entries.move_to_end(tenant_id)
+            while len(_entries) > TENANT_CONFIG_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return entry
+
+
+def invalidate_tenant_config(*tenant_ids):
+    """Drop cached configs for these tenants (every local entry if none given)."""
+    with _entries_lock:
+        if not tenant_ids:
+            _entries.clear()
+        for tenant_id in tenant_ids:
+            _entries.pop(tenant_id, None)
+    if tenant_ids:
+        _redis_delete(tenant_ids)
+
+
+def conditional_json(payload, etag: str):
+    """JSON response with an ETag, or an empty 304 if the client already has it."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    # Revalidate on every load; the 304 makes that cheap
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# ============================================================================
+# SESSION HOOKS
+# ============================================================================
+
+@event.listens_for(Session, "after_flush")
+def _track_tenant_changes(session, flush_context):
+    changed = {
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, Tenant)
+    }
+    if changed:
+        session.info.setdefault("tenant_config_changed", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    changed = session.info.pop("tenant_config_changed", None)
+    if changed:
+        invalidate_tenant_config(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("tenant_config_changed", None)
@@ -0,0 +1,278 @@
+"""
+Per-tenant logical snapshots.
+
+A pg_dump can only be restored whole, so putting back one customer's data
+meant restoring every tenant with a full-database outage. A tenant
+snapshot holds one tenant's rows:
+
+- export_tenant() reads every table in TENANT_TABLES for the tenant
+  through a server-side cursor, inside one REPEATABLE READ read-only
+  transaction on PostgreSQL so the tables agree with each other. Each
+  table is written as gzip-compressed JSON Lines (`<table>.jsonl.gz`, one
+  array of column values per row). tenant.json records the column order,
+  the row counts and the tenant's users. The tenant backup job tars,
+  encrypts and uploads the directory with the regular backup pipeline.
+- load_tenant() replaces the tenant's rows with a snapshot, in the
+  caller's transaction. As in migrate_from_old_crm.py, the database
+  assigns new ids and an old id -> new id map per table rewrites the
+  foreign keys. A snapshot therefore loads safely next to rows created
+  since it was taken, or into a different tenant (once the source no
+  longer holds the globally unique account numbers). User references are
+  matched by email to the target tenant's users. Unmatched ones become
+  NULL, or `fallback_user_id` where the column is required.
+
+load_tenant() also rebuilds the tenant's recently_touched rows from the
+loaded activity, and drops the tenant's activity roll-ups for the days the
+snapshot holds raw activity for, so those days are not counted twice. Search documents and report facts are rebuilt by the
+restore job once the load has committed.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+from sqlalchemy import Date, DateTime, delete, func, insert, select
+from app.models import (
+    Account, ActivityDailyRollup, ActivityLog, ChatMessage, Client, Contact, File, Interaction, Lead,
+    Message, Project, RecentlyTouched, Subscription, User,
+)
+from app.utils.activity_sink import touch_recent
+from app.utils.list_totals import invalidate_totals
+from app.utils.logging_utils import logger
+
+# Rows per server-side cursor fetch and per bulk insert
+TENANT_EXPORT_BATCH_SIZE = int(os.getenv("TENANT_EXPORT_BATCH_SIZE", 2000))
+
+TENANT_EXPORT_VERSION = 1
+TENANT_FILE = "tenant.json"
+
+# Parents before children: loaded in this order, deleted in reverse
+TENANT_TABLES = [
+    Lead, Client, Account, Contact, Project, Interaction, Subscription,
+    ChatMessage, Message, File, ActivityLog,
+]
+
+# User ids kept without a foreign key
+USER_ID_COLUMNS = {"effective_owner_id"}
+
+# ActivityLog.entity_type -> table its entity_id points into
+ACTIVITY_ENTITY_TABLES = {"client": "clients", "lead": "leads", "project": "projects", "account": "accounts"}
+
+
+def _table_file(table) -> str:
+    return f"{table.name}.jsonl.gz"
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    raise TypeError(f"Cannot export {type(value).__name__} values")
+
+
+def _id_targets(table) -> dict:
+    """Column name -> table whose ids it holds ("users" for user references)."""
+    targets = {}
+    for column in table.columns:
+        for foreign_key in column.foreign_keys:
+            targets[column.name] = foreign_key.column.table.name
+        if column.name in USER_ID_COLUMNS:
+            targets[column.name] = "users"
+    return targets
+
+
+# Tables whose new ids must be collected while loading
+_REFERENCED_TABLES = {
+    target for model in TENANT_TABLES for target in _id_targets(model.__table__).values()
+} | set(ACTIVITY_ENTITY_TABLES.values())
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def _export_table(connection, table, tenant_id: int, path: str) -> int:
+    query = (
+        select(table)
+        .where(table.c.tenant_id == tenant_id)
+        .order_by(table.c.id)
+        .execution_options(yield_per=TENANT_EXPORT_BATCH_SIZE)
+    )
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for row in connection.execute(query):
+            f.write(json.dumps(list(row), default=_encode, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def export_tenant(engine, tenant_id: int, directory: str) -> dict:
+    """
+    Write one tenant's rows into `directory`. Returns the snapshot
+    description that is also saved as tenant.json.
+    """
+    options = {}
+    if engine.dialect.name == "postgresql":
+        options = {"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+
+    description = {
+        "version": TENANT_EXPORT_VERSION,
+        "tenant_id": tenant_id,
+        "exported_at": datetime.utcnow().isoformat(),
+        "tables": {},
+    }
+    with engine.connect().execution_options(**options) as connection:
+        users = connection.execute(select(User.id, User.email).where(User.tenant_id == tenant_id))
+        description["users"] = {str(user_id): email for user_id, email in users}
+
+        for model in TENANT_TABLES:
+            table = model.__table__
+            rows = _export_table(connection, table, tenant_id, os.path.join(directory, _table_file(table)))
+            description["tables"][table.name] = {"columns": [c.name for c in table.columns], "rows": rows}
+
+    with open(os.path.join(directory, TENANT_FILE), "w") as f:
+        json.dump(description, f, sort_keys=True)
+
+    total = sum(spec["rows"] for spec in description["tables"].values())
+    logger.info(f"[TenantBackup] Exported {total} rows for tenant {tenant_id}")
+    return description
+
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+class _TableLoader:
+    """Decodes, remaps and bulk-inserts one table's rows."""
+
+    def __init__(self, session, table, spec, tenant_id, id_maps, fallback_user_id):
+        self.session = session
+        self.table = table
+        self.tenant_id = tenant_id
+        self.id_maps = id_maps
+        self.fallback_user_id = fallback_user_id
+        # Snapshot columns the table still has, with their positions in each row
+        self.columns = [(name, i) for i, name in enumerate(spec["columns"]) if name in table.c]
+        self.decoders = {}
+        for name, _ in self.columns:
+            column_type = table.c[name].type
+            if isinstance(column_type, DateTime):
+                self.decoders[name] = datetime.fromisoformat
+            elif isinstance(column_type, Date):
+                self.decoders[name] = date.fromisoformat
+        self.targets = _id_targets(table)
+        self.id_map = id_maps.setdefault(table.name, {}) if table.name in _REFERENCED_TABLES else None
+        self.rows = []
+        self.old_ids = []
+        self.count = 0
+
+    def _remap(self, name, value, target):
+        if value is None:
+            return None
+        new_id = self.id_maps[target].get(value)
+        if new_id is None and not self.table.c[name].nullable:
+            if target != "users" or self.fallback_user_id is None:
+                raise ValueError(f"{self.table.name}.{name} refers to {target} {value}, which the snapshot cannot map")
+            new_id = self.fallback_user_id
+        return new_id
+
+    def add(self, values: list):
+        row = {}
+        for name, position in self.columns:
+            value = values[position]
+            if value is not None and name in self.decoders:
+                value = self.decoders[name](value)
+            row[name] = value
+
+        self.old_ids.append(row.pop("id"))
+        row["tenant_id"] = self.tenant_id
+        for name, target in self.targets.items():
+            if name in row:
+                row[name] = self._remap(name, row[name], target)
+        if self.table.name == ActivityLog.__tablename__:
+            entity_ids = self.id_maps.get(ACTIVITY_ENTITY_TABLES.get(row["entity_type"]), {})
+            row["entity_id"] = entity_ids.get(row["entity_id"], row["entity_id"])
+
+        self.rows.append(row)
+        if len(self.rows) >= TENANT_EXPORT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.id_map is None:
+            self.session.execute(insert(self.table), self.rows)
+        else:
+            statement = insert(self.table).returning(self.table.c.id, sort_by_parameter_order=True)
+            new_ids = self.session.execute(statement, self.rows).scalars().all()
+            self.id_map.update(zip(self.old_ids, new_ids))
+        if self.table.name == ActivityLog.__tablename__:
+            touch_recent(self.session, self.rows)
+        self.count += len(self.rows)
+        self.rows = []
+        self.old_ids = []
+
+
+def load_tenant(session, tenant_id: int, directory: str, fallback_user_id: int = None) -> dict:
+    """
+    Replace tenant `tenant_id`'s rows with the snapshot in `directory`.
+    Runs in the session's transaction; the caller commits. Returns rows
+    loaded per table.
+    """
+    with open(os.path.join(directory, TENANT_FILE)) as f:
+        description = json.load(f)
+    if description.get("version") != TENANT_EXPORT_VERSION:
+        raise ValueError(f"Unsupported tenant snapshot version: {description.get('version')}")
+
+    current_users = {
+        email.lower(): user_id
+        for user_id, email in session.execute(select(User.id, User.email).where(User.tenant_id == tenant_id))
+    }
+    id_maps = {"users": {
+        int(old_id): current_users.get(email.lower())
+        for old_id, email in description["users"].items()
+    }}
+
+    # Core statements, so the per-row ORM hooks (search index, ownership) stay out of it
+    for model in reversed(TENANT_TABLES):
+        session.execute(delete(model.__table__).where(model.__table__.c.tenant_id == tenant_id))
+    session.execute(delete(RecentlyTouched.__table__).where(
+        RecentlyTouched.tenant_id == tenant_id,
+        RecentlyTouched.entity_type.in_(list(ACTIVITY_ENTITY_TABLES))
+    ))
+
+    counts = {}
+    for model in TENANT_TABLES:
+        table = model.__table__
+        spec = description["tables"].get(table.name)
+        if spec is None:
+            counts[table.name] = 0
+            continue
+        loader = _TableLoader(session, table, spec, tenant_id, id_maps, fallback_user_id)
+        with gzip.open(os.path.join(directory, _table_file(table)), "rt", encoding="utf-8") as f:
+            for line in f:
+                loader.add(json.loads(line))
+        loader.flush()
+        if loader.count != spec["rows"]:
+            raise ValueError(f"{table.name}: snapshot lists {spec['rows']} rows but holds {loader.count}")
+        counts[table.name] = loader.count
+
+    # Roll-ups replace raw activity that retention already dropped. From the
+    # snapshot's oldest raw row on, the loaded rows are the whole history.
+    first_activity = session.execute(
+        select(func.min(ActivityLog.timestamp)).where(ActivityLog.tenant_id == tenant_id)
+    ).scalar()
+    if first_activity is not None:
+        session.execute(delete(ActivityDailyRollup.__table__).where(
+            ActivityDailyRollup.tenant_id == tenant_id,
+            ActivityDailyRollup.day >= first_activity.date(),
+        ))
+
+    invalidate_totals(*counts)
+    logger.info(
+        f"[TenantBackup] Loaded {sum(counts.values())} rows into tenant {tenant_id} "
+        f"(snapshot of tenant {description['tenant_id']} from {description['exported_at']})"
+    )
+    return counts
@@ -8,5 +8,20 @@ from app.config import REDIS_URL
 # Redis connection (shared across all queues)
 redis_conn = redis.from_url(REDIS_URL)
 
+
+def fail_fast_connection(timeout: float):
+    """
+    A separate Redis client for lookups on the request path. It connects and
+    reads with `timeout`, so a stalled Redis delays a request by that much
+    at most. redis_conn has no timeouts because RQ workers block on it.
+    """
+    return redis.from_url(REDIS_URL, socket_connect_timeout=timeout, socket_timeout=timeout)
+
 # Queue for backup/restore jobs
-backup_queue = Queue('backups', connection=redis_conn, default_timeout='1h')
\ No newline at end of file
+backup_queue = Queue('backups', connection=redis_conn, default_timeout='1h')
+
+# Queue for report snapshot refreshes
+report_queue = Queue('reports', connection=redis_conn, default_timeout='30m')
+
+# Queue for spreadsheet imports
+import_queue = Queue('imports', connection=redis_conn, default_timeout='2h')
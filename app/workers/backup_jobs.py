@@ -1,9 +1,15 @@
 """
-Backup job: pg_dump → GPG encrypt → upload to B2 → cleanup
+Backup job: pg_dump | GPG encrypt | SHA-256 + multipart upload to B2, in one streaming pass
+
+Manual backups run on the RQ worker (enqueue_backup_job); while one runs,
+its byte counters are kept in the RQ job's meta for get_backup_status.
+
+With BACKUP_DEDUP=true the dump goes into the deduplicating chunk store
+(app/utils/backup_dedup.py) instead; cleanup_old_backups then also
+garbage-collects unreferenced chunks.
 """
 import os
-import subprocess
-import hashlib
+import shutil
 from datetime import datetime, timedelta
 from app.database import SessionLocal
 from app.models import Backup
@@ -13,24 +19,69 @@ from app.config import (
     BACKUP_RETENTION_DAYS
 )
 from app.utils.backup_storage import get_backup_storage
+from app.utils.backup_pipeline import (
+    BACKUP_PARALLEL_JOBS,
+    BackupProgress,
+    scratch_directory,
+    stream_encrypted_directory_dump,
+    stream_encrypted_dump,
+)
+from app.utils.backup_dedup import BACKUP_DEDUP, MANIFEST_PREFIX, ChunkStore
 from app.utils.logging_utils import logger
 
 
-def run_backup_job(backup_id: int, backup_type: str = "manual"):
+def enqueue_backup_job(backup: Backup) -> str:
+    """Put a backup on the backups queue. Returns the RQ job ID."""
+    from app.workers import backup_queue
+    rq_job = backup_queue.enqueue(
+        run_backup_job, backup.id, backup_type=backup.backup_type, job_id=f"backup-{backup.id}"
+    )
+    return rq_job.id
+
+
+def job_progress_publisher():
+    """Callback storing progress in the current RQ job's meta (None outside a worker)."""
+    from rq import get_current_job
+    job = get_current_job()
+    if job is None:
+        return None
+
+    def publish(snapshot):
+        job.meta["progress"] = snapshot
+        job.save_meta()
+    return publish
+
+
+def get_job_state(job_id: str) -> dict | None:
+    """RQ status and last published progress for a job, or None if Redis no longer has it."""
+    from rq.job import Job
+    from rq.exceptions import NoSuchJobError
+    from app.workers import redis_conn
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        return None
+    return {"id": job.id, "status": job.get_status(), "progress": job.meta.get("progress")}
+
+
+def run_backup_job(backup_id: int, backup_type: str = "manual", progress: BackupProgress = None):
     """
     Execute a database backup job:
     1. Update backup status to in_progress
-    2. Run pg_dump with custom format (-Fc)
-    3. Encrypt with GPG (AES256 symmetric)
-    4. Calculate SHA-256 checksum
-    5. Upload to B2
-    6. Update backup record with metadata
-    7. Cleanup local files
+    2. Stream pg_dump (custom format, -Fc) through GPG (AES256 symmetric)
+       into a multipart upload to B2, hashing the encrypted bytes inline
+       (directory format: pg_dump -Fd -j N to scratch, then stream it as
+       a tar with a per-file manifest)
+    3. Update backup record with metadata
+
+    Custom-format backups write nothing to local disk. Deduplicated
+    backups take an uncompressed dump and store only the chunks B2 does not
+    already hold, plus a manifest at storage_key.
     """
+    progress = progress or BackupProgress(job_progress_publisher())
     session = SessionLocal()
     backup = None
-    local_dump_path = None
-    local_encrypted_path = None
+    dump_dir = None
 
     try:
         # Fetch backup record
@@ -56,100 +107,72 @@ def run_backup_job(backup_id: int, backup_type: str = "manual"):
 
         # Create timestamp-based filename
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"backup_{backup_type}_{timestamp}.dump.gpg"
+        directory_format = backup.dump_format == "directory"
+        backup.deduplicated = backup.deduplicated or BACKUP_DEDUP
+        extension = "tar" if directory_format else "dump"
+        extension += ".manifest" if backup.deduplicated else ".gpg"
+        filename = f"backup_{backup_type}_{timestamp}.{extension}"
         backup.filename = filename
 
-        # Local temporary paths
-        temp_dir = "/tmp"
-        local_dump_path = os.path.join(temp_dir, f"backup_{timestamp}.dump")
-        local_encrypted_path = os.path.join(temp_dir, filename)
-
-        # Step 1: Run pg_dump with custom format
-        logger.info(f"[Backup] Starting pg_dump for backup {backup_id}")
-        dump_cmd = [
-            "pg_dump",
-            "--format=custom",  # -Fc for custom format (compressed, restorable)
-            "--no-owner",       # Don't include ownership commands
-            "--no-acl",         # Don't include access privileges
-            "--file", local_dump_path,
-            db_url
-        ]
-
-        result = subprocess.run(
-            dump_cmd,
-            capture_output=True,
-            text=True,
-            timeout=3600  # 1 hour timeout
-        )
-
-        if result.returncode != 0:
-            raise Exception(f"pg_dump failed: {result.stderr}")
-
-        logger.info(f"[Backup] pg_dump completed: {local_dump_path}")
-
-        # Get dump file size
-        dump_size = os.path.getsize(local_dump_path)
-        backup.database_size_bytes = dump_size
-
-        # Step 2: Encrypt with GPG (symmetric AES256)
         if not BACKUP_GPG_PASSPHRASE:
             raise ValueError("BACKUP_GPG_PASSPHRASE not configured")
 
-        logger.info(f"[Backup] Encrypting backup with GPG")
-        gpg_cmd = [
-            "gpg",
-            "--batch",                    # Non-interactive mode
-            "--yes",                      # Overwrite existing files
-            "--passphrase-fd", "0",       # Read passphrase from stdin
-            "--symmetric",                # Symmetric encryption (no public key)
-            "--cipher-algo", "AES256",    # Use AES256
-            "--output", local_encrypted_path,
-            local_dump_path
-        ]
-
-        gpg_result = subprocess.run(
-            gpg_cmd,
-            input=BACKUP_GPG_PASSPHRASE,
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minute timeout
-        )
-
-        if gpg_result.returncode != 0:
-            raise Exception(f"GPG encryption failed: {gpg_result.stderr}")
-
-        logger.info(f"[Backup] Encryption completed: {local_encrypted_path}")
-
-        # Get encrypted file size
-        encrypted_size = os.path.getsize(local_encrypted_path)
-        backup.size_bytes = encrypted_size
-
-        # Step 3: Calculate SHA-256 checksum
-        logger.info(f"[Backup] Calculating checksum")
-        sha256_hash = hashlib.sha256()
-        with open(local_encrypted_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256_hash.update(chunk)
-        checksum = sha256_hash.hexdigest()
-        backup.checksum = checksum
-
-        # Step 4: Upload to B2
         storage = get_backup_storage()
+        chunk_store = ChunkStore(storage, BACKUP_GPG_PASSPHRASE) if backup.deduplicated else None
 
         # Storage key format: backups/prod/YYYY/MM/filename
+        # (manifests: backups/manifests/YYYY/MM/filename)
         now = datetime.utcnow()
-        storage_key = f"backups/prod/{now.year}/{now.month:02d}/{filename}"
+        key_prefix = MANIFEST_PREFIX if backup.deduplicated else "backups/prod/"
+        storage_key = f"{key_prefix}{now.year}/{now.month:02d}/{filename}"
         backup.storage_key = storage_key
 
-        logger.info(f"[Backup] Uploading to B2: {storage_key}")
-        upload_success = storage.upload_file(local_encrypted_path, storage_key)
-
-        if not upload_success:
-            raise Exception("B2 upload failed")
-
+        dump_cmd = [
+            "pg_dump",
+            "--no-owner",       # Don't include ownership commands
+            "--no-acl",         # Don't include access privileges
+        ]
+        if backup.deduplicated:
+            # Unchanged rows must dump to identical bytes; chunks are compressed instead
+            dump_cmd.append("--compress=0")
+
+        if directory_format:
+            # -Fd -j N dumps tables in parallel; restores can use -j too
+            backup.parallel_jobs = backup.parallel_jobs or BACKUP_PARALLEL_JOBS
+            dump_dir = os.path.join(scratch_directory("backup_"), "dump")
+            dump_cmd += ["--format=directory", "--jobs", str(backup.parallel_jobs), "--file", dump_dir, db_url]
+            logger.info(f"[Backup] Running pg_dump -j {backup.parallel_jobs} for backup {backup_id} to B2: {storage_key}")
+            result = stream_encrypted_directory_dump(
+                dump_cmd,
+                dump_dir,
+                BACKUP_GPG_PASSPHRASE,
+                storage,
+                storage_key,
+                timeout=3600,  # 1 hour timeout
+                progress=progress,
+                chunk_store=chunk_store
+            )
+        else:
+            dump_cmd += ["--format=custom", db_url]  # -Fc: compressed, restorable
+            logger.info(f"[Backup] Streaming pg_dump for backup {backup_id} to B2: {storage_key}")
+            result = stream_encrypted_dump(
+                dump_cmd,
+                BACKUP_GPG_PASSPHRASE,
+                storage,
+                storage_key,
+                timeout=3600,  # 1 hour timeout
+                progress=progress,
+                chunk_store=chunk_store
+            )
+
+        backup.database_size_bytes = result["dump_size"]
+        backup.size_bytes = result["size"]
+        backup.checksum = result["checksum"]
         logger.info(f"[Backup] Upload completed")
 
-        # Step 5: Mark as completed with robust error handling
+        progress.set_stage("completed")
+
+        # Mark as completed with robust error handling
         try:
             backup.status = "completed"
             backup.completed_at = datetime.utcnow()
@@ -181,6 +204,7 @@ def run_backup_job(backup_id: int, backup_type: str = "manual"):
 
     except Exception as e:
         logger.error(f"[Backup] Backup {backup_id} failed: {str(e)}")
+        progress.set_stage("failed")
 
         # Ensure status is always set to failed, never left in progress
         if backup:
@@ -206,21 +230,15 @@ def run_backup_job(backup_id: int, backup_type: str = "manual"):
         raise
 
     finally:
-        # Cleanup local files
-        if local_dump_path and os.path.exists(local_dump_path):
-            os.remove(local_dump_path)
-            logger.info(f"[Backup] Cleaned up: {local_dump_path}")
-
-        if local_encrypted_path and os.path.exists(local_encrypted_path):
-            os.remove(local_encrypted_path)
-            logger.info(f"[Backup] Cleaned up: {local_encrypted_path}")
-
+        if dump_dir:
+            shutil.rmtree(os.path.dirname(dump_dir), ignore_errors=True)
         session.close()
 
 
 def cleanup_old_backups():
     """
-    Delete backups older than BACKUP_RETENTION_DAYS from both database and B2.
+    Delete backups older than BACKUP_RETENTION_DAYS from both database and B2,
+    then garbage-collect chunks no remaining manifest references.
     """
     session = SessionLocal()
     storage = get_backup_storage()
@@ -256,6 +274,21 @@ def cleanup_old_backups():
                 session.rollback()
                 continue
 
+        # Drop chunks only expired manifests referenced. Backups in flight
+        # also hold leases that collect_garbage() honours; this just saves
+        # the bucket round trips when the database already shows one.
+        running = session.query(Backup).filter(
+            Backup.deduplicated.is_(True),
+            Backup.status.in_(["pending", "in_progress"])
+        ).count()
+        if running:
+            logger.info(f"[Cleanup] Skipping chunk collection while {running} deduplicated backups run")
+        else:
+            try:
+                ChunkStore(storage, BACKUP_GPG_PASSPHRASE).collect_garbage()
+            except Exception as e:
+                logger.error(f"[Cleanup] Chunk collection failed: {str(e)}")
+
         logger.info(f"[Cleanup] Cleanup completed")
 
     except Exception as e:
@@ -0,0 +1,215 @@
+"""
+Import job: staged upload → parse → validate/insert in chunks → summary email
+
+The upload is staged in document storage (ImportJob.file_key). The worker
+copies it into a spooled temp file, which stays in memory up to
+IMPORT_SPOOL_MAX_BYTES and spills to disk beyond that.
+
+Each chunk's leads and the job's progress counters are committed in one
+transaction, so a job interrupted by a worker restart resumes from
+rows_processed without duplicating rows. scripts/run_worker.py re-enqueues
+such jobs on startup (requeue_interrupted_imports).
+"""
+import os
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from app import config as app_config
+from app.database import SessionLocal
+from app.models import ImportJob, User
+from app.utils.import_utils import iter_upload, count_upload_rows, import_leads
+from app.utils.email_utils import send_email
+from app.utils.storage_backend import storage_from_config
+from app.utils.logging_utils import logger
+
+# Rows per committed chunk (progress granularity)
+IMPORT_JOB_CHUNK_ROWS = int(os.getenv("IMPORT_JOB_CHUNK_ROWS", "5000"))
+# Failure details kept on the job record; counts are always exact
+IMPORT_MAX_STORED_FAILURES = int(os.getenv("IMPORT_MAX_STORED_FAILURES", "1000"))
+# A running job with no progress for this long is considered interrupted
+IMPORT_STALE_SECONDS = int(os.getenv("IMPORT_STALE_SECONDS", "600"))
+# Staged uploads larger than this are spooled to a temp file on disk
+IMPORT_SPOOL_MAX_BYTES = int(os.getenv("IMPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+def enqueue_import_job(job: ImportJob):
+    """Put a job on the imports queue. Returns the RQ job ID."""
+    from app.workers import import_queue
+    rq_job = import_queue.enqueue(run_import_job, job.id, job_id=f"import-{job.id}")
+    return rq_job.id
+
+
+def _staged_storage():
+    return storage_from_config(vars(app_config))
+
+
+def _open_staged_upload(key: str):
+    """Copy a staged upload into a seekable spooled temp file, one chunk at a time."""
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_BYTES)
+
+    async def copy():
+        async for chunk in _staged_storage().iter_range(key):
+            spool.write(chunk)
+
+    try:
+        asyncio.run(copy())
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def _drop_staged_upload(job: ImportJob):
+    if not job.file_key:
+        return
+    try:
+        asyncio.run(_staged_storage().delete(job.file_key))
+    except Exception as e:
+        logger.warning(f"[Import] Could not delete staged upload for job {job.id}: {str(e)}")
+    job.file_key = None
+
+
+def _send_summary(job: ImportJob, creator: User, assignee: User):
+    lead_list = [f"- {name}" for name in job.sample_names[:10]]
+    summary = "\n".join(lead_list)
+    more = f"\n...and {job.successful_rows - 10} more." if job.successful_rows > 10 else ""
+    body = (
+        f"You've been assigned {job.successful_rows} new leads from a recent import by {creator.email}.\n\n"
+        f"Sample of assigned leads:\n{summary}{more}\n\n"
+        "Please log in to the CRM to view all your leads."
+    )
+    try:
+        asyncio.run(send_email(subject="New Leads Assigned to You", recipient=assignee.email, body=body))
+    except Exception as e:
+        logger.warning(f"[Import] Failed to send summary email for job {job.id}: {str(e)}")
+
+
+def run_import_job(import_job_id: int):
+    """
+    Execute (or resume) an import job:
+    1. Count the staged upload's rows
+    2. Stream it in IMPORT_JOB_CHUNK_ROWS chunks, skipping rows already
+       committed by an earlier attempt
+    3. Insert each chunk, committing progress with it
+    4. Mark completed, drop the staged upload, email the assignee
+    """
+    session = SessionLocal()
+    job = None
+    upload = None
+
+    try:
+        job = session.get(ImportJob, import_job_id)
+        if not job:
+            logger.error(f"[Import] Import job {import_job_id} not found")
+            return
+        if job.status in ("completed", "failed"):
+            logger.info(f"[Import] Import job {import_job_id} already {job.status}, skipping")
+            return
+
+        resuming = job.rows_processed > 0
+        job.status = "in_progress"
+        job.started_at = job.started_at or datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+        session.commit()
+
+        upload = _open_staged_upload(job.file_key)
+        job.total_rows = count_upload_rows(upload, job.filename)
+        session.commit()
+        logger.info(
+            f"[Import] {'Resuming' if resuming else 'Starting'} job {job.id}: "
+            f"{job.rows_processed}/{job.total_rows} rows done"
+        )
+
+        for chunk in iter_upload(upload, job.filename, chunksize=IMPORT_JOB_CHUNK_ROWS):
+            chunk = chunk[chunk.index >= job.rows_processed]
+            if chunk.empty:
+                continue
+            result = import_leads(
+                session, chunk, job.column_mappings,
+                tenant_id=job.tenant_id,
+                created_by=job.created_by,
+                assigned_to=job.assigned_to
+            )
+
+            # Reassign (not mutate) JSON columns so the change is flushed
+            room = IMPORT_MAX_STORED_FAILURES - len(job.failures)
+            if room > 0:
+                job.failures = job.failures + result["failures"][:room]
+            job.warnings = sorted(set(job.warnings) | set(result["warnings"]))
+            if len(job.sample_names) < 10:
+                job.sample_names = (job.sample_names + result["names"])[:10]
+            job.successful_rows += result["successful"]
+            job.failed_rows += result["failed"]
+            job.rows_processed = int(chunk.index[-1]) + 1
+            job.updated_at = datetime.utcnow()
+            session.commit()
+
+        job.status = "completed"
+        job.completed_at = datetime.utcnow()
+        _drop_staged_upload(job)
+        session.commit()
+        logger.info(
+            f"[Import] Job {job.id} completed: {job.successful_rows} succeeded, {job.failed_rows} failed"
+        )
+
+        if job.successful_rows and job.assigned_to:
+            _send_summary(job, session.get(User, job.created_by), session.get(User, job.assigned_to))
+
+    except Exception as e:
+        logger.error(f"[Import] Job {import_job_id} failed: {str(e)}")
+        session.rollback()
+        if job:
+            try:
+                job.status = "failed"
+                job.error_message = str(e)[:500]
+                job.completed_at = datetime.utcnow()
+                _drop_staged_upload(job)
+                session.commit()
+            except Exception as status_error:
+                logger.error(f"[Import] Could not record failure for job {import_job_id}: {str(status_error)}")
+        raise
+
+    finally:
+        if upload is not None:
+            upload.close()
+        session.close()
+
+
+def _rq_job_active(job: ImportJob) -> bool:
+    from rq.job import Job
+    from rq.exceptions import NoSuchJobError
+    from app.workers import redis_conn
+    if not job.job_id:
+        return False
+    try:
+        status = Job.fetch(job.job_id, connection=redis_conn).get_status()
+    except NoSuchJobError:
+        return False
+    return status in ("queued", "started", "deferred", "scheduled")
+
+
+def requeue_interrupted_imports():
+    """
+    Re-enqueue unfinished jobs whose RQ job is gone or failed (e.g. the
+    worker was killed mid-import), and running jobs that have made no
+    progress for IMPORT_STALE_SECONDS. They resume from their last
+    committed chunk.
+    """
+    session = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=IMPORT_STALE_SECONDS)
+        unfinished = session.query(ImportJob).filter(ImportJob.status.in_(["pending", "in_progress"])).all()
+        stale = [
+            job for job in unfinished
+            if not _rq_job_active(job)
+            or (job.status == "in_progress" and job.updated_at and job.updated_at < cutoff)
+        ]
+        for job in stale:
+            job.job_id = enqueue_import_job(job)
+            job.updated_at = datetime.utcnow()
+            logger.info(f"[Import] Re-enqueued interrupted job {job.id} at row {job.rows_processed}")
+        session.commit()
+        return len(stale)
+    finally:
+        session.close()
@@ -0,0 +1,142 @@
+"""
+Report snapshot job: rebuild report_daily_facts for days touched since the
+last run, per tenant.
+
+A day's facts are rebuilt from scratch whenever any lead/project created on
+that day was created, edited or soft-deleted after the tenant's watermark,
+so repeated runs only cost as much as the recent changes. Days of purged
+rows come from report_dirty_days (see app/utils/report_snapshots.py). Pass
+full=True to rebuild everything (e.g. after a restore or raw-SQL changes).
+"""
+from datetime import datetime, time
+from sqlalchemy import func, or_, case, Date
+from app.database import SessionLocal
+from app.models import Lead, Project, ReportDailyFact, ReportSnapshotState, ReportDirtyDay
+from app.utils.logging_utils import logger
+
+
+def _created_day(model):
+    # date() works on both PostgreSQL and SQLite; type_ makes SQLite return a date
+    return func.date(model.created_at, type_=Date)
+
+
+def _touched_days(session, tenant_id: int, since: datetime) -> set:
+    days = set()
+    for model in (Lead, Project):
+        rows = session.query(_created_day(model)).filter(
+            model.tenant_id == tenant_id,
+            or_(model.created_at >= since, model.updated_at >= since, model.deleted_at >= since)
+        ).distinct()
+        days.update(row[0] for row in rows if row[0] is not None)
+    return days
+
+
+def _take_dirty_days(session, tenant_id: int) -> set:
+    """Days with hard-deleted rows; the marks are removed with this refresh's commit."""
+    marks = session.query(ReportDirtyDay.id, ReportDirtyDay.day).filter(ReportDirtyDay.tenant_id == tenant_id).all()
+    if marks:
+        session.query(ReportDirtyDay).filter(
+            ReportDirtyDay.id.in_([mark_id for mark_id, _ in marks])
+        ).delete(synchronize_session=False)
+    return {day for _, day in marks}
+
+
+def _rebuild_days(session, tenant_id: int, days=None):
+    """Replace the facts for `days` (or all days if None) from raw rows."""
+    fact_filters = [ReportDailyFact.tenant_id == tenant_id]
+    if days is not None:
+        fact_filters.append(ReportDailyFact.day.in_(days))
+    session.query(ReportDailyFact).filter(*fact_filters).delete(synchronize_session=False)
+
+    def day_filters(model):
+        filters = [model.tenant_id == tenant_id]
+        if days is not None:
+            filters.append(model.created_at >= datetime.combine(min(days), time.min))
+            filters.append(_created_day(model).in_(days))
+        return filters
+
+    lead_day = _created_day(Lead)
+    lead_deleted = case((Lead.deleted_at != None, True), else_=False)
+    lead_rows = session.query(
+        lead_day, Lead.lead_status, Lead.lead_source, Lead.assigned_to, lead_deleted,
+        func.count(Lead.id)
+    ).filter(*day_filters(Lead)).group_by(
+        lead_day, Lead.lead_status, Lead.lead_source, Lead.assigned_to, lead_deleted
+    ).all()
+
+    project_day = _created_day(Project)
+    project_deleted = case((Project.deleted_at != None, True), else_=False)
+    project_rows = session.query(
+        project_day, Project.project_status, Project.value_type, Project.assigned_to, project_deleted,
+        func.count(Project.id), func.coalesce(func.sum(Project.project_worth), 0)
+    ).filter(*day_filters(Project)).group_by(
+        project_day, Project.project_status, Project.value_type, Project.assigned_to, project_deleted
+    ).all()
+
+    facts = [{
+        "tenant_id": tenant_id, "day": day, "entity": "lead",
+        "status": status, "source": source, "assigned_to": assigned_to,
+        "is_deleted": bool(deleted), "item_count": count, "total_value": 0,
+    } for day, status, source, assigned_to, deleted, count in lead_rows]
+    facts.extend({
+        "tenant_id": tenant_id, "day": day, "entity": "project",
+        "status": status, "value_type": value_type, "assigned_to": assigned_to,
+        "is_deleted": bool(deleted), "item_count": count, "total_value": float(value),
+    } for day, status, value_type, assigned_to, deleted, count, value in project_rows)
+
+    if facts:
+        session.bulk_insert_mappings(ReportDailyFact, facts)
+    return len(facts)
+
+
+def refresh_tenant_snapshots(session, tenant_id: int, full: bool = False):
+    """Bring one tenant's facts up to date and advance its watermark."""
+    started = datetime.utcnow()
+    state = session.get(ReportSnapshotState, tenant_id)
+
+    dirty_days = _take_dirty_days(session, tenant_id)
+    if full or not state:
+        days = None
+    else:
+        days = _touched_days(session, tenant_id, state.refreshed_at) | dirty_days
+
+    fact_count = _rebuild_days(session, tenant_id, days) if days is None or days else 0
+
+    if not state:
+        state = ReportSnapshotState(tenant_id=tenant_id)
+        session.add(state)
+    state.refreshed_at = started
+    state.covered_through = started.date()
+    session.commit()
+
+    logger.info(
+        f"[Reports] Tenant {tenant_id}: rebuilt {'all' if days is None else len(days)} day(s), "
+        f"{fact_count} fact rows"
+    )
+
+
+def refresh_report_snapshots(tenant_id: int = None, full: bool = False):
+    """
+    RQ job entry point. Refreshes one tenant, or every tenant that has
+    leads or projects.
+    """
+    session = SessionLocal()
+    try:
+        if tenant_id is not None:
+            tenant_ids = [tenant_id]
+        else:
+            tenant_ids = sorted(
+                {row[0] for row in session.query(Lead.tenant_id).distinct()} |
+                {row[0] for row in session.query(Project.tenant_id).distinct()} |
+                {row[0] for row in session.query(ReportDirtyDay.tenant_id).distinct()}
+            )
+
+        logger.info(f"[Reports] Refreshing snapshots for {len(tenant_ids)} tenant(s) (full={full})")
+        for tid in tenant_ids:
+            try:
+                refresh_tenant_snapshots(session, tid, full=full)
+            except Exception as e:
+                session.rollback()
+                logger.error(f"[Reports] Snapshot refresh failed for tenant {tid}: {str(e)}")
+    finally:
+        session.close()
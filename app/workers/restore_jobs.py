@@ -1,7 +1,19 @@
 """
 Restore job: download from B2 → verify checksum → GPG decrypt → pg_restore
+
+Directory-format backups stream download → GPG → untar into scratch (checked
+against the archive manifest) and restore with pg_restore -j N.
+
+Deduplicated backups are reassembled from the chunk store instead of
+downloaded and decrypted with GPG; the chunk ids and the dump's SHA-256
+are checked as it streams.
+
+Admin restores run on the backup queue through run_safe_restore_job, which
+takes the pre-restore safety backup first and reports its stage in the RQ
+job's meta.
 """
 import os
+import shutil
 import subprocess
 import hashlib
 import json
@@ -13,10 +25,69 @@ from app.config import (
     BACKUP_GPG_PASSPHRASE
 )
 from app.utils.backup_storage import get_backup_storage
+from app.utils.backup_pipeline import (
+    BACKUP_PARALLEL_JOBS,
+    BackupProgress,
+    extract_directory_tar,
+    scratch_directory,
+    stream_decrypted,
+)
+from app.utils.backup_dedup import ChunkStore
 from app.utils.logging_utils import logger
+from app.workers.backup_jobs import job_progress_publisher, run_backup_job
+
+
+def enqueue_restore_job(restore: BackupRestore) -> str:
+    """Queue run_safe_restore_job for a pending restore. Returns the RQ job id."""
+    from app.workers import backup_queue
 
+    # Safety backup plus restore can outlast the queue's 1 hour default
+    rq_job = backup_queue.enqueue(
+        run_safe_restore_job,
+        restore.id,
+        job_id=f"restore-{restore.id}",
+        job_timeout="3h"
+    )
+    logger.info(f"[Restore] Queued restore {restore.id} as job {rq_job.id}")
+    return rq_job.id
 
-def run_restore_job(restore_id: int):
+
+def run_safe_restore_job(restore_id: int):
+    """
+    Queue entry point for admin restores: run the pre-restore safety backup,
+    then the restore. If the safety backup fails the restore is marked failed
+    and never started.
+    """
+    session = SessionLocal()
+    try:
+        restore = session.query(BackupRestore).filter_by(id=restore_id).first()
+        if not restore:
+            logger.error(f"[Restore] Restore ID {restore_id} not found")
+            return
+        safety_backup_id = restore.pre_restore_backup_id
+    finally:
+        session.close()
+
+    if safety_backup_id:
+        logger.info(f"[Restore] Running pre-restore backup {safety_backup_id}")
+        try:
+            run_backup_job(safety_backup_id, backup_type="pre_restore")
+        except Exception as e:
+            session = SessionLocal()
+            try:
+                restore = session.query(BackupRestore).filter_by(id=restore_id).first()
+                restore.status = "failed"
+                restore.error_message = f"Pre-restore safety backup failed: {str(e)}"[:500]
+                restore.completed_at = datetime.utcnow()
+                session.commit()
+            finally:
+                session.close()
+            raise
+
+    run_restore_job(restore_id)
+
+
+def run_restore_job(restore_id: int, progress: BackupProgress = None):
     """
     Execute a database restore job:
     1. Download encrypted backup from B2
@@ -26,11 +97,15 @@ def run_restore_job(restore_id: int):
     5. Run pg_restore with --clean and --if-exists
     6. Update restore record (will likely fail since record was wiped)
     7. Cleanup local files
+
+    Stages are published through `progress` (by default to the RQ job's meta).
     """
+    progress = progress or BackupProgress(job_progress_publisher())
     session = SessionLocal()
     restore = None
     local_encrypted_path = None
     local_decrypted_path = None
+    restore_dir = None
 
     try:
         # Fetch restore record
@@ -53,6 +128,7 @@ def run_restore_job(restore_id: int):
         session.commit()
 
         logger.info(f"[Restore] Starting restore from backup {backup.id}")
+        progress.set_stage("downloading")
 
         # Parse database connection URL
         db_url = SQLALCHEMY_DATABASE_URI
@@ -68,58 +144,101 @@ def run_restore_job(restore_id: int):
         local_encrypted_path = os.path.join(temp_dir, f"restore_{timestamp}.dump.gpg")
         local_decrypted_path = os.path.join(temp_dir, f"restore_{timestamp}.dump")
 
-        # Step 1: Download from B2
-        storage = get_backup_storage()
-        logger.info(f"[Restore] Downloading from B2: {backup.storage_key}")
-
-        download_success = storage.download_file(backup.storage_key, local_encrypted_path)
-        if not download_success:
-            raise Exception("B2 download failed")
-
-        logger.info(f"[Restore] Download completed: {local_encrypted_path}")
-
-        # Step 2: Verify checksum
-        logger.info(f"[Restore] Verifying checksum")
-        sha256_hash = hashlib.sha256()
-        with open(local_encrypted_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256_hash.update(chunk)
-        downloaded_checksum = sha256_hash.hexdigest()
-
-        if downloaded_checksum != backup.checksum:
-            raise Exception(
-                f"Checksum mismatch! Expected: {backup.checksum}, Got: {downloaded_checksum}"
-            )
-
-        logger.info(f"[Restore] Checksum verified")
-
-        # Step 3: Decrypt with GPG
         if not BACKUP_GPG_PASSPHRASE:
             raise ValueError("BACKUP_GPG_PASSPHRASE not configured")
 
-        logger.info(f"[Restore] Decrypting backup with GPG")
-        gpg_cmd = [
-            "gpg",
-            "--batch",                    # Non-interactive mode
-            "--yes",                      # Overwrite existing files
-            "--passphrase-fd", "0",       # Read passphrase from stdin
-            "--decrypt",                  # Decrypt mode
-            "--output", local_decrypted_path,
-            local_encrypted_path
-        ]
+        storage = get_backup_storage()
 
-        gpg_result = subprocess.run(
-            gpg_cmd,
-            input=BACKUP_GPG_PASSPHRASE,
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minute timeout
-        )
+        if backup.deduplicated:
+            # Steps 1-3: fetch and verify chunks listed in the backup's manifest
+            chunk_store = ChunkStore(storage, BACKUP_GPG_PASSPHRASE)
+            logger.info(f"[Restore] Reassembling {backup.storage_key} from the chunk store")
+            if backup.dump_format == "directory":
+                restore_dir = scratch_directory("restore_")
+                _, downloaded_checksum = chunk_store.stream(
+                    backup.storage_key,
+                    lambda plaintext: extract_directory_tar(plaintext, restore_dir)
+                )
+                restore_source = restore_dir
+            else:
+                def write_dump(plaintext):
+                    with open(local_decrypted_path, "wb") as f:
+                        shutil.copyfileobj(plaintext, f)
+                _, downloaded_checksum = chunk_store.stream(backup.storage_key, write_dump)
+                restore_source = local_decrypted_path
+            if downloaded_checksum != backup.checksum:
+                raise Exception(
+                    f"Checksum mismatch! Expected: {backup.checksum}, Got: {downloaded_checksum}"
+                )
+            logger.info(f"[Restore] Chunks and checksum verified")
+        elif backup.dump_format == "directory":
+            # Steps 1-3 in one stream: download -> GPG decrypt -> untar into
+            # scratch, checking every file against the archive's manifest
+            restore_dir = scratch_directory("restore_")
+            logger.info(f"[Restore] Streaming {backup.storage_key} into {restore_dir}")
+            manifest, downloaded_checksum = stream_decrypted(
+                storage.open_stream(backup.storage_key),
+                BACKUP_GPG_PASSPHRASE,
+                lambda plaintext: extract_directory_tar(plaintext, restore_dir),
+                timeout=3600
+            )
+            if downloaded_checksum != backup.checksum:
+                raise Exception(
+                    f"Checksum mismatch! Expected: {backup.checksum}, Got: {downloaded_checksum}"
+                )
+            logger.info(f"[Restore] Checksum and manifest verified ({len(manifest['files'])} files)")
+            restore_source = restore_dir
+        else:
+            # Step 1: Download from B2
+            logger.info(f"[Restore] Downloading from B2: {backup.storage_key}")
+
+            download_success = storage.download_file(backup.storage_key, local_encrypted_path)
+            if not download_success:
+                raise Exception("B2 download failed")
+
+            logger.info(f"[Restore] Download completed: {local_encrypted_path}")
+
+            # Step 2: Verify checksum
+            logger.info(f"[Restore] Verifying checksum")
+            sha256_hash = hashlib.sha256()
+            with open(local_encrypted_path, "rb") as f:
+                for chunk in iter(lambda: f.read(8192), b""):
+                    sha256_hash.update(chunk)
+            downloaded_checksum = sha256_hash.hexdigest()
+
+            if downloaded_checksum != backup.checksum:
+                raise Exception(
+                    f"Checksum mismatch! Expected: {backup.checksum}, Got: {downloaded_checksum}"
+                )
+
+            logger.info(f"[Restore] Checksum verified")
+
+            # Step 3: Decrypt with GPG
+            logger.info(f"[Restore] Decrypting backup with GPG")
+            gpg_cmd = [
+                "gpg",
+                "--batch",                    # Non-interactive mode
+                "--yes",                      # Overwrite existing files
+                "--passphrase-fd", "0",       # Read passphrase from stdin
+                "--decrypt",                  # Decrypt mode
+                "--output", local_decrypted_path,
+                local_encrypted_path
+            ]
+
+            gpg_result = subprocess.run(
+                gpg_cmd,
+                input=BACKUP_GPG_PASSPHRASE,
+                capture_output=True,
+                text=True,
+                timeout=600  # 10 minute timeout
+            )
 
-        if gpg_result.returncode != 0:
-            raise Exception(f"GPG decryption failed: {gpg_result.stderr}")
+            if gpg_result.returncode != 0:
+                raise Exception(f"GPG decryption failed: {gpg_result.stderr}")
 
-        logger.info(f"[Restore] Decryption completed: {local_decrypted_path}")
+            logger.info(f"[Restore] Decryption completed: {local_decrypted_path}")
+
+            restore_source = local_decrypted_path
 
         # Step 4: Log restore metadata to B2 (before pg_restore wipes the database)
         logger.info(f"[Restore] Logging restore metadata to B2")
@@ -177,6 +296,7 @@ def run_restore_job(restore_id: int):
         # Close the current session to avoid connection issues
         session.close()
 
+        progress.set_stage("restoring")
         logger.info(f"[Restore] Starting database restore (this will cause brief downtime)")
         logger.info(f"[Restore] Running pg_restore with --clean")
 
@@ -187,8 +307,12 @@ def run_restore_job(restore_id: int):
             "--no-owner",        # Don't restore ownership
             "--no-acl",          # Don't restore access privileges
             "--dbname", db_url,
-            local_decrypted_path
         ]
+        if restore_dir:
+            # Load tables and build indexes with one worker per core
+            restore_cmd += ["--jobs", str(BACKUP_PARALLEL_JOBS)]
+            logger.info(f"[Restore] Running pg_restore with {BACKUP_PARALLEL_JOBS} jobs")
+        restore_cmd.append(restore_source)
 
         restore_result = subprocess.run(
             restore_cmd,
@@ -207,6 +331,7 @@ def run_restore_job(restore_id: int):
                 logger.info(f"[Restore] pg_restore completed with warnings (expected)")
 
         logger.info(f"[Restore] Database restore completed")
+        progress.set_stage("completed")
 
         # Reconnect with a fresh session
         session = SessionLocal()
@@ -234,6 +359,7 @@ def run_restore_job(restore_id: int):
 
     except Exception as e:
         logger.error(f"[Restore] Restore {restore_id} failed: {str(e)}")
+        progress.set_stage("failed")
 
         # Ensure status is always set to failed, never left in progress
         if restore:
@@ -268,4 +394,8 @@ def run_restore_job(restore_id: int):
             os.remove(local_decrypted_path)
             logger.info(f"[Restore] Cleaned up: {local_decrypted_path}")
 
+        if restore_dir:
+            shutil.rmtree(restore_dir, ignore_errors=True)
+            logger.info(f"[Restore] Cleaned up: {restore_dir}")
+
         session.close()
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Tenant snapshot jobs: export one tenant's rows → tar + manifest → GPG → B2,
+and the matching restore: B2 → GPG → verify → load_tenant.
+
+Both run on the backup queue. A tenant restore replaces only that tenant's
+rows, in one transaction, so the rest of the database stays online and
+it finishes in seconds rather than taking a full pg_restore outage.
+"""
+import shutil
+from datetime import datetime
+from app.database import SessionLocal
+from app.models import Backup, BackupRestore
+from app.config import BACKUP_GPG_PASSPHRASE
+from app.utils.backup_storage import get_backup_storage
+from app.utils.backup_pipeline import (
+    BackupProgress,
+    extract_directory_tar,
+    scratch_directory,
+    stream_decrypted,
+    stream_encrypted,
+    write_directory_tar,
+)
+from app.utils.tenant_export import export_tenant, load_tenant
+from app.utils.search_index import rebuild_search_index
+from app.workers.backup_jobs import job_progress_publisher
+from app.workers.report_jobs import refresh_tenant_snapshots
+from app.utils.logging_utils import logger
+
+
+def enqueue_tenant_backup_job(backup: Backup) -> str:
+    """Put a tenant snapshot on the backups queue. Returns the RQ job ID."""
+    from app.workers import backup_queue
+    rq_job = backup_queue.enqueue(run_tenant_backup_job, backup.id, job_id=f"backup-{backup.id}")
+    return rq_job.id
+
+
+def enqueue_tenant_restore_job(restore: BackupRestore) -> str:
+    """Queue run_tenant_restore_job for a pending restore. Returns the RQ job ID."""
+    from app.workers import backup_queue
+    rq_job = backup_queue.enqueue(run_tenant_restore_job, restore.id, job_id=f"restore-{restore.id}")
+    logger.info(f"[TenantBackup] Queued tenant restore {restore.id} as job {rq_job.id}")
+    return rq_job.id
+
+
+def _mark_failed(session, record, error):
+    try:
+        session.rollback()
+        record.status = "failed"
+        record.error_message = str(error)[:500]
+        record.completed_at = datetime.utcnow()
+        session.commit()
+    except Exception as status_error:
+        logger.error(f"[TenantBackup] CRITICAL: Could not record failure: {str(status_error)}")
+
+
+def run_tenant_backup_job(backup_id: int, progress: BackupProgress = None):
+    """
+    Snapshot one tenant (Backup.tenant_id):
+    1. Export its tables to gzip JSONL in a scratch directory
+    2. Stream the directory as a tar + manifest through GPG into a multipart upload
+    3. Update the backup record
+    """
+    progress = progress or BackupProgress(job_progress_publisher())
+    session = SessionLocal()
+    backup = None
+    export_dir = None
+
+    try:
+        backup = session.query(Backup).filter_by(id=backup_id).first()
+        if not backup:
+            logger.error(f"[TenantBackup] Backup ID {backup_id} not found")
+            return
+        if backup.tenant_id is None:
+            raise ValueError(f"Backup {backup_id} is not a tenant snapshot")
+
+        backup.status = "in_progress"
+        backup.started_at = datetime.utcnow()
+        session.commit()
+
+        if not BACKUP_GPG_PASSPHRASE:
+            raise ValueError("BACKUP_GPG_PASSPHRASE not configured")
+
+        now = datetime.utcnow()
+        filename = f"tenant_{backup.tenant_id}_{backup.backup_type}_{now.strftime('%Y%m%d_%H%M%S')}.tar.gpg"
+        storage_key = f"backups/prod/tenants/{backup.tenant_id}/{now.year}/{now.month:02d}/{filename}"
+        backup.filename = filename
+        backup.storage_key = storage_key
+
+        progress.set_stage("exporting")
+        export_dir = scratch_directory("tenant_export_")
+        export_tenant(session.get_bind(), backup.tenant_id, export_dir)
+
+        logger.info(f"[TenantBackup] Streaming tenant {backup.tenant_id} snapshot to B2: {storage_key}")
+        result = stream_encrypted(
+            lambda target: write_directory_tar(export_dir, target),
+            BACKUP_GPG_PASSPHRASE,
+            get_backup_storage(),
+            storage_key,
+            timeout=3600,
+            progress=progress
+        )
+
+        backup.database_size_bytes = result["dump_size"]
+        backup.size_bytes = result["size"]
+        backup.checksum = result["checksum"]
+        backup.status = "completed"
+        backup.completed_at = datetime.utcnow()
+        session.commit()
+        progress.set_stage("completed")
+        logger.info(f"[TenantBackup] Backup {backup_id} completed")
+
+    except Exception as e:
+        logger.error(f"[TenantBackup] Backup {backup_id} failed: {str(e)}")
+        progress.set_stage("failed")
+        if backup:
+            _mark_failed(session, backup, e)
+        raise
+
+    finally:
+        if export_dir:
+            shutil.rmtree(export_dir, ignore_errors=True)
+        session.close()
+
+
+def run_tenant_restore_job(restore_id: int):
+    """
+    Restore one tenant from a tenant snapshot:
+    1. Snapshot the tenant's current rows (pre_restore_backup_id)
+    2. Download, decrypt and verify the snapshot (checksum + manifest)
+    3. Replace the tenant's rows with it in one transaction
+    4. Rebuild the tenant's search documents and report facts
+    """
+    session = SessionLocal()
+    restore = None
+    restore_dir = None
+
+    try:
+        restore = session.query(BackupRestore).filter_by(id=restore_id).first()
+        if not restore:
+            logger.error(f"[TenantBackup] Restore ID {restore_id} not found")
+            return
+
+        if restore.pre_restore_backup_id:
+            logger.info(f"[TenantBackup] Running pre-restore snapshot {restore.pre_restore_backup_id}")
+            try:
+                run_tenant_backup_job(restore.pre_restore_backup_id)
+            except Exception as e:
+                raise Exception(f"Pre-restore safety backup failed: {str(e)}")
+
+        progress = BackupProgress(job_progress_publisher())
+        backup = restore.backup
+        if backup.status != "completed" or backup.dump_format != "tenant":
+            raise Exception(f"Backup {backup.id} is not a completed tenant snapshot")
+        if not BACKUP_GPG_PASSPHRASE:
+            raise ValueError("BACKUP_GPG_PASSPHRASE not configured")
+        tenant_id = backup.tenant_id
+
+        restore.status = "in_progress"
+        session.commit()
+
+        progress.set_stage("downloading")
+        restore_dir = scratch_directory("tenant_restore_")
+        storage = get_backup_storage()
+        _, downloaded_checksum = stream_decrypted(
+            storage.open_stream(backup.storage_key),
+            BACKUP_GPG_PASSPHRASE,
+            lambda plaintext: extract_directory_tar(plaintext, restore_dir),
+            timeout=3600
+        )
+        if downloaded_checksum != backup.checksum:
+            raise Exception(f"Checksum mismatch! Expected: {backup.checksum}, Got: {downloaded_checksum}")
+
+        progress.set_stage("restoring")
+        load_tenant(session, tenant_id, restore_dir, fallback_user_id=restore.restored_by)
+        restore.status = "completed"
+        restore.completed_at = datetime.utcnow()
+        session.commit()
+        logger.info(f"[TenantBackup] Restore {restore_id} of tenant {tenant_id} completed")
+
+        # Derived data; the restored rows are already committed if these fail
+        progress.set_stage("reindexing")
+        try:
+            rebuild_search_index(session, tenant_id)
+            refresh_tenant_snapshots(session, tenant_id, full=True)
+        except Exception as e:
+            session.rollback()
+            logger.warning(
+                f"[TenantBackup] Rebuilding derived data for tenant {tenant_id} failed, "
+                f"run scripts/rebuild_search_index.py and scripts/run_report_refresh.py: {str(e)}"
+            )
+        progress.set_stage("completed")
+
+    except Exception as e:
+        logger.error(f"[TenantBackup] Restore {restore_id} failed: {str(e)}")
+        if restore:
+            _mark_failed(session, restore, e)
+        raise
+
+    finally:
+        if restore_dir:
+            shutil.rmtree(restore_dir, ignore_errors=True)
+        session.close()
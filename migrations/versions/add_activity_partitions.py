@@ -0,0 +1,122 @@
+"""Partition activity_logs by month; add recently_touched and daily roll-ups
+
+Revision ID: add_activity_partitions
+Revises: add_effective_owners
+Create Date: 2026-10-16
+
+On PostgreSQL, activity_logs is rebuilt as a monthly range-partitioned
+table (primary key becomes (id, timestamp), as partitioning requires).
+The copy holds an exclusive lock on activity_logs for its duration; run it
+in a maintenance window on large installs. Other databases keep the plain
+table. Schedule scripts/maintain_activity_logs.py daily afterwards.
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_activity_partitions'
+down_revision = 'add_effective_owners'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, tenant_id, user_id, action, entity_type, entity_id, timestamp, description"
+
+
+def upgrade():
+    from app.utils.activity_retention import ACTIVITY_PARTITIONS_AHEAD, add_months, month_start, partition_ddl
+
+    op.create_table(
+        'recently_touched',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('last_touched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'entity_type', 'entity_id'),
+    )
+    op.create_index('ix_recently_touched_user_time', 'recently_touched',
+                    ['tenant_id', 'user_id', 'last_touched_at'])
+    op.execute(
+        "INSERT INTO recently_touched (user_id, entity_type, entity_id, tenant_id, last_touched_at) "
+        "SELECT user_id, entity_type, entity_id, max(tenant_id), max(timestamp) FROM activity_logs "
+        "WHERE timestamp IS NOT NULL GROUP BY user_id, entity_type, entity_id"
+    )
+
+    op.create_table(
+        'activity_daily_rollups',
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('action', sa.String(20), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('tenant_id', 'user_id', 'day', 'entity_type', 'action'),
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE activity_logs RENAME TO activity_logs_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_activity_logs_tenant_id RENAME TO ix_activity_logs_legacy_tenant_id")
+    op.execute("ALTER INDEX IF EXISTS ix_activity_logs_timestamp RENAME TO ix_activity_logs_legacy_timestamp")
+    op.execute("""
+        CREATE TABLE activity_logs (
+            id INTEGER NOT NULL DEFAULT nextval('activity_logs_id_seq'),
+            tenant_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            action activitytype NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            description TEXT,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT")
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM activity_logs_legacy")).scalar()
+    month = month_start(oldest or date.today())
+    last = add_months(month_start(date.today()), ACTIVITY_PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(partition_ddl(month))
+        month = add_months(month, 1)
+
+    op.execute(
+        f"INSERT INTO activity_logs ({COLUMNS}) "
+        f"SELECT id, tenant_id, user_id, action, entity_type, entity_id, coalesce(timestamp, now()), description "
+        f"FROM activity_logs_legacy"
+    )
+    op.execute("ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id")
+    op.execute("DROP TABLE activity_logs_legacy")
+    op.create_index('ix_activity_logs_tenant_id', 'activity_logs', ['tenant_id'])
+    op.create_index('ix_activity_logs_timestamp', 'activity_logs', ['timestamp'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE activity_logs RENAME TO activity_logs_partitioned")
+        op.execute("ALTER INDEX IF EXISTS ix_activity_logs_tenant_id RENAME TO ix_activity_logs_partitioned_tenant_id")
+        op.execute("ALTER INDEX IF EXISTS ix_activity_logs_timestamp RENAME TO ix_activity_logs_partitioned_timestamp")
+        op.execute("""
+            CREATE TABLE activity_logs (
+                id INTEGER NOT NULL DEFAULT nextval('activity_logs_id_seq') PRIMARY KEY,
+                tenant_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL REFERENCES users (id),
+                action activitytype NOT NULL,
+                entity_type VARCHAR(50) NOT NULL,
+                entity_id INTEGER NOT NULL,
+                timestamp TIMESTAMP WITHOUT TIME ZONE,
+                description TEXT
+            )
+        """)
+        op.execute(f"INSERT INTO activity_logs ({COLUMNS}) SELECT {COLUMNS} FROM activity_logs_partitioned")
+        op.execute("ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id")
+        op.execute("DROP TABLE activity_logs_partitioned CASCADE")
+        op.create_index('ix_activity_logs_tenant_id', 'activity_logs', ['tenant_id'])
+        op.create_index('ix_activity_logs_timestamp', 'activity_logs', ['timestamp'])
+
+    op.drop_table('activity_daily_rollups')
+    op.drop_index('ix_recently_touched_user_time', table_name='recently_touched')
+    op.drop_table('recently_touched')
@@ -0,0 +1,25 @@
+"""Flag backups stored in the deduplicating chunk store
+
+Revision ID: add_backup_dedup
+Revises: add_backup_tenant
+Create Date: 2026-10-16
+
+Existing backups are single encrypted objects (deduplicated = false).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_backup_dedup'
+down_revision = 'add_backup_tenant'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('backups', sa.Column('deduplicated', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('backups', 'deduplicated')
@@ -0,0 +1,32 @@
+"""Record dump format and parallelism on backups; widen size columns
+
+Revision ID: add_backup_format
+Revises: add_activity_partitions
+Create Date: 2026-10-16
+
+Existing backups are single-stream custom-format dumps. Size columns become
+BIGINT so multi-GB dumps fit.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_backup_format'
+down_revision = 'add_activity_partitions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('backups', sa.Column('dump_format', sa.String(20), nullable=False, server_default='custom'))
+    op.add_column('backups', sa.Column('parallel_jobs', sa.Integer(), nullable=True))
+    op.alter_column('backups', 'size_bytes', type_=sa.BigInteger(), existing_nullable=True)
+    op.alter_column('backups', 'database_size_bytes', type_=sa.BigInteger(), existing_nullable=True)
+
+
+def downgrade():
+    op.alter_column('backups', 'database_size_bytes', type_=sa.Integer(), existing_nullable=True)
+    op.alter_column('backups', 'size_bytes', type_=sa.Integer(), existing_nullable=True)
+    op.drop_column('backups', 'parallel_jobs')
+    op.drop_column('backups', 'dump_format')
@@ -0,0 +1,28 @@
+"""Record the tenant of per-tenant snapshot backups
+
+Revision ID: add_backup_tenant
+Revises: add_backup_format
+Create Date: 2026-10-16
+
+Tenant snapshots are Backup rows with dump_format 'tenant'; whole-database
+backups keep tenant_id NULL.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_backup_tenant'
+down_revision = 'add_backup_format'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('backups', sa.Column('tenant_id', sa.Integer(), nullable=True))
+    op.create_index('ix_backups_tenant_id', 'backups', ['tenant_id'])
+
+
+def downgrade():
+    op.drop_index('ix_backups_tenant_id', table_name='backups')
+    op.drop_column('backups', 'tenant_id')
@@ -0,0 +1,66 @@
+"""Add precomputed effective owners to projects and interactions
+
+Revision ID: add_effective_owners
+Revises: add_interaction_stats
+Create Date: 2026-10-16
+
+Owners are backfilled in the upgrade (non-admin project and interaction
+lists filter on them). The SQL mirrors app/utils/ownership.py; on very
+large tables scripts/backfill_effective_owners.py can redo it in batches.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_effective_owners'
+down_revision = 'add_interaction_stats'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_projects_tenant_owner_created', 'projects', ['tenant_id', 'effective_owner_id', 'created_at', 'id']),
+    ('ix_interactions_tenant_owner_contact_date', 'interactions',
+     ['tenant_id', 'effective_owner_id', 'contact_date', 'id']),
+]
+
+
+# project.assigned_to -> client's/lead's (assigned_to, else created_by) -> project.created_by
+BACKFILL_PROJECTS = """
+UPDATE projects SET effective_owner_id = COALESCE(projects.assigned_to, CASE
+    WHEN projects.client_id IS NOT NULL THEN
+        (SELECT COALESCE(c.assigned_to, c.created_by) FROM clients c WHERE c.id = projects.client_id)
+    WHEN projects.lead_id IS NOT NULL THEN
+        (SELECT COALESCE(l.assigned_to, l.created_by) FROM leads l WHERE l.id = projects.lead_id)
+    ELSE projects.created_by
+END)
+"""
+
+# Interactions inherit the owner of their client, else lead, else project
+BACKFILL_INTERACTIONS = """
+UPDATE interactions SET effective_owner_id = CASE
+    WHEN interactions.client_id IS NOT NULL THEN
+        (SELECT COALESCE(c.assigned_to, c.created_by) FROM clients c WHERE c.id = interactions.client_id)
+    WHEN interactions.lead_id IS NOT NULL THEN
+        (SELECT COALESCE(l.assigned_to, l.created_by) FROM leads l WHERE l.id = interactions.lead_id)
+    WHEN interactions.project_id IS NOT NULL THEN
+        (SELECT p.effective_owner_id FROM projects p WHERE p.id = interactions.project_id)
+END
+"""
+
+
+def upgrade():
+    for table in ('projects', 'interactions'):
+        op.add_column(table, sa.Column('effective_owner_id', sa.Integer(), nullable=True))
+    # Projects first: project-linked interactions read their owner
+    op.execute(BACKFILL_PROJECTS)
+    op.execute(BACKFILL_INTERACTIONS)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in ('interactions', 'projects'):
+        op.drop_column(table, 'effective_owner_id')
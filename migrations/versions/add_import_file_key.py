@@ -0,0 +1,31 @@
+"""Stage import uploads in storage instead of the database
+
+Revision ID: add_import_file_key
+Revises: add_report_dirty_days
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_import_file_key'
+down_revision = 'add_report_dirty_days'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('import_jobs', sa.Column('file_key', sa.String(512), nullable=True))
+    # Uploads staged in the old column cannot be resumed; let them fail visibly
+    op.execute(
+        "UPDATE import_jobs SET status = 'failed', error_message = 'Upload discarded by migration; please re-import' "
+        "WHERE status IN ('pending', 'in_progress')"
+    )
+    op.drop_column('import_jobs', 'file_data')
+
+
+def downgrade():
+    op.add_column('import_jobs', sa.Column('file_data', sa.LargeBinary(), nullable=True))
+    op.drop_column('import_jobs', 'file_key')
@@ -0,0 +1,55 @@
+"""Add import_jobs table
+
+Revision ID: add_import_jobs
+Revises: add_search_documents
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_import_jobs'
+down_revision = 'add_search_documents'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(20), nullable=False, server_default='leads'),
+        sa.Column('filename', sa.String(255), nullable=False),
+        sa.Column('file_data', sa.LargeBinary(), nullable=True),
+        sa.Column('column_mappings', sa.JSON(), nullable=False),
+        sa.Column('assigned_to', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('successful_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failures', sa.JSON(), nullable=False),
+        sa.Column('warnings', sa.JSON(), nullable=False),
+        sa.Column('sample_names', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('job_id', sa.String(100), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assigned_to'], ['users.id']),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_import_jobs_tenant_id', 'import_jobs', ['tenant_id'])
+    op.create_index('ix_import_jobs_status', 'import_jobs', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_import_jobs_status', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_tenant_id', table_name='import_jobs')
+    op.drop_table('import_jobs')
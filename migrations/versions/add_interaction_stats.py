@@ -0,0 +1,40 @@
+"""Add denormalized interaction stats to clients and leads
+
+Revision ID: add_interaction_stats
+Revises: add_keyset_indexes
+Create Date: 2026-10-16
+
+Run scripts/backfill_interaction_stats.py after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_interaction_stats'
+down_revision = 'add_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_clients_tenant_last_interaction', 'clients', ['tenant_id', 'last_interaction_at', 'id']),
+    ('ix_leads_tenant_last_interaction', 'leads', ['tenant_id', 'last_interaction_at', 'id']),
+    ('ix_interactions_client_contact_date', 'interactions', ['client_id', 'contact_date']),
+    ('ix_interactions_lead_contact_date', 'interactions', ['lead_id', 'contact_date']),
+]
+
+
+def upgrade():
+    for table in ('clients', 'leads'):
+        op.add_column(table, sa.Column('interaction_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('last_interaction_at', sa.DateTime(), nullable=True))
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in ('leads', 'clients'):
+        op.drop_column(table, 'last_interaction_at')
+        op.drop_column(table, 'interaction_count')
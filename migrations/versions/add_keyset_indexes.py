@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: add_keyset_indexes
+Revises: add_import_jobs
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_keyset_indexes'
+down_revision = 'add_import_jobs'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_clients_tenant_created', 'clients', ['tenant_id', 'created_at', 'id']),
+    ('ix_clients_tenant_name', 'clients', ['tenant_id', 'name', 'id']),
+    ('ix_leads_tenant_created', 'leads', ['tenant_id', 'created_at', 'id']),
+    ('ix_leads_tenant_name', 'leads', ['tenant_id', 'name', 'id']),
+    ('ix_projects_tenant_created', 'projects', ['tenant_id', 'created_at', 'id']),
+    ('ix_projects_tenant_name', 'projects', ['tenant_id', 'project_name', 'id']),
+    ('ix_interactions_tenant_contact_date', 'interactions', ['tenant_id', 'contact_date', 'id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
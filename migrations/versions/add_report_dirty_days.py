@@ -0,0 +1,33 @@
+"""Add report dirty days table
+
+Revision ID: add_report_dirty_days
+Revises: add_backup_dedup
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_report_dirty_days'
+down_revision = 'add_backup_dedup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_dirty_days',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_report_dirty_days_tenant_id', 'report_dirty_days', ['tenant_id'])
+
+
+def downgrade():
+    op.drop_index('ix_report_dirty_days_tenant_id', table_name='report_dirty_days')
+    op.drop_table('report_dirty_days')
@@ -0,0 +1,53 @@
+"""Add report snapshot tables
+
+Revision ID: add_report_snapshots
+Revises: add_project_assigned_to
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_report_snapshots'
+down_revision = 'add_project_assigned_to'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_daily_facts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('entity', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(50), nullable=True),
+        sa.Column('source', sa.String(50), nullable=True),
+        sa.Column('value_type', sa.String(20), nullable=True),
+        sa.Column('assigned_to', sa.Integer(), nullable=True),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_value', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_report_daily_facts_tenant_entity_day',
+        'report_daily_facts',
+        ['tenant_id', 'entity', 'day']
+    )
+
+    op.create_table(
+        'report_snapshot_state',
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.Column('covered_through', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('report_snapshot_state')
+    op.drop_index('ix_report_daily_facts_tenant_entity_day', table_name='report_daily_facts')
+    op.drop_table('report_daily_facts')
@@ -0,0 +1,53 @@
+"""Add search_documents table and full-text indexes
+
+Revision ID: add_search_documents
+Revises: add_report_snapshots
+Create Date: 2026-10-16
+
+After upgrading, populate the index with:
+    python scripts/rebuild_search_index.py
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_documents'
+down_revision = 'add_report_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from app.utils.search_index import POSTGRES_DDL, SQLITE_DDL
+
+    op.create_table(
+        'search_documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(255), nullable=True),
+        sa.Column('link', sa.String(255), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('assigned_to', sa.Integer(), nullable=True),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default=sa.false()),
+        *[sa.Column(f'field_{i}', sa.Text(), nullable=True) for i in range(1, 10)],
+        sa.Column('search_text', sa.Text(), nullable=False, server_default=''),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+    )
+    op.create_index('ix_search_documents_tenant_type', 'search_documents', ['tenant_id', 'entity_type'])
+
+    dialect = op.get_bind().dialect.name
+    for statement in POSTGRES_DDL if dialect == 'postgresql' else SQLITE_DDL if dialect == 'sqlite' else []:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('search_documents_ai', 'search_documents_ad', 'search_documents_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS search_documents_fts')
+    op.drop_index('ix_search_documents_tenant_type', table_name='search_documents')
+    op.drop_table('search_documents')
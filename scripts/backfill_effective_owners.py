@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Backfill effective_owner_id on projects and interactions.
+
+Ownership changes keep the column current and the add_effective_owners
+migration fills it for existing rows; run this after a restore, or after
+ownership columns were changed with raw SQL.
+
+Usage:
+    python scripts/backfill_effective_owners.py             # all tenants
+    python scripts/backfill_effective_owners.py --tenant 3  # single tenant
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.utils.ownership import backfill_effective_owners
+from app.utils.logging_utils import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill precomputed effective owners")
+    parser.add_argument("--tenant", type=int, default=None, help="Only backfill this tenant")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per committed batch")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        count = backfill_effective_owners(session, tenant_id=args.tenant, batch_size=args.batch_size)
+        logger.info(f"[Ownership] Backfilled owners for {count} projects and interactions")
+        return 0
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Ownership] Backfill failed: {str(e)}")
+        return 1
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
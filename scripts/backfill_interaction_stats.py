@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Backfill interaction_count / last_interaction_at on clients and leads.
+
+Interaction writes keep the stats current; run this after the
+add_interaction_stats migration, after a restore, or after interactions
+were changed with raw SQL.
+
+Usage:
+    python scripts/backfill_interaction_stats.py             # all tenants
+    python scripts/backfill_interaction_stats.py --tenant 3  # single tenant
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.utils.interaction_stats import backfill_interaction_stats
+from app.utils.logging_utils import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill denormalized interaction stats")
+    parser.add_argument("--tenant", type=int, default=None, help="Only backfill this tenant")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per committed batch")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        count = backfill_interaction_stats(session, tenant_id=args.tenant, batch_size=args.batch_size)
+        logger.info(f"[Interactions] Backfilled stats for {count} clients and leads")
+        return 0
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Interactions] Backfill failed: {str(e)}")
+        return 1
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
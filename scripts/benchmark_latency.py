@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Load benchmark for mixed list + report traffic.
+
+Fires concurrent GET requests at a running backend and prints p50/p95/p99
+latency per endpoint group. Run it once against a build using the sync
+session and once against the async one, with the same data and settings,
+to compare head-of-line blocking on a single Hypercorn worker.
+
+Usage:
+    BENCH_BASE_URL=http://localhost:8000 \
+    BENCH_TOKEN=<jwt> \
+    python scripts/benchmark_latency.py --requests 500 --concurrency 32
+
+Options:
+    --requests       Total number of requests to send (default 500)
+    --concurrency    Number of requests in flight at once (default 32)
+    --report-ratio   Fraction of requests that hit report endpoints (default 0.3)
+"""
+import sys
+import os
+import argparse
+import random
+import time
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+LIST_ENDPOINTS = [
+    "/api/clients/",
+    "/api/leads/",
+    "/api/projects/",
+    "/api/interactions/",
+]
+
+REPORT_ENDPOINTS = [
+    "/api/reports/pipeline",
+    "/api/reports/lead-source",
+    "/api/reports/conversion-rate",
+    "/api/reports/revenue-by-client",
+    "/api/reports/user-activity",
+    "/api/reports/follow-ups",
+    "/api/reports/project-performance",
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def timed_get(base_url, token, path):
+    """Issue a single GET and return (group, path, status, latency_ms)."""
+    group = "report" if path.startswith("/api/reports") else "list"
+    req = urllib.request.Request(base_url + path, headers={"Authorization": f"Bearer {token}"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return group, path, status, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed list/report latency benchmark")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--report-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    base_url = os.getenv("BENCH_BASE_URL", "http://localhost:8000").rstrip("/")
+    token = os.getenv("BENCH_TOKEN")
+    if not token:
+        print("BENCH_TOKEN is required (a valid JWT for an admin user)")
+        return 1
+
+    rng = random.Random(42)
+    paths = [
+        rng.choice(REPORT_ENDPOINTS) if rng.random() < args.report_ratio else rng.choice(LIST_ENDPOINTS)
+        for _ in range(args.requests)
+    ]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda p: timed_get(base_url, token, p), paths))
+    elapsed = time.perf_counter() - started
+
+    errors = [r for r in results if r[2] >= 400 or r[2] == 0]
+    print(f"{len(results)} requests in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} req/s), concurrency={args.concurrency}, errors={len(errors)}")
+    print(f"{'group':<8} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for group in ("list", "report", "all"):
+        latencies = [r[3] for r in results if group == "all" or r[0] == group]
+        if not latencies:
+            continue
+        print(f"{group:<8} {len(latencies):>6} "
+              f"{percentile(latencies, 50):>8.1f}ms {percentile(latencies, 95):>8.1f}ms "
+              f"{percentile(latencies, 99):>8.1f}ms {max(latencies):>8.1f}ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
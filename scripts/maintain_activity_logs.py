@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+activity_logs maintenance for Fly.io scheduled machines.
+
+Creates upcoming monthly partitions, rolls history older than
+ACTIVITY_RETENTION_MONTHS up into activity_daily_rollups and drops it, and
+prunes stale recently_touched rows.
+
+Usage:
+    python scripts/maintain_activity_logs.py
+    python scripts/maintain_activity_logs.py --retention-months 6
+
+Configure as a Fly.io scheduled machine (run daily):
+    flyctl machines run . \
+      --app pathsix-crm-backend \
+      --schedule daily \
+      --region iad \
+      --vm-memory 256 \
+      --env DATABASE_URL=... \
+      --env ACTIVITY_RETENTION_MONTHS=13 \
+      --cmd "python scripts/maintain_activity_logs.py"
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.utils.activity_retention import maintain_activity_logs
+from app.utils.logging_utils import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition, roll up and prune activity_logs")
+    parser.add_argument("--retention-months", type=int, default=None,
+                        help="Override ACTIVITY_RETENTION_MONTHS")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        summary = maintain_activity_logs(session, retention_months=args.retention_months)
+        logger.info(f"[Activity] Maintenance completed: {summary}")
+        return 0
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Activity] Maintenance failed: {str(e)}")
+        return 1
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
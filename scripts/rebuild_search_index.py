@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+Rebuild the global search index (search_documents) from source tables.
+
+Normal writes keep the index current; run this after the
+add_search_documents migration, after a restore, or after data was changed
+with raw SQL.
+
+Usage:
+    python scripts/rebuild_search_index.py             # all tenants
+    python scripts/rebuild_search_index.py --tenant 3  # single tenant
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.utils.search_index import rebuild_search_index
+from app.utils.logging_utils import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the global search index")
+    parser.add_argument("--tenant", type=int, default=None, help="Only rebuild this tenant")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        count = rebuild_search_index(session, tenant_id=args.tenant)
+        logger.info(f"[Search] Indexed {count} rows")
+        return 0
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[Search] Rebuild failed: {str(e)}")
+        return 1
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Report snapshot refresh for Fly.io scheduled machines.
+
+Enqueues refresh_report_snapshots on the 'reports' queue (picked up by
+scripts/run_worker.py). Only days touched since each tenant's last refresh
+are rebuilt, so this is cheap to run often (hourly works well).
+
+Usage:
+    python scripts/run_report_refresh.py              # enqueue incremental refresh
+    python scripts/run_report_refresh.py --inline     # run in this process
+    python scripts/run_report_refresh.py --full       # rebuild all days
+    python scripts/run_report_refresh.py --tenant 3   # single tenant
+
+Configure as a Fly.io scheduled machine:
+    flyctl machines run . \
+      --app pathsix-crm-backend \
+      --schedule hourly \
+      --region iad \
+      --vm-memory 256 \
+      --env DATABASE_URL=... \
+      --env REDIS_URL=... \
+      --cmd "python scripts/run_report_refresh.py"
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.workers.report_jobs import refresh_report_snapshots
+from app.utils.logging_utils import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh report snapshots")
+    parser.add_argument("--tenant", type=int, default=None, help="Only refresh this tenant")
+    parser.add_argument("--full", action="store_true", help="Rebuild all days, not just touched ones")
+    parser.add_argument("--inline", action="store_true", help="Run here instead of enqueueing")
+    args = parser.parse_args()
+
+    try:
+        if args.inline:
+            refresh_report_snapshots(tenant_id=args.tenant, full=args.full)
+            logger.info("[Reports] Snapshot refresh completed")
+        else:
+            from app.workers import report_queue
+            job = report_queue.enqueue(refresh_report_snapshots, tenant_id=args.tenant, full=args.full)
+            logger.info(f"[Reports] Snapshot refresh enqueued: job {job.id}")
+        return 0
+
+    except Exception as e:
+        logger.error(f"[Reports] Snapshot refresh failed: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,6 +43,7 @@ Configure scheduled machine using flyctl:
       --env BACKUP_S3_SECRET_ACCESS_KEY=... \
       --env BACKUP_S3_BUCKET=... \
       --env BACKUP_GPG_PASSPHRASE=... \
+      --env BACKUP_DEFAULT_FORMAT=directory \
       --cmd "python scripts/run_scheduled_backup.py"
 """
 import sys
@@ -56,6 +57,7 @@ from datetime import datetime
 from app.database import SessionLocal
 from app.models import Backup
 from app.workers.backup_jobs import run_backup_job
+from app.utils.backup_pipeline import BACKUP_DEFAULT_FORMAT
 from app.utils.logging_utils import logger
 
 
@@ -72,6 +74,7 @@ def main():
             filename=f"scheduled_backup_{timestamp}.sql.gpg",
             backup_type="scheduled",
             status="pending",
+            dump_format=BACKUP_DEFAULT_FORMAT,
             created_by=None,  # System-created
             created_at=datetime.utcnow()
         )
@@ -5,7 +5,9 @@ RQ worker startup script.
 Usage:
     python scripts/run_worker.py
 
-This script starts an RQ worker that processes jobs from the 'backups' queue.
+This script starts an RQ worker that processes jobs from the 'backups',
+'imports' and 'reports' queues. Imports interrupted by a previous worker
+shutdown are re-enqueued on startup.
 Run this as a separate process group in Fly.io or as a background service locally.
 """
 import sys
@@ -15,18 +17,26 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from rq import Worker
-from app.workers import redis_conn, backup_queue
+from app.workers import redis_conn, backup_queue, import_queue, report_queue
+from app.workers.import_jobs import requeue_interrupted_imports
 from app.utils.logging_utils import logger
 
 
 def main():
-    """Start the RQ worker for backup jobs."""
-    logger.info("Starting RQ worker for backup queue...")
+    """Start the RQ worker for backup, import and report jobs."""
+    logger.info("Starting RQ worker for backup, import and report queues...")
 
-    # Create worker and start listening
-    worker = Worker([backup_queue], connection=redis_conn)
+    try:
+        requeued = requeue_interrupted_imports()
+        if requeued:
+            logger.info(f"Re-enqueued {requeued} interrupted import job(s)")
+    except Exception as e:
+        logger.error(f"Could not check for interrupted imports: {str(e)}")
+
+    # Create worker and start listening (backups take priority)
+    worker = Worker([backup_queue, import_queue, report_queue], connection=redis_conn)
 
-    logger.info(f"Worker listening on queue: {backup_queue.name}")
+    logger.info(f"Worker listening on queues: {backup_queue.name}, {import_queue.name}, {report_queue.name}")
     logger.info("Press Ctrl+C to stop")
 
     try:
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Replace a tenant's config JSON and drop its cached copy.
+
+Committing through the ORM clears the tenant's entry in Redis, so web
+processes pick up the new config within TENANT_CONFIG_CACHE_TTL_SECONDS.
+Use --invalidate-only after editing the tenants table with raw SQL.
+
+Usage:
+    python scripts/set_tenant_config.py --slug acme --file acme_config.json
+    python scripts/set_tenant_config.py --slug acme --invalidate-only
+"""
+import sys
+import os
+import json
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.models import Tenant
+from app.utils.tenant_config import invalidate_tenant_config
+from app.utils.logging_utils import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update a tenant's config")
+    parser.add_argument("--slug", required=True, help="Tenant slug")
+    parser.add_argument("--file", help="JSON file with the full config")
+    parser.add_argument("--invalidate-only", action="store_true", help="Only drop the cached config")
+    args = parser.parse_args()
+    if not args.file and not args.invalidate_only:
+        parser.error("--file or --invalidate-only is required")
+
+    session = SessionLocal()
+    try:
+        tenant = session.query(Tenant).filter_by(slug=args.slug).first()
+        if not tenant:
+            logger.error(f"[TenantConfig] No tenant with slug '{args.slug}'")
+            return 1
+
+        if args.invalidate_only:
+            invalidate_tenant_config(tenant.id)
+        else:
+            with open(args.file) as f:
+                tenant.config = json.load(f)
+            session.commit()
+        action = "Invalidated cached config for" if args.invalidate_only else "Updated config for"
+        logger.info(f"[TenantConfig] {action} tenant {tenant.id} ({args.slug})")
+        return 0
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[TenantConfig] Update failed: {str(e)}")
+        return 1
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import (
+    Tenant, User, Lead, Client, ActivityLog, ActivityType, ActivityDailyRollup, RecentlyTouched
+)
+from app.routes import activity
+from app.utils import auth_utils, activity_sink as sink_module
+from app.utils.activity_retention import maintain_activity_logs
+from app.utils.activity_sink import ActivitySink
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'retention.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add_all([User(id=i, tenant_id=1, email=f"rep{i}@example.com", password_hash="x") for i in (1, 2)])
+    session.add_all([Lead(id=i, tenant_id=1, created_by=1, name=f"Lead {i}") for i in (1, 2)])
+    session.add(Client(id=1, tenant_id=1, created_by=1, name="Client"))
+    session.commit()
+    session.close()
+    for module in (sink_module, activity, auth_utils):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    auth_utils.invalidate_principal()
+    yield Session
+    engine.dispose()
+    auth_utils.invalidate_principal()
+
+
+def test_recent_activity_reads_recently_touched(Session):
+    sink = ActivitySink()
+
+    async def scenario():
+        sink.start()
+        sink.record(1, 1, ActivityType.viewed, "lead", 1)
+        sink.record(1, 1, ActivityType.viewed, "client", 1)
+        sink.record(1, 1, ActivityType.edited, "lead", 1)
+        sink.record(1, 2, ActivityType.viewed, "lead", 2)
+        await sink.stop()
+
+    asyncio.run(scenario())
+    session = Session()
+    touched = {(r.user_id, r.entity_type, r.entity_id) for r in session.query(RecentlyTouched)}
+    assert touched == {(1, "lead", 1), (1, "client", 1), (2, "lead", 2)}
+    session.close()
+
+    app = create_app()
+
+    async def get():
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        response = await app.test_client().get(
+            "/api/activity/recent", headers={"Authorization": f"Bearer {token}"}
+        )
+        return await response.get_json()
+
+    data = asyncio.run(get())
+    assert [(r["entity_type"], r["entity_id"]) for r in data] == [("lead", 1), ("client", 1)]
+
+
+def test_maintenance_rolls_up_and_prunes_expired_history(Session):
+    session = Session()
+    session.add_all(
+        [ActivityLog(tenant_id=1, user_id=1, action=ActivityType.viewed, entity_type="lead", entity_id=1,
+                     timestamp=datetime(2024, 3, 5, hour)) for hour in (9, 10, 11)]
+        + [ActivityLog(tenant_id=1, user_id=2, action=ActivityType.edited, entity_type="lead", entity_id=2,
+                       timestamp=datetime(2025, 8, 31, 23))]
+        + [ActivityLog(tenant_id=1, user_id=1, action=ActivityType.viewed, entity_type="lead", entity_id=1,
+                       timestamp=datetime(2025, 9, 1, 0))]
+    )
+    session.add_all([
+        RecentlyTouched(tenant_id=1, user_id=1, entity_type="lead", entity_id=1, last_touched_at=datetime(2025, 9, 1)),
+        RecentlyTouched(tenant_id=1, user_id=2, entity_type="lead", entity_id=2, last_touched_at=datetime(2025, 8, 31)),
+    ])
+    session.commit()
+
+    summary = maintain_activity_logs(session, retention_months=13, today=date(2026, 10, 16))
+    assert summary["cutoff"] == "2025-09-01"
+    assert (summary["rolled_up"], summary["deleted"], summary["recently_touched_pruned"]) == (4, 4, 1)
+    assert [r.timestamp for r in session.query(ActivityLog)] == [datetime(2025, 9, 1)]
+    rollups = {(r.user_id, r.day, r.entity_type, r.action): r.event_count for r in session.query(ActivityDailyRollup)}
+    assert rollups == {(1, date(2024, 3, 5), "lead", "viewed"): 3, (2, date(2025, 8, 31), "lead", "edited"): 1}
+
+    # A late row for an already rolled-up day is added to the existing count
+    session.add(ActivityLog(tenant_id=1, user_id=1, action=ActivityType.viewed, entity_type="lead", entity_id=1,
+                            timestamp=datetime(2024, 3, 5, 12)))
+    session.commit()
+    maintain_activity_logs(session, retention_months=13, today=date(2026, 10, 16))
+    assert session.get(ActivityDailyRollup, (1, 1, date(2024, 3, 5), "lead", "viewed")).event_count == 4
+    session.close()
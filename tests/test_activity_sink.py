@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Tenant, User, ActivityLog, ActivityType
+from app.utils import activity_sink as sink_module
+from app.utils.activity_sink import ActivitySink
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'activity.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add(User(id=1, tenant_id=1, email="rep@example.com", password_hash="x"))
+    session.commit()
+    session.close()
+    monkeypatch.setattr(sink_module, "SessionLocal", Session)
+    yield Session
+    engine.dispose()
+
+
+def _rows(Session):
+    session = Session()
+    rows = [(r.action, r.entity_type, r.entity_id, r.description)
+            for r in session.query(ActivityLog).order_by(ActivityLog.id)]
+    session.close()
+    return rows
+
+
+def test_writes_immediately_when_writer_is_not_running(Session):
+    ActivitySink().record(1, 1, ActivityType.viewed, "lead", 7, "Viewed lead 'A'")
+    assert _rows(Session) == [(ActivityType.viewed, "lead", 7, "Viewed lead 'A'")]
+
+
+def test_buffers_coalesces_views_and_drains_on_stop(Session, monkeypatch):
+    monkeypatch.setattr(sink_module, "ACTIVITY_FLUSH_INTERVAL_SECONDS", 60)
+    sink = ActivitySink()
+
+    async def scenario():
+        sink.start()
+        for name in ("A", "A again", "A once more"):
+            sink.record(1, 1, ActivityType.viewed, "lead", 7, f"Viewed lead '{name}'")
+        sink.record(1, 1, ActivityType.viewed, "client", 3, "Viewed client")
+        sink.record(1, 1, ActivityType.edited, "lead", 7, "Edited lead")
+        sink.record(1, 1, ActivityType.edited, "lead", 7, "Edited lead")
+        assert _rows(Session) == [] and sink.has_pending(1) and not sink.has_pending(2)
+
+        assert await asyncio.to_thread(sink.flush) == 5 - 1
+        # Already written within the coalescing window
+        sink.record(1, 1, ActivityType.viewed, "lead", 7, "Viewed lead 'A'")
+        sink.record(1, 1, ActivityType.viewed, "project", 9, "Viewed project")
+        await sink.stop()
+
+    asyncio.run(scenario())
+    assert _rows(Session) == [
+        (ActivityType.viewed, "lead", 7, "Viewed lead 'A once more'"),
+        (ActivityType.viewed, "client", 3, "Viewed client"),
+        (ActivityType.edited, "lead", 7, "Edited lead"),
+        (ActivityType.edited, "lead", 7, "Edited lead"),
+        (ActivityType.viewed, "project", 9, "Viewed project"),
+    ]
+    assert not sink.running
+
+
+def test_flushes_when_batch_size_is_reached(Session, monkeypatch):
+    monkeypatch.setattr(sink_module, "ACTIVITY_FLUSH_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(sink_module, "ACTIVITY_FLUSH_BATCH_SIZE", 2)
+    sink = ActivitySink()
+
+    async def scenario():
+        sink.start()
+        sink.record(1, 1, ActivityType.viewed, "lead", 1)
+        await asyncio.sleep(0.05)
+        assert _rows(Session) == []
+        sink.record(1, 1, ActivityType.viewed, "lead", 2)
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if _rows(Session):
+                break
+        assert len(_rows(Session)) == 2
+        await sink.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_events_for_the_next_attempt(Session, monkeypatch):
+    sink = ActivitySink()
+
+    def database_down():
+        raise RuntimeError("db down")
+
+    async def scenario():
+        sink.start()
+        sink.record(1, 1, ActivityType.viewed, "lead", 1)
+        monkeypatch.setattr(sink_module, "SessionLocal", database_down)
+        assert await asyncio.to_thread(sink.flush) == 0
+        monkeypatch.setattr(sink_module, "SessionLocal", Session)
+        await sink.stop()
+
+    asyncio.run(scenario())
+    assert len(_rows(Session)) == 1
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import Backup, BackupRestore, Tenant, User, Role
+from app.routes import admin_backups
+from app.utils import auth_utils, tenant_config
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'admin_backups.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme"))
+    session.add(User(id=1, tenant_id=1, email="admin@example.com", password_hash="x", roles=[Role(name="admin")]))
+    session.add(Backup(id=7, filename="old.dump.gpg", backup_type="manual", status="completed", created_by=1))
+    session.commit()
+    session.close()
+
+    for module in (auth_utils, tenant_config, admin_backups):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    monkeypatch.setattr(tenant_config, "TENANT_CONFIG_REDIS_TTL_SECONDS", 0)
+    auth_utils.invalidate_principal()
+
+    queued = []
+    monkeypatch.setattr(admin_backups, "enqueue_backup_job", lambda backup: queued.append(backup.id) or f"backup-{backup.id}")
+    monkeypatch.setattr(admin_backups, "enqueue_restore_job", lambda restore: queued.append(restore.id) or f"restore-{restore.id}")
+    monkeypatch.setattr(admin_backups, "enqueue_tenant_backup_job", lambda backup: queued.append(("tenant", backup.id)) or f"backup-{backup.id}")
+    monkeypatch.setattr(admin_backups, "get_job_state", lambda job_id: {
+        "id": job_id,
+        "status": "started",
+        "progress": {"stage": "uploading", "bytes_dumped": 10, "bytes_encrypted": 8, "bytes_uploaded": 0},
+    })
+    app = create_app()
+
+    async def call(method, path, json=None):
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        response = await app.test_client().open(
+            path, method=method, json=json, headers={"Authorization": f"Bearer {token}"}
+        )
+        return response.status_code, await response.get_json()
+
+    def sync_call(method, path, json=None):
+        return asyncio.run(call(method, path, json))
+
+    sync_call.Session = Session
+    sync_call.queued = queued
+    yield sync_call
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+
+
+def test_manual_backup_is_queued_and_reports_progress(client):
+    status, body = client("POST", "/api/admin/backups")
+    assert status == 202
+    backup_id = body["backup"]["id"]
+    assert body["job_id"] == f"backup-{backup_id}"
+    assert body["backup"]["status"] == "pending"
+    assert client.queued == [backup_id]
+
+    status, body = client("GET", f"/api/admin/backups/{backup_id}/status")
+    assert status == 200
+    assert body["job"]["progress"]["bytes_dumped"] == 10
+
+
+def test_restore_is_queued_with_pending_safety_backup(client):
+    status, body = client("POST", "/api/admin/backups/7/restore")
+    assert status == 202
+    assert body["job_id"] == f"restore-{body['restore_id']}"
+
+    session = client.Session()
+    restore = session.get(BackupRestore, body["restore_id"])
+    safety = session.get(Backup, body["pre_restore_backup_id"])
+    assert restore.status == "pending" and safety.status == "pending"
+    assert safety.job_id == body["job_id"]
+    session.close()
+
+    # A queued restore still protects its source backup
+    status, _ = client("DELETE", "/api/admin/backups/7")
+    assert status == 400
+
+
+def test_tenant_snapshots_are_scoped_to_the_callers_tenant(client):
+    status, body = client("POST", "/api/admin/backups", json={"format": "tenant"})
+    assert status == 202
+    assert body["backup"]["tenant_id"] == 1 and body["backup"]["format"] == "tenant"
+    assert client.queued == [("tenant", body["backup"]["id"])]
+
+    session = client.Session()
+    session.add(Backup(id=50, filename="other.tar.gpg", backup_type="tenant", dump_format="tenant",
+                       tenant_id=2, status="completed"))
+    session.commit()
+    session.close()
+
+    _, listing = client("GET", "/api/admin/backups")
+    assert 50 not in [b["id"] for b in listing["backups"]]
+    status, _ = client("POST", "/api/admin/backups/50/restore")
+    assert status == 404
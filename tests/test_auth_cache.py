@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from app.models import User
+from app.utils import auth_utils
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    auth_utils.invalidate_principal()
+    yield
+    auth_utils.invalidate_principal()
+
+
+def test_principal_cache_hit_and_invalidate():
+    user = User(id=1, tenant_id=1, email="a@example.com")
+    auth_utils._cache_principal(1, "tok", user)
+
+    assert auth_utils._get_cached_principal(1, "tok") is user
+    assert auth_utils._get_cached_principal(1, "other-token") is None
+
+    auth_utils.invalidate_principal(1)
+    assert auth_utils._get_cached_principal(1, "tok") is None
+
+
+def test_principal_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(auth_utils, "AUTH_CACHE_MAX_ENTRIES", 2)
+    for user_id in (1, 2):
+        auth_utils._cache_principal(user_id, "tok", User(id=user_id, tenant_id=1))
+
+    auth_utils._get_cached_principal(1, "tok")  # touch 1 so 2 is oldest
+    auth_utils._cache_principal(3, "tok", User(id=3, tenant_id=1))
+
+    assert auth_utils._get_cached_principal(1, "tok") is not None
+    assert auth_utils._get_cached_principal(2, "tok") is None
+    assert auth_utils._get_cached_principal(3, "tok") is not None
+
+
+def test_principal_cache_expires(monkeypatch):
+    monkeypatch.setattr(auth_utils, "AUTH_CACHE_TTL_SECONDS", 1)
+    auth_utils._cache_principal(1, "tok", User(id=1, tenant_id=1))
+
+    now = time.monotonic()
+    monkeypatch.setattr(auth_utils.time, "monotonic", lambda: now + 5)
+    assert auth_utils._get_cached_principal(1, "tok") is None
+
+
+def test_principal_from_claims_respects_freshness_window(monkeypatch):
+    payload = {"sub": 7, "email": "b@example.com", "roles": ["admin"], "tenant_id": 3, "iat": int(time.time())}
+
+    assert auth_utils._principal_from_claims(payload) is None  # disabled by default
+
+    monkeypatch.setattr(auth_utils, "AUTH_JWT_FRESHNESS_SECONDS", 60)
+    user = auth_utils._principal_from_claims(payload)
+    assert (user.id, user.tenant_id) == (7, 3)
+    assert [r.name for r in user.roles] == ["admin"]
+
+    payload["iat"] -= 120
+    assert auth_utils._principal_from_claims(payload) is None
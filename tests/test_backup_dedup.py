@@ -0,0 +1,216 @@
+import io
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils import backup_dedup
+from app.utils.backup_dedup import CHUNK_PREFIX, GC_MARKER, LEASE_PREFIX, MANIFEST_PREFIX, Chunker, ChunkStore
+from app.utils.backup_pipeline import stream_encrypted_dump
+
+PASSPHRASE = "correct horse battery staple"
+NOW = datetime(2026, 10, 1, 3, 0, tzinfo=timezone.utc)
+
+
+class DictStorage:
+    """The object subset of BackupStorageBackend the chunk store uses."""
+
+    def __init__(self):
+        self.objects = {}
+        self.modified = {}
+        self.puts = []
+        self._lock = threading.Lock()
+
+    def put_object(self, object_key, body):
+        with self._lock:
+            self.objects[object_key] = body
+            self.modified[object_key] = NOW
+            self.puts.append(object_key)
+
+    def open_stream(self, object_key):
+        return io.BytesIO(self.objects[object_key])
+
+    def list_objects(self, prefix=""):
+        return [
+            {"key": key, "size": len(body), "last_modified": self.modified[key]}
+            for key, body in self.objects.items() if key.startswith(prefix)
+        ]
+
+    def delete_file(self, object_key):
+        self.objects.pop(object_key)
+        return True
+
+
+def _dump(size, seed):
+    return random.Random(seed).randbytes(size)
+
+
+def _store(storage):
+    return ChunkStore(storage, PASSPHRASE, chunker=Chunker(4096), concurrency=3)
+
+
+def _put(store, data, key):
+    return store.put(lambda pipe: pipe.write(data), key)
+
+
+def _read(store, key):
+    return store.stream(key, lambda reader: reader.read(1 << 30) + b"".join(iter(reader.read, b"")))
+
+
+def test_cut_points_resync_after_an_insert():
+    chunker = Chunker(4096)
+    data = _dump(200_000, seed=1)
+    edited = data[:50_000] + b"a new row" + data[50_000:]
+
+    before = list(chunker.split(io.BytesIO(data)))
+    after = list(chunker.split(io.BytesIO(edited)))
+    assert b"".join(before) == data and b"".join(after) == edited
+    assert all(1024 <= len(chunk) <= 16384 for chunk in before[:-1])
+    # Only the chunk around the insert changes
+    assert len(set(after) - set(before)) <= 2
+
+
+def test_second_backup_uploads_only_changed_chunks():
+    storage = DictStorage()
+    store = _store(storage)
+    data = _dump(300_000, seed=2)
+    edited = data[:100_000] + b"changed" + data[100_007:]
+
+    first = _put(store, data, f"{MANIFEST_PREFIX}first.dump.manifest")
+    assert first["new_chunks"] == first["chunks"]
+    second = _put(store, edited, f"{MANIFEST_PREFIX}second.dump.manifest")
+    assert second["new_chunks"] <= 2
+    assert second["size"] < first["size"] / 10
+
+    restored, checksum = _read(store, f"{MANIFEST_PREFIX}second.dump.manifest")
+    assert restored == edited
+    assert checksum == second["checksum"]
+    # Stored objects are sealed, not the plaintext
+    assert not any(data[:64] in body for body in storage.objects.values())
+
+
+def test_tampered_chunk_or_manifest_is_rejected():
+    storage = DictStorage()
+    store = _store(storage)
+    key = f"{MANIFEST_PREFIX}backup.dump.manifest"
+    _put(store, _dump(50_000, seed=3), key)
+
+    chunk_key = next(k for k in storage.objects if k.startswith(CHUNK_PREFIX))
+    blob = storage.objects[chunk_key]
+    storage.objects[chunk_key] = blob[:-1] + bytes([blob[-1] ^ 1])
+    with pytest.raises(Exception):
+        _read(store, key)
+
+    # A manifest moved to another key no longer opens
+    storage.objects[chunk_key] = blob
+    storage.objects[f"{MANIFEST_PREFIX}other.dump.manifest"] = storage.objects[key]
+    with pytest.raises(Exception):
+        store.read_manifest(f"{MANIFEST_PREFIX}other.dump.manifest")
+
+    with pytest.raises(Exception):
+        ChunkStore(storage, "wrong passphrase", chunker=Chunker(4096)).read_manifest(key)
+
+
+def test_garbage_collection_keeps_referenced_and_recent_chunks():
+    storage = DictStorage()
+    store = _store(storage)
+    old_key = f"{MANIFEST_PREFIX}old.dump.manifest"
+    new_key = f"{MANIFEST_PREFIX}new.dump.manifest"
+    _put(store, _dump(100_000, seed=4), old_key)
+    _put(store, _dump(100_000, seed=5), new_key)
+    old_chunks = {chunk_id for chunk_id, _ in store.read_manifest(old_key)["chunks"]}
+
+    # Retention deleted the old manifest; its chunks are still inside the grace period
+    storage.delete_file(old_key)
+    assert store.collect_garbage(grace_hours=24, now=NOW)["deleted"] == 0
+
+    result = store.collect_garbage(grace_hours=24, now=NOW + timedelta(days=2))
+    assert result["deleted"] == len(old_chunks)
+    assert not any(store.chunk_key(chunk_id) in storage.objects for chunk_id in old_chunks)
+    restored, _ = _read(store, new_key)
+    assert restored == _dump(100_000, seed=5)
+
+
+def test_live_backup_lease_blocks_collection_and_stale_ones_expire():
+    storage = DictStorage()
+    store = _store(storage)
+    _put(store, _dump(50_000, seed=6), f"{MANIFEST_PREFIX}old.dump.manifest")
+    storage.delete_file(f"{MANIFEST_PREFIX}old.dump.manifest")
+    later = NOW + timedelta(days=2)
+
+    # A backup that started reading the chunk index may reuse these chunks
+    storage.put_object(f"{LEASE_PREFIX}running", b"")
+    storage.modified[f"{LEASE_PREFIX}running"] = later
+    result = store.collect_garbage(grace_hours=24, now=later)
+    assert result["skipped"] and result["deleted"] == 0
+    assert GC_MARKER not in storage.objects
+
+    # Once the lease is older than the grace period its backup is long dead
+    result = store.collect_garbage(grace_hours=24, now=later + timedelta(days=2))
+    assert not result["skipped"] and result["deleted"] > 0
+    assert not storage.list_objects(LEASE_PREFIX)
+
+
+def test_backup_waits_for_running_collection(monkeypatch):
+    monkeypatch.setattr(backup_dedup, "GC_MARKER_POLL_SECONDS", 0.05)
+    storage = DictStorage()
+    store = _store(storage)
+    storage.put_object(GC_MARKER, b"")
+    storage.modified[GC_MARKER] = datetime.now(timezone.utc)
+
+    with pytest.raises(Exception, match="garbage collection"):
+        store.put(lambda pipe: pipe.write(b"x" * 10_000), f"{MANIFEST_PREFIX}a.dump.manifest", timeout=0.2)
+    assert not storage.list_objects(CHUNK_PREFIX) and not storage.list_objects(LEASE_PREFIX)
+
+    threading.Timer(0.2, storage.delete_file, [GC_MARKER]).start()
+    result = store.put(lambda pipe: pipe.write(b"x" * 10_000), f"{MANIFEST_PREFIX}b.dump.manifest", timeout=5)
+    assert result["chunks"] > 0
+
+
+def test_stalled_producer_is_timed_out():
+    storage = DictStorage()
+    store = _store(storage)
+    resume = threading.Event()
+    late_write = []
+
+    def stalled_dump(pipe):
+        pipe.write(_dump(20_000, seed=7))
+        resume.wait(5)  # pg_dump stops producing output
+        try:
+            pipe.write(b"more")
+            pipe.flush()
+        except BrokenPipeError as e:
+            late_write.append(e)
+            raise
+
+    with pytest.raises(Exception, match="timed out"):
+        store.put(stalled_dump, f"{MANIFEST_PREFIX}stalled.dump.manifest", timeout=0.5)
+    assert not storage.list_objects(MANIFEST_PREFIX) and not storage.list_objects(LEASE_PREFIX)
+
+    resume.set()
+    for _ in range(50):
+        if late_write:
+            break
+        time.sleep(0.05)
+    assert late_write, "the producer's next write should fail so the dump is killed"
+
+
+def test_stalled_dump_process_is_killed(tmp_path):
+    storage = DictStorage()
+    pid_file = tmp_path / "dump.pid"
+    script = (
+        "import os, sys, time; open(sys.argv[1], 'w').write(str(os.getpid())); "
+        "sys.stdout.buffer.write(b'x' * 1000); sys.stdout.flush(); time.sleep(30)"
+    )
+
+    started = time.monotonic()
+    with pytest.raises(Exception, match="timed out"):
+        stream_encrypted_dump([sys.executable, "-c", script, str(pid_file)], PASSPHRASE, storage,
+                              f"{MANIFEST_PREFIX}stalled.dump.manifest", timeout=1, chunk_store=_store(storage))
+    assert time.monotonic() - started < 10
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
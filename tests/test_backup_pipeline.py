@@ -0,0 +1,197 @@
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app.utils import backup_storage
+from app.utils import backup_pipeline
+from app.utils.backup_pipeline import (
+    BackupProgress,
+    extract_directory_tar,
+    stream_decrypted,
+    stream_encrypted_directory_dump,
+    stream_encrypted_dump,
+    write_directory_tar,
+)
+from app.utils.backup_storage import BackupStorageBackend
+
+PASSPHRASE = "correct horse battery staple"
+
+
+class InMemoryS3:
+    """Thread-safe stand-in for the multipart subset of the S3 API."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.uploads[UploadId][PartNumber] = Body
+            return {"ETag": hashlib.md5(Body).hexdigest()}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[Key] = b"".join(parts[n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(Key)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setattr(backup_storage, "BACKUP_PART_SIZE", 64 * 1024)
+    monkeypatch.setattr(backup_storage, "BACKUP_UPLOAD_CONCURRENCY", 2)
+    backend = BackupStorageBackend.__new__(BackupStorageBackend)
+    backend.client = InMemoryS3()
+    backend.bucket = "backups"
+    return backend
+
+
+def _dump_cmd(size, exit_code=0):
+    script = (
+        "import random, sys; random.seed(7); "
+        f"sys.stdout.buffer.write(random.randbytes({size})); sys.stdout.flush(); "
+        f"sys.exit({exit_code})"
+    )
+    return [sys.executable, "-c", script]
+
+
+def _decrypt(data, tmp_path):
+    return subprocess.run(
+        ["gpg", "--batch", "--homedir", str(tmp_path), "--passphrase", PASSPHRASE, "--decrypt"],
+        input=data, capture_output=True, check=True,
+    ).stdout
+
+
+def test_streams_encrypts_and_hashes_in_one_pass(storage, tmp_path):
+    result = stream_encrypted_dump(_dump_cmd(1_000_000), PASSPHRASE, storage, "backups/b.dump.gpg")
+
+    stored = storage.client.objects["backups/b.dump.gpg"]
+    assert result["dump_size"] == 1_000_000
+    assert result["size"] == len(stored)
+    assert result["checksum"] == hashlib.sha256(stored).hexdigest()
+    assert 1 <= storage.client.max_in_flight <= 2
+
+    expected = subprocess.run(_dump_cmd(1_000_000), capture_output=True, check=True).stdout
+    assert _decrypt(stored, tmp_path) == expected
+
+
+def test_progress_counts_dumped_encrypted_and_uploaded_bytes(storage, monkeypatch):
+    monkeypatch.setattr(backup_pipeline, "BACKUP_PROGRESS_INTERVAL_SECONDS", 3600)
+    published = []
+    progress = BackupProgress(published.append)
+
+    stream_encrypted_dump(_dump_cmd(300_000), PASSPHRASE, storage, "backups/p.dump.gpg", progress=progress)
+    progress.set_stage("completed")
+
+    stored = storage.client.objects["backups/p.dump.gpg"]
+    assert published[-1] == {
+        "stage": "completed",
+        "bytes_dumped": 300_000,
+        "bytes_encrypted": len(stored),
+        "bytes_uploaded": len(stored),
+    }
+    # Stage changes always publish; byte updates only once per interval
+    assert [p["stage"] for p in published] == ["uploading", "completed"]
+
+
+def test_failed_dump_aborts_upload(storage):
+    with pytest.raises(Exception, match="failed"):
+        stream_encrypted_dump(_dump_cmd(200_000, exit_code=1), PASSPHRASE, storage, "backups/bad.dump.gpg")
+
+    assert "backups/bad.dump.gpg" not in storage.client.objects
+    assert storage.client.aborted == ["backups/bad.dump.gpg"]
+
+
+def _stalled_dump_cmd(pid_file):
+    # Writes a little, then hangs without closing stdout like a stuck pg_dump
+    script = (
+        "import os, sys, time; open(sys.argv[1], 'w').write(str(os.getpid())); "
+        "sys.stdout.buffer.write(b'x' * 1000); sys.stdout.flush(); time.sleep(30)"
+    )
+    return [sys.executable, "-c", script, pid_file]
+
+
+def _process_gone(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+
+def test_stalled_dump_is_killed_on_timeout(storage, tmp_path):
+    pid_file = tmp_path / "dump.pid"
+    started = time.monotonic()
+    with pytest.raises(Exception, match="timed out"):
+        stream_encrypted_dump(_stalled_dump_cmd(str(pid_file)), PASSPHRASE, storage, "backups/s.dump.gpg", timeout=1)
+
+    assert time.monotonic() - started < 10
+    assert _process_gone(int(pid_file.read_text()))
+    assert "backups/s.dump.gpg" not in storage.client.objects
+    assert storage.client.aborted == ["backups/s.dump.gpg"]
+
+
+def _directory_dump_cmd(dump_dir):
+    script = (
+        "import os, random, sys; random.seed(3); d = sys.argv[1]; os.makedirs(d); "
+        "open(os.path.join(d, 'toc.dat'), 'wb').write(b'toc'); "
+        "[open(os.path.join(d, f'{n}.dat.gz'), 'wb').write(random.randbytes(150_000)) for n in range(3)]"
+    )
+    return [sys.executable, "-c", script, dump_dir]
+
+
+def test_directory_dump_round_trips_with_manifest(storage, tmp_path):
+    dump_dir = str(tmp_path / "dump")
+    result = stream_encrypted_directory_dump(
+        _directory_dump_cmd(dump_dir), dump_dir, PASSPHRASE, storage, "backups/d.tar.gpg"
+    )
+    assert result["dump_size"] == 3 + 3 * 150_000
+
+    restore_dir = tmp_path / "restore"
+    restore_dir.mkdir()
+    stored = storage.client.objects["backups/d.tar.gpg"]
+    manifest, checksum = stream_decrypted(
+        io.BytesIO(stored), PASSPHRASE, lambda plaintext: extract_directory_tar(plaintext, str(restore_dir))
+    )
+
+    assert checksum == result["checksum"]
+    assert sorted(manifest["files"]) == ["0.dat.gz", "1.dat.gz", "2.dat.gz", "toc.dat"]
+    for name in manifest["files"]:
+        assert (restore_dir / name).read_bytes() == (tmp_path / "dump" / name).read_bytes()
+
+
+def test_extract_rejects_files_that_do_not_match_manifest(tmp_path):
+    (tmp_path / "dump").mkdir()
+    (tmp_path / "dump" / "toc.dat").write_bytes(b"original")
+    archive = io.BytesIO()
+    write_directory_tar(str(tmp_path / "dump"), archive)
+    tampered = archive.getvalue().replace(b"original", b"tampered")
+
+    (tmp_path / "restore").mkdir()
+    with pytest.raises(Exception, match="toc.dat"):
+        extract_directory_tar(io.BytesIO(tampered), str(tmp_path / "restore"))
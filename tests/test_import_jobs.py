@@ -0,0 +1,198 @@
+import asyncio
+import io
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from werkzeug.datastructures import FileStorage
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Lead, ImportJob
+from app.routes import imports
+from app.utils import auth_utils
+from app.utils.storage_backend import LocalStorageBackend
+from app.workers import import_jobs
+
+MAPPINGS = [
+    {"csvColumn": "Company", "leadField": "name"},
+    {"csvColumn": "Phone", "leadField": "phone"},
+]
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import_jobs.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add_all([
+        User(id=1, tenant_id=1, email="admin@example.com", password_hash="x"),
+        User(id=2, tenant_id=1, email="rep@example.com", password_hash="x"),
+    ])
+    session.commit()
+    session.close()
+
+    sent = []
+
+    async def fake_send_email(subject, recipient, body):
+        sent.append((recipient, body))
+
+    monkeypatch.setattr(import_jobs, "SessionLocal", Session)
+    monkeypatch.setattr(import_jobs, "send_email", fake_send_email)
+    monkeypatch.setattr(import_jobs, "IMPORT_JOB_CHUNK_ROWS", 10)
+    storage = LocalStorageBackend(str(tmp_path / "storage"))
+    monkeypatch.setattr(import_jobs, "_staged_storage", lambda: storage)
+    Session.sent = sent
+    Session.storage = storage
+    yield Session
+    engine.dispose()
+
+
+def _create_job(Session, rows):
+    csv = "Company,Phone\n" + "".join(f"{name},{phone}\n" for name, phone in rows)
+    asyncio.run(Session.storage.put_bytes("imports/tenant-1/leads.csv", csv.encode(), "text/csv"))
+    session = Session()
+    job = ImportJob(
+        tenant_id=1, filename="leads.csv", file_key="imports/tenant-1/leads.csv", column_mappings=MAPPINGS,
+        assigned_to=2, created_by=1, created_at=datetime.utcnow(),
+        failures=[], warnings=[], sample_names=[]
+    )
+    session.add(job)
+    session.commit()
+    job_id = job.id
+    session.close()
+    return job_id
+
+
+def test_import_job_processes_chunks_and_reports_progress(Session):
+    rows = [(f"Lead {i}", "555-123-4567") for i in range(25)]
+    rows[3] = ("", "555-123-4567")
+    rows[4] = ("Bad Phone", "12")
+    job_id = _create_job(Session, rows)
+
+    import_jobs.run_import_job(job_id)
+
+    session = Session()
+    job = session.get(ImportJob, job_id)
+    data = job.to_dict(include_failures=True)
+    assert data["status"] == "completed"
+    assert (data["total_rows"], data["rows_processed"]) == (25, 25)
+    assert (data["successful_imports"], data["failed_imports"]) == (24, 1)
+    assert data["failures"] == [{"row": 5, "data": {"Phone": "555-123-4567"}, "error": "Missing required 'name' field"}]
+    assert data["warnings"] == ["Invalid phone on row 6"]
+    assert job.file_key is None
+    assert not os.path.exists(os.path.join(Session.storage.root, "imports/tenant-1/leads.csv"))
+    assert session.query(Lead).filter_by(assigned_to=2).count() == 24
+    session.close()
+
+    (recipient, body), = Session.sent
+    assert recipient == "rep@example.com"
+    assert "assigned 24 new leads" in body and "- Lead 0" in body
+
+
+def test_interrupted_import_job_resumes_without_duplicates(Session, monkeypatch):
+    job_id = _create_job(Session, [(f"Lead {i}", "5551234567") for i in range(30)])
+
+    real_import_leads = import_jobs.import_leads
+    calls = []
+
+    def crash_on_second_chunk(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise SystemExit("worker killed")
+        return real_import_leads(*args, **kwargs)
+
+    monkeypatch.setattr(import_jobs, "import_leads", crash_on_second_chunk)
+    with pytest.raises(SystemExit):
+        import_jobs.run_import_job(job_id)
+
+    session = Session()
+    job = session.get(ImportJob, job_id)
+    assert (job.status, job.rows_processed) == ("in_progress", 10)
+    session.close()
+
+    monkeypatch.setattr(import_jobs, "import_leads", real_import_leads)
+    import_jobs.run_import_job(job_id)
+
+    session = Session()
+    job = session.get(ImportJob, job_id)
+    assert (job.status, job.rows_processed, job.successful_rows) == ("completed", 30, 30)
+    assert session.query(Lead).count() == 30
+    assert session.query(Lead.name).distinct().count() == 30
+    session.close()
+
+
+def test_import_job_status_endpoint_is_scoped_to_creator(Session, monkeypatch):
+    job_id = _create_job(Session, [("Lead 0", "5551234567")])
+    import_jobs.run_import_job(job_id)
+    monkeypatch.setattr(imports, "SessionLocal", Session)
+    monkeypatch.setattr(auth_utils, "SessionLocal", Session)
+    auth_utils.invalidate_principal()
+    app = create_app()
+
+    async def get_as(user_id):
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, user_id))
+            session.close()
+        response = await app.test_client().get(
+            f"/api/import/jobs/{job_id}", headers={"Authorization": f"Bearer {token}"}
+        )
+        return response.status_code, await response.get_json()
+
+    status, data = asyncio.run(get_as(1))
+    assert status == 200 and data["status"] == "completed" and data["successful_imports"] == 1
+    assert asyncio.run(get_as(2))[0] == 404
+    auth_utils.invalidate_principal()
+
+
+def test_queued_upload_is_staged_in_storage_and_imported(Session, monkeypatch):
+    queued = []
+    monkeypatch.setattr(imports, "SessionLocal", Session)
+    monkeypatch.setattr(imports, "enqueue_import_job", lambda job: queued.append(job.id) or f"import-{job.id}")
+    monkeypatch.setattr(auth_utils, "SessionLocal", Session)
+    auth_utils.invalidate_principal()
+    app = create_app()
+    app.config["STORAGE_VENDOR"] = "local"
+    app.config["STORAGE_ROOT"] = Session.storage.root
+    app.config["IMPORT_INLINE_MAX_BYTES"] = 64
+    csv = "Company,Phone\n" + "".join(f"Lead {i},5551234567\n" for i in range(15))
+
+    async def submit():
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        response = await app.test_client().post(
+            "/api/import/leads/submit",
+            form={"assigned_user_email": "rep@example.com", "column_mappings": json.dumps(MAPPINGS)},
+            files={"file": FileStorage(io.BytesIO(csv.encode()), filename="leads.csv")},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        return response.status_code, await response.get_json()
+
+    status, data = asyncio.run(submit())
+    auth_utils.invalidate_principal()
+    assert status == 202 and queued == [data["job"]["id"]]
+
+    session = Session()
+    job = session.get(ImportJob, queued[0])
+    staged_path = os.path.join(Session.storage.root, job.file_key)
+    with open(staged_path, "rb") as f:
+        assert f.read() == csv.encode()
+    session.close()
+
+    import_jobs.run_import_job(queued[0])
+
+    session = Session()
+    job = session.get(ImportJob, queued[0])
+    assert (job.status, job.successful_rows, job.file_key) == ("completed", 15, None)
+    assert session.query(Lead).count() == 15
+    assert not os.path.exists(staged_path)
+    session.close()
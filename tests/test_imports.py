@@ -0,0 +1,183 @@
+import asyncio
+import io
+import json
+
+import openpyxl
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from werkzeug.datastructures import FileStorage
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Lead, SearchDocument
+from app.routes import imports
+from app.utils import auth_utils, import_utils
+from app.utils.import_utils import (
+    clean_phone_series, prepare_leads, import_leads, iter_upload, count_upload_rows, preview_upload
+)
+from app.utils.phone_utils import clean_phone_number
+
+MAPPINGS = [
+    {"csvColumn": "Company", "leadField": "name"},
+    {"csvColumn": "Email", "leadField": "email"},
+    {"csvColumn": "Phone", "leadField": "phone"},
+    {"csvColumn": "Label", "leadField": "phone_label"},
+    {"csvColumn": "Mobile", "leadField": "secondary_phone"},
+    {"csvColumn": "Ignored", "leadField": ""},
+]
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'imports.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER reject_boom BEFORE INSERT ON leads WHEN NEW.name = 'Boom' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected by trigger'); END"
+        ))
+    session = sessionmaker(bind=engine)()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add(User(id=1, tenant_id=1, email="rep@example.com", password_hash="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_clean_phone_series_matches_scalar_cleaner():
+    raw = ["(555) 123-4567", "1-555-123-4567", "123-4567", "+44 20 7946 0958", "12", "", None,
+           "2-555-123-4567", "1234567890123456"]
+    cleaned = clean_phone_series(pd.Series(raw, dtype=object))
+    assert cleaned.tolist() == [clean_phone_number(v) for v in raw]
+
+
+def test_prepare_leads_cleans_columns_and_reports_rows():
+    df = pd.DataFrame({
+        "Company": ["Acme", None, "Beta", "x" * 101],
+        "Email": [" Sales@Acme.COM ", "a@b.co", None, None],
+        "Phone": ["555-123-4567", None, "12", None],
+        "Label": ["Mobile", None, "pager", None],
+        "Mobile": [None, None, "555 987 6543", None],
+        "Ignored": ["a", "b", "c", "d"],
+    })
+    records, failures, warnings = prepare_leads(df, MAPPINGS)
+
+    assert [f["row"] for f in failures] == [3, 5]
+    assert failures[0]["error"] == "Missing required 'name' field"
+    assert failures[0]["data"] == {"Email": "a@b.co", "Ignored": "b"}
+    assert failures[1]["error"] == "'name' exceeds 100 characters"
+    assert sorted(warnings) == ["Invalid phone on row 4", "Unknown phone label 'pager' on row 4"]
+
+    acme, beta = records.to_dict("records")
+    assert acme["email"] == "sales@acme.com"
+    assert acme["phone"] == "+15551234567" and acme["phone_label"] == "Mobile"
+    assert acme["secondary_phone"] is None and acme["secondary_phone_label"] is None
+    assert acme["type"] == "None" and acme["lead_status"] == "open"
+    assert beta["phone"] is None and beta["phone_label"] == "work"
+    assert beta["secondary_phone"] == "+15559876543" and beta["secondary_phone_label"] == "mobile"
+
+
+def test_import_leads_inserts_batches_and_isolates_bad_rows(session):
+    names = [f"Lead {i}" for i in range(25)]
+    names[7] = "Boom"
+    names[12] = None
+    df = pd.DataFrame({"Company": names, "Phone": ["5551234567"] * 25})
+
+    result = import_leads(
+        session, df, MAPPINGS[:3], tenant_id=1, created_by=1, assigned_to=1, chunk_size=10
+    )
+    session.commit()
+
+    assert result["successful"] == 23 and result["failed"] == 2
+    assert [(f["row"], f["error"]) for f in result["failures"]] == [
+        (9, "rejected by trigger"), (14, "Missing required 'name' field")
+    ]
+    assert session.query(Lead).count() == 23
+    lead = session.query(Lead).filter_by(name="Lead 0").one()
+    assert (lead.tenant_id, lead.assigned_to, lead.phone, lead.phone_label) == (1, 1, "+15551234567", "work")
+    assert session.query(SearchDocument).filter_by(entity_type="lead").count() == 23
+
+
+def _xlsx(rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_iter_upload_streams_csv_in_chunks_with_sheet_indexes():
+    body = " Company ,Notes\n" + "".join(f'Café {i},"line one\nline two"\n' for i in range(25))
+    stream = io.BytesIO(("\ufeff" + body).encode("utf-8"))
+
+    chunks = list(iter_upload(stream, "leads.CSV", chunksize=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert chunks[1].index[0] == 10 and chunks[2].index[-1] == 24
+    assert chunks[0].columns.tolist() == ["Company", "Notes"]
+    assert chunks[0].iloc[0]["Company"] == "Café 0"
+    assert count_upload_rows(stream, "leads.csv") == 25
+
+    latin = io.BytesIO("Company\nCaf\xe9\n".encode("latin1"))
+    assert next(iter_upload(latin, "leads.csv")).iloc[0]["Company"] == "Café"
+
+
+def test_iter_upload_streams_xlsx_rows_and_previews():
+    stream = _xlsx([["Company", None, "Phone"]] + [[f"Lead {i}", None, 5551234567] for i in range(12)] + [[None, None, None]])
+
+    chunks = list(iter_upload(stream, "leads.xlsx", chunksize=5))
+    assert [len(c) for c in chunks] == [5, 5, 2]
+    assert chunks[0].columns.tolist() == ["Company", "Unnamed: 1", "Phone"]
+    assert chunks[2].index.tolist() == [10, 11]
+
+    headers, rows, total = preview_upload(stream, "leads.xlsx", rows=3)
+    assert headers == ["Company", "Unnamed: 1", "Phone"]
+    assert rows == [["Lead 0", "", 5551234567], ["Lead 1", "", 5551234567], ["Lead 2", "", 5551234567]]
+    assert total == 12
+
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        next(iter_upload(stream, "leads.txt"))
+
+
+def test_submit_imports_small_upload_inline_in_chunks(session, monkeypatch):
+    Session = sessionmaker(bind=session.get_bind())
+    sent = []
+
+    async def fake_send_email(subject, recipient, body):
+        sent.append((recipient, body))
+
+    monkeypatch.setattr(imports, "SessionLocal", Session)
+    monkeypatch.setattr(auth_utils, "SessionLocal", Session)
+    monkeypatch.setattr(imports, "send_email", fake_send_email)
+    monkeypatch.setattr(import_utils, "IMPORT_CHUNK_SIZE", 2)
+    auth_utils.invalidate_principal()
+    app = create_app()
+    csv = "Company,Phone\nAcme,5551234567\nBoom,5551234567\n,5551234567\nBeta,12\nGamma,5551234567\n"
+
+    async def submit():
+        async with app.app_context():
+            token = auth_utils.create_token(session.get(User, 1))
+        response = await app.test_client().post(
+            "/api/import/leads/submit",
+            form={"assigned_user_email": "rep@example.com", "column_mappings": json.dumps(MAPPINGS[:3])},
+            files={"file": FileStorage(io.BytesIO(csv.encode()), filename="leads.csv")},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        return response.status_code, await response.get_json()
+
+    status, data = asyncio.run(submit())
+    auth_utils.invalidate_principal()
+
+    assert status == 200
+    assert (data["successful_imports"], data["failed_imports"]) == (3, 2)
+    assert [(f["row"], f["error"]) for f in data["failures"]] == [
+        (3, "rejected by trigger"), (4, "Missing required 'name' field")
+    ]
+    assert data["warnings"] == ["Invalid phone on row 5"]
+    assert sorted(name for name, in session.query(Lead.name)) == ["Acme", "Beta", "Gamma"]
+    (recipient, body), = sent
+    assert recipient == "rep@example.com" and "assigned 3 new leads" in body
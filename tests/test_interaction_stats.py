@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Role, Lead, Client, Interaction
+from app.routes import clients, interactions
+from app.utils import auth_utils
+from app.utils.interaction_stats import backfill_interaction_stats
+from app.utils.list_totals import invalidate_totals
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add(User(id=1, tenant_id=1, email="admin@example.com", password_hash="x", roles=[Role(name="admin")]))
+    session.add_all([Client(id=i, tenant_id=1, created_by=1, name=f"Client {i}") for i in (1, 2, 3)])
+    session.add(Lead(id=1, tenant_id=1, created_by=1, name="Lead"))
+    session.commit()
+    session.close()
+
+    for module in (clients, interactions, auth_utils):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    # List endpoints query through the async session
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}", poolclass=NullPool)
+    for module in (clients, interactions):
+        monkeypatch.setattr(module, "AsyncSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+    auth_utils.invalidate_principal()
+    invalidate_totals()
+    app = create_app()
+
+    async def call(method, path, **kwargs):
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        response = await getattr(app.test_client(), method)(
+            path, headers={"Authorization": f"Bearer {token}"}, **kwargs
+        )
+        return response.status_code, await response.get_json()
+
+    def sync_call(method, path, **kwargs):
+        return asyncio.run(call(method, path, **kwargs))
+
+    sync_call.Session = Session
+    yield sync_call
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+    invalidate_totals()
+
+
+def _stats(Session, model, id):
+    session = Session()
+    row = session.get(model, id)
+    session.close()
+    return row.interaction_count, row.last_interaction_at
+
+
+def _log(call, when, **parent):
+    status, data = call("post", "/api/interactions/", json={
+        "contact_date": when.isoformat(), "summary": "Call", **parent
+    })
+    assert status == 201
+    return data["id"]
+
+
+def test_interaction_writes_keep_stats_current(api):
+    call, Session = api, api.Session
+    now = datetime.utcnow().replace(microsecond=0)
+
+    first = _log(call, now - timedelta(days=5), client_id=1)
+    second = _log(call, now - timedelta(days=2), client_id=1)
+    _log(call, now - timedelta(days=1), lead_id=1)
+    assert _stats(Session, Client, 1) == (2, now - timedelta(days=2))
+    assert _stats(Session, Lead, 1) == (1, now - timedelta(days=1))
+
+    # Moving an interaction to another client updates both sides
+    assert call("put", f"/api/interactions/{second}", json={"client_id": 2})[0] == 200
+    assert _stats(Session, Client, 1) == (1, now - timedelta(days=5))
+    assert _stats(Session, Client, 2) == (1, now - timedelta(days=2))
+
+    assert call("delete", f"/api/interactions/{first}")[0] == 200
+    assert _stats(Session, Client, 1) == (0, None)
+
+    status, data = call("post", "/api/interactions/transfer", json={"from_lead_id": 1, "to_client_id": 3})
+    assert data["transferred"] == 1
+    assert _stats(Session, Lead, 1) == (0, None)
+    assert _stats(Session, Client, 3) == (1, now - timedelta(days=1))
+
+
+def test_activity_sort_and_filters_read_denormalized_columns(api):
+    call = api
+    now = datetime.utcnow()
+    _log(call, now - timedelta(days=120), client_id=1)
+    _log(call, now - timedelta(days=3), client_id=2)
+    _log(call, now - timedelta(days=40), client_id=2)
+
+    status, data = call("get", "/api/clients/all", query_string={"sort": "activity"})
+    assert status == 200
+    assert [c["id"] for c in data["clients"]][:2] == [2, 1]
+    assert {c["id"]: c["interaction_count"] for c in data["clients"]} == {1: 1, 2: 2, 3: 0}
+
+    status, data = call("get", "/api/clients/all", query_string={"activity_filter": "active"})
+    assert [c["id"] for c in data["clients"]] == [2]
+    status, data = call("get", "/api/clients/all", query_string={"activity_filter": "inactive"})
+    assert sorted(c["id"] for c in data["clients"]) == [1, 3]
+
+
+def test_backfill_recomputes_from_interactions(api):
+    Session = api.Session
+    session = Session()
+    when = datetime(2026, 3, 1)
+    session.add_all([Interaction(tenant_id=1, client_id=1, contact_date=when),
+                     Interaction(tenant_id=1, client_id=1, contact_date=when - timedelta(days=1)),
+                     Interaction(tenant_id=1, lead_id=1, contact_date=when)])
+    session.commit()
+    session.execute(update(Client).values(updated_at=None))
+    session.commit()
+
+    assert backfill_interaction_stats(session, tenant_id=1, batch_size=2) == 4
+    session.close()
+    assert _stats(Session, Client, 1) == (2, when)
+    assert _stats(Session, Client, 2) == (0, None)
+    assert _stats(Session, Lead, 1) == (1, when)
+
+    session = Session()
+    assert session.get(Client, 1).updated_at is None
+    session.close()
@@ -0,0 +1,187 @@
+import asyncio
+import importlib.util
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Role, Lead, Client, Project, Interaction
+from app.routes import projects, interactions
+from app.utils import auth_utils
+from app.utils.list_totals import invalidate_totals
+from app.utils.ownership import backfill_effective_owners
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ownership.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add(User(id=1, tenant_id=1, email="admin@example.com", password_hash="x", roles=[Role(name="admin")]))
+    session.add_all([User(id=i, tenant_id=1, email=f"rep{i}@example.com", password_hash="x") for i in (2, 3)])
+    session.add(Client(id=1, tenant_id=1, created_by=2, name="Client"))
+    session.add(Lead(id=1, tenant_id=1, created_by=3, name="Lead"))
+    session.flush()
+    session.add_all([
+        Project(id=1, tenant_id=1, created_by=1, client_id=1, project_name="Client project", project_status="pending"),
+        Project(id=2, tenant_id=1, created_by=1, lead_id=1, project_name="Lead project", project_status="pending"),
+        Project(id=3, tenant_id=1, created_by=3, project_name="Standalone", project_status="pending"),
+        Project(id=4, tenant_id=1, created_by=1, client_id=1, assigned_to=3,
+                project_name="Assigned", project_status="pending"),
+    ])
+    session.flush()
+    session.add_all([
+        Interaction(id=1, tenant_id=1, client_id=1, contact_date=datetime(2026, 1, 1)),
+        Interaction(id=2, tenant_id=1, lead_id=1, contact_date=datetime(2026, 1, 2)),
+        Interaction(id=3, tenant_id=1, project_id=1, contact_date=datetime(2026, 1, 3)),
+    ])
+    session.commit()
+    session.close()
+
+    for module in (projects, interactions, auth_utils):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    # List endpoints query through the async session
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ownership.db'}", poolclass=NullPool)
+    for module in (projects, interactions):
+        monkeypatch.setattr(module, "AsyncSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+    auth_utils.invalidate_principal()
+    invalidate_totals()
+    yield Session
+    engine.dispose()
+    auth_utils.invalidate_principal()
+    invalidate_totals()
+
+
+def _owners(Session, model):
+    session = Session()
+    owners = dict(session.query(model.id, model.effective_owner_id).order_by(model.id).all())
+    session.close()
+    return owners
+
+
+def _list(Session, path, user_id, **params):
+    app = create_app()
+
+    async def get():
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, user_id))
+            session.close()
+        response = await app.test_client().get(
+            path, query_string=params, headers={"Authorization": f"Bearer {token}"}
+        )
+        return await response.get_json()
+
+    return asyncio.run(get())
+
+
+def test_owners_follow_the_assignment_chain(Session):
+    assert _owners(Session, Project) == {1: 2, 2: 3, 3: 3, 4: 3}
+    assert _owners(Session, Interaction) == {1: 2, 2: 3, 3: 2}
+
+    # Reassigning the client moves its unassigned projects and their interactions
+    session = Session()
+    project_updated_at = session.get(Project, 1).updated_at
+    session.get(Client, 1).assigned_to = 3
+    session.commit()
+    assert _owners(Session, Project) == {1: 3, 2: 3, 3: 3, 4: 3}
+    assert _owners(Session, Interaction) == {1: 3, 2: 3, 3: 3}
+    assert session.get(Project, 1).updated_at == project_updated_at
+
+    # Assigning the project directly overrides the client's owner
+    session.get(Project, 1).assigned_to = 2
+    session.commit()
+    assert _owners(Session, Project)[1] == 2
+    assert _owners(Session, Interaction)[3] == 2
+
+    # Moving an interaction to another parent
+    session.get(Interaction, 1).client_id = None
+    session.get(Interaction, 1).lead_id = 1
+    session.commit()
+    session.close()
+    assert _owners(Session, Interaction)[1] == 3
+
+
+def test_owner_scoped_lists_use_effective_owner(Session):
+    data = _list(Session, "/api/projects/", 2)
+    assert [p["id"] for p in data["projects"]] == [1]
+
+    data = _list(Session, "/api/projects/", 3, sort="alphabetical")
+    assert [p["project_name"] for p in data["projects"]] == ["Assigned", "Lead project", "Standalone"]
+
+    data = _list(Session, "/api/interactions/", 2)
+    assert sorted(i["id"] for i in data["interactions"]) == [1, 3]
+
+    data = _list(Session, "/api/interactions/all", 1, user_email="rep3@example.com")
+    assert [i["id"] for i in data["interactions"]] == [2]
+
+    # The cached project count for rep 3 is dropped when the client changes hands
+    session = Session()
+    session.get(Client, 1).assigned_to = 3
+    session.commit()
+    session.close()
+    assert _list(Session, "/api/projects/", 3)["total"] == 4
+
+    # Interactions stay visible to the client's creator, and reach the new owner
+    data = _list(Session, "/api/interactions/", 2)
+    assert [i["id"] for i in data["interactions"]] == [1]
+    data = _list(Session, "/api/interactions/", 3)
+    assert sorted(i["id"] for i in data["interactions"]) == [1, 2, 3]
+
+
+def test_backfill_recomputes_owners(Session):
+    session = Session()
+    session.execute(update(Project).values(effective_owner_id=None))
+    session.execute(update(Interaction).values(effective_owner_id=None))
+    session.commit()
+
+    assert backfill_effective_owners(session, tenant_id=1, batch_size=2) == 7
+    session.close()
+    assert _owners(Session, Project) == {1: 2, 2: 3, 3: 3, 4: 3}
+    assert _owners(Session, Interaction) == {1: 2, 2: 3, 3: 2}
+
+
+def _load(path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_migration_backfill_matches_orm_owners(Session):
+    migration = _load(ROOT / "migrations" / "versions" / "add_effective_owners.py")
+    expected = (_owners(Session, Project), _owners(Session, Interaction))
+
+    session = Session()
+    session.execute(update(Project).values(effective_owner_id=None))
+    session.execute(update(Interaction).values(effective_owner_id=None))
+    session.execute(text(migration.BACKFILL_PROJECTS))
+    session.execute(text(migration.BACKFILL_INTERACTIONS))
+    session.commit()
+    session.close()
+    assert (_owners(Session, Project), _owners(Session, Interaction)) == expected
+
+
+def test_backfill_script_runs(Session, monkeypatch):
+    script = _load(ROOT / "scripts" / "backfill_effective_owners.py")
+    session = Session()
+    session.execute(update(Project).values(effective_owner_id=None))
+    session.commit()
+    session.close()
+
+    monkeypatch.setattr(script, "SessionLocal", Session)
+    monkeypatch.setattr(sys, "argv", ["backfill_effective_owners.py", "--tenant", "1"])
+    assert script.main() == 0
+    assert _owners(Session, Project) == {1: 2, 2: 3, 3: 3, 4: 3}
@@ -0,0 +1,156 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Role, Lead, Client
+from app.routes import leads, clients
+from app.utils import auth_utils, list_totals
+from app.utils.list_totals import invalidate_totals
+from app.utils.pagination import encode_cursor
+from sqlalchemy import text, update
+
+
+@pytest.fixture
+def seeded(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pagination.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    admin = User(id=1, tenant_id=1, email="admin@example.com", password_hash="x", roles=[Role(name="admin")])
+    session.add(admin)
+    base = datetime(2026, 1, 1)
+    # Pairs of leads share a created_at so the id tie-breaker matters
+    session.add_all([
+        Lead(tenant_id=1, created_by=1, name=f"Lead {i % 7}-{i:02d}", created_at=base + timedelta(hours=i // 2))
+        for i in range(23)
+    ])
+    session.add(Client(tenant_id=1, created_by=1, name="Client", created_at=base))
+    session.commit()
+    session.close()
+
+    for module in (leads, clients, auth_utils):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    # List endpoints query through the async session
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pagination.db'}", poolclass=NullPool)
+    for module in (leads, clients):
+        monkeypatch.setattr(module, "AsyncSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+    auth_utils.invalidate_principal()
+    invalidate_totals()
+    app = create_app()
+
+    async def get(path, **params):
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        response = await app.test_client().get(
+            path, query_string=params, headers={"Authorization": f"Bearer {token}"}
+        )
+        return response.status_code, await response.get_json()
+
+    def sync_get(path, **params):
+        return asyncio.run(get(path, **params))
+
+    sync_get.Session = Session
+    yield sync_get
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+    invalidate_totals()
+
+
+def _walk(get, path, **params):
+    ids, cursor, pages = [], "", 0
+    while cursor is not None:
+        status, data = get(path, cursor=cursor, per_page=5, **params)
+        assert status == 200
+        ids.extend(lead["id"] for lead in data["leads"])
+        cursor = data["next_cursor"]
+        pages += 1
+    return ids, pages
+
+
+@pytest.mark.parametrize("sort", ["newest", "oldest", "alphabetical"])
+def test_cursor_pages_match_offset_order(seeded, sort):
+    get = seeded
+    status, data = get("/api/leads/all", sort=sort, per_page=100)
+    assert status == 200 and data["total"] == 23 and data["next_cursor"] is None
+    expected = [lead["id"] for lead in data["leads"]]
+    # Offset mode orders ties arbitrarily; keyset mode breaks them by id
+    if sort != "alphabetical":
+        expected = [l["id"] for l in sorted(
+            data["leads"], key=lambda l: (l["created_at"], l["id"]), reverse=sort == "newest"
+        )]
+
+    ids, pages = _walk(get, "/api/leads/all", sort=sort)
+    assert ids == expected
+    assert pages == 5
+
+
+def test_cursor_mode_total_is_opt_in(seeded):
+    get = seeded
+    status, data = get("/api/leads/all", cursor="", per_page=5)
+    assert status == 200 and data["total"] is None and len(data["leads"]) == 5
+
+    status, data = get("/api/leads/all", cursor="", per_page=5, include_total="true")
+    assert data["total"] == 23
+
+
+def test_cursor_errors(seeded):
+    get = seeded
+    assert get("/api/leads/all", cursor="not-a-cursor")[0] == 400
+
+    status, data = get("/api/leads/all", sort="oldest", cursor=encode_cursor("newest", ["2026-01-01", 1]))
+    assert status == 400 and "different sort" in data["error"]
+
+    status, data = get("/api/clients/all", sort="activity", cursor="")
+    assert status == 400 and "activity" in data["error"]
+    assert get("/api/clients/all", sort="activity")[0] == 200
+
+
+def test_totals_are_cached_until_the_table_is_written(seeded):
+    get = seeded
+    status, data = get("/api/leads/all", per_page=5)
+    assert (data["total"], data["total_estimated"]) == (23, False)
+
+    # A write that bypasses the ORM is not seen until the cache entry expires
+    session = get.Session()
+    session.execute(text("INSERT INTO leads (tenant_id, created_by, name, created_at) "
+                         "VALUES (1, 1, 'Raw', '2026-02-01 00:00:00')"))
+    session.commit()
+    assert get("/api/leads/all", per_page=5)[1]["total"] == 23
+    # Filters are part of the key
+    assert get("/api/leads/all", per_page=5, user_email="nobody@example.com")[1]["total"] == 0
+
+    # ORM flushes and bulk statements invalidate counts over that table
+    session.add(Lead(tenant_id=1, created_by=1, name="Flushed", created_at=datetime(2026, 2, 2)))
+    session.commit()
+    assert get("/api/leads/all", per_page=5)[1]["total"] == 25
+
+    session.execute(update(Lead).where(Lead.name == "Raw").values(deleted_at=datetime.utcnow()))
+    session.commit()
+    session.close()
+    assert get("/api/leads/all", per_page=5)[1]["total"] == 24
+
+    # Versions move only once the write commits
+    session = get.Session()
+    version = list_totals._table_versions["leads"]
+    session.add(Lead(tenant_id=1, created_by=1, name="Pending", created_at=datetime(2026, 2, 3)))
+    session.flush()
+    assert list_totals._table_versions["leads"] == version
+    session.rollback()
+    assert list_totals._table_versions["leads"] == version
+    session.execute(update(Lead).where(Lead.name == "Flushed").values(deleted_at=datetime.utcnow()))
+    assert list_totals._table_versions["leads"] == version
+    session.commit()
+    session.close()
+    assert list_totals._table_versions["leads"] == version + 1
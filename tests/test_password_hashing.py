@@ -0,0 +1,109 @@
+import asyncio
+
+import bcrypt
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Role
+from app.routes import auth, users
+from app.utils import auth_utils
+from app.utils import rate_limiter, tenant_config
+
+
+@pytest.fixture(autouse=True)
+def fast_rounds(monkeypatch):
+    # bcrypt's minimum cost keeps the suite quick
+    monkeypatch.setattr(auth_utils, "BCRYPT_ROUNDS", 4)
+
+
+def test_async_hashing_round_trip_and_stats():
+    async def run():
+        hashed = await auth_utils.hash_password_async("s3cret")
+        return hashed, await auth_utils.verify_password_async("s3cret", hashed), \
+            await auth_utils.verify_password_async("wrong", hashed)
+
+    hashed, ok, bad = asyncio.run(run())
+    assert hashed.startswith("$2b$04$")
+    assert ok and not bad
+
+    stats = auth_utils.password_hash_stats()
+    assert stats["rounds"] == 4
+    assert stats["operations"]["hash"]["count"] >= 1
+    assert stats["operations"]["verify"]["count"] >= 2
+
+
+def test_needs_rehash_compares_cost():
+    assert not auth_utils.needs_rehash(auth_utils.hash_password("pw"))
+    assert auth_utils.needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=5)).decode())
+    assert not auth_utils.needs_rehash("not-a-bcrypt-hash")
+
+
+@pytest.fixture
+def app_session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'hashing.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    old_hash = bcrypt.hashpw(b"s3cret", bcrypt.gensalt(rounds=5)).decode()
+    session.add(User(id=1, tenant_id=1, email="admin@example.com", password_hash=old_hash,
+                     roles=[Role(name="admin")]))
+    session.commit()
+    session.close()
+
+    for module in (auth, users, auth_utils, tenant_config):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    monkeypatch.setattr(rate_limiter, "_backend", rate_limiter.MemoryBackend())
+    monkeypatch.setattr(tenant_config, "TENANT_CONFIG_REDIS_TTL_SECONDS", 0)
+    tenant_config.invalidate_tenant_config()
+    auth_utils.invalidate_principal()
+    yield create_app(), Session
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+    tenant_config.invalidate_tenant_config()
+
+
+def test_login_rehashes_with_current_cost(app_session):
+    app, Session = app_session
+
+    async def login(password):
+        response = await app.test_client().post(
+            "/api/login", json={"email": "admin@example.com", "password": password}
+        )
+        return response.status_code
+
+    assert asyncio.run(login("wrong")) == 401
+    session = Session()
+    assert session.get(User, 1).password_hash.startswith("$2b$05$")
+    session.close()
+
+    assert asyncio.run(login("s3cret")) == 200
+    session = Session()
+    new_hash = session.get(User, 1).password_hash
+    session.close()
+    assert new_hash.startswith("$2b$04$")
+    assert auth_utils.verify_password("s3cret", new_hash)
+
+
+def test_hash_stats_endpoint(app_session):
+    app, Session = app_session
+
+    async def get():
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        response = await app.test_client().get(
+            "/api/users/password-hash-stats", headers={"Authorization": f"Bearer {token}"}
+        )
+        return response.status_code, await response.get_json()
+
+    status, data = asyncio.run(get())
+    assert status == 200
+    assert data["rounds"] == 4
+    assert "operations" in data
@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from quart import Quart, request
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.utils import rate_limiter
+from app.utils.rate_limiter import MemoryBackend, RedisBackend, rate_limit
+
+
+def test_memory_backend_sliding_window():
+    backend = MemoryBackend()
+    assert backend.hit("k", 2, 10, now=100) == (True, 1, 10)
+    assert backend.hit("k", 2, 10, now=104) == (True, 0, 6)
+    assert backend.hit("k", 2, 10, now=105) == (False, 0, 5)
+    # The first hit leaves the window, freeing one slot
+    allowed, remaining, _ = backend.hit("k", 2, 10, now=110)
+    assert allowed and remaining == 0
+    assert backend.hit("other", 2, 10, now=110)[0]
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.hit(key, 5, 60, now=0)
+    assert set(backend.status()) == {"b", "c"}
+
+
+def test_redis_backend_falls_back_when_unavailable():
+    calls = []
+
+    def failing_script(keys, args):
+        calls.append(keys)
+        raise RedisConnectionError("down")
+
+    connection = SimpleNamespace(register_script=lambda source: failing_script)
+    backend = RedisBackend(connection)
+    assert backend.hit("k", 1, 60, now=0)[0]
+    assert not backend.hit("k", 1, 60, now=1)[0]
+    # Redis is not retried inside the retry window
+    assert len(calls) == 1
+
+    backend._down_until = 0.0
+    backend.hit("k", 1, 60, now=2)
+    assert len(calls) == 2
+
+
+def test_redis_backend_client_has_socket_timeouts():
+    # Its own client, not the RQ connection; no connection is opened here
+    options = RedisBackend().connection.connection_pool.connection_kwargs
+    assert options["socket_timeout"] == options["socket_connect_timeout"] == rate_limiter.RATE_LIMIT_REDIS_TIMEOUT_SECONDS
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_backend", MemoryBackend())
+    app = Quart(__name__)
+
+    @app.before_request
+    async def fake_auth():
+        user_id = request.headers.get("X-User")
+        request.user = SimpleNamespace(id=int(user_id), tenant_id=1) if user_id else None
+
+    @app.route("/ip")
+    @rate_limit(max_attempts=2, window_seconds=60)
+    async def by_ip():
+        return {"ok": True}
+
+    @app.route("/user")
+    @rate_limit(max_attempts=1, window_seconds=60, scope="user")
+    async def by_user():
+        return {"ok": True}, 201
+
+    async def call(path, **headers):
+        response = await app.test_client().get(path, headers=headers)
+        return response.status_code, response.headers
+
+    return lambda path, **headers: asyncio.run(call(path, **headers))
+
+
+def test_decorator_sets_headers_and_limits(limited_app):
+    status, headers = limited_app("/ip")
+    assert status == 200
+    assert headers["X-RateLimit-Limit"] == "2"
+    assert headers["X-RateLimit-Remaining"] == "1"
+
+    assert limited_app("/ip")[0] == 200
+    status, headers = limited_app("/ip")
+    assert status == 429
+    assert headers["X-RateLimit-Remaining"] == "0"
+    assert int(headers["Retry-After"]) > 0
+
+
+def test_user_scope_keys_by_user(limited_app):
+    assert limited_app("/user", **{"X-User": "1"})[0] == 201
+    assert limited_app("/user", **{"X-User": "1"})[0] == 429
+    assert limited_app("/user", **{"X-User": "2"})[0] == 201
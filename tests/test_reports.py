@@ -0,0 +1,451 @@
+"""
+Report numbers on seeded data.
+
+Each endpoint is compared against the straightforward one-scalar-query-per-
+number implementation it replaced, run against the same SQLite database.
+"""
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, or_, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import (
+    Tenant, User, Role, Lead, Project, Client, Interaction, ActivityLog, ActivityType, ReportSnapshotState,
+    ReportDailyFact, ReportDirtyDay,
+)
+from app.routes import reports
+from app.utils import auth_utils
+from app.utils.activity_retention import maintain_activity_logs
+from app.workers.report_jobs import refresh_tenant_snapshots
+
+
+@pytest.fixture
+def seeded(tmp_path, monkeypatch):
+    db_path = tmp_path / "reports.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    now = datetime.utcnow()
+    admin_role = Role(name="admin")
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    session.add(Tenant(id=2, name="Other", slug="other", config={}))
+    admin = User(tenant_id=1, email="admin@example.com", password_hash="x", roles=[admin_role])
+    rep = User(tenant_id=1, email="rep@example.com", password_hash="x")
+    outsider = User(tenant_id=2, email="out@example.com", password_hash="x")
+    session.add_all([admin, rep, outsider])
+    session.flush()
+
+    statuses = ["open", "won", "qualified", "lost", "won"]
+    for i in range(40):
+        won = statuses[i % 5] == "won"
+        session.add(Lead(
+            tenant_id=1 if i < 35 else 2,
+            created_by=admin.id,
+            assigned_to=[admin.id, rep.id, None][i % 3],
+            name=f"Lead {i}",
+            lead_status=statuses[i % 5],
+            created_at=now - timedelta(days=i),
+            converted_on=now - timedelta(days=i // 2) if won and i % 3 else None,
+            deleted_at=now if i % 7 == 0 else None,
+        ))
+
+    project_statuses = ["active", "completed", "lost", "completed"]
+    for i in range(20):
+        session.add(Project(
+            tenant_id=1 if i < 18 else 2,
+            project_name=f"Project {i}",
+            project_status=project_statuses[i % 4],
+            project_worth=None if i % 5 == 0 else 250.0 * i,
+            project_start=now - timedelta(days=40 + i) if i % 2 else None,
+            project_end=now - timedelta(days=i),
+            created_by=admin.id,
+            created_at=now - timedelta(days=i * 2),
+            deleted_at=now if i == 6 else None,
+        ))
+
+    clients = [
+        Client(tenant_id=1, created_by=admin.id, assigned_to=[admin.id, rep.id, None][i % 3],
+               name=f"Client {i}", deleted_at=now if i == 4 else None)
+        for i in range(6)
+    ]
+    session.add_all(clients)
+    session.flush()
+    lead_ids = [row[0] for row in session.execute(select(Lead.id).where(Lead.tenant_id == 1))]
+    for i in range(24):
+        # Mix of client-only, lead-only and client+lead interactions
+        session.add(Interaction(
+            tenant_id=1,
+            client_id=clients[i % 6].id if i % 3 != 1 else None,
+            lead_id=lead_ids[i] if i % 3 != 0 else None,
+            contact_date=now - timedelta(days=i),
+        ))
+    for i in range(15):
+        session.add(ActivityLog(tenant_id=1, user_id=[admin.id, rep.id][i % 2], action=ActivityType.viewed,
+                                entity_type="lead", entity_id=lead_ids[i], timestamp=now - timedelta(days=i)))
+    session.commit()
+    admin_id = admin.id
+    session.close()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    monkeypatch.setattr(reports, "AsyncSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+    monkeypatch.setattr(auth_utils, "SessionLocal", Session)
+    auth_utils.invalidate_principal()
+
+    app = create_app()
+    yield app, Session, admin_id
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+    auth_utils.invalidate_principal()
+
+
+def _call(app, Session, admin_id, method, path, **kwargs):
+    async def run():
+        async with app.app_context():
+            session = Session()
+            try:
+                admin = session.get(User, admin_id)
+                token = auth_utils.create_token(admin)
+            finally:
+                session.close()
+        client = app.test_client()
+        response = await client.open(path, method=method, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+        assert response.status_code == 200
+        return await response.get_json()
+    return asyncio.run(run())
+
+
+def _expected_summary(session, lead_filters, project_filters):
+    return {
+        "lead_count": session.query(func.count(Lead.id)).filter(*lead_filters).scalar(),
+        "converted_leads": session.query(func.count(Lead.id)).filter(*lead_filters, Lead.lead_status == "won").scalar(),
+        "project_count": session.query(func.count(Project.id)).filter(*project_filters).scalar(),
+        "won_projects": session.query(func.count(Project.id)).filter(*project_filters, Project.project_status == "completed").scalar(),
+        "lost_projects": session.query(func.count(Project.id)).filter(*project_filters, Project.project_status == "lost").scalar(),
+        "total_won_value": session.query(func.coalesce(func.sum(Project.project_worth), 0)).filter(
+            *project_filters, Project.project_status == "completed").scalar(),
+    }
+
+
+def test_get_reports_matches_per_metric_queries(seeded):
+    app, Session, admin_id = seeded
+    data = _call(app, Session, admin_id, "GET", "/api/reports")
+
+    session = Session()
+    try:
+        expected = _expected_summary(
+            session,
+            [Lead.tenant_id == 1, Lead.deleted_at == None],
+            [Project.tenant_id == 1],
+        )
+    finally:
+        session.close()
+
+    assert data == expected
+    assert data["lead_count"] > 0 and data["won_projects"] > 0
+
+
+def test_summary_report_with_date_range(seeded):
+    app, Session, admin_id = seeded
+    start = datetime.utcnow() - timedelta(days=20)
+    data = _call(app, Session, admin_id, "POST", "/api/reports/summary", json={"start_date": start.isoformat()})
+
+    session = Session()
+    try:
+        expected = _expected_summary(
+            session,
+            [Lead.tenant_id == 1, Lead.deleted_at == None, Lead.created_at >= start],
+            [Project.tenant_id == 1, Project.created_at >= start],
+        )
+    finally:
+        session.close()
+
+    assert data == expected
+
+
+def test_conversion_rate_report_matches_per_metric_queries(seeded):
+    app, Session, admin_id = seeded
+    data = _call(app, Session, admin_id, "GET", "/api/reports/conversion-rate")
+
+    filters = [Lead.tenant_id == 1, or_(Lead.deleted_at == None, Lead.lead_status == "won")]
+    session = Session()
+    try:
+        total = session.query(func.count(Lead.id)).filter(*filters).scalar()
+        converted = session.query(func.count(Lead.id)).filter(*filters, Lead.lead_status == "won").scalar()
+        avg_days = session.query(
+            func.avg(func.julianday(Lead.converted_on) - func.julianday(Lead.created_at))
+        ).filter(*filters, Lead.lead_status == "won", Lead.converted_on != None).scalar()
+
+        per_user = {}
+        for assigned_to in (admin_id, admin_id + 1, None):
+            user_total = session.query(func.count(Lead.id)).filter(*filters, Lead.assigned_to == assigned_to).scalar()
+            user_won = session.query(func.count(Lead.id)).filter(
+                *filters, Lead.assigned_to == assigned_to, Lead.lead_status == "won").scalar()
+            per_user[assigned_to] = (user_total, user_won)
+    finally:
+        session.close()
+
+    assert data["overall"] == {
+        "total_leads": total,
+        "converted_leads": converted,
+        "conversion_rate": round(converted / total * 100, 2),
+        "avg_days_to_convert": round(avg_days, 1),
+    }
+    assert {row["user_id"]: (row["total_leads"], row["converted"]) for row in data["by_user"]} == per_user
+    assert data["by_user"][-1]["user_email"] == "Unassigned"
+
+
+def test_project_performance_report_matches_per_metric_queries(seeded):
+    app, Session, admin_id = seeded
+    data = _call(app, Session, admin_id, "GET", "/api/reports/project-performance")
+
+    filters = [Project.tenant_id == 1, Project.deleted_at == None]
+    session = Session()
+    try:
+        total = session.query(func.count(Project.id)).filter(*filters).scalar()
+        won = session.query(func.count(Project.id)).filter(*filters, Project.project_status == "completed").scalar()
+        avg_duration = session.query(
+            func.avg(func.julianday(Project.project_end) - func.julianday(Project.project_start))
+        ).filter(*filters, Project.project_start != None, Project.project_end != None,
+                 Project.project_status == "completed").scalar()
+        avg_value = session.query(func.avg(Project.project_worth)).filter(*filters, Project.project_worth != None).scalar()
+    finally:
+        session.close()
+
+    assert data["total_projects"] == total
+    assert data["win_rate"] == round(won / total * 100, 2)
+    assert data["avg_duration_days"] == round(avg_duration, 1)
+    assert data["avg_project_value"] == round(float(avg_value), 2)
+    assert sum(row["count"] for row in data["status_breakdown"]) == total
+
+
+def _expected_user_activity(session, user_id, since):
+    """The per-user four-query loop the grouped version replaced."""
+    return {
+        "interactions": session.query(func.count(Interaction.id)).filter(
+            Interaction.tenant_id == 1,
+            or_(
+                Interaction.client_id.in_(select(Client.id).where(Client.assigned_to == user_id, Client.tenant_id == 1)),
+                Interaction.lead_id.in_(select(Lead.id).where(Lead.assigned_to == user_id, Lead.tenant_id == 1))
+            ),
+            Interaction.contact_date >= since
+        ).scalar(),
+        "leads_assigned": session.query(func.count(Lead.id)).filter(
+            Lead.tenant_id == 1, Lead.assigned_to == user_id, Lead.deleted_at == None).scalar(),
+        "clients_assigned": session.query(func.count(Client.id)).filter(
+            Client.tenant_id == 1, Client.assigned_to == user_id, Client.deleted_at == None).scalar(),
+        "activity_count": session.query(func.count(ActivityLog.id)).filter(
+            ActivityLog.tenant_id == 1, ActivityLog.user_id == user_id, ActivityLog.timestamp >= since).scalar(),
+    }
+
+
+def test_user_activity_report_matches_per_user_queries(seeded):
+    app, Session, admin_id = seeded
+    since = datetime.utcnow() - timedelta(days=15)
+    data = _call(app, Session, admin_id, "GET", f"/api/reports/user-activity?start_date={since.isoformat()}")
+
+    session = Session()
+    try:
+        expected = {
+            user_id: _expected_user_activity(session, user_id, since)
+            for (user_id,) in session.query(User.id).filter(User.tenant_id == 1)
+        }
+    finally:
+        session.close()
+
+    actual = {row.pop("user_id"): row for row in data["users"]}
+    for row in actual.values():
+        row.pop("email")
+    assert actual == expected
+    assert any(row["interactions"] for row in actual.values())
+
+
+def test_user_activity_report_counts_match_once_rolled_up(seeded):
+    app, Session, admin_id = seeded
+    today = datetime.utcnow().date()
+    window = f"start_date={(today - timedelta(days=12)).isoformat()}&end_date={(today - timedelta(days=4)).isoformat()}"
+
+    def activity():
+        data = _call(app, Session, admin_id, "GET", f"/api/reports/user-activity?{window}")
+        return {row["user_id"]: row["activity_count"] for row in data["users"]}
+
+    before = activity()
+    session = Session()
+    try:
+        # Cutoff at the start of next month: every raw row becomes a daily roll-up
+        maintain_activity_logs(session, retention_months=-1, today=date.today())
+        session.commit()
+        assert session.query(ActivityLog).count() == 0
+    finally:
+        session.close()
+
+    assert sum(before.values()) == 8
+    assert activity() == before
+
+
+def test_user_activity_report_query_count_is_constant(seeded):
+    """Benchmark: 100 users x 10k leads must not add per-user queries."""
+    app, Session, admin_id = seeded
+    async_engine = reports.AsyncSessionLocal.kw["bind"]
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        _call(app, Session, admin_id, "GET", "/api/reports/user-activity")
+        small_tenant = len(statements)
+
+        session = Session()
+        try:
+            users = [User(tenant_id=1, email=f"rep{i}@example.com", password_hash="x") for i in range(100)]
+            session.add_all(users)
+            session.flush()
+            now = datetime.utcnow()
+            session.bulk_insert_mappings(Lead, [{
+                "tenant_id": 1, "created_by": admin_id, "assigned_to": users[i % 100].id,
+                "name": f"Bulk {i}", "lead_status": "open", "created_at": now,
+            } for i in range(10_000)])
+            session.commit()
+        finally:
+            session.close()
+
+        statements.clear()
+        started = time.perf_counter()
+        data = _call(app, Session, admin_id, "GET", "/api/reports/user-activity")
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert len(data["users"]) == 102
+    assert len(statements) == small_tenant
+    assert elapsed < 10
+
+
+SNAPSHOT_ENDPOINTS = [
+    ("GET", "/api/reports", {}),
+    ("GET", "/api/reports/pipeline", {}),
+    ("GET", "/api/reports/lead-source", {}),
+    ("POST", "/api/reports/summary", {"json": {}}),
+]
+
+
+def _normalized(data):
+    """Order-insensitive form of a report response (group order is not part of the contract)."""
+    if isinstance(data, dict):
+        return {key: _normalized(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return sorted((_normalized(item) for item in data), key=lambda item: json.dumps(item, sort_keys=True))
+    return data
+
+
+def _assert_snapshot_matches_raw(app, Session, admin_id, endpoints=SNAPSHOT_ENDPOINTS):
+    with_snapshot = [_call(app, Session, admin_id, method, path, **kwargs) for method, path, kwargs in endpoints]
+
+    session = Session()
+    try:
+        states = session.query(ReportSnapshotState).all()
+        saved = [(state.tenant_id, state.refreshed_at, state.covered_through) for state in states]
+        for state in states:
+            session.delete(state)
+        session.commit()
+        raw = [_call(app, Session, admin_id, method, path, **kwargs) for method, path, kwargs in endpoints]
+        for tenant_id, refreshed_at, covered_through in saved:
+            session.add(ReportSnapshotState(tenant_id=tenant_id, refreshed_at=refreshed_at, covered_through=covered_through))
+        session.commit()
+    finally:
+        session.close()
+
+    assert [_normalized(d) for d in with_snapshot] == [_normalized(d) for d in raw]
+
+
+def test_snapshot_reports_match_raw_rows(seeded):
+    app, Session, admin_id = seeded
+    session = Session()
+    try:
+        refresh_tenant_snapshots(session, 1)
+        # Backdate the watermark so most rows are served from facts
+        state = session.get(ReportSnapshotState, 1)
+        state.covered_through = (datetime.utcnow() - timedelta(days=3)).date()
+        session.commit()
+    finally:
+        session.close()
+
+    midnight = datetime.combine((datetime.utcnow() - timedelta(days=12)).date(), datetime.min.time())
+    _assert_snapshot_matches_raw(app, Session, admin_id, SNAPSHOT_ENDPOINTS + [
+        ("GET", f"/api/reports/pipeline?start_date={midnight.isoformat()}", {}),
+        ("GET", f"/api/reports/pipeline?user_id={admin_id}", {}),
+        ("POST", "/api/reports/summary", {"json": {"end_date": midnight.isoformat()}}),
+    ])
+
+
+def test_snapshot_incremental_refresh_picks_up_old_rows(seeded):
+    app, Session, admin_id = seeded
+    session = Session()
+    try:
+        refresh_tenant_snapshots(session, 1)
+        state = session.get(ReportSnapshotState, 1)
+        state.refreshed_at -= timedelta(seconds=1)
+        state.covered_through = (datetime.utcnow() - timedelta(days=1)).date()
+        session.commit()
+
+        # Edit and soft-delete leads created weeks ago
+        old_leads = session.query(Lead).filter(Lead.tenant_id == 1, Lead.deleted_at == None)\
+            .order_by(Lead.created_at.asc()).limit(3).all()
+        old_leads[0].lead_status = "won"
+        old_leads[1].lead_source = "Referral"
+        old_leads[2].deleted_at = datetime.utcnow()
+        session.commit()
+
+        refresh_tenant_snapshots(session, 1)
+        state = session.get(ReportSnapshotState, 1)
+        state.covered_through = (datetime.utcnow() - timedelta(days=1)).date()
+        session.commit()
+    finally:
+        session.close()
+
+    _assert_snapshot_matches_raw(app, Session, admin_id)
+
+
+def test_snapshot_refresh_drops_purged_rows(seeded):
+    app, Session, admin_id = seeded
+
+    def facts(session):
+        return sorted(
+            (f.day, f.entity, f.status, f.source, f.value_type, f.assigned_to, f.is_deleted, f.item_count, f.total_value)
+            for f in session.query(ReportDailyFact).filter(ReportDailyFact.tenant_id == 1)
+        )
+
+    session = Session()
+    try:
+        refresh_tenant_snapshots(session, 1)
+
+        # Purge old soft-deleted rows, one through the ORM and the rest in bulk
+        trashed = session.query(Lead).filter(Lead.tenant_id == 1, Lead.deleted_at != None).order_by(Lead.id).all()
+        session.delete(trashed[0])
+        session.query(Lead).filter(
+            Lead.id.in_([lead.id for lead in trashed[1:]])
+        ).delete(synchronize_session=False)
+        session.query(Project).filter(Project.tenant_id == 1, Project.deleted_at != None).delete(synchronize_session=False)
+        session.commit()
+        assert session.query(ReportDirtyDay).count() > 0
+
+        refresh_tenant_snapshots(session, 1)
+        incremental = facts(session)
+        assert session.query(ReportDirtyDay).count() == 0
+
+        refresh_tenant_snapshots(session, 1, full=True)
+        assert incremental == facts(session)
+        assert not any(fact[6] for fact in incremental)
+    finally:
+        session.close()
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Role, Client, Lead, Project, Account, SearchDocument
+from app.routes import search
+from app.utils import auth_utils
+from app.utils.search_index import rebuild_search_index
+
+
+@pytest.fixture
+def seeded(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    admin_role = Role(name="admin")
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    admin = User(tenant_id=1, email="admin@example.com", password_hash="x", roles=[admin_role])
+    rep = User(tenant_id=1, email="rep@example.com", password_hash="x")
+    session.add_all([admin, rep])
+    session.flush()
+
+    smith = Client(tenant_id=1, created_by=admin.id, name="Smithson Roofing", city="Springfield")
+    other = Client(tenant_id=1, created_by=rep.id, name="Oak Plumbing", notes="met at Springfield expo")
+    session.add_all([smith, other])
+    session.flush()
+    session.add_all([
+        Client(tenant_id=2, created_by=admin.id, name="Springfield Other Tenant"),
+        Lead(tenant_id=1, created_by=admin.id, assigned_to=rep.id, name="Springer Bakery", email="hi@springer.test"),
+        Project(tenant_id=1, client_id=smith.id, project_name="Roof spring repair", project_status="active",
+                created_by=admin.id),
+        Account(tenant_id=1, client_id=other.id, account_number="SPR-1001", account_name="Oak main"),
+    ])
+    session.commit()
+    ids = {"admin": admin.id, "rep": rep.id, "smith": smith.id, "other": other.id}
+    session.close()
+
+    monkeypatch.setattr(search, "SessionLocal", Session)
+    monkeypatch.setattr(auth_utils, "SessionLocal", Session)
+    auth_utils.invalidate_principal()
+
+    yield create_app(), Session, ids
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+
+
+def _search(app, Session, user_id, q):
+    async def run():
+        async with app.app_context():
+            session = Session()
+            try:
+                user = session.get(User, user_id)
+                token = auth_utils.create_token(user)
+            finally:
+                session.close()
+        response = await app.test_client().get(
+            "/api/search", query_string={"q": q}, headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+        return await response.get_json()
+    return asyncio.run(run())
+
+
+def test_search_matches_substrings_and_reports_fields(seeded):
+    app, Session, ids = seeded
+    results = _search(app, Session, ids["admin"], "Springfield")
+
+    by_id = {(r["type"], r["id"]): r for r in results}
+    assert set(by_id) == {("client", ids["smith"]), ("client", ids["other"])}
+    assert by_id[("client", ids["smith"])]["matches"] == ["city"]
+    assert by_id[("client", ids["other"])]["matches"] == ["notes"]
+
+    mixed = _search(app, Session, ids["admin"], "spr")
+    assert {r["type"] for r in mixed} == {"client", "lead", "project", "account"}
+    assert next(r for r in mixed if r["type"] == "account")["matches"] == ["account_number"]
+
+
+def test_search_ranks_title_hits_first(seeded):
+    app, Session, ids = seeded
+    results = _search(app, Session, ids["admin"], "smithson")
+    assert results[0]["id"] == ids["smith"] and results[0]["name"] == "Smithson Roofing"
+    assert results[0]["link"] == f"/clients/{ids['smith']}"
+
+
+def test_search_respects_visibility_for_non_admins(seeded):
+    app, Session, ids = seeded
+    results = _search(app, Session, ids["rep"], "spr")
+    # rep created "Oak Plumbing" (and so its account) and is assigned the lead
+    assert {(r["type"], r["id"]) for r in results if r["type"] == "client"} == {("client", ids["other"])}
+    assert {r["type"] for r in results} == {"client", "lead", "account"}
+    assert _search(app, Session, ids["rep"], "example.com") == []
+
+
+def test_index_follows_updates_and_bulk_deletes(seeded):
+    app, Session, ids = seeded
+    session = Session()
+    try:
+        client = session.get(Client, ids["smith"])
+        client.name = "Brightside Roofing"
+        session.commit()
+        assert _search(app, Session, ids["admin"], "brightside")[0]["id"] == ids["smith"]
+
+        session.query(Client).filter(Client.id == ids["other"]).update(
+            {Client.deleted_at: datetime.utcnow()}, synchronize_session=False
+        )
+        session.commit()
+        assert ("client", ids["other"]) not in {(r["type"], r["id"]) for r in _search(app, Session, ids["admin"], "oak")}
+
+        session.query(Project).filter(Project.client_id == ids["smith"]).delete(synchronize_session=False)
+        session.commit()
+        assert session.query(SearchDocument).filter_by(entity_type="project").count() == 0
+    finally:
+        session.close()
+
+
+def test_rebuild_search_index_matches_incremental_index(seeded):
+    app, Session, ids = seeded
+    before = _search(app, Session, ids["admin"], "spr")
+
+    session = Session()
+    try:
+        assert rebuild_search_index(session) == session.query(SearchDocument).count()
+    finally:
+        session.close()
+
+    assert _search(app, Session, ids["admin"], "spr") == before
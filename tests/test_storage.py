@@ -0,0 +1,182 @@
+import asyncio
+import io
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, File
+from app.routes import storage as storage_routes
+from app.utils import auth_utils, storage_backend
+from app.utils.backup_storage import BackupStorageBackend
+from app.utils.storage_backend import LocalStorageBackend, S3StorageBackend
+from app.utils.storage_clients import get_s3_client, reset_s3_clients, storage_pool_stats
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _collect(iterator):
+    return b"".join([chunk async for chunk in iterator])
+
+
+class FakeS3Client:
+    def __init__(self, objects=None, fail_on_part=None):
+        self.objects = objects or {}
+        self.calls = []
+        self.fail_on_part = fail_on_part
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.calls.append(("put_object", len(Body)))
+        self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.calls.append(("create_multipart_upload",))
+        self.parts = []
+        return {"UploadId": "u1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_on_part:
+            raise IOError("connection reset")
+        self.calls.append(("upload_part", PartNumber, len(Body)))
+        self.parts.append(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append(("complete_multipart_upload", [p["PartNumber"] for p in MultipartUpload["Parts"]]))
+        self.objects[Key] = b"".join(self.parts)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append(("abort_multipart_upload",))
+
+    def get_object(self, Bucket, Key, Range):
+        self.calls.append(("get_object", Range))
+        first, last = Range[len("bytes="):].split("-")
+        data = self.objects[Key]
+        return {"Body": io.BytesIO(data[int(first):int(last) + 1 if last else None])}
+
+
+def _s3_backend(client):
+    backend = S3StorageBackend.__new__(S3StorageBackend)
+    backend.client = client
+    backend.bucket = "bucket"
+    return backend
+
+
+def test_local_backend_streams_and_serves_ranges(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path))
+
+    size = asyncio.run(backend.put_stream("tenant-1/a.bin", _chunks(b"hello ", b"streaming ", b"world"), "text/plain"))
+    assert size == 21
+    assert asyncio.run(backend.stat("tenant-1/a.bin"))[0] == 21
+    assert asyncio.run(_collect(backend.iter_range("tenant-1/a.bin"))) == b"hello streaming world"
+    assert asyncio.run(_collect(backend.iter_range("tenant-1/a.bin", 6, 15))) == b"streaming"
+    assert not (tmp_path / "tenant-1" / "a.bin.part").exists()
+
+
+def test_s3_backend_uses_multipart_for_large_objects(monkeypatch):
+    monkeypatch.setattr(storage_backend, "S3_PART_SIZE", 10)
+    client = FakeS3Client()
+    backend = _s3_backend(client)
+
+    asyncio.run(backend.put_stream("small", _chunks(b"tiny"), "text/plain"))
+    asyncio.run(backend.put_stream("big", _chunks(b"0123456", b"789abcdef", b"ghijklmnop", b"q"), None))
+
+    assert client.objects == {"small": b"tiny", "big": b"0123456789abcdefghijklmnopq"}
+    assert client.calls == [
+        ("put_object", 4),
+        ("create_multipart_upload",),
+        ("upload_part", 1, 16),
+        ("upload_part", 2, 10),
+        ("upload_part", 3, 1),
+        ("complete_multipart_upload", [1, 2, 3]),
+    ]
+
+    assert asyncio.run(_collect(backend.iter_range("big", 3, 8))) == b"34567"
+    assert client.calls[-1] == ("get_object", "bytes=3-7")
+
+
+def test_s3_backend_aborts_failed_multipart_upload(monkeypatch):
+    monkeypatch.setattr(storage_backend, "S3_PART_SIZE", 4)
+    client = FakeS3Client(fail_on_part=2)
+
+    with pytest.raises(IOError):
+        asyncio.run(_s3_backend(client).put_stream("big", _chunks(b"abcd", b"efgh", b"ij"), None))
+    assert client.calls[-1] == ("abort_multipart_upload",)
+    assert "big" not in client.objects
+
+
+def test_download_streams_storage_objects_with_range_support(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'storage.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={}))
+    user = User(id=1, tenant_id=1, email="rep@example.com", password_hash="x")
+    session.add(user)
+    session.add(File(id=1, tenant_id=1, user_id=1, filename="notes.txt", stored_name="n.txt",
+                     path="tenant-1/n.txt", size=26, mimetype="text/plain", uploaded_at=datetime.utcnow()))
+    session.commit()
+    session.close()
+
+    root = tmp_path / "files"
+    asyncio.run(LocalStorageBackend(str(root)).put_stream(
+        "tenant-1/n.txt", _chunks(b"abcdefghijklmnopqrstuvwxyz"), "text/plain"
+    ))
+
+    monkeypatch.setattr(storage_routes, "SessionLocal", Session)
+    monkeypatch.setattr(auth_utils, "SessionLocal", Session)
+    auth_utils.invalidate_principal()
+    app = create_app()
+    app.config["STORAGE_ROOT"] = str(root)
+
+    async def get(range_header=None):
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        headers = {"Authorization": f"Bearer {token}"}
+        if range_header:
+            headers["Range"] = range_header
+        response = await app.test_client().get("/api/storage/download/1", headers=headers)
+        return response.status_code, response.headers, await response.get_data()
+
+    status, headers, body = asyncio.run(get())
+    assert (status, body, headers["Accept-Ranges"]) == (200, b"abcdefghijklmnopqrstuvwxyz", "bytes")
+
+    status, headers, body = asyncio.run(get("bytes=2-5"))
+    assert (status, body, headers["Content-Range"]) == (206, b"cdef", "bytes 2-5/26")
+
+    status, headers, body = asyncio.run(get("bytes=-3"))
+    assert (status, body) == (206, b"xyz")
+
+    assert asyncio.run(get("bytes=40-50"))[0] == 416
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+
+
+def test_s3_clients_are_built_once_per_configuration():
+    reset_s3_clients()
+    try:
+        first = S3StorageBackend("https://s3.example.test", "key", "secret", "bucket-a")
+        second = S3StorageBackend("https://s3.example.test", "key", "secret", "bucket-b")
+        backups = BackupStorageBackend("https://s3.example.test", "other-key", "secret", "backups")
+
+        assert first.client is second.client
+        assert backups.client is not first.client
+        assert get_s3_client("https://s3.example.test", "key", "secret") is first.client
+
+        stats = {entry["name"]: entry for entry in storage_pool_stats()}
+        assert stats["storage"]["uses"] == 3 and stats["backups"]["uses"] == 1
+        assert stats["storage"]["max_pool_connections"] == 32
+        assert stats["storage"]["pools"] == []  # no requests made yet
+    finally:
+        reset_s3_clients()
+    assert storage_pool_stats() == []
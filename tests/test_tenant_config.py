@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.database import Base
+from app.models import Tenant, User, Role
+from app.utils import auth_utils, tenant_config
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tenant_config.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    session.add(Tenant(id=1, name="Acme", slug="acme", config={"branding": {"name": "Acme"}}))
+    session.add(User(id=1, tenant_id=1, email="admin@example.com", password_hash="x", roles=[Role(name="admin")]))
+    session.commit()
+    session.close()
+
+    for module in (auth_utils, tenant_config):
+        monkeypatch.setattr(module, "SessionLocal", Session)
+    monkeypatch.setattr(tenant_config, "TENANT_CONFIG_REDIS_TTL_SECONDS", 0)
+    auth_utils.invalidate_principal()
+    tenant_config.invalidate_tenant_config()
+    app = create_app()
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+    async def get(path, etag=None):
+        async with app.app_context():
+            session = Session()
+            token = auth_utils.create_token(session.get(User, 1))
+            session.close()
+        headers = {"Authorization": f"Bearer {token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = await app.test_client().get(path, headers=headers)
+        return response.status_code, response.headers.get("ETag"), await response.get_data()
+
+    def sync_get(path, etag=None):
+        return asyncio.run(get(path, etag))
+
+    sync_get.Session = Session
+    sync_get.queries = queries
+    yield sync_get
+
+    engine.dispose()
+    auth_utils.invalidate_principal()
+    tenant_config.invalidate_tenant_config()
+
+
+def test_tenant_config_etag_and_304_without_queries(client):
+    status, etag, body = client("/api/tenant/config")
+    assert status == 200 and etag
+    assert b'"slug":"acme"' in body
+
+    client.queries.clear()
+    status, same_etag, body = client("/api/tenant/config", etag=etag)
+    assert (status, same_etag, body) == (304, etag, b"")
+    # Only the token lookup in the test helper touches the database
+    assert not [q for q in client.queries if "tenants" in q]
+
+
+def test_tenant_update_invalidates_cache(client):
+    _, etag, _ = client("/api/tenant/config")
+
+    session = client.Session()
+    session.get(Tenant, 1).config = {"branding": {"name": "Renamed"}}
+    session.commit()
+    session.close()
+
+    status, new_etag, body = client("/api/tenant/config", etag=etag)
+    assert status == 200 and new_etag != etag
+    assert b"Renamed" in body
+
+
+def test_me_supports_conditional_requests(client):
+    status, etag, body = client("/api/me")
+    assert status == 200 and b'"tenant"' in body
+    assert client("/api/me", etag=etag)[0] == 304
+
+    session = client.Session()
+    session.get(Tenant, 1).name = "Acme Inc"
+    session.commit()
+    session.close()
+    assert client("/api/me", etag=etag)[0] == 200
+
+
+def test_redis_tier_client_has_socket_timeouts(monkeypatch):
+    monkeypatch.setattr(tenant_config, "_redis_client", None)
+    monkeypatch.setattr(tenant_config, "_redis_down_until", 0.0)
+    # Its own client, not the RQ connection; no connection is opened here
+    options = tenant_config._redis().connection_pool.connection_kwargs
+    timeout = tenant_config.TENANT_CONFIG_REDIS_TIMEOUT_SECONDS
+    assert options["socket_timeout"] == options["socket_connect_timeout"] == timeout
@@ -0,0 +1,185 @@
+import hashlib
+import io
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import (
+    Tenant, User, Client, Lead, Project, Interaction, Account, Contact, ActivityLog, ActivityType,
+    ActivityDailyRollup, FollowUpStatus, RecentlyTouched, Backup, BackupRestore,
+)
+from app.utils.activity_retention import roll_up
+from app.utils.tenant_export import export_tenant, load_tenant
+from app.workers import tenant_backup_jobs
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tenant_export.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Tenant(id=1, name="Acme", slug="acme", config={}), Tenant(id=2, name="Other", slug="other", config={})])
+    session.add_all([
+        User(id=1, tenant_id=1, email="admin@acme.test", password_hash="x"),
+        User(id=2, tenant_id=1, email="rep@acme.test", password_hash="x"),
+        User(id=3, tenant_id=2, email="admin@other.test", password_hash="x"),
+    ])
+    session.add(Lead(id=1, tenant_id=1, created_by=2, name="Bakery"))
+    session.flush()
+    session.add(Client(id=1, tenant_id=1, created_by=1, assigned_to=2, name="Roofing", source_lead_id=1))
+    session.add(Client(id=2, tenant_id=2, created_by=3, name="Other tenant"))
+    session.flush()
+    session.add_all([
+        Account(id=1, tenant_id=1, client_id=1, account_number="A-1"),
+        Contact(id=1, tenant_id=1, client_id=1, first_name="Pat"),
+        Project(id=1, tenant_id=1, client_id=1, created_by=1, project_name="Roof", project_status="won"),
+    ])
+    session.flush()
+    session.add_all([
+        Interaction(id=1, tenant_id=1, client_id=1, project_id=1, contact_date=datetime(2026, 3, 1, 9, 30),
+                    followup_status=FollowUpStatus.completed),
+        ActivityLog(id=1, tenant_id=1, user_id=2, action=ActivityType.viewed, entity_type="client", entity_id=1,
+                    timestamp=datetime(2026, 3, 2)),
+    ])
+    session.commit()
+    session.close()
+    yield engine
+    engine.dispose()
+
+
+def _tenant_rows(session, tenant_id):
+    client = session.scalars(select(Client).where(Client.tenant_id == tenant_id)).one()
+    return {
+        "client": client,
+        "lead": session.scalars(select(Lead).where(Lead.tenant_id == tenant_id)).one(),
+        "project": session.scalars(select(Project).where(Project.tenant_id == tenant_id)).one(),
+        "interaction": session.scalars(select(Interaction).where(Interaction.tenant_id == tenant_id)).one(),
+        "activity": session.scalars(select(ActivityLog).where(ActivityLog.tenant_id == tenant_id)).one(),
+    }
+
+
+def test_restore_replaces_tenant_rows_and_remaps_ids(engine, tmp_path):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    description = export_tenant(engine, 1, str(snapshot))
+    assert description["tables"]["clients"]["rows"] == 1
+    assert description["tables"]["interactions"]["rows"] == 1
+
+    session = sessionmaker(bind=engine)()
+    session.get(Client, 1).name = "Renamed by mistake"
+    session.add(Lead(tenant_id=1, created_by=1, name="Created after the snapshot"))
+    session.commit()
+
+    counts = load_tenant(session, 1, str(snapshot))
+    session.commit()
+    assert counts["clients"] == 1 and counts["activity_logs"] == 1
+
+    rows = _tenant_rows(session, 1)
+    assert rows["client"].name == "Roofing" and rows["client"].id != 1
+    assert rows["client"].source_lead_id == rows["lead"].id
+    assert (rows["client"].created_by, rows["client"].assigned_to) == (1, 2)
+    assert rows["project"].client_id == rows["client"].id
+    assert rows["interaction"].project_id == rows["project"].id
+    assert rows["interaction"].contact_date == datetime(2026, 3, 1, 9, 30)
+    assert rows["interaction"].followup_status == FollowUpStatus.completed
+    assert rows["activity"].entity_id == rows["client"].id
+    touched = session.scalars(select(RecentlyTouched).where(RecentlyTouched.tenant_id == 1)).one()
+    assert (touched.entity_type, touched.entity_id) == ("client", rows["client"].id)
+
+    # Other tenants are untouched
+    assert session.get(Client, 2).name == "Other tenant"
+    session.close()
+
+
+def test_load_into_another_tenant_maps_users_by_email(engine, tmp_path):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    export_tenant(engine, 1, str(snapshot))
+
+    session = sessionmaker(bind=engine)()
+    # Account numbers are unique across tenants
+    session.delete(session.get(Account, 1))
+    session.commit()
+    with pytest.raises(ValueError, match="cannot map"):
+        load_tenant(session, 2, str(snapshot))
+    session.rollback()
+
+    load_tenant(session, 2, str(snapshot), fallback_user_id=3)
+    session.commit()
+
+    rows = _tenant_rows(session, 2)
+    # Tenant 2 has neither acme user: required columns fall back, optional ones clear
+    assert (rows["client"].created_by, rows["client"].assigned_to) == (3, None)
+    assert rows["activity"].user_id == 3
+    assert len(session.scalars(select(Client).where(Client.tenant_id == 1)).all()) == 1
+    session.close()
+
+
+def test_restore_does_not_double_count_rolled_up_activity(engine, tmp_path):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    export_tenant(engine, 1, str(snapshot))
+
+    session = sessionmaker(bind=engine)()
+    # Older history the snapshot no longer holds raw rows for
+    session.add(ActivityDailyRollup(tenant_id=1, user_id=2, day=date(2026, 1, 15), entity_type="client",
+                                    action="viewed", event_count=4))
+    # Retention rolls up the snapshot's activity after the export
+    assert roll_up(session, None, datetime(2026, 4, 1)) == 1
+    session.query(ActivityLog).delete()
+    session.commit()
+
+    load_tenant(session, 1, str(snapshot))
+    session.commit()
+
+    rollups = session.scalars(select(ActivityDailyRollup).where(ActivityDailyRollup.tenant_id == 1)).all()
+    assert [(r.day, r.event_count) for r in rollups] == [(date(2026, 1, 15), 4)]
+    assert _tenant_rows(session, 1)["activity"].timestamp == datetime(2026, 3, 2)
+    session.close()
+
+
+class DictStorage:
+    """Just enough of BackupStorageBackend for the tenant jobs."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_stream(self, stream, object_key, before_complete=None, progress=None):
+        data = stream.read()
+        if before_complete:
+            before_complete()
+        self.objects[object_key] = data
+        return {"size": len(data), "checksum": hashlib.sha256(data).hexdigest()}
+
+    def open_stream(self, object_key):
+        return io.BytesIO(self.objects[object_key])
+
+
+def test_tenant_snapshot_job_round_trip(engine, monkeypatch):
+    Session = sessionmaker(bind=engine)
+    storage = DictStorage()
+    monkeypatch.setattr(tenant_backup_jobs, "SessionLocal", Session)
+    monkeypatch.setattr(tenant_backup_jobs, "BACKUP_GPG_PASSPHRASE", "correct horse battery staple")
+    monkeypatch.setattr(tenant_backup_jobs, "get_backup_storage", lambda: storage)
+
+    session = Session()
+    session.add(Backup(id=1, filename="pending", backup_type="tenant", dump_format="tenant", tenant_id=1))
+    session.commit()
+    tenant_backup_jobs.run_tenant_backup_job(1)
+    assert session.get(Backup, 1).status == "completed"
+
+    session.get(Client, 1).name = "Renamed by mistake"
+    session.add(Backup(id=2, filename="pending", backup_type="pre_restore", dump_format="tenant", tenant_id=1))
+    session.add(BackupRestore(id=1, backup_id=1, restored_by=1, pre_restore_backup_id=2, status="pending"))
+    session.commit()
+    tenant_backup_jobs.run_tenant_restore_job(1)
+
+    session.expire_all()
+    assert session.get(BackupRestore, 1).status == "completed"
+    assert session.get(Backup, 2).status == "completed"
+    assert len(storage.objects) == 2
+    assert _tenant_rows(session, 1)["client"].name == "Roofing"
+    session.close()